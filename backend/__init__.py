@@ -1,35 +1,52 @@
 """
 Backend Package - Flask Application Factory
 """
+import importlib
 import os
 import logging
+
+# Created first so PROFILE_STARTUP=1 can time every import below
+from .startup_profiler import StartupProfiler, profile_startup_command
+startup_profiler = StartupProfiler.from_env()
+
 from flask import Flask
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Import extensions
 from .extensions import db, migrate, cors
+from .services.session_store import ServerSideSessionInterface, install_user_write_through
+from .digest_commands import digest_command
 
 def create_app(config_name=None):
     """
     Application factory pattern for Flask app creation
     """
+    profiler = startup_profiler
+    profiler.begin()
+    
     # Create Flask app with template and static folders relative to project root
-    app = Flask(__name__, 
-                template_folder='../templates',
-                static_folder='../static')
+    with profiler.phase('flask_app'):
+        app = Flask(__name__, 
+                    template_folder='../templates',
+                    static_folder='../static')
     
     # Configure the app
-    configure_app(app, config_name)
+    with profiler.phase('configure_app'):
+        configure_app(app, config_name)
     
     # Initialize extensions
-    initialize_extensions(app)
+    initialize_extensions(app, profiler)
     
     # Register blueprints
-    register_blueprints(app)
+    register_blueprints(app, profiler)
     
     # Configure logging
-    configure_logging(app)
+    with profiler.phase('configure_logging'):
+        configure_logging(app)
     
+    app.cli.add_command(profile_startup_command)
+    app.cli.add_command(digest_command)
+    profiler.finish(app)
     return app
 
 def configure_app(app, config_name=None):
@@ -55,41 +72,57 @@ def configure_app(app, config_name=None):
     else:
         app.config['DEBUG'] = True
         app.config['TESTING'] = False
+    
+    # Server-side sessions caching the user's profile (SESSION_BACKEND=cookie keeps signed cookies)
+    if os.environ.get('SESSION_BACKEND', 'sqlite') != 'cookie':
+        from .services.session_store import session_store
+        app.session_interface = ServerSideSessionInterface(session_store)
 
-def initialize_extensions(app):
+def initialize_extensions(app, profiler=None):
     """Initialize Flask extensions"""
-    db.init_app(app)
-    migrate.init_app(app, db)
-    cors.init_app(app, origins=["*"], supports_credentials=True)
+    profiler = profiler or StartupProfiler()
+    with profiler.phase('extension:sqlalchemy'):
+        db.init_app(app)
+    with profiler.phase('extension:migrate'):
+        migrate.init_app(app, db)
+    with profiler.phase('extension:cors'):
+        cors.init_app(app, origins=["*"], supports_credentials=True)
     
     # Import models to ensure they're registered with Flask-Migrate
-    with app.app_context():
+    with profiler.phase('models'), app.app_context():
         try:
             from .models import User, Contact, Goal, AISuggestion, ContactInteraction, AuthToken
             logging.info("Models imported successfully for Flask-Migrate")
+            
+            if isinstance(app.session_interface, ServerSideSessionInterface):
+                install_user_write_through(app.session_interface.store)
         except Exception as e:
             logging.error(f"Model import error: {e}")
 
-def register_blueprints(app):
+# (module, blueprint, url_prefix) in registration order
+BLUEPRINTS = [
+    ('auth_routes', 'auth_bp', '/api/auth'),
+    ('api_routes', 'api_bp', '/api'),
+    ('contact_routes', 'contact_bp', '/api/contacts'),
+    ('goal_routes', 'goal_bp', '/api/goals'),
+    ('service_routes', 'service_bp', '/api/services'),
+    ('trust_routes', 'trust_bp', '/api/trust'),
+    ('journal_routes', 'journal_bp', '/api/journal'),
+    ('intelligence_routes', 'intelligence_bp', None),  # Already has /api/intelligence prefix
+    ('core_routes', 'core_bp', None),  # Core routes (/, /health, etc.)
+]
+
+def register_blueprints(app, profiler=None):
     """Register all application blueprints"""
-    from .routes.auth_routes import auth_bp
-    from .routes.api_routes import api_bp
-    from .routes.contact_routes import contact_bp
-    from .routes.goal_routes import goal_bp
-    from .routes.core_routes import core_bp
-    from .routes.service_routes import service_bp
-    from .routes.intelligence_routes import intelligence_bp
-    from .routes.trust_routes import trust_bp
-    
-    # Register blueprints with URL prefixes
-    app.register_blueprint(auth_bp, url_prefix='/api/auth')
-    app.register_blueprint(api_bp, url_prefix='/api')
-    app.register_blueprint(contact_bp, url_prefix='/api/contacts')
-    app.register_blueprint(goal_bp, url_prefix='/api/goals')
-    app.register_blueprint(service_bp, url_prefix='/api/services')
-    app.register_blueprint(trust_bp, url_prefix='/api/trust')
-    app.register_blueprint(intelligence_bp)  # Already has /api/intelligence prefix
-    app.register_blueprint(core_bp)  # Core routes (/, /health, etc.)
+    profiler = profiler or StartupProfiler()
+    for module_name, blueprint_name, url_prefix in BLUEPRINTS:
+        with profiler.phase(f'blueprint:{module_name}'):
+            module = importlib.import_module(f'.routes.{module_name}', __name__)
+            blueprint = getattr(module, blueprint_name)
+            if url_prefix:
+                app.register_blueprint(blueprint, url_prefix=url_prefix)
+            else:
+                app.register_blueprint(blueprint)
 
 def configure_logging(app):
     """Configure application logging"""
@@ -0,0 +1,42 @@
+"""
+Daily digest commands
+Sends every user's daily digest to the destinations they set through
+/api/digest/destinations. Run it once a day from cron (or any scheduler)
+rather than from a thread inside the web workers, so four gunicorn workers
+don't each send the same digests:
+
+    flask --app backend digest run
+    flask --app backend digest run --user <user id>
+"""
+import click
+from flask.cli import AppGroup
+
+from backend.extensions import db
+from services.digest_scheduler import DigestScheduler
+
+digest_command = AppGroup('digest', help='Daily Slack and Telegram digests.')
+
+
+class EngineConnections:
+    """get_connection() over the app's SQLAlchemy engine, for the DB-API style digest loader"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_connection(self):
+        return self.engine.raw_connection()
+
+
+@digest_command.command('run')
+@click.option('--user', 'user_ids', multiple=True, help='Only send to this user (repeatable).')
+def run_digests_command(user_ids):
+    """Send today's digests and print how many went out."""
+    scheduler = DigestScheduler(EngineConnections(db.engine))
+    if not scheduler.is_configured():
+        raise click.ClickException('No digest channel is configured (set TELEGRAM_BOT_TOKEN for Telegram).')
+    
+    stats = scheduler.run_once(list(user_ids) or None)
+    click.echo(f"Digests for {stats['users']} users: {stats['sent']} sent, {stats['failed']} failed "
+               f"in {stats['seconds']}s")
+    if stats['failed']:
+        raise click.exceptions.Exit(1)
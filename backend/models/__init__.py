@@ -6,7 +6,7 @@ from datetime import datetime
 from sqlalchemy import Column, String, Text, DateTime, Integer, Float, Boolean, ForeignKey, JSON
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from .extensions import db
+from ..extensions import db
 
 
 class User(db.Model):
@@ -273,8 +273,8 @@ class AuthToken(db.Model):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     email = Column(String(255), nullable=False)
-    token = Column(String(255), nullable=False, unique=True)
-    expires = Column(DateTime, nullable=False)
+    token = Column(String(255), nullable=False, unique=True)  # SHA-256 of the issued token
+    expires = Column(DateTime, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     used_at = Column(DateTime)
     
@@ -295,6 +295,23 @@ class AuthToken(db.Model):
         }
 
 
+class DigestDestination(db.Model):
+    """Where a user's daily digest is delivered: a Slack webhook URL or a Telegram chat id"""
+    __tablename__ = 'digest_destinations'
+    
+    user_id = Column(String, ForeignKey('users.id'), primary_key=True)
+    channel = Column(String(20), primary_key=True)  # slack, telegram
+    destination = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'channel': self.channel,
+            'destination': self.destination,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
 class JournalEntry(db.Model):
     """Journal entries for reflection and insights"""
     __tablename__ = 'journal_entries'
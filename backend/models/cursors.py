@@ -0,0 +1,60 @@
+"""
+Keyset Cursors
+Opaque, URL-safe encodings of the sort key of the last row on a page, shared
+by journal listings and journal search. Every field is parsed on the way back
+in, so a malformed or edited cursor is rejected with ValueError instead of
+reaching the database.
+"""
+import base64
+import json
+import math
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for a row's sort key; dates are stored as ISO strings"""
+    payload = [
+        value.isoformat() if hasattr(value, 'isoformat')
+        else value if isinstance(value, (int, float)) else str(value)
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str], *parsers: Callable[[Any], Any],
+                  name: str = 'page') -> Optional[Tuple]:
+    """
+    Return the sort key from a cursor made by encode_cursor, or None for the
+    first page. parsers validate and convert each field in order.
+    """
+    if not cursor:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("wrong number of fields")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid {name} cursor")
+
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def parse_uuid(value: str) -> str:
+    return str(uuid.UUID(value))
+
+
+def parse_rank(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError("rank must be a finite number")
+    return float(value)
+
+
+def parse_id(value) -> str:
+    if not isinstance(value, str) or not value:
+        raise ValueError("id must be a non-empty string")
+    return value
@@ -6,6 +6,13 @@ from datetime import datetime
 from typing import Optional
 import uuid
 
+from backend.models.cursors import decode_cursor, encode_cursor, parse_timestamp, parse_uuid
+from backend.models.journal_rollups import JournalRollups
+from backend.models.journal_search import JournalSearch
+
+LIST_PREVIEW_CHARS = 280
+
+
 class JournalEntry:
     """Model for journal entries with AI reflection capabilities"""
     
@@ -41,6 +48,7 @@ class JournalEntry:
         
         CREATE INDEX IF NOT EXISTS idx_journal_entries_user_id ON journal_entries(user_id);
         CREATE INDEX IF NOT EXISTS idx_journal_entries_created_at ON journal_entries(created_at);
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_user_page ON journal_entries(user_id, created_at DESC, id DESC);
         CREATE INDEX IF NOT EXISTS idx_journal_entries_type ON journal_entries(entry_type);
         CREATE INDEX IF NOT EXISTS idx_journal_entries_related_contact ON journal_entries(related_contact_id);
         CREATE INDEX IF NOT EXISTS idx_journal_entries_related_goal ON journal_entries(related_goal_id);
@@ -73,7 +81,7 @@ class JournalEntry:
         );
         
         CREATE INDEX IF NOT EXISTS idx_journal_reflections_entry_id ON journal_reflections(journal_entry_id);
-        """
+        """ + JournalRollups.get_schema() + JournalSearch.get_schema()
     
     def create_entry(self, user_id: str, title: str, content: str, 
                      entry_type: str = 'reflection', related_contact_id: Optional[str] = None,
@@ -96,6 +104,8 @@ class JournalEntry:
             """, (entry_id, user_id, title, content, entry_type, 
                   related_contact_id, related_goal_id, mood_score, energy_level, tags))
             
+            JournalRollups.record_entry(cursor, user_id, entry_type, related_contact_id, mood_score, energy_level)
+            
             self.db.commit()
             return entry_id
             
@@ -131,6 +141,92 @@ class JournalEntry:
         except Exception as e:
             raise Exception(f"Failed to get journal entries: {str(e)}")
     
+    def get_entries_page(self, user_id: str, limit: int = 20, cursor: Optional[str] = None,
+                         include_content: bool = True) -> dict:
+        """
+        Get one page of a user's journal entries, newest first, continuing after
+        an opaque (created_at, id) cursor. Cost does not grow with page depth.
+        With include_content=False only a short preview of each entry is read.
+        """
+        if not self.db:
+            raise Exception("Database connection required")
+        
+        after = decode_cursor(cursor, parse_timestamp, parse_uuid)
+        
+        try:
+            body_columns = ("je.content, je.ai_reflection" if include_content
+                            else f"LEFT(je.content, {LIST_PREVIEW_CHARS}), je.ai_reflection IS NOT NULL")
+            keyset = ""
+            params = [user_id]
+            if after:
+                keyset = "AND (je.created_at, je.id) < (%s::timestamptz, %s::uuid)"
+                params.extend(after)
+            params.append(limit + 1)
+            
+            db_cursor = self.db.cursor()
+            db_cursor.execute(f"""
+                SELECT 
+                    je.id, je.title, {body_columns}, je.entry_type, je.mood_score, 
+                    je.energy_level, je.tags, je.created_at,
+                    je.related_contact_id, je.related_goal_id
+                FROM journal_entries je
+                WHERE je.user_id = %s {keyset}
+                ORDER BY je.created_at DESC, je.id DESC
+                LIMIT %s
+            """, params)
+            rows = db_cursor.fetchall()
+            
+            page = rows[:limit]
+            contact_names, goal_titles = self._load_related_names(page)
+            
+            entries = []
+            for row in page:
+                entry = {
+                    "id": str(row[0]),
+                    "title": row[1],
+                    "entry_type": row[4],
+                    "mood_score": row[5],
+                    "energy_level": row[6],
+                    "tags": row[7] or [],
+                    "created_at": row[8].isoformat() if row[8] else None,
+                    "related_contact_id": row[9],
+                    "related_goal_id": row[10],
+                    "contact_name": contact_names.get(str(row[9])) if row[9] else None,
+                    "goal_title": goal_titles.get(str(row[10])) if row[10] else None
+                }
+                if include_content:
+                    entry["content"] = row[2]
+                    entry["ai_reflection"] = row[3]
+                else:
+                    entry["content_preview"] = row[2]
+                    entry["has_ai_reflection"] = bool(row[3])
+                entries.append(entry)
+            
+            next_cursor = None
+            if len(rows) > limit and page:
+                next_cursor = encode_cursor(page[-1][8], page[-1][0])
+            
+            return {'entries': entries, 'next_cursor': next_cursor}
+            
+        except Exception as e:
+            raise Exception(f"Failed to get journal entries: {str(e)}")
+    
+    def _load_related_names(self, rows) -> tuple:
+        """Fetch contact names and goal titles for a page of entries with one query each"""
+        contact_ids = tuple({str(row[9]) for row in rows if row[9]})
+        goal_ids = tuple({str(row[10]) for row in rows if row[10]})
+        contact_names, goal_titles = {}, {}
+        
+        cursor = self.db.cursor()
+        if contact_ids:
+            cursor.execute("SELECT id, name FROM contacts WHERE id IN %s", (contact_ids,))
+            contact_names = {str(row[0]): row[1] for row in cursor.fetchall()}
+        if goal_ids:
+            cursor.execute("SELECT id, title FROM goals WHERE id IN %s", (goal_ids,))
+            goal_titles = {str(row[0]): row[1] for row in cursor.fetchall()}
+        
+        return contact_names, goal_titles
+    
     def get_entry_by_id(self, entry_id: str, user_id: str) -> dict:
         """Get a specific journal entry by ID"""
         if not self.db:
@@ -217,46 +313,10 @@ class JournalEntry:
             raise Exception(f"Failed to create reflection session: {str(e)}")
     
     def get_weekly_insights(self, user_id: str) -> dict:
-        """Get weekly insights from journal entries"""
-        if not self.db:
-            raise Exception("Database connection required")
+        """Get weekly insights from the journal rollups"""
+        analytics = JournalRollups(self.db).get_analytics(user_id)
         
-        try:
-            cursor = self.db.cursor()
-            
-            # Get entries from the last 7 days
-            cursor.execute("""
-                SELECT 
-                    COUNT(*) as entry_count,
-                    AVG(mood_score) as avg_mood,
-                    AVG(energy_level) as avg_energy,
-                    STRING_AGG(DISTINCT entry_type, ', ') as entry_types,
-                    COUNT(DISTINCT related_contact_id) as contacts_mentioned
-                FROM journal_entries
-                WHERE user_id = %s 
-                AND created_at >= CURRENT_DATE - INTERVAL '7 days'
-            """, (user_id,))
-            
-            weekly_stats = cursor.fetchone()
-            
-            # Get most mentioned contacts
-            cursor.execute("""
-                SELECT c.name, COUNT(*) as mention_count
-                FROM journal_entries je
-                JOIN contacts c ON je.related_contact_id = c.id
-                WHERE je.user_id = %s 
-                AND je.created_at >= CURRENT_DATE - INTERVAL '7 days'
-                GROUP BY c.id, c.name
-                ORDER BY mention_count DESC
-                LIMIT 5
-            """, (user_id,))
-            
-            top_contacts = cursor.fetchall()
-            
-            return {
-                'weekly_stats': weekly_stats,
-                'top_contacts': top_contacts
-            }
-            
-        except Exception as e:
-            raise Exception(f"Failed to get weekly insights: {str(e)}")
\ No newline at end of file
+        return {
+            'weekly_stats': analytics['weekly_stats'],
+            'top_contacts': analytics['top_contacts']
+        }
@@ -0,0 +1,232 @@
+"""
+Journal Rollups
+Per-user daily journal aggregates maintained on write, so journal dashboards
+read a few dozen rollup rows instead of scanning journal_entries. Users whose
+entries predate the rollups are backfilled on their first analytics read.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+ANALYTICS_WINDOW_DAYS = 30
+WEEKLY_WINDOW_DAYS = 7
+
+
+def build_journal_views(rows: Iterable[tuple], today: date) -> Dict[str, Any]:
+    """
+    Fold daily rollup rows (day, entry_type, entry_count, mood_sum, mood_count,
+    energy_sum, energy_count) into the weekly stats and 30-day series in one pass.
+    today must come from the same clock that stamped the rows (the database's
+    CURRENT_DATE), or the weekly window drifts around midnight.
+    """
+    week_start = today - timedelta(days=WEEKLY_WINDOW_DAYS)
+    days: Dict[date, list] = {}
+    week = [0, 0, 0, 0, 0]  # entries, mood sum, mood count, energy sum, energy count
+    week_types = set()
+
+    for day, entry_type, entry_count, mood_sum, mood_count, energy_sum, energy_count in rows:
+        totals = days.setdefault(day, [0, 0, 0, 0, 0])
+        for i, value in enumerate((entry_count, mood_sum, mood_count, energy_sum, energy_count)):
+            totals[i] += value or 0
+            if day >= week_start:
+                week[i] += value or 0
+        if day >= week_start and entry_count:
+            week_types.add(entry_type)
+
+    daily_entries = []
+    mood_trends = []
+    for day in sorted(days):
+        entry_count, mood_sum, mood_count, energy_sum, energy_count = days[day]
+        daily_entries.append({"day": day.isoformat(), "count": entry_count})
+        if mood_count or energy_count:
+            mood_trends.append({
+                "day": day.isoformat(),
+                "mood": mood_sum / mood_count if mood_count else None,
+                "energy": energy_sum / energy_count if energy_count else None
+            })
+
+    return {
+        'weekly_stats': (
+            week[0],
+            week[1] / week[2] if week[2] else None,
+            week[3] / week[4] if week[4] else None,
+            ', '.join(sorted(week_types)) or None,
+        ),
+        'daily_entries': daily_entries,
+        'mood_trends': mood_trends
+    }
+
+
+class JournalRollups:
+    """Daily per-user journal aggregates, updated in the same transaction as the entry"""
+
+    def __init__(self, db_connection=None):
+        self.db = db_connection
+
+    @staticmethod
+    def get_schema():
+        """Get the database schema for journal rollups"""
+        return """
+        CREATE TABLE IF NOT EXISTS journal_daily_rollups (
+            user_id UUID NOT NULL,
+            day DATE NOT NULL,
+            entry_type VARCHAR(50) NOT NULL,
+            entry_count INTEGER NOT NULL DEFAULT 0,
+            mood_sum INTEGER NOT NULL DEFAULT 0,
+            mood_count INTEGER NOT NULL DEFAULT 0,
+            energy_sum INTEGER NOT NULL DEFAULT 0,
+            energy_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, entry_type)
+        );
+
+        CREATE TABLE IF NOT EXISTS journal_contact_mentions_daily (
+            user_id UUID NOT NULL,
+            day DATE NOT NULL,
+            contact_id UUID NOT NULL,
+            mention_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, contact_id)
+        );
+
+        -- Users whose rollups have been rebuilt from their existing entries
+        CREATE TABLE IF NOT EXISTS journal_rollup_backfills (
+            user_id UUID PRIMARY KEY,
+            rebuilt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+
+    @staticmethod
+    def record_entry(cursor, user_id: str, entry_type: str, related_contact_id: Optional[str] = None,
+                     mood_score: Optional[int] = None, energy_level: Optional[int] = None):
+        """Add one new entry to today's rollups; runs on the caller's cursor and transaction"""
+        cursor.execute("""
+            INSERT INTO journal_daily_rollups
+            (user_id, day, entry_type, entry_count, mood_sum, mood_count, energy_sum, energy_count)
+            VALUES (%s, CURRENT_DATE, %s, 1, %s, %s, %s, %s)
+            ON CONFLICT (user_id, day, entry_type) DO UPDATE SET
+                entry_count = journal_daily_rollups.entry_count + 1,
+                mood_sum = journal_daily_rollups.mood_sum + EXCLUDED.mood_sum,
+                mood_count = journal_daily_rollups.mood_count + EXCLUDED.mood_count,
+                energy_sum = journal_daily_rollups.energy_sum + EXCLUDED.energy_sum,
+                energy_count = journal_daily_rollups.energy_count + EXCLUDED.energy_count
+        """, (user_id, entry_type, mood_score or 0, 1 if mood_score is not None else 0,
+              energy_level or 0, 1 if energy_level is not None else 0))
+
+        if related_contact_id:
+            cursor.execute("""
+                INSERT INTO journal_contact_mentions_daily (user_id, day, contact_id, mention_count)
+                VALUES (%s, CURRENT_DATE, %s, 1)
+                ON CONFLICT (user_id, day, contact_id) DO UPDATE SET
+                    mention_count = journal_contact_mentions_daily.mention_count + 1
+            """, (user_id, related_contact_id))
+
+    def rebuild(self, user_id: str):
+        """Recompute a user's rollups from journal_entries (backfill or repair)"""
+        if not self.db:
+            raise Exception("Database connection required")
+
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("""
+                INSERT INTO journal_rollup_backfills (user_id) VALUES (%s)
+                ON CONFLICT (user_id) DO UPDATE SET rebuilt_at = CURRENT_TIMESTAMP
+            """, (user_id,))
+            self._rebuild(cursor, user_id)
+            self.db.commit()
+
+        except Exception as e:
+            if self.db:
+                self.db.rollback()
+            raise Exception(f"Failed to rebuild journal rollups: {str(e)}")
+
+    def ensure_backfilled(self, user_id: str) -> bool:
+        """
+        Rebuild a user's rollups once if they have never been built from their
+        entries. The marker row is claimed in the rebuilding transaction, so
+        concurrent first reads wait for a single rebuild instead of racing.
+        Returns True when this call did the rebuild.
+        """
+        if not self.db:
+            raise Exception("Database connection required")
+
+        try:
+            cursor = self.db.cursor()
+            cursor.execute("SELECT 1 FROM journal_rollup_backfills WHERE user_id = %s", (user_id,))
+            if cursor.fetchone():
+                return False
+
+            cursor.execute("""
+                INSERT INTO journal_rollup_backfills (user_id) VALUES (%s)
+                ON CONFLICT (user_id) DO NOTHING
+            """, (user_id,))
+            claimed = cursor.rowcount > 0
+            if claimed:
+                self._rebuild(cursor, user_id)
+            self.db.commit()
+            return claimed
+
+        except Exception as e:
+            if self.db:
+                self.db.rollback()
+            raise Exception(f"Failed to backfill journal rollups: {str(e)}")
+
+    @staticmethod
+    def _rebuild(cursor, user_id: str):
+        cursor.execute("DELETE FROM journal_daily_rollups WHERE user_id = %s", (user_id,))
+        cursor.execute("DELETE FROM journal_contact_mentions_daily WHERE user_id = %s", (user_id,))
+        cursor.execute("""
+            INSERT INTO journal_daily_rollups
+            (user_id, day, entry_type, entry_count, mood_sum, mood_count, energy_sum, energy_count)
+            SELECT user_id, created_at::date, entry_type, COUNT(*),
+                   COALESCE(SUM(mood_score), 0), COUNT(mood_score),
+                   COALESCE(SUM(energy_level), 0), COUNT(energy_level)
+            FROM journal_entries
+            WHERE user_id = %s
+            GROUP BY user_id, created_at::date, entry_type
+        """, (user_id,))
+        cursor.execute("""
+            INSERT INTO journal_contact_mentions_daily (user_id, day, contact_id, mention_count)
+            SELECT user_id, created_at::date, related_contact_id, COUNT(*)
+            FROM journal_entries
+            WHERE user_id = %s AND related_contact_id IS NOT NULL
+            GROUP BY user_id, created_at::date, related_contact_id
+        """, (user_id,))
+
+    def get_analytics(self, user_id: str, days: int = ANALYTICS_WINDOW_DAYS) -> Dict[str, Any]:
+        """Weekly insights plus daily entry counts and mood/energy trends, from rollups only"""
+        if not self.db:
+            raise Exception("Database connection required")
+
+        self.ensure_backfilled(user_id)
+
+        try:
+            cursor = self.db.cursor()
+            # The rollups are stamped with the database's CURRENT_DATE, so the
+            # windows are measured from it too
+            cursor.execute("SELECT CURRENT_DATE")
+            today = cursor.fetchone()[0]
+
+            cursor.execute("""
+                SELECT day, entry_type, entry_count, mood_sum, mood_count, energy_sum, energy_count
+                FROM journal_daily_rollups
+                WHERE user_id = %s AND day >= %s
+            """, (user_id, today - timedelta(days=days)))
+            views = build_journal_views(cursor.fetchall(), today)
+
+            cursor.execute("""
+                SELECT c.name, m.mention_count
+                FROM (
+                    SELECT contact_id, SUM(mention_count) AS mention_count
+                    FROM journal_contact_mentions_daily
+                    WHERE user_id = %s AND day >= %s
+                    GROUP BY contact_id
+                ) m
+                JOIN contacts c ON m.contact_id = c.id
+                ORDER BY m.mention_count DESC
+            """, (user_id, today - timedelta(days=WEEKLY_WINDOW_DAYS)))
+            mentions = cursor.fetchall()
+
+            views['weekly_stats'] = views['weekly_stats'] + (len(mentions),)
+            views['top_contacts'] = mentions[:5]
+            return views
+
+        except Exception as e:
+            raise Exception(f"Failed to get journal analytics: {str(e)}")
@@ -0,0 +1,249 @@
+"""
+Journal Search
+Ranked, highlighted full-text search over journal titles, content, tags and AI
+reflections. Postgres uses weighted tsvector columns with GIN indexes; SQLite
+(local runs) uses an FTS5 table kept in sync by triggers.
+"""
+import re
+import sqlite3
+from typing import Any, Dict, Optional
+
+from backend.models.cursors import decode_cursor, encode_cursor, parse_id, parse_rank
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+REFLECTION_RANK_WEIGHT = 0.5
+
+HIGHLIGHT_OPTIONS = 'StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=24, MinWords=8'
+
+
+def fts5_query(query: str) -> str:
+    """Turn free text into an FTS5 AND query of quoted terms, immune to FTS syntax"""
+    return ' '.join(f'"{term}"' for term in re.findall(r'\w+', query or ''))
+
+
+class JournalSearch:
+    """Full-text search over a user's journal"""
+
+    def __init__(self, db_connection=None):
+        self.db = db_connection
+        self.is_sqlite = isinstance(db_connection, sqlite3.Connection)
+
+    @staticmethod
+    def get_schema():
+        """Get the Postgres search schema for journal entries and reflections"""
+        return """
+        ALTER TABLE journal_entries ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+        CREATE OR REPLACE FUNCTION journal_entries_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector :=
+                setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(array_to_string(NEW.tags, ' '), '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(NEW.content, '')), 'C');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+
+        DROP TRIGGER IF EXISTS trg_journal_entries_search_vector ON journal_entries;
+        CREATE TRIGGER trg_journal_entries_search_vector
+            BEFORE INSERT OR UPDATE OF title, content, tags ON journal_entries
+            FOR EACH ROW EXECUTE FUNCTION journal_entries_search_vector();
+
+        -- Backfill rows written before the trigger existed
+        UPDATE journal_entries SET title = title WHERE search_vector IS NULL;
+
+        CREATE INDEX IF NOT EXISTS idx_journal_entries_search ON journal_entries USING GIN (search_vector);
+
+        ALTER TABLE journal_reflections ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', coalesce(ai_response, ''))) STORED;
+
+        CREATE INDEX IF NOT EXISTS idx_journal_reflections_search ON journal_reflections USING GIN (search_vector);
+        """
+
+    def ensure_schema(self):
+        """Create the search index for this connection's database"""
+        if not self.db:
+            raise Exception("Database connection required")
+
+        try:
+            if self.is_sqlite:
+                self.db.executescript(self._sqlite_schema())
+            else:
+                self.db.cursor().execute(self.get_schema())
+            self.db.commit()
+
+        except Exception as e:
+            if self.db:
+                self.db.rollback()
+            raise Exception(f"Failed to create journal search index: {str(e)}")
+
+    def _sqlite_schema(self) -> str:
+        entry_columns = {row[1] for row in self.db.execute("PRAGMA table_info(journal_entries)")}
+        tags = "coalesce(new.tags, '')" if 'tags' in entry_columns else "''"
+        backfill_tags = "coalesce(je.tags, '')" if 'tags' in entry_columns else "''"
+        has_reflections = self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'journal_reflections'"
+        ).fetchone() is not None
+        reflections = (
+            "(SELECT group_concat(ai_response, ' ') FROM journal_reflections WHERE journal_entry_id = je.id)"
+            if has_reflections else "''"
+        )
+
+        # The FTS rowid mirrors journal_entries.rowid so triggers update in place
+        schema = f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS journal_search_fts USING fts5(
+                entry_id UNINDEXED, user_id UNINDEXED, title, content, tags, reflections,
+                tokenize = 'porter unicode61'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS journal_search_entry_insert AFTER INSERT ON journal_entries BEGIN
+                INSERT INTO journal_search_fts (rowid, entry_id, user_id, title, content, tags, reflections)
+                VALUES (new.rowid, new.id, new.user_id, coalesce(new.title, ''), new.content, {tags}, '');
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS journal_search_entry_update AFTER UPDATE OF title, content ON journal_entries BEGIN
+                UPDATE journal_search_fts SET title = coalesce(new.title, ''), content = new.content
+                WHERE rowid = new.rowid;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS journal_search_entry_delete AFTER DELETE ON journal_entries BEGIN
+                DELETE FROM journal_search_fts WHERE rowid = old.rowid;
+            END;
+
+            INSERT INTO journal_search_fts (rowid, entry_id, user_id, title, content, tags, reflections)
+            SELECT je.rowid, je.id, je.user_id, coalesce(je.title, ''), je.content, {backfill_tags},
+                   coalesce({reflections}, '')
+            FROM journal_entries je
+            WHERE je.rowid NOT IN (SELECT rowid FROM journal_search_fts);
+        """
+        if has_reflections:
+            schema += """
+            CREATE TRIGGER IF NOT EXISTS journal_search_reflection_insert AFTER INSERT ON journal_reflections BEGIN
+                UPDATE journal_search_fts SET reflections = reflections || ' ' || coalesce(new.ai_response, '')
+                WHERE rowid = (SELECT rowid FROM journal_entries WHERE id = new.journal_entry_id);
+            END;
+            """
+        return schema
+
+    def search(self, user_id: str, query: str, limit: int = DEFAULT_SEARCH_LIMIT,
+               cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search a user's journal. Results are ordered best match first and
+        paginated by an opaque (rank, id) cursor returned as next_cursor.
+        """
+        if not self.db:
+            raise Exception("Database connection required")
+
+        limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT))
+        after = decode_cursor(cursor, parse_rank, parse_id, name='search')
+
+        try:
+            if self.is_sqlite:
+                rows = self._search_sqlite(user_id, query, limit + 1, after)
+            else:
+                rows = self._search_postgres(user_id, query, limit + 1, after)
+
+        except Exception as e:
+            raise Exception(f"Failed to search journal entries: {str(e)}")
+
+        results = [{
+            "id": row[0],
+            "title": row[1],
+            "entry_type": row[2],
+            "created_at": row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
+            "rank": row[4],
+            "title_highlight": row[5],
+            "content_highlight": row[6],
+            # Only surface a reflection excerpt when the match was in a reflection
+            "reflection_highlight": row[7] if row[7] and '<mark>' in row[7] else None
+        } for row in rows[:limit]]
+
+        next_cursor = None
+        if len(rows) > limit:
+            last = results[-1]
+            next_cursor = encode_cursor(last['rank'], last['id'])
+
+        return {'results': results, 'next_cursor': next_cursor}
+
+    def _search_postgres(self, user_id, query, limit, after):
+        keyset = ""
+        params = [query, user_id, user_id, REFLECTION_RANK_WEIGHT]
+        if after:
+            keyset = "WHERE (rank, id) < (%s, %s)"
+            params.extend(after)
+        params.append(limit)
+
+        cursor = self.db.cursor()
+        cursor.execute(f"""
+            WITH q AS (
+                SELECT websearch_to_tsquery('english', %s) AS query
+            ),
+            candidates AS (
+                SELECT je.id FROM journal_entries je, q
+                WHERE je.user_id = %s AND je.search_vector @@ q.query
+                UNION
+                SELECT jr.journal_entry_id FROM journal_reflections jr
+                JOIN journal_entries je ON je.id = jr.journal_entry_id, q
+                WHERE je.user_id = %s AND jr.search_vector @@ q.query
+            ),
+            ranked AS (
+                SELECT je.id::text AS id, je.title, je.content, je.entry_type, je.created_at,
+                       (ts_rank_cd(coalesce(je.search_vector, ''), q.query) + %s * coalesce((
+                           SELECT MAX(ts_rank_cd(jr.search_vector, q.query)) FROM journal_reflections jr
+                           WHERE jr.journal_entry_id = je.id AND jr.search_vector @@ q.query
+                       ), 0))::float8 AS rank
+                FROM candidates c
+                JOIN journal_entries je ON je.id = c.id, q
+            ),
+            page AS (
+                SELECT * FROM ranked {keyset}
+                ORDER BY rank DESC, id DESC
+                LIMIT %s
+            )
+            SELECT page.id, page.title, page.entry_type, page.created_at, page.rank,
+                   ts_headline('english', coalesce(page.title, ''), q.query, 'StartSel=<mark>, StopSel=</mark>, HighlightAll=true'),
+                   ts_headline('english', page.content, q.query, '{HIGHLIGHT_OPTIONS}'),
+                   rh.reflection_highlight
+            FROM page CROSS JOIN q
+            LEFT JOIN LATERAL (
+                SELECT ts_headline('english', jr.ai_response, q.query, '{HIGHLIGHT_OPTIONS}') AS reflection_highlight
+                FROM journal_reflections jr
+                WHERE jr.journal_entry_id::text = page.id AND jr.search_vector @@ q.query
+                ORDER BY ts_rank_cd(jr.search_vector, q.query) DESC
+                LIMIT 1
+            ) rh ON TRUE
+            ORDER BY page.rank DESC, page.id DESC
+        """, params)
+        return cursor.fetchall()
+
+    def _search_sqlite(self, user_id, query, limit, after):
+        match = fts5_query(query)
+        if not match:
+            return []
+
+        # bm25() is lower-is-better; expose rank as higher-is-better like Postgres
+        keyset = ""
+        params = [REFLECTION_RANK_WEIGHT, match, user_id]
+        if after:
+            keyset = "AND (m.rank < ? OR (m.rank = ? AND m.entry_id < ?))"
+            params.extend([after[0], after[0], after[1]])
+        params.append(limit)
+
+        return self.db.execute(f"""
+            SELECT m.entry_id, je.title, je.entry_type, je.created_at, m.rank,
+                   m.title_highlight, m.content_highlight, m.reflection_highlight
+            FROM (
+                SELECT entry_id,
+                       -bm25(journal_search_fts, 0, 0, 10.0, 1.0, 5.0, ?) AS rank,
+                       highlight(journal_search_fts, 2, '<mark>', '</mark>') AS title_highlight,
+                       snippet(journal_search_fts, 3, '<mark>', '</mark>', '…', 24) AS content_highlight,
+                       snippet(journal_search_fts, 5, '<mark>', '</mark>', '…', 24) AS reflection_highlight
+                FROM journal_search_fts
+                WHERE journal_search_fts MATCH ? AND user_id = ?
+            ) m
+            JOIN journal_entries je ON je.id = m.entry_id
+            WHERE 1 = 1 {keyset}
+            ORDER BY m.rank DESC, m.entry_id DESC
+            LIMIT ?
+        """, params).fetchall()
@@ -3,9 +3,14 @@ API Routes Blueprint
 Main API endpoints for the React frontend
 """
 import logging
-from flask import Blueprint, jsonify, request, session
+from flask import Blueprint, Response, jsonify, request, session, stream_with_context
 from backend import db
-from backend.models import User, Contact, Goal, AISuggestion
+from backend.models import User, Contact, Goal, AISuggestion, DigestDestination
+from backend.services.session_store import get_session_user
+from services.data.network_graph import (
+    DEFAULT_MAX_NODES, MAX_NODES_LIMIT, network_graph_cache, stream_graph_json
+)
+from services.digest_scheduler import validate_destination
 
 api_bp = Blueprint('api', __name__)
 
@@ -79,66 +84,49 @@ def get_ai_suggestions():
         logging.error(f"AI suggestions error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _load_graph_records(user_id):
+    """Column-only loads for the graph engine; no ORM objects for large networks"""
+    contacts = [
+        {'id': row.id, 'name': row.name, 'company': row.company, 'warmth_level': row.warmth_level,
+         'warmth_status': row.warmth_status, 'tags': row.tags, 'introduced_by': row.introduced_by}
+        for row in db.session.query(
+            Contact.id, Contact.name, Contact.company, Contact.warmth_level,
+            Contact.warmth_status, Contact.tags, Contact.introduced_by
+        ).filter(Contact.user_id == user_id)
+    ]
+    goals = [
+        {'id': row.id, 'title': row.title, 'priority_level': row.priority_level}
+        for row in db.session.query(Goal.id, Goal.title, Goal.priority_level).filter(Goal.user_id == user_id)
+    ]
+    suggestions = [
+        {'goal_id': row.goal_id, 'contact_id': row.contact_id, 'confidence': row.confidence}
+        for row in db.session.query(
+            AISuggestion.goal_id, AISuggestion.contact_id, AISuggestion.confidence
+        ).filter(AISuggestion.user_id == user_id, AISuggestion.suggestion_type == 'contact_match')
+    ]
+    return contacts, goals, suggestions
+
 @api_bp.route('/network/graph')
 def get_network_graph():
-    """Get network graph data"""
+    """
+    Get network graph data.
+    Small networks come back whole; large ones as a clustered overview that
+    can be expanded with ?cluster=<cluster id>. Tune with ?max_nodes=.
+    """
     try:
         user_id = session.get('user_id', 'demo_user')
+        max_nodes = min(request.args.get('max_nodes', DEFAULT_MAX_NODES, type=int), MAX_NODES_LIMIT)
+        cluster_id = request.args.get('cluster')
         
-        # Get user's contacts and goals
-        contacts = Contact.query.filter_by(user_id=user_id).limit(50).all()  # Limit for performance
-        goals = Goal.query.filter_by(user_id=user_id).limit(20).all()
-        
-        # Build nodes
-        nodes = [{'id': 'user', 'name': 'You', 'type': 'user'}]
-        
-        for contact in contacts:
-            nodes.append({
-                'id': contact.id,
-                'name': contact.name,
-                'type': 'contact',
-                'company': contact.company,
-                'warmth': contact.warmth_level
-            })
-        
-        for goal in goals:
-            nodes.append({
-                'id': f'goal_{goal.id}',
-                'name': goal.title,
-                'type': 'goal',
-                'priority': goal.priority_level
-            })
-        
-        # Build edges (relationships)
-        edges = []
-        
-        # User to contacts
-        for contact in contacts:
-            strength = 0.8 if contact.warmth_level == 'hot' else 0.6 if contact.warmth_level == 'warm' else 0.4
-            edges.append({
-                'id': f'user_contact_{contact.id}',
-                'source': 'user',
-                'target': contact.id,
-                'type': 'relationship',
-                'strength': strength
-            })
-        
-        # User to goals
-        for goal in goals:
-            edges.append({
-                'id': f'user_goal_{goal.id}',
-                'source': 'user', 
-                'target': f'goal_{goal.id}',
-                'type': 'goal',
-                'strength': 0.9
-            })
-        
-        graph_data = {
-            'nodes': nodes,
-            'edges': edges
-        }
+        graph = network_graph_cache.get(user_id, lambda: _load_graph_records(user_id))
+        if cluster_id:
+            graph_data = graph.cluster_detail(cluster_id, max_nodes)
+            if graph_data is None:
+                return jsonify({'error': 'Cluster not found'}), 404
+        else:
+            graph_data = graph.overview(max_nodes)
         
-        return jsonify(graph_data)
+        return Response(stream_with_context(stream_graph_json(graph_data)), mimetype='application/json')
         
     except Exception as e:
         logging.error(f"Network graph error: {e}")
@@ -152,12 +140,59 @@ def get_current_user():
         if not user_id:
             return jsonify({'error': 'Not authenticated'}), 401
         
-        user = User.query.get(user_id)
+        user = get_session_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify(user.to_dict())
+        return jsonify(user)
         
     except Exception as e:
         logging.error(f"Get current user error: {e}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/digest/destinations')
+def get_digest_destinations():
+    """Where the current user's daily digest is sent"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    destinations = DigestDestination.query.filter_by(user_id=user_id).order_by(DigestDestination.channel).all()
+    return jsonify({'destinations': [destination.to_dict() for destination in destinations]})
+
+@api_bp.route('/digest/destinations/<channel>', methods=['PUT'])
+def set_digest_destination(channel):
+    """Send the current user's daily digest to a Slack webhook or Telegram chat"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    try:
+        destination = validate_destination(channel, (request.get_json(silent=True) or {}).get('destination'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        record = db.session.get(DigestDestination, (user_id, channel))
+        if record is None:
+            record = DigestDestination(user_id=user_id, channel=channel)
+            db.session.add(record)
+        record.destination = destination
+        db.session.commit()
+        return jsonify({'destination': record.to_dict()})
+        
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Set digest destination error: {e}")
+        return jsonify({'error': 'Failed to save digest destination'}), 500
+
+@api_bp.route('/digest/destinations/<channel>', methods=['DELETE'])
+def delete_digest_destination(channel):
+    """Stop sending the current user's daily digest to a channel"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    deleted = DigestDestination.query.filter_by(user_id=user_id, channel=channel).delete()
+    db.session.commit()
+    return jsonify({'deleted': bool(deleted)})
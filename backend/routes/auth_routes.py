@@ -2,10 +2,12 @@
 Authentication routes module
 Magic link authentication with JWT tokens and Resend email integration
 """
+from datetime import datetime
 from flask import Blueprint, request, jsonify, session, redirect
 from backend.extensions import db
 from backend.models import User
 from backend.services.auth_service import AuthService
+from backend.services.session_store import get_session_user, regenerate_session
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 auth_service = AuthService()
@@ -67,14 +69,12 @@ def verify_magic_link():
         # Get or create user
         user = auth_service.get_or_create_user(email)
         
-        # Create session
+        # Create session under a new sid
+        regenerate_session()
         session['user_id'] = user.id
         session['authenticated'] = True
         session['email'] = user.email
         
-        # Cleanup expired tokens
-        auth_service.cleanup_expired_tokens()
-        
         # Check if request expects JSON response
         if request.headers.get('Accept') == 'application/json':
             return jsonify({
@@ -96,18 +96,19 @@ def get_user_profile():
         return jsonify({'error': 'Authentication required'}), 401
     
     try:
-        user = User.query.get(session['user_id'])
+        user = get_session_user()
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        created_at = datetime.fromisoformat(user['created_at']) if user['created_at'] else None
         return jsonify({
-            'user': user.to_dict(),
+            'user': user,
             'profile': {
-                'name': user.email.split('@')[0].title(),
-                'email': user.email,
-                'subscription_tier': user.subscription_tier,
-                'member_since': user.created_at.strftime('%B %Y'),
-                'is_guest': user.is_guest
+                'name': user['email'].split('@')[0].title(),
+                'email': user['email'],
+                'subscription_tier': user['subscription_tier'],
+                'member_since': created_at.strftime('%B %Y') if created_at else None,
+                'is_guest': user['is_guest']
             }
         })
         
@@ -125,13 +126,13 @@ def get_current_user():
     if not user_id:
         return jsonify({'error': 'No user session'}), 401
     
-    user = User.query.get(user_id)
+    user = get_session_user()
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
     return jsonify({
         'success': True,
-        'user': user.to_dict()
+        'user': user
     })
 
 
@@ -155,7 +156,8 @@ def demo_login():
         # Get or create demo user
         user = auth_service.get_or_create_user(demo_email)
         
-        # Create session
+        # Create session under a new sid
+        regenerate_session()
         session['user_id'] = user.id
         session['authenticated'] = True
         session['email'] = user.email
@@ -3,7 +3,6 @@ Contact Routes - Contact management and CSV upload functionality
 """
 import json
 import uuid
-import pandas as pd
 import io
 from datetime import datetime
 from flask import Blueprint, request, jsonify, session
@@ -11,10 +10,28 @@ from backend.models import Contact, ContactInteraction, User
 from backend.extensions import db
 from backend.services.contact_sync_engine import ContactSyncEngine
 from backend.services.contact_intelligence import ContactIntelligence
+from services.ai.context_builder import context_builder
+from services.data.network_graph import network_graph_cache
+from services.data.search_index import search_index
 
 contact_bp = Blueprint('contact', __name__)
 
 
+def _contact_saved(user_id, contact):
+    """Keep the prompt context and search index in step with a contact write"""
+    contact_data = contact.to_dict()
+    context_builder.upsert_contact(user_id, contact_data)
+    search_index.upsert_contact(user_id, contact_data)
+    network_graph_cache.invalidate(user_id)
+
+
+def _contacts_reloaded(user_id):
+    """Drop cached network state after a bulk import or sync"""
+    context_builder.invalidate_user(user_id)
+    search_index.invalidate_user(user_id)
+    network_graph_cache.invalidate(user_id)
+
+
 @contact_bp.route('', methods=['GET'])
 def get_contacts():
     """Get all contacts for the current user"""
@@ -57,6 +74,7 @@ def create_contact():
         
         db.session.add(contact)
         db.session.commit()
+        _contact_saved(user_id, contact)
         
         return jsonify(contact.to_dict()), 201
     except Exception as e:
@@ -103,6 +121,7 @@ def update_contact(contact_id):
                 setattr(contact, field, data[field])
         
         db.session.commit()
+        _contact_saved(user_id, contact)
         return jsonify(contact.to_dict())
     except Exception as e:
         db.session.rollback()
@@ -123,6 +142,9 @@ def delete_contact(contact_id):
         
         db.session.delete(contact)
         db.session.commit()
+        context_builder.remove_contact(user_id, contact_id)
+        search_index.remove_contact(user_id, contact_id)
+        network_graph_cache.invalidate(user_id)
         return jsonify({'message': 'Contact deleted successfully'})
     except Exception as e:
         db.session.rollback()
@@ -148,6 +170,7 @@ def upload_contacts():
             # Process parsed contacts
             sync_engine = ContactSyncEngine()
             result = sync_engine.process_parsed_contacts(user_id, contacts_data)
+            _contacts_reloaded(user_id)
             
             return jsonify(result)
         
@@ -165,6 +188,7 @@ def upload_contacts():
         # Process CSV file
         sync_engine = ContactSyncEngine()
         result = sync_engine.import_csv_file(user_id, file)
+        _contacts_reloaded(user_id)
         
         return jsonify(result)
         
@@ -189,6 +213,7 @@ def sync_contacts(source_type):
         else:
             return jsonify({'error': 'Unsupported sync source'}), 400
         
+        _contacts_reloaded(user_id)
         return jsonify(result)
         
     except Exception as e:
@@ -265,6 +290,7 @@ def add_contact_interaction(contact_id):
         contact.last_interaction = interaction.interaction_date
         
         db.session.commit()
+        context_builder.invalidate_contact(contact_id)
         
         return jsonify(interaction.to_dict()), 201
         
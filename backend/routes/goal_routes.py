@@ -4,6 +4,8 @@ Goal Routes - Goal management and AI matching
 from flask import Blueprint, request, jsonify, session
 from backend.models import Goal
 from backend.extensions import db
+from services.ai.context_builder import context_builder
+from services.data.network_graph import network_graph_cache
 
 goal_bp = Blueprint('goal', __name__)
 
@@ -44,6 +46,8 @@ def create_goal():
         
         db.session.add(goal)
         db.session.commit()
+        context_builder.add_goal(user_id, goal.to_dict())
+        network_graph_cache.invalidate(user_id)
         
         return jsonify(goal.to_dict()), 201
     except Exception as e:
@@ -3,13 +3,28 @@ Intelligence routes - AI-powered relationship insights and chat
 """
 
 from flask import Blueprint, request, jsonify, session
+from sqlalchemy import func
 from backend.models import db, User, Contact, Goal
 from backend.services.contact_intelligence import ContactIntelligence
+from services.ai.context_builder import context_builder
+from services.data.search_index import search_index
 import os
 import logging
 
 intelligence_bp = Blueprint('intelligence', __name__, url_prefix='/api/intelligence')
 
+# Token budget for the network context sent with each chat message
+CHAT_CONTEXT_TOKENS = 600
+
+
+def _load_network_records(user_id):
+    """Load contacts and goals for the context builder (only on a cache miss)"""
+    contacts = [contact.to_dict() for contact in Contact.query.filter_by(user_id=user_id).all()]
+    goals = [goal.to_dict() for goal in Goal.query.filter_by(user_id=user_id, status='active')
+             .order_by(Goal.created_at.desc()).all()]
+    return contacts, goals
+
+
 @intelligence_bp.route('/chat', methods=['POST'])
 def chat():
     """
@@ -27,10 +42,10 @@ def chat():
         
         user_id = session['user_id']
         
-        # Get user context
-        user = User.query.get(user_id)
-        contacts = Contact.query.filter_by(user_id=user_id).all()
-        goals = Goal.query.filter_by(user_id=user_id).all()
+        # Get user context from the cached network summary
+        summary = context_builder.ensure_loaded(user_id, lambda: _load_network_records(user_id))
+        contacts = context_builder.get_contacts(user_id)
+        user_email = session.get('email')
         
         # Check if OpenAI is available
         openai_key = os.environ.get("OPENAI_API_KEY")
@@ -42,12 +57,13 @@ def chat():
                 client = OpenAI(api_key=openai_key)
                 
                 # Build context
-                context = f"""You are a relationship intelligence assistant helping {user.email if user else 'a user'} with their professional network.
+                network_context = context_builder.build_context(
+                    user_id, query=message, token_budget=CHAT_CONTEXT_TOKENS
+                )
+                context = f"""You are a relationship intelligence assistant helping {user_email or 'a user'} with their professional network.
                 
 Current context:
-- They have {len(contacts)} contacts in their network
-- They have {len(goals)} active goals
-- Recent goals: {', '.join([g.title for g in goals[:3]]) if goals else 'None'}
+{network_context}
 
 Provide specific, actionable advice about relationship building and networking strategy.
 Keep response under 200 words and focus on concrete next steps."""
@@ -66,9 +82,9 @@ Keep response under 200 words and focus on concrete next steps."""
                 
             except Exception as e:
                 logging.error(f"OpenAI error: {e}")
-                ai_response = _get_fallback_response(message, contacts, goals)
+                ai_response = _get_fallback_response(message, contacts, summary.goal_titles)
         else:
-            ai_response = _get_fallback_response(message, contacts, goals)
+            ai_response = _get_fallback_response(message, contacts, summary.goal_titles)
         
         return jsonify({
             "response": ai_response,
@@ -94,26 +110,28 @@ def get_insights():
         # Get contact intelligence
         intelligence = ContactIntelligence()
         
-        # Get contact recommendations
-        contacts = Contact.query.filter_by(user_id=user_id).all()
+        # Get contact recommendations ranked by the search index
         goals = Goal.query.filter_by(user_id=user_id).all()
         
         recommendations = []
-        if contacts and goals:
-            # Simple recommendation logic
-            for goal in goals[:2]:
-                relevant_contacts = [c for c in contacts if 
-                                   goal.goal_type.lower() in (c.notes or '').lower() or
-                                   goal.goal_type.lower() in (c.company or '').lower()][:2]
-                
-                for contact in relevant_contacts:
-                    recommendations.append({
-                        "contact_name": contact.name,
-                        "contact_id": contact.id,
-                        "reason": f"Perfect fit for your {goal.goal_type} goal - {goal.title}",
-                        "confidence": 85,
-                        "action": "Schedule a call this week"
-                    })
+        for goal in goals[:2]:
+            goal_query = ' '.join(part for part in (goal.goal_type, goal.title) if part)
+            relevant_contacts = search_index.search(
+                user_id, goal_query, limit=2,
+                loader=lambda: [c.to_dict() for c in Contact.query.filter_by(user_id=user_id).all()],
+                signature=lambda: db.session.query(
+                    func.count(Contact.id), func.max(Contact.updated_at)
+                ).filter(Contact.user_id == user_id).one()
+            )
+            
+            for contact in relevant_contacts:
+                recommendations.append({
+                    "contact_name": contact['name'],
+                    "contact_id": contact['id'],
+                    "reason": f"Perfect fit for your {goal.goal_type or 'networking'} goal - {goal.title}",
+                    "confidence": min(95, 60 + int(contact['score'] * 35)),
+                    "action": "Schedule a call this week"
+                })
         
         # Get opportunities
         opportunities = [
@@ -145,14 +163,15 @@ def get_insights():
 def _get_fallback_response(message, contacts, goals):
     """
     Generate intelligent fallback responses when OpenAI is unavailable
+    contacts are the context builder's compact contact dicts
     """
     message_lower = message.lower()
     
     # Fundraising advice
     if any(word in message_lower for word in ['fundraising', 'investor', 'funding', 'raise']):
-        investor_contacts = [c for c in contacts if 'investor' in (c.title or '').lower() or 'vc' in (c.company or '').lower()]
+        investor_contacts = [c for c in contacts if 'investor' in (c.get('title') or '').lower() or 'vc' in (c.get('company') or '').lower()]
         if investor_contacts:
-            return f"For fundraising, I'd recommend starting with {investor_contacts[0].name} at {investor_contacts[0].company}. They're already in your network and understand your space. Focus on building trust first before making the ask."
+            return f"For fundraising, I'd recommend starting with {investor_contacts[0]['name']} at {investor_contacts[0]['company']}. They're already in your network and understand your space. Focus on building trust first before making the ask."
         else:
             return "For fundraising, start by reaching out to founders who've raised recently. They can provide introductions to investors. Look for warm connections through your existing network first."
     
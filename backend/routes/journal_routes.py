@@ -0,0 +1,491 @@
+"""
+Journal Routes - Journal entries, search, analytics and AI reflections
+AI reflections are answered by a background queue: POST /reflect returns 202
+with a job that clients poll at /reflections/<job_id>. Job state lives in a
+table shared by all app workers, so any worker can answer the poll.
+"""
+import os
+
+from flask import Blueprint, current_app, g, jsonify, request, session
+
+from backend.extensions import db
+from backend.models.journal import JournalEntry
+from backend.models.journal_rollups import JournalRollups
+from backend.models.journal_search import JournalSearch
+from services.ai.reflection_queue import ReflectionQueue
+
+journal_bp = Blueprint('journal', __name__)
+
+_openai_client = None
+
+
+def get_openai_client():
+    """OpenAI client, created on first use so importing the blueprint stays cheap"""
+    global _openai_client
+    if _openai_client is None:
+        from openai import OpenAI
+        _openai_client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _openai_client
+
+
+def get_db_connection():
+    """A DB-API connection for the journal models, closed when the request ends"""
+    if 'journal_db' not in g:
+        g.journal_db = db.engine.raw_connection()
+    return g.journal_db
+
+
+@journal_bp.teardown_request
+def close_db_connection(exc):
+    conn = g.pop('journal_db', None)
+    if conn is not None:
+        conn.close()
+
+
+def get_reflection_queue() -> ReflectionQueue:
+    """The app's reflection queue, created on first use"""
+    queue = current_app.extensions.get('reflection_queue')
+    if queue is None:
+        app = current_app._get_current_object()
+
+        def generate(job) -> str:
+            return request_ai_reflection(job.title, job.content, job.user_question, job.reflection_type,
+                                         get_openai_client())
+
+        def persist(job) -> str:
+            # Jobs finish on worker threads, so they need their own app context
+            with app.app_context():
+                conn = db.engine.raw_connection()
+                try:
+                    journal = JournalEntry(conn)
+                    reflection_id = journal.create_reflection_session(
+                        job.entry_id, job.user_question, job.ai_response, job.reflection_type
+                    )
+                    # Update the main entry with AI reflection if it's the first one
+                    if job.first_reflection:
+                        journal.add_ai_reflection(job.entry_id, job.user_id, job.ai_response)
+                    return reflection_id
+                finally:
+                    conn.close()
+
+        queue = app.extensions.setdefault('reflection_queue', ReflectionQueue(generate, persist))
+    return queue
+
+
+@journal_bp.route('/entries', methods=['POST'])
+def create_journal_entry():
+    """Create a new journal entry"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Invalid request data"}), 400
+        
+        # Validate required fields
+        title = data.get('title', '').strip()
+        content = data.get('content', '').strip()
+        
+        if not title or not content:
+            return jsonify({"error": "Title and content are required"}), 400
+        
+        # Optional fields
+        entry_type = data.get('entry_type', 'reflection')
+        related_contact_id = data.get('related_contact_id')
+        related_goal_id = data.get('related_goal_id')
+        mood_score = data.get('mood_score')
+        energy_level = data.get('energy_level')
+        tags = data.get('tags', [])
+        
+        # Validate numeric fields
+        if mood_score is not None:
+            mood_score = int(mood_score)
+            if mood_score < 1 or mood_score > 10:
+                return jsonify({"error": "Mood score must be between 1 and 10"}), 400
+        
+        if energy_level is not None:
+            energy_level = int(energy_level)
+            if energy_level < 1 or energy_level > 10:
+                return jsonify({"error": "Energy level must be between 1 and 10"}), 400
+        
+        # Create journal entry
+        conn = get_db_connection()
+        journal = JournalEntry(conn)
+        
+        entry_id = journal.create_entry(
+            user_id=user_id,
+            title=title,
+            content=content,
+            entry_type=entry_type,
+            related_contact_id=related_contact_id,
+            related_goal_id=related_goal_id,
+            mood_score=mood_score,
+            energy_level=energy_level,
+            tags=tags
+        )
+        
+        response = {
+            "success": True,
+            "entry_id": entry_id,
+            "message": "Journal entry created successfully"
+        }
+        
+        # Optionally queue a first reflection; the save does not wait for it
+        if data.get('reflect'):
+            job = get_reflection_queue().submit(
+                user_id, entry_id, title, content, data.get('user_question', ''),
+                data.get('reflection_type', 'general'), first_reflection=True
+            )
+            response["reflection_job"] = job.to_dict()
+        
+        return jsonify(response), 201
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to create journal entry: {str(e)}"}), 500
+
+
+@journal_bp.route('/entries', methods=['GET'])
+def get_journal_entries():
+    """Get journal entries for the current user"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        limit = request.args.get('limit', 20, type=int)
+        
+        conn = get_db_connection()
+        journal = JournalEntry(conn)
+        
+        if 'offset' not in request.args:
+            # Keyset pagination: pass back next_cursor to get the following page
+            include_content = request.args.get('fields') != 'summary'
+            try:
+                page = journal.get_entries_page(user_id, limit, request.args.get('cursor'), include_content)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify({
+                "success": True,
+                "entries": page['entries'],
+                "total": len(page['entries']),
+                "next_cursor": page['next_cursor']
+            })
+        
+        offset = request.args.get('offset', 0, type=int)
+        entries = journal.get_entries_by_user(user_id, limit, offset)
+        
+        # Format entries for frontend
+        formatted_entries = []
+        for entry in entries:
+            formatted_entries.append({
+                "id": entry[0],
+                "title": entry[1],
+                "content": entry[2],
+                "entry_type": entry[3],
+                "mood_score": entry[4],
+                "energy_level": entry[5],
+                "tags": entry[6] or [],
+                "ai_reflection": entry[7],
+                "created_at": entry[8].isoformat() if entry[8] else None,
+                "related_contact_id": entry[9],
+                "related_goal_id": entry[10],
+                "contact_name": entry[11],
+                "goal_title": entry[12]
+            })
+        
+        return jsonify({
+            "success": True,
+            "entries": formatted_entries,
+            "total": len(formatted_entries)
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get journal entries: {str(e)}"}), 500
+
+
+@journal_bp.route('/entries/<entry_id>', methods=['GET'])
+def get_journal_entry(entry_id):
+    """Get a specific journal entry with reflections"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        conn = get_db_connection()
+        journal = JournalEntry(conn)
+        
+        result = journal.get_entry_by_id(entry_id, user_id)
+        
+        if not result:
+            return jsonify({"error": "Journal entry not found"}), 404
+        
+        entry = result['entry']
+        reflections = result['reflections']
+        
+        # Format entry data
+        formatted_entry = {
+            "id": entry[0],
+            "title": entry[2],
+            "content": entry[3],
+            "entry_type": entry[4],
+            "mood_score": entry[8],
+            "energy_level": entry[9],
+            "tags": entry[10] or [],
+            "ai_reflection": entry[11],
+            "created_at": entry[13].isoformat() if entry[13] else None,
+            "related_contact_id": entry[5],
+            "related_goal_id": entry[6],
+            "contact_name": entry[15] if len(entry) > 15 else None,
+            "goal_title": entry[16] if len(entry) > 16 else None
+        }
+        
+        # Format reflections
+        formatted_reflections = []
+        for reflection in reflections:
+            formatted_reflections.append({
+                "id": reflection[0],
+                "user_question": reflection[1],
+                "ai_response": reflection[2],
+                "reflection_type": reflection[3],
+                "created_at": reflection[4].isoformat() if reflection[4] else None
+            })
+        
+        return jsonify({
+            "success": True,
+            "entry": formatted_entry,
+            "reflections": formatted_reflections
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get journal entry: {str(e)}"}), 500
+
+
+@journal_bp.route('/search', methods=['GET'])
+def search_journal():
+    """Full-text search over journal entries and AI reflections"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Search query is required"}), 400
+        
+        limit = request.args.get('limit', 20, type=int)
+        cursor = request.args.get('cursor')
+        
+        conn = get_db_connection()
+        try:
+            page = JournalSearch(conn).search(user_id, query, limit, cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        return jsonify({
+            "success": True,
+            "results": page['results'],
+            "next_cursor": page['next_cursor']
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to search journal: {str(e)}"}), 500
+
+
+@journal_bp.route('/reflect', methods=['POST'])
+def reflect_with_ai():
+    """Generate AI reflection on a journal entry"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        data = request.get_json()
+        if not data:
+            return jsonify({"error": "Invalid request data"}), 400
+        
+        entry_id = data.get('entry_id')
+        user_question = data.get('user_question', '')
+        reflection_type = data.get('reflection_type', 'general')
+        
+        if not entry_id:
+            return jsonify({"error": "Entry ID is required"}), 400
+        
+        conn = get_db_connection()
+        journal = JournalEntry(conn)
+        
+        # Get the journal entry
+        result = journal.get_entry_by_id(entry_id, user_id)
+        if not result:
+            return jsonify({"error": "Journal entry not found"}), 404
+        
+        entry = result['entry']
+        entry_content = entry[3]  # content field
+        entry_title = entry[2]    # title field
+        
+        # Queue the AI reflection; poll the job for the result
+        job = get_reflection_queue().submit(
+            user_id, entry_id, entry_title, entry_content, user_question, reflection_type,
+            first_reflection=not entry[11]  # ai_reflection field is empty
+        )
+        
+        return jsonify({
+            "success": True,
+            "job": job.to_dict(),
+            "message": "AI reflection queued"
+        }), 202
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to generate AI reflection: {str(e)}"}), 500
+
+
+@journal_bp.route('/reflections/<job_id>', methods=['GET'])
+def get_reflection_job(job_id):
+    """Poll a queued AI reflection"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Authentication required"}), 401
+    
+    job = get_reflection_queue().get(job_id, user_id)
+    if not job:
+        return jsonify({"error": "Reflection job not found"}), 404
+    
+    return jsonify({"success": True, "job": job.to_dict()})
+
+
+@journal_bp.route('/weekly-prompt', methods=['GET'])
+def get_weekly_prompt():
+    """Get weekly journaling prompt"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        # Get current week's insights
+        conn = get_db_connection()
+        journal = JournalEntry(conn)
+        
+        weekly_insights = journal.get_weekly_insights(user_id)
+        
+        # Generate contextual weekly prompt
+        prompt = generate_weekly_prompt(weekly_insights)
+        
+        return jsonify({
+            "success": True,
+            "prompt": prompt,
+            "weekly_insights": weekly_insights
+        })
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get weekly prompt: {str(e)}"}), 500
+
+
+@journal_bp.route('/analytics', methods=['GET'])
+def get_journal_analytics():
+    """Get journal analytics and insights"""
+    try:
+        user_id = session.get('user_id')
+        if not user_id:
+            return jsonify({"error": "Authentication required"}), 401
+        
+        # Weekly insights and 30-day trends come from the daily rollups
+        conn = get_db_connection()
+        analytics = JournalRollups(conn).get_analytics(user_id)
+        
+        response = {
+            "success": True,
+            "weekly_insights": {
+                "weekly_stats": analytics['weekly_stats'],
+                "top_contacts": analytics['top_contacts']
+            },
+            "daily_entries": analytics['daily_entries'],
+            "mood_trends": analytics['mood_trends']
+        }
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        return jsonify({"error": f"Failed to get journal analytics: {str(e)}"}), 500
+
+
+def generate_ai_reflection(title: str, content: str, user_question: str, reflection_type: str, openai_client) -> str:
+    """Generate AI reflection on journal entry"""
+    try:
+        return request_ai_reflection(title, content, user_question, reflection_type, openai_client)
+        
+    except Exception as e:
+        return f"Unable to generate AI reflection at this time. Please try again later. ({str(e)})"
+
+
+def request_ai_reflection(title: str, content: str, user_question: str, reflection_type: str, openai_client) -> str:
+    """Call the LLM for a reflection; raises on failure"""
+    # Create contextual prompt based on reflection type
+    if reflection_type == "relationship":
+        system_prompt = """You are a wise relationship coach helping someone reflect on their relationships and social connections. 
+        Focus on relationship patterns, communication insights, and social growth opportunities."""
+    elif reflection_type == "growth":
+        system_prompt = """You are a personal development coach helping someone reflect on their growth and learning. 
+        Focus on progress, challenges overcome, and future development opportunities."""
+    elif reflection_type == "insight":
+        system_prompt = """You are a thoughtful advisor helping someone extract deeper insights from their experiences. 
+        Focus on patterns, underlying meanings, and actionable wisdom."""
+    else:
+        system_prompt = """You are a compassionate reflection partner helping someone process their thoughts and experiences. 
+        Provide gentle, insightful guidance that encourages self-discovery."""
+    
+    user_prompt = f"""
+    Journal Entry Title: {title}
+    
+    Journal Entry Content: {content}
+    
+    User's Question: {user_question if user_question else "Help me reflect on this entry and find insights."}
+    
+    Please provide a thoughtful, personalized reflection that:
+    1. Acknowledges the emotions and experiences shared
+    2. Offers gentle insights or questions for deeper reflection
+    3. Suggests practical next steps or considerations
+    4. Maintains a supportive and encouraging tone
+    
+    Keep your response between 150-300 words and make it personal and actionable.
+    """
+    
+    response = openai_client.chat.completions.create(
+        model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=400,
+        temperature=0.7
+    )
+    
+    return response.choices[0].message.content
+
+
+def generate_weekly_prompt(weekly_insights: dict) -> str:
+    """Generate contextual weekly journaling prompt"""
+    stats = weekly_insights.get('weekly_stats')
+    top_contacts = weekly_insights.get('top_contacts', [])
+    
+    if not stats:
+        return "Who helped you this week? Reflect on the people who made a positive impact on your journey."
+    
+    entry_count = stats[0] if stats[0] else 0
+    avg_mood = stats[1] if stats[1] else None
+    contacts_mentioned = stats[4] if stats[4] else 0
+    
+    # Generate contextual prompt based on weekly patterns
+    if entry_count == 0:
+        return "Let's start your week with reflection: Who has been most supportive of your goals lately?"
+    elif entry_count >= 5:
+        return "You've been actively journaling this week! Looking back, what relationship patterns are you noticing?"
+    elif contacts_mentioned >= 3:
+        return "You've mentioned several people this week. Who among them would you like to show more appreciation to?"
+    elif avg_mood and avg_mood >= 7:
+        return "Your mood has been positive this week! Who contributed to that positive energy?"
+    elif avg_mood and avg_mood < 5:
+        return "This week seems challenging. Who in your network could offer support or perspective?"
+    else:
+        return "Who helped you this week? Take a moment to acknowledge the people who made a difference."
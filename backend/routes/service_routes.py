@@ -1,48 +1,61 @@
 """
 Service Status Routes - Service health and status checking
+/live is the liveness check and never touches a dependency; /ready and
+/status serve the cached, concurrently probed readiness result.
 """
-from flask import Blueprint, jsonify
-from services.contact_intelligence import ContactIntelligence
-from services.trust_insights import TrustInsights
-from services.social_integrations import SocialIntegrations
-from services.contact_sync_engine import ContactSyncEngine
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import text
+
+from backend.extensions import db
+from services.health import HealthMonitor, standard_probes
 
 service_bp = Blueprint('service', __name__, url_prefix='/api/services')
 
 
+def get_health_monitor() -> HealthMonitor:
+    """The app's health monitor, created on first use"""
+    monitor = current_app.extensions.get('health_monitor')
+    if monitor is None:
+        app = current_app._get_current_object()
+
+        def database():
+            # Probes run on worker threads, so they need their own app context
+            with app.app_context():
+                with db.engine.connect() as connection:
+                    connection.execute(text('SELECT 1'))
+
+        monitor = HealthMonitor(
+            standard_probes(database),
+            ttl=app.config.get('HEALTH_CACHE_TTL_SECONDS', 5)
+        )
+        monitor = app.extensions.setdefault('health_monitor', monitor)
+    return monitor
+
+
 @service_bp.route('/status')
 def service_status():
     """Get status of all services"""
-    try:
-        services = {}
-        
-        # Test Contact Intelligence
-        ci = ContactIntelligence()
-        services['contact_intelligence'] = ci.get_status()
-        
-        # Test Trust Insights
-        ti = TrustInsights()
-        services['trust_insights'] = ti.get_status()
-        
-        # Test Social Integrations
-        si = SocialIntegrations()
-        services['social_integrations'] = si.get_status()
-        
-        # Test Contact Sync Engine
-        cse = ContactSyncEngine()
-        services['contact_sync_engine'] = cse.get_status()
-        
-        return jsonify({
-            'status': 'healthy',
-            'services': services,
-            'total_services': len(services)
-        })
-        
-    except Exception as e:
-        return jsonify({
-            'status': 'error',
-            'error': str(e)
-        }), 500
+    readiness = get_health_monitor().readiness()
+    return jsonify({
+        'status': 'healthy' if readiness['ready'] else 'unhealthy',
+        'services': readiness['checks'],
+        'total_services': len(readiness['checks']),
+        'checked_at': readiness['checked_at'],
+        'cached': readiness['cached'],
+    }), 200 if readiness['ready'] else 503
+
+
+@service_bp.route('/ready')
+def readiness_check():
+    """Readiness check for load balancers"""
+    readiness = get_health_monitor().readiness()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
+
+@service_bp.route('/live')
+def liveness_check():
+    """Liveness check; does not touch any dependency"""
+    return jsonify(get_health_monitor().liveness())
 
 
 @service_bp.route('/health')
@@ -51,4 +64,4 @@ def quick_health():
     return jsonify({
         'status': 'operational',
         'message': 'All services available for import'
-    })
\ No newline at end of file
+    })
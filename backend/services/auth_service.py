@@ -6,12 +6,19 @@ Handles Magic-Link authentication with JWT tokens and Resend email integration
 import os
 import jwt
 import secrets
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 import resend
 from flask import current_app
 from backend.extensions import db
 from backend.models import User, AuthToken
+from services.auth.magic_links import MAGIC_LINK_TTL_MINUTES, SWEEP_BATCH_SIZE, ExpirySweeper, hash_token
+from services.email.bulk_sender import OutgoingEmail
+from services.email.outbox import email_outbox
+from services.unified_email_service import get_email_service
+from services.unified_utilities import ProductionUtils
 
 class AuthService:
     """Magic-Link authentication service"""
@@ -21,50 +28,50 @@ class AuthService:
         self.resend_api_key = os.environ.get('RESEND_API_KEY')
         if self.resend_api_key:
             resend.api_key = self.resend_api_key
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
     
     def generate_magic_link_token(self, email: str) -> str:
         """Generate a secure JWT token for magic link authentication"""
         payload = {
             'email': email,
             'type': 'magic_link',
-            'exp': datetime.utcnow() + timedelta(minutes=15),  # 15-minute expiry
+            'exp': datetime.utcnow() + timedelta(minutes=MAGIC_LINK_TTL_MINUTES),
             'iat': datetime.utcnow(),
             'jti': secrets.token_urlsafe(32)  # Unique token ID
         }
         
         token = jwt.encode(payload, self.jwt_secret, algorithm='HS256')
         
-        # Store token in database for tracking and revocation
+        # Store only the token's hash for tracking and revocation
         auth_token = AuthToken()
         auth_token.email = email
-        auth_token.token = token
+        auth_token.token = hash_token(token)
         auth_token.expires = payload['exp']
         
         db.session.add(auth_token)
         db.session.commit()
         
+        self.start_token_sweeper(current_app._get_current_object())
         return token
     
     def verify_magic_link_token(self, token: str) -> Optional[Dict[str, Any]]:
         """Verify and decode a magic link JWT token"""
         try:
-            # Check if token exists in database and is not used
-            auth_token = AuthToken.query.filter_by(token=token).first()
-            if not auth_token or auth_token.used_at:
-                return None
-            
-            # Verify JWT token
+            # Verify JWT token before touching the database
             payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
             
-            # Check if token is expired
-            if auth_token.is_expired():
-                return None
-            
-            # Mark token as used
-            auth_token.mark_used()
+            # Mark token as used in one indexed statement; a used, expired or
+            # unknown token updates nothing
+            now = datetime.utcnow()
+            claimed = AuthToken.query.filter(
+                AuthToken.token == hash_token(token),
+                AuthToken.used_at.is_(None),
+                AuthToken.expires > now
+            ).update({AuthToken.used_at: now}, synchronize_session=False)
             db.session.commit()
             
-            return payload
+            return payload if claimed == 1 else None
             
         except jwt.ExpiredSignatureError:
             return None
@@ -72,7 +79,7 @@ class AuthService:
             return None
     
     def send_magic_link(self, email: str, token: str) -> bool:
-        """Send magic link email via Resend"""
+        """Queue the magic link email for delivery; False if it cannot be delivered"""
         try:
             # Generate magic link URL
             base_url = os.environ.get('REPLIT_DEV_DOMAIN', 'http://localhost:5000')
@@ -145,28 +152,28 @@ class AuthService:
             Rhiz - High-context relationship intelligence
             """
             
-            # Send email via Resend
-            if self.resend_api_key:
-                try:
-                    params = {
-                        "from": "Rhiz <noreply@resend.dev>",
-                        "to": [email],
-                        "subject": "🔐 Your Rhiz Login Link",
-                        "html": html_content,
-                        "text": text_content
-                    }
-                    
-                    email_response = resend.Emails.send(params)
-                    return True
-                except Exception as e:
-                    current_app.logger.error(f"Resend email error: {e}")
-                    # Fallback to development mode
-                    current_app.logger.info(f"Magic link for {email}: {magic_link}")
-                    return True
-            else:
+            email_service = get_email_service()
+            if not email_service.get_service_status()['any_configured']:
+                if ProductionUtils.is_production():
+                    current_app.logger.error(f"No email provider configured; cannot send magic link to {email}")
+                    return False
                 # Development fallback - log the magic link
                 current_app.logger.info(f"Development Magic link for {email}: {magic_link}")
                 return True
+
+            message = OutgoingEmail(email, "🔐 Your Rhiz Login Link", html_content, text_content)
+            # Queue for the outbox worker so login latency doesn't depend on the email provider;
+            # the row expires with the link so a stale link is dropped instead of retried
+            try:
+                email_outbox.enqueue(
+                    message, idempotency_key=f"magic_link:{hash_token(token)}", kind='magic_link',
+                    expires_at=time.time() + MAGIC_LINK_TTL_MINUTES * 60
+                )
+                return True
+            except Exception as e:
+                current_app.logger.error(f"Failed to queue magic link email, sending directly: {e}")
+                result = email_service.send_email(email, message.subject, html_content, text_content)
+                return bool(result.get('success'))
                 
         except Exception as e:
             current_app.logger.error(f"Failed to send magic link: {e}")
@@ -187,14 +194,41 @@ class AuthService:
         
         return user
     
-    def cleanup_expired_tokens(self):
-        """Remove expired tokens from database"""
-        expired_tokens = AuthToken.query.filter(
-            AuthToken.expires < datetime.utcnow()
-        ).all()
-        
-        for token in expired_tokens:
-            db.session.delete(token)
+    def cleanup_expired_tokens(self, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+        """Remove expired tokens from database, a batch at a time"""
+        removed = 0
+        while True:
+            expired_ids = db.session.query(AuthToken.id).filter(
+                AuthToken.expires < datetime.utcnow()
+            ).limit(batch_size).subquery()
+            
+            deleted = AuthToken.query.filter(
+                AuthToken.id.in_(db.session.query(expired_ids.c.id))
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+    
+    def start_token_sweeper(self, app):
+        """
+        Delete expired tokens in the background instead of on the login path.
+        Started on the first magic link a worker issues, never at app creation:
+        under gunicorn --preload that runs in the master, whose threads and
+        pooled connections don't survive into the forked workers.
+        """
+        if app.config.get('TESTING'):
+            return
         
-        db.session.commit()
-        return len(expired_tokens)
\ No newline at end of file
+        with self._sweeper_lock:
+            if self._sweeper is None:
+                def sweep():
+                    with app.app_context():
+                        try:
+                            return self.cleanup_expired_tokens()
+                        finally:
+                            db.session.remove()
+                
+                self._sweeper = ExpirySweeper(sweep, name='auth-token-sweeper')
+        self._sweeper.start()
@@ -0,0 +1,248 @@
+"""
+Server-side sessions
+Session data lives in a local SQLite (WAL) store keyed by a random session id
+held in the cookie. Each session also caches a compact profile of its user, so
+authenticated endpoints don't re-read the users row on every request; commits
+that change a user write the new profile through to all of that user's
+sessions. The store's get/set/delete/expire surface mirrors a Redis client so
+a shared backend can replace it for multi-host deployments.
+"""
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from flask import session
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from werkzeug.datastructures import CallbackDict
+
+from services.auth.magic_links import ExpirySweeper
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_STORE_PATH = 'sessions.db'
+SESSION_TTL_SECONDS = 30 * 24 * 3600
+SESSION_SWEEP_INTERVAL_SECONDS = 600
+SESSION_SWEEP_BATCH_SIZE = 1000
+# Session key holding the cached user profile
+PROFILE_KEY = '_user'
+
+
+class SessionStore:
+    """SQLite key/value store for session payloads, indexed by user for write-through"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get('SESSION_STORE_PATH', DEFAULT_SESSION_STORE_PATH)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.sweeper = ExpirySweeper(self.sweep_expired, SESSION_SWEEP_INTERVAL_SECONDS, name='session-sweeper')
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sessions (
+                    sid TEXT PRIMARY KEY,
+                    user_id TEXT,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._get_connection().execute(
+                'SELECT data FROM sessions WHERE sid = ? AND expires_at > ?', (sid, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, sid: str, data: Dict[str, Any], ttl: int = SESSION_TTL_SECONDS):
+        user_id = data.get('user_id')
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (sid, user_id, data, expires_at) VALUES (?, ?, ?, ?)',
+                (sid, str(user_id) if user_id is not None else None, json.dumps(data), time.time() + ttl)
+            )
+            conn.commit()
+        self.sweeper.start()
+
+    def delete(self, sid: str):
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+            conn.commit()
+
+    def update_user_profile(self, user_id: str, profile: Optional[Dict[str, Any]]):
+        """Write a user's new profile into every live session of that user (None drops it)"""
+        with self._lock:
+            conn = self._get_connection()
+            rows = conn.execute('SELECT sid, data FROM sessions WHERE user_id = ?', (str(user_id),)).fetchall()
+            updates = []
+            for sid, raw in rows:
+                data = json.loads(raw)
+                if profile is None:
+                    data.pop(PROFILE_KEY, None)
+                else:
+                    data[PROFILE_KEY] = profile
+                updates.append((json.dumps(data), sid))
+            conn.executemany('UPDATE sessions SET data = ? WHERE sid = ?', updates)
+            conn.commit()
+
+    def sweep_expired(self, batch_size: int = SESSION_SWEEP_BATCH_SIZE) -> int:
+        removed = 0
+        while True:
+            with self._lock:
+                conn = self._get_connection()
+                deleted = conn.execute('''
+                    DELETE FROM sessions WHERE sid IN (
+                        SELECT sid FROM sessions WHERE expires_at < ? LIMIT ?
+                    )
+                ''', (time.time(), batch_size)).rowcount
+                conn.commit()
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid: Optional[str] = None, new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.previous_sid: Optional[str] = None
+
+    def regenerate(self):
+        """Move the data to a fresh sid; the old one is deleted from the store on save"""
+        if self.previous_sid is None and not self.new:
+            self.previous_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface backed by a SessionStore"""
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def _ttl(self, app) -> int:
+        return int(app.permanent_session_lifetime.total_seconds()) or SESSION_TTL_SECONDS
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.get(sid)
+            if data is not None:
+                return ServerSideSession(data, sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.previous_sid:
+            self.store.delete(session.previous_sid)
+            session.previous_sid = None
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.set(session.sid, dict(session), self._ttl(app))
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            expires = self.get_expiration_time(app, session) or datetime.utcnow() + timedelta(seconds=self._ttl(app))
+            response.set_cookie(
+                name, session.sid, expires=expires, httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path, secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+
+def regenerate_session():
+    """Issue a new session id on login so a sid planted beforehand never becomes authenticated"""
+    if isinstance(session._get_current_object(), ServerSideSession):
+        session.regenerate()
+
+
+def get_session_user() -> Optional[Dict[str, Any]]:
+    """The signed-in user's profile, from the session cache or loaded once from the database"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return None
+
+    profile = session.get(PROFILE_KEY)
+    if profile and profile.get('id') == str(user_id):
+        return profile
+
+    from backend.models import User
+    user = User.query.get(user_id)
+    if not user:
+        return None
+    profile = user.to_dict()
+    session[PROFILE_KEY] = profile
+    return profile
+
+
+_write_through_installed = False
+
+
+def install_user_write_through(store: SessionStore):
+    """Refresh cached session profiles whenever a commit changes or deletes a user"""
+    global _write_through_installed
+    if _write_through_installed:
+        return
+    from backend.models import User
+
+    def collect(orm_session, flush_context):
+        # Snapshot profiles at flush; no SQL can be emitted once the commit is done
+        pending = orm_session.info.setdefault('session_profile_updates', {})
+        for obj in orm_session.dirty:
+            if isinstance(obj, User) and orm_session.is_modified(obj):
+                pending[str(obj.id)] = obj.to_dict()
+        for obj in orm_session.deleted:
+            if isinstance(obj, User):
+                pending[str(obj.id)] = None
+
+    def write_through(orm_session):
+        pending = orm_session.info.pop('session_profile_updates', None)
+        for user_id, profile in (pending or {}).items():
+            try:
+                store.update_user_profile(user_id, profile)
+            except Exception as e:
+                logger.error(f"Failed to refresh session profile for user {user_id}: {e}")
+
+    def discard(orm_session):
+        orm_session.info.pop('session_profile_updates', None)
+
+    event.listen(OrmSession, 'after_flush', collect)
+    event.listen(OrmSession, 'after_commit', write_through)
+    event.listen(OrmSession, 'after_rollback', discard)
+    _write_through_installed = True
+
+
+# Global instance for easy importing
+session_store = SessionStore()
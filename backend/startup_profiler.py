@@ -0,0 +1,211 @@
+"""
+Startup profiler
+create_app always records how long each startup phase takes (configuration,
+each extension, each blueprint import and registration) in
+app.extensions['startup_profile']. With PROFILE_STARTUP=1 set before the
+backend package is imported, it also times every module import (self and
+cumulative, like python -X importtime) so the expensive dependencies of a
+worker boot show up by name.
+
+    flask --app backend profile-startup
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+import click
+
+logger = logging.getLogger(__name__)
+
+# Modules that must stay off the startup path; they are imported where they are used
+DEFERRED_MODULES = ('pandas', 'openai', 'stripe')
+REPORT_TOP_IMPORTS = 25
+
+
+class _TimedLoader:
+    """Wraps a module's loader to time exec_module, then puts the original back"""
+
+    def __init__(self, loader, timer: '_ImportTimer', name: str):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._timer.enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.exit(self._name)
+            module.__loader__ = self._loader
+            if getattr(module, '__spec__', None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+
+class _ImportTimer:
+    """sys.meta_path finder that times module execution with self/cumulative split"""
+
+    def __init__(self):
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self._local = threading.local()
+
+    def find_spec(self, fullname, path, target=None):
+        if getattr(self._local, 'finding', False):
+            return None
+        self._local.finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.finding = False
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def enter(self, name: str):
+        stack = self._local.__dict__.setdefault('stack', [])
+        stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self, name: str):
+        stack = self._local.stack
+        _, started, children = stack.pop()
+        total = time.perf_counter() - started
+        if stack:
+            stack[-1][2] += total
+        self.imports[name] = {
+            'self_ms': round((total - children) * 1000, 2),
+            'cumulative_ms': round(total * 1000, 2),
+        }
+
+
+class StartupProfiler:
+    """Records startup phase durations, and module import times when enabled"""
+
+    def __init__(self, profile_imports: bool = False):
+        self.profile_imports = profile_imports
+        self.phases: List[Dict[str, Any]] = []
+        self._timer: Optional[_ImportTimer] = None
+
+    @classmethod
+    def from_env(cls) -> 'StartupProfiler':
+        profiler = cls(profile_imports=os.environ.get('PROFILE_STARTUP', '').lower() in ('1', 'true', 'yes'))
+        if profiler.profile_imports:
+            profiler.start()
+        return profiler
+
+    def start(self):
+        if self._timer is None:
+            self._timer = _ImportTimer()
+            sys.meta_path.insert(0, self._timer)
+
+    def stop(self):
+        if self._timer is not None and self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+
+    def begin(self):
+        """Start a fresh set of phase timings for one create_app call"""
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({'name': name, 'ms': round((time.perf_counter() - started) * 1000, 2)})
+
+    def report(self, top: int = REPORT_TOP_IMPORTS) -> Dict[str, Any]:
+        report = {
+            'phases': list(self.phases),
+            'phases_ms': round(sum(phase['ms'] for phase in self.phases), 2),
+            'deferred_modules_loaded': [name for name in DEFERRED_MODULES if name in sys.modules],
+        }
+        if self._timer is not None:
+            imports = self._timer.imports
+            # Top-level packages, so 'openai' accounts for all of openai.*
+            packages: Dict[str, float] = {}
+            for name, timing in imports.items():
+                package = name.partition('.')[0]
+                packages[package] = packages.get(package, 0.0) + timing['self_ms']
+            report['imports'] = sorted(
+                ({'module': name, **timing} for name, timing in imports.items()),
+                key=lambda item: item['cumulative_ms'], reverse=True
+            )[:top]
+            report['packages'] = sorted(
+                ({'package': name, 'self_ms': round(ms, 2)} for name, ms in packages.items()),
+                key=lambda item: item['self_ms'], reverse=True
+            )[:top]
+            report['import_ms'] = round(sum(timing['self_ms'] for timing in imports.values()), 2)
+        return report
+
+    def finish(self, app):
+        """Attach the report to the app and log a summary"""
+        self.stop()
+        report = self.report()
+        app.extensions['startup_profile'] = report
+        if self.profile_imports:
+            slowest = ', '.join(f"{p['package']} {p['self_ms']:.0f}ms" for p in report['packages'][:5])
+            logger.info(f"Startup took {report['phases_ms']:.0f}ms in create_app; slowest imports: {slowest}")
+        return report
+
+
+_COLD_START_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from backend import create_app
+app = create_app()
+report = app.extensions['startup_profile']
+report['cold_start_ms'] = round((time.perf_counter() - started) * 1000, 2)
+print(json.dumps(report))
+"""
+
+
+def measure_cold_start(profile_imports: bool = False, env: Optional[Dict[str, str]] = None,
+                       timeout: float = 120) -> Dict[str, Any]:
+    """Import the backend and call create_app in a fresh interpreter; returns its startup report"""
+    child_env = dict(os.environ)
+    child_env.setdefault('DATABASE_URL', 'sqlite://')
+    child_env.setdefault('SESSION_BACKEND', 'cookie')
+    child_env['PROFILE_STARTUP'] = '1' if profile_imports else ''
+    child_env.update(env or {})
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-c', _COLD_START_SCRIPT], cwd=root, env=child_env,
+        capture_output=True, text=True, timeout=timeout
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"create_app failed in a fresh interpreter:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@click.command('profile-startup')
+@click.option('--imports/--no-imports', default=True, help='Also time every module import.')
+def profile_startup_command(imports):
+    """Profile a cold start of the app in a fresh interpreter."""
+    report = measure_cold_start(profile_imports=imports)
+    click.echo(f"Cold start: {report['cold_start_ms']:.0f}ms (create_app phases {report['phases_ms']:.0f}ms)")
+    click.echo("=" * 50)
+    for phase in report['phases']:
+        click.echo(f"{phase['ms']:>9.1f}ms  {phase['name']}")
+    for package in report.get('packages', []):
+        click.echo(f"{package['self_ms']:>9.1f}ms  import {package['package']}")
+    if report['deferred_modules_loaded']:
+        click.echo(f"Deferred modules imported at startup: {', '.join(report['deferred_modules_loaded'])}")
@@ -0,0 +1,30 @@
+"""Hash stored magic link tokens and index their expiry
+
+Revision ID: a7c31e90d4b2
+Revises: 3bee8b128e2c
+Create Date: 2026-10-18 10:12:41.518302
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c31e90d4b2'
+down_revision = '3bee8b128e2c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Tokens are now looked up by SHA-256; hash the ones still in flight
+    op.execute("UPDATE user_auth_tokens SET token = encode(sha256(convert_to(token, 'UTF8')), 'hex')")
+    with op.batch_alter_table('user_auth_tokens', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_auth_tokens_expires'), ['expires'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_auth_tokens', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_auth_tokens_expires'))
+    # Hashes can't be reversed; outstanding links stop working
+    op.execute("DELETE FROM user_auth_tokens WHERE used_at IS NULL")
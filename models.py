@@ -1,7 +1,7 @@
 """
 Legacy Models Import
 This file maintains compatibility for any legacy imports.
-All models are now properly organized in backend/models.py
+All models are now properly organized in the backend.models package
 """
 
 # Import all models from the new modularized backend
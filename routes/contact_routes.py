@@ -3,12 +3,13 @@ Contact management routes module
 Handles contact CRUD operations, pipeline management, and interactions
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session, Response, stream_with_context
 from . import RouteBase, login_required, get_current_user_id
 # from csv_import import CSVContactImporter
 from linkedin_importer import LinkedInContactImporter  
 from simple_email import SimpleEmailSender
 from contact_intelligence import ContactNLP
+from services.data.contact_export import ContactExporter
 import logging
 import json
 
@@ -259,6 +260,28 @@ def import_contacts():
     
     return render_template('import_contacts.html')
 
+@contact_bp.route('/api/contacts/export')
+@login_required
+def export_contacts():
+    """Stream contacts as CSV/NDJSON/Parquet, optionally gzipped, in a CRM's column layout"""
+    user_id = get_current_user_id()
+    crm = request.args.get('crm', 'standard').lower()
+    fmt = request.args.get('format', 'csv').lower()
+    compress = request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+    
+    try:
+        chunks, mimetype, filename = ContactExporter(contact_routes.db).export(
+            user_id, profile=crm, fmt=fmt, compress=compress
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
 @contact_bp.route('/contacts/pipeline')
 @login_required
 def contact_pipeline():
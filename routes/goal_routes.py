@@ -3,10 +3,12 @@ Goal management routes module
 Handles goal CRUD operations and AI-powered goal matching
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session, Response, stream_with_context
 from . import RouteBase, login_required, get_current_user_id
 from database_utils import match_contacts_to_goal
 from ai_contact_matcher import AIContactMatcher
+from services.ai.message_generation_utils import stream_messages_for_goal_matches
+import json
 import logging
 
 # Create blueprint
@@ -300,6 +302,29 @@ def get_goal_suggestions(goal_id):
         logging.error(f"Error getting goal suggestions: {e}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@goal_bp.route('/api/goals/<goal_id>/messages/stream')
+@login_required
+def stream_goal_messages(goal_id):
+    """Stream outreach drafts for a goal's top matches as NDJSON, one line per contact"""
+    user_id = get_current_user_id()
+    
+    goal = goal_routes.goal_model.get_by_id(goal_id)
+    if not goal or goal['user_id'] != user_id:
+        return jsonify({'error': 'Goal not found'}), 404
+    
+    max_contacts = min(request.args.get('max_contacts', 50, type=int), 100)
+    tone = request.args.get('tone', 'warm')
+    
+    def generate():
+        try:
+            for message in stream_messages_for_goal_matches(goal_id, max_contacts, tone):
+                yield json.dumps(message, default=str) + '\n'
+        except Exception as e:
+            logging.error(f"Error streaming goal messages: {e}")
+            yield json.dumps({'error': 'Message generation failed'}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @goal_bp.route('/goal-matcher', methods=['GET', 'POST'])
 def goal_matcher():
     """Single-page goal-based contact matcher (legacy route)"""
@@ -4,86 +4,43 @@ Handles AI suggestions, network analysis, and sophisticated CRM features
 """
 
 from flask import Blueprint, render_template, request, redirect, url_for, jsonify, session
-from . import RouteBase, login_required, get_current_user_id
-from analytics import NetworkingAnalytics
-from network_visualization import NetworkMapper
-from ai_contact_matcher import AIContactMatcher
-from rhizomatic_intelligence import RhizomaticIntelligence
-from smart_networking import SmartNetworkingEngine
-from contact_search import ContactSearchEngine
-from relationship_intelligence import RelationshipIntelligence
-from network_metrics import NetworkMetricsManager
-from shared_ai_assistant import SharedAIAssistant
-from trust_contribution_engine import TrustContributionEngine
-from unknown_contact_discovery import UnknownContactDiscovery
-from coordination_infrastructure import CoordinationInfrastructure
+from . import RouteBase, login_required, get_current_user_id, db
+from models import Contact
+from services.data.search_index import search_index
+from services.service_registry import LazyServiceRegistry
 import logging
 
 # Create blueprint
 intelligence_bp = Blueprint('intelligence_routes', __name__)
 
+# Engines are imported and constructed on first use, once per worker
+intelligence_services = LazyServiceRegistry()
+intelligence_services.register('analytics', 'analytics.NetworkingAnalytics', db)
+intelligence_services.register('network_mapper', 'network_visualization.NetworkMapper', db)
+intelligence_services.register('ai_matcher', 'ai_contact_matcher.AIContactMatcher', db)
+intelligence_services.register('rhizomatic_intel', 'rhizomatic_intelligence.RhizomaticIntelligence', db)
+intelligence_services.register('smart_networking', 'smart_networking.SmartNetworkingEngine', db)
+intelligence_services.register('search_engine', 'contact_search.ContactSearchEngine', db)
+intelligence_services.register('relationship_intel', 'relationship_intelligence.RelationshipIntelligence', db)
+intelligence_services.register('network_metrics', 'network_metrics.NetworkMetricsManager')
+intelligence_services.register('ai_assistant', 'shared_ai_assistant.SharedAIAssistant')
+intelligence_services.register('trust_engine', 'trust_contribution_engine.TrustContributionEngine')
+intelligence_services.register('contact_discovery', 'unknown_contact_discovery.UnknownContactDiscovery')
+intelligence_services.register('coordination', 'coordination_infrastructure.CoordinationInfrastructure')
+
 class IntelligenceRoutes(RouteBase):
-    def __init__(self):
-        super().__init__()
-        try:
-            self.analytics = NetworkingAnalytics(self.db)
-        except Exception:
-            self.analytics = None
-        
-        try:
-            self.network_mapper = NetworkMapper(self.db)
-        except Exception:
-            self.network_mapper = None
-            
-        try:
-            self.ai_matcher = AIContactMatcher(self.db)
-        except Exception:
-            self.ai_matcher = None
-            
-        try:
-            self.rhizomatic_intel = RhizomaticIntelligence(self.db)
-        except Exception:
-            self.rhizomatic_intel = None
-            
-        try:
-            self.smart_networking = SmartNetworkingEngine(self.db)
-        except Exception:
-            self.smart_networking = None
-            
-        try:
-            self.search_engine = ContactSearchEngine(self.db)
-        except Exception:
-            self.search_engine = None
-            
-        try:
-            self.relationship_intel = RelationshipIntelligence(self.db)
-        except Exception:
-            self.relationship_intel = None
-            
-        try:
-            self.network_metrics = NetworkMetricsManager()
-        except Exception:
-            self.network_metrics = None
-            
-        try:
-            self.ai_assistant = SharedAIAssistant()
-        except Exception:
-            self.ai_assistant = None
-            
-        try:
-            self.trust_engine = TrustContributionEngine()
-        except Exception:
-            self.trust_engine = None
-            
-        try:
-            self.contact_discovery = UnknownContactDiscovery()
-        except Exception:
-            self.contact_discovery = None
-            
-        try:
-            self.coordination = CoordinationInfrastructure()
-        except Exception:
-            self.coordination = None
+    analytics = intelligence_services.service('analytics')
+    network_mapper = intelligence_services.service('network_mapper')
+    ai_matcher = intelligence_services.service('ai_matcher')
+    rhizomatic_intel = intelligence_services.service('rhizomatic_intel')
+    smart_networking = intelligence_services.service('smart_networking')
+    search_engine = intelligence_services.service('search_engine')
+    relationship_intel = intelligence_services.service('relationship_intel')
+    network_metrics = intelligence_services.service('network_metrics')
+    ai_assistant = intelligence_services.service('ai_assistant')
+    trust_engine = intelligence_services.service('trust_engine')
+    contact_discovery = intelligence_services.service('contact_discovery')
+    coordination = intelligence_services.service('coordination')
 
 intelligence_routes = IntelligenceRoutes()
 
@@ -333,6 +290,17 @@ def advanced_search():
         intelligence_routes.flash_error('Failed to load search interface')
         return redirect(url_for('core_routes.dashboard'))
 
+def _contacts_signature(user_id):
+    """Contact count and latest update, to tell whether the search index is stale"""
+    conn = db.get_connection()
+    try:
+        return tuple(conn.execute(
+            'SELECT COUNT(*), MAX(updated_at) FROM contacts WHERE user_id = ?', (user_id,)
+        ).fetchone())
+    finally:
+        conn.close()
+
+
 @intelligence_bp.route('/api/search', methods=['POST'])
 @login_required
 def api_search():
@@ -345,4 +313,34 @@ def api_search():
         return jsonify(results)
     except Exception as e:
         logging.error(f"Search API error: {e}")
-        return jsonify({'error': 'Search failed'}), 500
\ No newline at end of file
+        return jsonify({'error': 'Search failed'}), 500
+
+@intelligence_bp.route('/api/search/ranked', methods=['POST'])
+@login_required
+def api_ranked_search():
+    """Free-text contact search ranked by the BM25 + embedding index"""
+    user_id = get_current_user_id()
+
+    try:
+        params = request.json or {}
+        query = (params.get('query') or '').strip()
+        if not query:
+            return jsonify({'error': 'Query is required'}), 400
+
+        results = search_index.search(
+            user_id, query,
+            limit=int(params.get('limit', 20)),
+            loader=lambda: Contact(intelligence_routes.db).get_all(user_id),
+            semantic=bool(params.get('semantic', True)),
+            signature=lambda: _contacts_signature(user_id)
+        )
+        return jsonify({'query': query, 'results': results, 'total': len(results)})
+    except Exception as e:
+        logging.error(f"Ranked search API error: {e}")
+        return jsonify({'error': 'Search failed'}), 500
+
+@intelligence_bp.route('/api/intelligence/services')
+@login_required
+def api_intelligence_services():
+    """Which intelligence engines this worker has built, and what they cost"""
+    return jsonify({'services': intelligence_services.report()})
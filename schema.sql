@@ -19,6 +19,14 @@ CREATE TABLE IF NOT EXISTS users (
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Magic-link tokens, stored as SHA-256 hashes
+CREATE TABLE IF NOT EXISTS magic_link_tokens (
+  token_hash TEXT PRIMARY KEY,
+  email TEXT NOT NULL,
+  expires_at REAL NOT NULL, -- unix time
+  created_at REAL NOT NULL
+);
+
 -- Enhanced Contacts table with CRM intelligence
 CREATE TABLE IF NOT EXISTS contacts (
   id TEXT PRIMARY KEY,
@@ -95,6 +103,16 @@ CREATE TABLE IF NOT EXISTS contact_interactions (
   FOREIGN KEY (user_id) REFERENCES users (id)
 );
 
+-- Where each user's daily digest is delivered (Slack webhook URL or Telegram chat id)
+CREATE TABLE IF NOT EXISTS digest_destinations (
+  user_id TEXT NOT NULL,
+  channel TEXT NOT NULL, -- slack, telegram
+  destination TEXT NOT NULL,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id, channel),
+  FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
 -- Contact relationship mapping for introductions
 CREATE TABLE IF NOT EXISTS contact_relationships (
   id TEXT PRIMARY KEY,
@@ -146,15 +164,18 @@ CREATE INDEX IF NOT EXISTS idx_contacts_priority_level ON contacts (priority_lev
 CREATE INDEX IF NOT EXISTS idx_contacts_relationship_type ON contacts (relationship_type);
 CREATE INDEX IF NOT EXISTS idx_contacts_last_interaction ON contacts (last_interaction_date);
 CREATE INDEX IF NOT EXISTS idx_contacts_follow_up_due ON contacts (follow_up_due_date);
+CREATE INDEX IF NOT EXISTS idx_contacts_user_warmth_last ON contacts (user_id, warmth_status, last_interaction_date);
 CREATE INDEX IF NOT EXISTS idx_goals_user_id ON goals (user_id);
 CREATE INDEX IF NOT EXISTS idx_ai_suggestions_contact_id ON ai_suggestions (contact_id);
 CREATE INDEX IF NOT EXISTS idx_ai_suggestions_goal_id ON ai_suggestions (goal_id);
 CREATE INDEX IF NOT EXISTS idx_contact_interactions_contact_id ON contact_interactions (contact_id);
 CREATE INDEX IF NOT EXISTS idx_contact_interactions_timestamp ON contact_interactions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_contact_interactions_user_timestamp ON contact_interactions (user_id, timestamp);
 CREATE INDEX IF NOT EXISTS idx_contact_relationships_user_id ON contact_relationships (user_id);
 CREATE INDEX IF NOT EXISTS idx_pipeline_history_contact_id ON contact_pipeline_history (contact_id);
 CREATE INDEX IF NOT EXISTS idx_outreach_suggestions_user_id ON outreach_suggestions (user_id);
 CREATE INDEX IF NOT EXISTS idx_outreach_suggestions_priority ON outreach_suggestions (priority_score DESC);
+CREATE INDEX IF NOT EXISTS idx_magic_link_tokens_expires ON magic_link_tokens (expires_at);
 
 -- Conference Mode Tables
 CREATE TABLE IF NOT EXISTS conferences (
@@ -356,6 +377,7 @@ CREATE INDEX IF NOT EXISTS idx_users_subscription_tier ON users (subscription_ti
 CREATE INDEX IF NOT EXISTS idx_magic_links_token ON magic_links (token);
 CREATE INDEX IF NOT EXISTS idx_magic_links_email ON magic_links (email);
 CREATE INDEX IF NOT EXISTS idx_guest_sessions_token ON guest_sessions (session_token);
+CREATE INDEX IF NOT EXISTS idx_guest_sessions_expires ON guest_sessions (expires_at);
 CREATE INDEX IF NOT EXISTS idx_usage_tracking_user ON usage_tracking (user_id);
 CREATE INDEX IF NOT EXISTS idx_usage_tracking_action ON usage_tracking (action_type);
 CREATE INDEX IF NOT EXISTS idx_subscription_history_user ON subscription_history (user_id);
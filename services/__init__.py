@@ -10,21 +10,15 @@ from .unified_utilities import (
     DataUtils, ImportUtils, ProductionUtils
 )
 
-# Import specialized services
-try:
-    from .stripe_integration import StripeService
-except ImportError:
-    StripeService = None
+import importlib
 
-try:
-    from .telegram_integration import TelegramService
-except ImportError:
-    TelegramService = None
-
-try:
-    from .integrations import IntegrationsService
-except ImportError:
-    IntegrationsService = None
+# Specialized services, imported the first time they are requested so that
+# importing any services.* module doesn't load Stripe, Telegram and Slack
+OPTIONAL_SERVICES = {
+    'stripe': ('.stripe_integration', 'StripeService'),
+    'telegram': ('.telegram_integration', 'TelegramService'),
+    'integrations': ('.integrations', 'IntegrationsService'),
+}
 
 class ServiceManager:
     """
@@ -55,19 +49,21 @@ class ServiceManager:
         self._services['data'] = DataUtils()
         self._services['import'] = ImportUtils()
         self._services['production'] = ProductionUtils()
-        
-        # Optional services (only if available)
-        if StripeService:
-            self._services['stripe'] = StripeService()
-        
-        if TelegramService:
-            self._services['telegram'] = TelegramService()
-        
-        if IntegrationsService:
-            self._services['integrations'] = IntegrationsService()
+    
+    def _load_optional_service(self, service_name: str):
+        """Import and construct an optional service (None if it isn't available)"""
+        module_name, class_name = OPTIONAL_SERVICES[service_name]
+        try:
+            service_class = getattr(importlib.import_module(module_name, __name__), class_name)
+            self._services[service_name] = service_class()
+        except (ImportError, AttributeError):
+            self._services[service_name] = None
+        return self._services[service_name]
     
     def get_service(self, service_name: str):
         """Get service by name"""
+        if service_name not in self._services and service_name in OPTIONAL_SERVICES:
+            return self._load_optional_service(service_name)
         return self._services.get(service_name)
     
     def get_email_service(self) -> UnifiedEmailService:
@@ -106,7 +102,9 @@ class ServiceManager:
             'timestamp': ProductionUtils().health_check()['timestamp']
         }
         
-        for service_name, service in self._services.items():
+        for service_name, service in list(self._services.items()):
+            if service is None:
+                continue
             try:
                 if hasattr(service, 'health_check'):
                     service_health = service.health_check()
@@ -0,0 +1,223 @@
+"""
+Batch outreach message generation over goal matches.
+Loads the goal, contacts, interaction histories and uncached bios in one pass,
+then fans the LLM calls out over a rate-limited worker pool and streams results
+back.
+"""
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from models import Database
+from services.ai.context_builder import context_builder, fit_sections
+from services.unified_utilities import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+# gpt-4o requests per minute allotted to outreach drafts
+DEFAULT_REQUESTS_PER_MINUTE = 120
+HISTORY_LIMIT = 5
+# Token budget shared by the contact bio and interaction history in a prompt
+MESSAGE_CONTEXT_TOKENS = 700
+# Contact columns summarized into the bio given to the model
+BIO_FIELDS = ('title', 'company', 'location', 'relationship_type', 'tags', 'interests',
+              'notes', 'narrative_thread')
+
+
+def format_contact_bio(contact) -> str:
+    """Render a contact's profile columns as a short background paragraph"""
+    parts = []
+    role = ' at '.join(part for part in (contact['title'], contact['company']) if part)
+    if role:
+        parts.append(role)
+    if contact['location']:
+        parts.append(f"Based in {contact['location']}")
+    if contact['relationship_type']:
+        parts.append(f"Relationship: {contact['relationship_type']}")
+    if contact['tags']:
+        parts.append(f"Tags: {contact['tags']}")
+    if contact['interests']:
+        parts.append(f"Interests: {contact['interests']}")
+    for name in ('notes', 'narrative_thread'):
+        if contact[name]:
+            parts.append(str(contact[name]).strip())
+    return '. '.join(parts)
+
+
+def bio_cache_key(contact_id) -> tuple:
+    return (None, str(contact_id), 'bio')
+
+
+def load_contact_bios(conn, contact_ids: Sequence) -> Dict[Any, str]:
+    """Bios for the given contacts, formatting only those not in the fragment cache"""
+    bios, missing = {}, []
+    for contact_id in contact_ids:
+        cached = context_builder.peek_fragment(bio_cache_key(contact_id))
+        if cached is None:
+            missing.append(contact_id)
+        else:
+            bios[contact_id] = cached
+    if missing:
+        placeholders = ','.join('?' for _ in missing)
+        rows = conn.execute(
+            f"SELECT id, {', '.join(BIO_FIELDS)} FROM contacts WHERE id IN ({placeholders})",
+            tuple(missing)
+        ).fetchall()
+        for row in rows:
+            bio = format_contact_bio(row)
+            bios[row['id']] = context_builder.get_fragment(bio_cache_key(row['id']), lambda: bio)
+    return bios
+
+
+def format_interaction(interaction) -> str:
+    """Render one contact_interactions row as a single history line"""
+    timestamp = (interaction['timestamp'] or '')[:10]  # Just the date
+    direction = "Outbound" if interaction['direction'] == 'outbound' else "Inbound"
+
+    history_entry = f"{timestamp}: {direction} {interaction['interaction_type']}"
+    if interaction['subject']:
+        history_entry += f" - {interaction['subject']}"
+    if interaction['summary']:
+        history_entry += f". {interaction['summary']}"
+    if interaction['sentiment']:
+        history_entry += f" (Sentiment: {interaction['sentiment']})"
+    return history_entry
+
+
+class BatchMessageGenerator:
+    """Generates personalized outreach drafts for many contacts at once"""
+
+    def __init__(self, db: Database = None, openai_utils: 'OpenAIUtils' = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE):
+        if openai_utils is None:
+            from openai_utils import OpenAIUtils
+            openai_utils = OpenAIUtils()
+        self.db = db or Database()
+        self.openai_utils = openai_utils
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter.per_minute(requests_per_minute, burst=max_workers)
+        self.stats = {'requested': 0, 'llm_calls': 0, 'deduplicated': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    def load_batch(self, goal_id, contact_ids: Sequence) -> Tuple[Optional[Dict], List[Dict], Dict[Any, str],
+                                                                  Dict[Any, str]]:
+        """Load the goal, the contacts, their recent histories and bios on one connection"""
+        conn = self.db.get_connection()
+        try:
+            goal = conn.execute(
+                "SELECT id, title, description FROM goals WHERE id = ?",
+                (goal_id,)
+            ).fetchone()
+
+            if not contact_ids:
+                return (dict(goal) if goal else None), [], {}, {}
+
+            placeholders = ','.join('?' for _ in contact_ids)
+            contacts = conn.execute(
+                f"SELECT id, name, relationship_type FROM contacts WHERE id IN ({placeholders})",
+                tuple(contact_ids)
+            ).fetchall()
+
+            # Latest HISTORY_LIMIT interactions per contact in a single query
+            rows = conn.execute(
+                f"""SELECT contact_id, interaction_type, subject, summary, sentiment, timestamp, direction
+                    FROM (
+                        SELECT *, ROW_NUMBER() OVER (
+                            PARTITION BY contact_id ORDER BY timestamp DESC
+                        ) AS rn
+                        FROM contact_interactions
+                        WHERE contact_id IN ({placeholders})
+                    )
+                    WHERE rn <= ?
+                    ORDER BY contact_id, timestamp DESC""",
+                tuple(contact_ids) + (HISTORY_LIMIT,)
+            ).fetchall()
+
+            histories: Dict[Any, List[str]] = {}
+            for row in rows:
+                histories.setdefault(row['contact_id'], []).append(format_interaction(row))
+
+            return (
+                dict(goal) if goal else None,
+                [dict(contact) for contact in contacts],
+                {contact_id: "; ".join(lines) for contact_id, lines in histories.items()},
+                load_contact_bios(conn, [contact['id'] for contact in contacts])
+            )
+        finally:
+            conn.close()
+
+    def iter_messages(self, goal_id, contact_ids: Sequence, tone: str = "warm",
+                      scores: Optional[Dict[Any, float]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield one result dict per contact as soon as its draft is ready.
+        Contacts whose prompts are identical share a single LLM call.
+        """
+        goal, contacts, histories, bios = self.load_batch(goal_id, contact_ids)
+        if not goal:
+            logger.error(f"Goal {goal_id} not found")
+            return
+
+        prompts: Dict[str, Dict[str, Any]] = {}
+        for contact in contacts:
+            contact_bio = bios.get(contact['id'], '')
+            fitted = fit_sections(
+                [('bio', contact_bio), ('history', histories.get(contact['id'], ''))],
+                MESSAGE_CONTEXT_TOKENS
+            )
+            kwargs = {
+                'contact_name': contact['name'],
+                'goal_title': goal['title'],
+                'goal_description': goal['description'],
+                'contact_bio': fitted['bio'],
+                'interaction_history': fitted['history'],
+                'tone': tone
+            }
+            key = hashlib.sha1(repr(sorted(kwargs.items())).encode('utf-8')).hexdigest()
+            entry = prompts.setdefault(key, {'kwargs': kwargs, 'contacts': []})
+            entry['contacts'].append((contact, contact_bio, fitted['history']))
+
+        self.stats['requested'] += len(contacts)
+        self.stats['deduplicated'] += len(contacts) - len(prompts)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='outreach') as executor:
+            futures = {
+                executor.submit(self._generate, entry['kwargs']): entry
+                for entry in prompts.values()
+            }
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    message = future.result()
+                except Exception as e:
+                    self.stats['failed'] += len(entry['contacts'])
+                    logger.error(f"Error generating message for goal {goal_id}: {e}")
+                    for contact, _, _ in entry['contacts']:
+                        yield {'contact_id': contact['id'], 'contact_name': contact['name'],
+                               'goal_title': goal['title'], 'error': 'generation_failed'}
+                    continue
+
+                for contact, contact_bio, interaction_history in entry['contacts']:
+                    result = {
+                        'contact_id': contact['id'],
+                        'contact_name': contact['name'],
+                        'relationship_type': contact['relationship_type'],
+                        'goal_title': goal['title'],
+                        'message': message,
+                        'tone': tone,
+                        'has_history': bool(interaction_history),
+                        'bio_length': len(contact_bio)
+                    }
+                    if scores and contact['id'] in scores:
+                        result['similarity_score'] = scores[contact['id']]
+                    yield result
+
+    def _generate(self, kwargs: Dict[str, Any]) -> str:
+        self.rate_limiter.acquire()
+        with self._stats_lock:
+            self.stats['llm_calls'] += 1
+        return self.openai_utils.generate_message(**kwargs)
@@ -0,0 +1,538 @@
+"""
+Prompt Context Builder
+Keeps a compact, incrementally updated network summary per user and assembles
+token-budgeted prompt context for AI calls, caching the fragments it builds.
+Cached network state expires after a TTL, so writes made by other workers or
+code paths that don't notify the builder are picked up on the next load.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough OpenAI tokenizer ratio for English prose
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 800
+FRAGMENT_TTL_SECONDS = 300
+NETWORK_TTL_SECONDS = 300
+MAX_CACHED_FRAGMENTS = 2048
+MAX_CACHED_EMBEDDINGS = 4096
+# Contacts that survive lexical pre-filtering and get re-ranked with embeddings
+SEMANTIC_CANDIDATES = 200
+EMBEDDING_BATCH_SIZE = 100
+
+# Compact per-contact fields kept in memory for relevance selection
+CONTACT_FIELDS = (
+    'id', 'name', 'company', 'title', 'notes', 'tags', 'interests',
+    'warmth_level', 'warmth_status', 'last_interaction_date'
+)
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the number of prompt tokens in a piece of text"""
+    if not text:
+        return 0
+    return max(1, math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+def truncate_to_tokens(text: Optional[str], max_tokens: int) -> str:
+    """Trim text so that it fits within max_tokens"""
+    if not text or max_tokens <= 0:
+        return ""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + "..."
+
+
+def fit_sections(sections: Sequence[Tuple[str, Optional[str]]], token_budget: int) -> Dict[str, str]:
+    """
+    Fit named text sections into a shared token budget.
+    Sections are given in priority order; later sections get whatever is left.
+    """
+    fitted = {}
+    remaining = token_budget
+    for name, text in sections:
+        fitted[name] = truncate_to_tokens(text, remaining)
+        remaining -= estimate_tokens(fitted[name])
+    return fitted
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase word tokenizer shared by the lexical scorers"""
+    if not text:
+        return []
+    return _WORD_RE.findall(str(text).lower())
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity between two dense vectors"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+def openai_embed_fn() -> Optional[Callable[[List[str]], List[List[float]]]]:
+    """Batch embedding function backed by OpenAI, or None when not configured"""
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    try:
+        from openai import OpenAI
+        client = OpenAI(api_key=api_key)
+    except Exception as e:
+        logger.warning(f"Embeddings unavailable: {e}")
+        return None
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        response = client.embeddings.create(model="text-embedding-3-small", input=texts)
+        return [item.embedding for item in response.data]
+
+    return embed
+
+
+def _is_warm(contact: Dict[str, Any]) -> bool:
+    if (contact.get('warmth_status') or 0) >= 3:
+        return True
+    return (contact.get('warmth_level') or '').lower() in ('warm', 'hot')
+
+
+def _contact_text(contact: Dict[str, Any]) -> str:
+    parts = [contact.get(name) for name in ('name', 'title', 'company', 'tags', 'interests', 'notes')]
+    return ' '.join(str(part) for part in parts if part)
+
+
+def _render_contact(contact: Dict[str, Any]) -> str:
+    line = f"- {contact.get('name', 'Unknown')}"
+    role = ' at '.join(part for part in (contact.get('title'), contact.get('company')) if part)
+    if role:
+        line += f" ({role})"
+    if contact.get('warmth_level'):
+        line += f", {contact['warmth_level']}"
+    if contact.get('notes'):
+        line += f": {truncate_to_tokens(str(contact['notes']), 30)}"
+    return line
+
+
+@dataclass
+class NetworkSummary:
+    """Running aggregate of a user's network used as the prompt preamble"""
+    user_id: str
+    total_contacts: int = 0
+    warm_contacts: int = 0
+    companies: Counter = field(default_factory=Counter)
+    titles: Counter = field(default_factory=Counter)
+    goal_titles: List[str] = field(default_factory=list)
+    version: int = 0
+    loaded_at: float = field(default_factory=time.time)
+
+    def add_contact(self, contact: Dict[str, Any]):
+        self.total_contacts += 1
+        if _is_warm(contact):
+            self.warm_contacts += 1
+        if contact.get('company'):
+            self.companies[contact['company']] += 1
+        if contact.get('title'):
+            self.titles[contact['title']] += 1
+        self.version += 1
+
+    def remove_contact(self, contact: Dict[str, Any]):
+        self.total_contacts = max(0, self.total_contacts - 1)
+        if _is_warm(contact):
+            self.warm_contacts = max(0, self.warm_contacts - 1)
+        for counter, key in ((self.companies, contact.get('company')), (self.titles, contact.get('title'))):
+            if key and counter[key] > 0:
+                counter[key] -= 1
+                if counter[key] == 0:
+                    del counter[key]
+        self.version += 1
+
+    def set_goals(self, goals: Iterable[Dict[str, Any]]):
+        self.goal_titles = [goal.get('title') for goal in goals if goal.get('title')]
+        self.version += 1
+
+    def render(self, max_items: int = 5) -> str:
+        """Render the summary as a compact prompt fragment"""
+        companies = ', '.join(name for name, _ in self.companies.most_common(max_items)) or 'None'
+        titles = ', '.join(name for name, _ in self.titles.most_common(max_items)) or 'None'
+        goals = ', '.join(self.goal_titles[:3]) or 'None'
+        return (
+            f"Total contacts: {self.total_contacts}, Warm relationships: {self.warm_contacts}\n"
+            f"Top companies: {companies}\n"
+            f"Common roles: {titles}\n"
+            f"Active goals ({len(self.goal_titles)}): {goals}"
+        )
+
+
+class ContextBuilder:
+    """Builds bounded prompt context from cached per-user network state"""
+
+    def __init__(self, embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 fragment_ttl: int = FRAGMENT_TTL_SECONDS, max_fragments: int = MAX_CACHED_FRAGMENTS,
+                 network_ttl: int = NETWORK_TTL_SECONDS, max_embeddings: int = MAX_CACHED_EMBEDDINGS):
+        self._embed_fn = embed_fn
+        self._embed_fn_resolved = embed_fn is not None
+        self.fragment_ttl = fragment_ttl
+        self.max_fragments = max_fragments
+        self.network_ttl = network_ttl
+        self.max_embeddings = max_embeddings
+
+        self._lock = threading.RLock()
+        self._summaries: Dict[str, NetworkSummary] = {}
+        self._contacts: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._embeddings: "OrderedDict[Any, Tuple[str, List[float]]]" = OrderedDict()
+        self._fragments: "OrderedDict[tuple, Tuple[float, str]]" = OrderedDict()
+        self._stats = Counter()
+
+    # ------------------------------------------------------------------
+    # Network state
+    # ------------------------------------------------------------------
+
+    def _is_fresh(self, summary: Optional[NetworkSummary]) -> bool:
+        return summary is not None and time.time() - summary.loaded_at < self.network_ttl
+
+    def is_loaded(self, user_id: str) -> bool:
+        with self._lock:
+            return self._is_fresh(self._summaries.get(str(user_id)))
+
+    def load_user(self, user_id: str, contacts: Iterable[Dict[str, Any]],
+                  goals: Optional[Iterable[Dict[str, Any]]] = None):
+        """Seed (or reseed) the cached network state for a user"""
+        user_id = str(user_id)
+        summary = NetworkSummary(user_id=user_id)
+        records = {}
+        for contact in contacts:
+            record = self._compact(contact)
+            records[record['id']] = record
+            summary.add_contact(record)
+        summary.set_goals(goals or [])
+
+        with self._lock:
+            previous = self._summaries.get(user_id)
+            if previous:
+                summary.version = previous.version + summary.version
+            self._summaries[user_id] = summary
+            self._contacts[user_id] = records
+        self._stats['loads'] += 1
+
+    def ensure_loaded(self, user_id: str,
+                      loader: Callable[[], Tuple[Iterable[Dict[str, Any]], Iterable[Dict[str, Any]]]]) -> NetworkSummary:
+        """Load a user's network through loader() unless a fresh copy is cached"""
+        user_id = str(user_id)
+        with self._lock:
+            summary = self._summaries.get(user_id)
+        if self._is_fresh(summary):
+            self._stats['summary_hits'] += 1
+            return summary
+        if summary is not None:
+            self._stats['summary_expired'] += 1
+
+        contacts, goals = loader()
+        self.load_user(user_id, contacts, goals)
+        with self._lock:
+            return self._summaries[user_id]
+
+    def upsert_contact(self, user_id: str, contact: Dict[str, Any]):
+        """Apply a contact create/update to the cached summary"""
+        user_id = str(user_id)
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return  # Nothing cached yet; the next load reads fresh data
+            record = self._compact(contact)
+            records = self._contacts[user_id]
+            previous = records.get(record['id'])
+            if previous:
+                summary.remove_contact(previous)
+            summary.add_contact(record)
+            records[record['id']] = record
+            self._embeddings.pop(record['id'], None)
+            self._drop_fragments(lambda key: key[0] == user_id or key[1:2] == (record['id'],))
+
+    def remove_contact(self, user_id: str, contact_id: str):
+        """Apply a contact delete to the cached summary"""
+        user_id, contact_id = str(user_id), str(contact_id)
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return
+            previous = self._contacts[user_id].pop(contact_id, None)
+            if previous:
+                summary.remove_contact(previous)
+            self._embeddings.pop(contact_id, None)
+            self._drop_fragments(lambda key: key[0] == user_id or key[1:2] == (contact_id,))
+
+    def set_goals(self, user_id: str, goals: Iterable[Dict[str, Any]]):
+        """Replace the cached goal list for a user"""
+        user_id = str(user_id)
+        with self._lock:
+            summary = self._summaries.get(user_id)
+            if summary is None:
+                return
+            summary.set_goals(goals)
+            self._drop_fragments(lambda key: key[0] == user_id)
+
+    def add_goal(self, user_id: str, goal: Dict[str, Any]):
+        """Append a newly created active goal to the cached summary"""
+        if (goal.get('status') or 'active') != 'active':
+            return
+        with self._lock:
+            summary = self._summaries.get(str(user_id))
+            if summary is None:
+                return
+            goals = [{'title': title} for title in summary.goal_titles] + [goal]
+        self.set_goals(user_id, goals)
+
+    def invalidate_user(self, user_id: str):
+        """Forget everything cached for a user (e.g. after a bulk import)"""
+        user_id = str(user_id)
+        with self._lock:
+            self._summaries.pop(user_id, None)
+            for contact_id in self._contacts.pop(user_id, {}):
+                self._embeddings.pop(contact_id, None)
+            self._drop_fragments(lambda key: key[0] == user_id)
+
+    def invalidate_contact(self, contact_id: str):
+        """Drop cached fragments (bio, history) built for a single contact"""
+        contact_id = str(contact_id)
+        with self._lock:
+            self._drop_fragments(lambda key: key[1:2] == (contact_id,))
+
+    def get_summary(self, user_id: str) -> Optional[NetworkSummary]:
+        with self._lock:
+            return self._summaries.get(str(user_id))
+
+    def get_contacts(self, user_id: str) -> List[Dict[str, Any]]:
+        """Cached compact contact records for a user"""
+        with self._lock:
+            return list(self._contacts.get(str(user_id), {}).values())
+
+    # ------------------------------------------------------------------
+    # Fragment cache
+    # ------------------------------------------------------------------
+
+    def get_fragment(self, key: tuple, factory: Callable[[], str], ttl: Optional[int] = None) -> str:
+        """
+        Return a cached prompt fragment, building it with factory() on a miss.
+        Keys are tuples whose first element is the owning user id (or None)
+        and whose second element, when present, is the contact id.
+        """
+        cached = self.peek_fragment(key)
+        if cached is not None:
+            return cached
+
+        now = time.time()
+        value = factory() or ""
+        with self._lock:
+            self._fragments[key] = (now + (ttl or self.fragment_ttl), value)
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        self._stats['fragment_misses'] += 1
+        return value
+
+    def peek_fragment(self, key: tuple) -> Optional[str]:
+        """The cached fragment for key, or None without building it"""
+        with self._lock:
+            cached = self._fragments.get(key)
+            if cached and cached[0] > time.time():
+                self._fragments.move_to_end(key)
+                self._stats['fragment_hits'] += 1
+                return cached[1]
+        return None
+
+    def _drop_fragments(self, predicate: Callable[[tuple], bool]):
+        for key in [key for key in self._fragments if predicate(key)]:
+            del self._fragments[key]
+
+    # ------------------------------------------------------------------
+    # Relevance selection
+    # ------------------------------------------------------------------
+
+    def select_contacts(self, user_id: str, query: Optional[str], token_budget: int) -> List[Dict[str, Any]]:
+        """Pick the most relevant contacts for a query that fit within token_budget"""
+        contacts = self.get_contacts(user_id)
+        if not contacts or token_budget <= 0:
+            return []
+
+        ranked = self._rank_contacts(contacts, query)
+        selected, used = [], 0
+        for contact in ranked:
+            cost = estimate_tokens(_render_contact(contact)) + 1
+            if used + cost > token_budget:
+                break
+            selected.append(contact)
+            used += cost
+        return selected
+
+    def _rank_contacts(self, contacts: List[Dict[str, Any]], query: Optional[str]) -> List[Dict[str, Any]]:
+        query_terms = set(tokenize(query))
+
+        def lexical_score(contact):
+            terms = set(tokenize(_contact_text(contact)))
+            overlap = len(query_terms & terms) / len(query_terms) if query_terms else 0.0
+            return overlap + (0.1 if _is_warm(contact) else 0.0)
+
+        ranked = sorted(contacts, key=lexical_score, reverse=True)
+        if not query_terms:
+            return ranked
+
+        candidates = ranked[:SEMANTIC_CANDIDATES]
+        vectors = self._embed_contacts(candidates)
+        query_vector = self._embed_query(query) if vectors else None
+        if not query_vector:
+            return ranked
+
+        def semantic_score(contact):
+            vector = vectors.get(contact['id'])
+            semantic = cosine_similarity(query_vector, vector) if vector else 0.0
+            return semantic + 0.5 * lexical_score(contact)
+
+        reranked = sorted(candidates, key=semantic_score, reverse=True)
+        return reranked + ranked[SEMANTIC_CANDIDATES:]
+
+    def _resolve_embed_fn(self):
+        if not self._embed_fn_resolved:
+            self._embed_fn_resolved = True
+            self._embed_fn = openai_embed_fn()
+        return self._embed_fn
+
+    def _embed_contacts(self, contacts: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        embed_fn = self._resolve_embed_fn()
+        if not embed_fn:
+            return {}
+
+        vectors, missing = {}, []
+        with self._lock:
+            for contact in contacts:
+                text = _contact_text(contact)
+                fingerprint = hashlib.sha1(text.encode('utf-8')).hexdigest()
+                cached = self._embeddings.get(contact['id'])
+                if cached and cached[0] == fingerprint:
+                    self._embeddings.move_to_end(contact['id'])
+                    vectors[contact['id']] = cached[1]
+                else:
+                    missing.append((contact['id'], fingerprint, text))
+
+        try:
+            for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+                batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+                embedded = embed_fn([text for _, _, text in batch])
+                with self._lock:
+                    for (contact_id, fingerprint, _), vector in zip(batch, embedded):
+                        self._remember_embedding(contact_id, (fingerprint, vector))
+                        vectors[contact_id] = vector
+                self._stats['embedding_calls'] += 1
+        except Exception as e:
+            logger.warning(f"Contact embedding failed, using lexical ranking: {e}")
+        return vectors
+
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        key = (None, 'query_embedding', hashlib.sha1(query.encode('utf-8')).hexdigest())
+        with self._lock:
+            cached = self._embeddings.get(key)
+            if cached:
+                self._embeddings.move_to_end(key)
+        if cached:
+            return cached[1]
+        try:
+            vector = self._resolve_embed_fn()([query])[0]
+        except Exception as e:
+            logger.warning(f"Query embedding failed: {e}")
+            return None
+        with self._lock:
+            self._remember_embedding(key, ('', vector))
+        return vector
+
+    def _remember_embedding(self, key, entry: Tuple[str, List[float]]):
+        """LRU insert; call with self._lock held"""
+        self._embeddings[key] = entry
+        self._embeddings.move_to_end(key)
+        while len(self._embeddings) > self.max_embeddings:
+            self._embeddings.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Context assembly
+    # ------------------------------------------------------------------
+
+    def build_context(self, user_id: str, query: Optional[str] = None,
+                      token_budget: int = DEFAULT_TOKEN_BUDGET,
+                      interactions: Optional[Sequence[str]] = None) -> str:
+        """
+        Assemble prompt context: network summary first, then the most relevant
+        contacts, then recent interactions, never exceeding token_budget.
+        """
+        user_id = str(user_id)
+        summary = self.get_summary(user_id)
+        if summary is None:
+            return "No contact data available"
+
+        query_key = hashlib.sha1((query or '').encode('utf-8')).hexdigest()
+        interactions_key = hashlib.sha1('\n'.join(interactions or []).encode('utf-8')).hexdigest()
+        key = (user_id, 'context', summary.version, query_key, interactions_key, token_budget)
+        return self.get_fragment(key, lambda: self._assemble(user_id, summary, query, token_budget, interactions))
+
+    def _assemble(self, user_id: str, summary: NetworkSummary, query: Optional[str],
+                  token_budget: int, interactions: Optional[Sequence[str]]) -> str:
+        summary_text = truncate_to_tokens(
+            self.get_fragment((user_id, 'summary', summary.version), summary.render),
+            token_budget
+        )
+        parts = [summary_text]
+        remaining = token_budget - estimate_tokens(summary_text)
+
+        # Split what is left between contacts and interaction history
+        contact_budget = remaining if not interactions else remaining * 2 // 3
+        contacts = self.select_contacts(user_id, query, contact_budget - 3)
+        if contacts:
+            block = "Relevant contacts:\n" + '\n'.join(_render_contact(contact) for contact in contacts)
+            parts.append(block)
+            remaining -= estimate_tokens(block)
+
+        if interactions and remaining > 0:
+            lines, used = [], estimate_tokens("Recent interactions:")
+            for line in interactions:
+                cost = estimate_tokens(line) + 1
+                if used + cost > remaining:
+                    break
+                lines.append(f"- {line}")
+                used += cost
+            if lines:
+                parts.append("Recent interactions:\n" + '\n'.join(lines))
+
+        return '\n\n'.join(part for part in parts if part)
+
+    def _compact(self, contact: Dict[str, Any]) -> Dict[str, Any]:
+        record = {name: contact.get(name) for name in CONTACT_FIELDS}
+        record['id'] = str(record['id'])
+        return record
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache effectiveness counters"""
+        with self._lock:
+            return {
+                **self._stats,
+                'users_cached': len(self._summaries),
+                'fragments_cached': len(self._fragments),
+                'embeddings_cached': len(self._embeddings)
+            }
+
+
+# Global instance for easy importing
+context_builder = ContextBuilder()
@@ -7,7 +7,10 @@ Includes contact bio, interaction history, and relationship context for personal
 import logging
 from models import Database, Contact, Goal, ContactInteraction
 from openai_utils import OpenAIUtils
-from database_utils import load_contact_bio
+from services.ai.context_builder import context_builder, fit_sections
+from services.ai.batch_generation import (
+    BatchMessageGenerator, MESSAGE_CONTEXT_TOKENS, format_interaction, load_contact_bios
+)
 
 def get_contact_interaction_history(contact_id, limit=5):
     """Get recent interaction history for a contact"""
@@ -27,20 +30,7 @@ def get_contact_interaction_history(contact_id, limit=5):
         if not interactions:
             return ""
         
-        history_parts = []
-        for interaction in interactions:
-            timestamp = interaction['timestamp'][:10]  # Just the date
-            direction = "Outbound" if interaction['direction'] == 'outbound' else "Inbound"
-            
-            history_entry = f"{timestamp}: {direction} {interaction['interaction_type']}"
-            if interaction['subject']:
-                history_entry += f" - {interaction['subject']}"
-            if interaction['summary']:
-                history_entry += f". {interaction['summary']}"
-            if interaction['sentiment']:
-                history_entry += f" (Sentiment: {interaction['sentiment']})"
-            
-            history_parts.append(history_entry)
+        history_parts = [format_interaction(interaction) for interaction in interactions]
         
         return "; ".join(history_parts)
         
@@ -73,19 +63,24 @@ def generate_personalized_message(contact_id, goal_id, tone="warm"):
             logging.error(f"Contact {contact_id} or goal {goal_id} not found")
             return None
         
-        # Load comprehensive contact bio
-        contact_bio = load_contact_bio(contact_id)
+        # Load contact bio and interaction history, cached per contact
+        contact_bio = load_contact_bios(conn, [contact_id]).get(contact_id, '')
+        interaction_history = context_builder.get_fragment(
+            (None, str(contact_id), 'history'), lambda: get_contact_interaction_history(contact_id)
+        )
         
-        # Get interaction history
-        interaction_history = get_contact_interaction_history(contact_id)
+        # Bound the prompt: the bio takes priority, history gets the remainder
+        fitted = fit_sections(
+            [('bio', contact_bio), ('history', interaction_history)], MESSAGE_CONTEXT_TOKENS
+        )
         
         # Generate the message
         message = openai_utils.generate_message(
             contact_name=contact['name'],
             goal_title=goal['title'],
             goal_description=goal['description'],
-            contact_bio=contact_bio,
-            interaction_history=interaction_history,
+            contact_bio=fitted['bio'],
+            interaction_history=fitted['history'],
             tone=tone
         )
         
@@ -107,19 +102,21 @@ def generate_personalized_message(contact_id, goal_id, tone="warm"):
 
 def generate_messages_for_goal_matches(goal_id, max_contacts=5, tone="warm"):
     """Generate messages for the top contacts matched to a goal"""
+    messages = list(stream_messages_for_goal_matches(goal_id, max_contacts, tone))
+    messages = [message for message in messages if 'error' not in message]
+    messages.sort(key=lambda message: message.get('similarity_score', 0), reverse=True)
+    return messages
+
+def stream_messages_for_goal_matches(goal_id, max_contacts=50, tone="warm", generator=None):
+    """Yield drafts for the top goal matches as they complete (batched, concurrent)"""
     from database_utils import match_contacts_to_goal
     
     # Get top matches for the goal
-    matches = match_contacts_to_goal(goal_id)
+    matches = match_contacts_to_goal(goal_id)[:max_contacts]
+    scores = {contact_id: score for contact_id, contact_name, score in matches}
     
-    messages = []
-    for contact_id, contact_name, score in matches[:max_contacts]:
-        message_data = generate_personalized_message(contact_id, goal_id, tone)
-        if message_data:
-            message_data['similarity_score'] = score
-            messages.append(message_data)
-    
-    return messages
+    generator = generator or BatchMessageGenerator()
+    yield from generator.iter_messages(goal_id, list(scores), tone=tone, scores=scores)
 
 def test_message_generation():
     """Test the enhanced message generation with different tones and contexts"""
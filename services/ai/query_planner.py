@@ -0,0 +1,400 @@
+"""
+Natural Language Query Planner
+Parses common network questions ("warm contacts at fintech companies I haven't
+talked to in 60 days") into structured filters that compile to SQL, so only
+genuinely open-ended questions pay for an LLM round trip.
+"""
+
+import logging
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import astuple, dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_PLANS = 1024
+DEFAULT_RESULT_LIMIT = 10
+MAX_RESULT_LIMIT = 50
+# Assumed window for "haven't talked to recently" with no explicit period
+DEFAULT_INACTIVE_DAYS = 30
+
+# Intents
+CONTACTS = 'contacts'
+FOLLOW_UPS = 'follow_ups'
+STATS = 'stats'
+GOALS = 'goals'
+OPEN_ENDED = 'open_ended'
+
+# warmth_status scale: 1=Cold, 2=Aware, 3=Warm, 4=Active, 5=Contributor
+WARMTH_RANGES = {
+    'cold': (None, 1),
+    'aware': (2, 2),
+    'lukewarm': (2, 2),
+    'warm': (3, None),
+    'hot': (4, None),
+    'active': (4, None),
+    'engaged': (4, None),
+    'contributor': (5, None),
+    'contributors': (5, None),
+}
+
+# Role words and the substrings they match in title / relationship_type / tags
+ROLE_SYNONYMS = {
+    'investor': ('investor', 'vc', 'venture', 'angel'),
+    'founder': ('founder', 'ceo', 'co-founder'),
+    'engineer': ('engineer', 'developer', 'cto'),
+    'designer': ('designer', 'design'),
+    'recruiter': ('recruiter', 'talent'),
+    'advisor': ('advisor', 'mentor'),
+    'press': ('press', 'journalist', 'reporter', 'editor'),
+    'partner': ('partner',),
+    'executive': ('ceo', 'cto', 'cfo', 'coo', 'vp', 'head of', 'director'),
+}
+ROLE_ALIASES = {
+    'investors': 'investor', 'vc': 'investor', 'vcs': 'investor', 'angels': 'investor', 'angel': 'investor',
+    'founders': 'founder', 'ceos': 'founder',
+    'engineers': 'engineer', 'developers': 'engineer', 'developer': 'engineer',
+    'designers': 'designer',
+    'recruiters': 'recruiter',
+    'advisors': 'advisor', 'mentors': 'advisor', 'mentor': 'advisor',
+    'journalists': 'press', 'journalist': 'press', 'reporters': 'press',
+    'partners': 'partner',
+    'executives': 'executive', 'execs': 'executive',
+}
+ROLE_ALIASES.update({role: role for role in ROLE_SYNONYMS})
+
+UNIT_DAYS = {'day': 1, 'week': 7, 'month': 30, 'year': 365}
+NAMED_PERIODS = {'today': 1, 'yesterday': 2, 'this week': 7, 'last week': 14,
+                 'this month': 30, 'last month': 60, 'this year': 365}
+
+_OPEN_ENDED_RE = re.compile(
+    r"^(why|how (?:should|can|do|would)|what should|should i|help me|advice|suggest|recommend|"
+    r"write|draft|compose|summari[sz]e|explain|who should|what do you think|tell me about|"
+    r"schedule|create|remind me|send|email|message|introduce|log|mark)\b"
+)
+_COUNT_RE = re.compile(r"^how many\b")
+_LIMIT_RE = re.compile(r"\b(?:top|first|show(?: me)?|list|find)\s+(\d{1,3})\b")
+# A time window with its leading preposition, so removing it leaves no dangling "in"
+_WINDOW_PREFIX = r"(?:\b(?:in|for|over|within|during|since|from)\s+)?(?:the\s+)?"
+_PERIOD_RE = re.compile(_WINDOW_PREFIX + r"(?:(?:last|past)\s+)?\b(\d{1,4})\s*(day|week|month|year)s?\b")
+_NAMED_PERIOD_RE = re.compile(_WINDOW_PREFIX + r"\b(" + '|'.join(NAMED_PERIODS) + r")\b")
+_INACTIVE_RE = re.compile(
+    r"\b(?:haven'?t|have not|not|no|never|without)\s+(?:been\s+)?"
+    r"(?:talked|spoken|contacted|reached out|heard from|been in touch|interacted|met|caught up)"
+    r"(?:\s+(?:to|with))?\b"
+)
+_ACTIVE_RE = re.compile(
+    r"\b(?:talked|spoke|spoken|contacted|reached out|heard from|interacted|met|caught up)"
+    r"(?:\s+(?:to|with))?\b"
+)
+# Only phrases about adding contacts; a bare "new" is usually part of a name ("new york")
+_ADDED_RE = re.compile(
+    r"\b(?:new\s+(?:contacts?|people|connections?)|newly added|added|add|imported)\b"
+)
+_FOLLOW_UP_RE = re.compile(r"\b(?:follow[- ]?ups?|overdue|due|remind(?:er)?s?|need(?:s)? follow)\b")
+_STATS_RE = re.compile(r"\b(?:stats|statistics|metrics|performance|response rate|analytics)\b")
+_GOALS_RE = re.compile(r"\b(?:my goals?|goals|objectives?|targets?)\b")
+# "at acme and hooli", "in san francisco", "from the new york times"
+_PLACE_RE = re.compile(
+    r"\b(?P<prep>working at|works at|work at|based in|located in|at|from|in|near)\s+"
+    r"(?P<names>.+?)(?=\s+(?:who|that|i|we|with|but|at|from|in|near)\b|[?.!]|$)"
+)
+_NAME_SEPARATOR_RE = re.compile(r"\s*(?:,|\band\b|\bor\b|&)\s*")
+_INDUSTRY_SUFFIX_RE = re.compile(r"\s+(?:companies|company|startups?|firms?|space|industry|sector)$")
+_LOCATION_PREPOSITIONS = ('in', 'based in', 'located in', 'near')
+_NOT_KEYWORDS = frozenset((
+    'my', 'the', 'a', 'an', 'all', 'last', 'this', 'network', 'touch', 'days', 'weeks', 'months',
+    'contacts', 'people', 'anyone', 'someone', 'companies', 'company',
+    'today', 'yesterday', 'week', 'month', 'year'
+))
+
+
+def _window(text: str) -> Tuple[Optional[int], str]:
+    """Days in the first period mentioned in text ("in 60 days", "this week") and the words naming it"""
+    match = _PERIOD_RE.search(text)
+    if match:
+        return int(match.group(1)) * UNIT_DAYS[match.group(2)], match.group(0)
+    match = _NAMED_PERIOD_RE.search(text)
+    if match:
+        return NAMED_PERIODS[match.group(1)], match.group(0)
+    return None, ''
+
+
+def _names(phrase: str) -> List[str]:
+    """Split "acme, hooli and the new york times" into names, dropping filler words"""
+    names = []
+    for name in _NAME_SEPARATOR_RE.split(phrase):
+        words = re.sub(r"^(?:the|a|an)\s+", '', name.strip()).split()
+        if words and not all(word in _NOT_KEYWORDS or word in ROLE_ALIASES or word in WARMTH_RANGES
+                             or word.isdigit() for word in words):
+            names.append(' '.join(words))
+    return names
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    """Structured reading of a natural language question"""
+    intent: str
+    query: str = ''
+    min_warmth: Optional[int] = None
+    max_warmth: Optional[int] = None
+    roles: Tuple[str, ...] = ()
+    companies: Tuple[str, ...] = ()
+    locations: Tuple[str, ...] = ()
+    inactive_days: Optional[int] = None
+    active_within_days: Optional[int] = None
+    added_within_days: Optional[int] = None
+    count_only: bool = False
+    limit: int = DEFAULT_RESULT_LIMIT
+
+    @property
+    def is_structured(self) -> bool:
+        """Whether the plan can be answered without the LLM"""
+        return self.intent != OPEN_ENDED
+
+    @property
+    def cache_key(self) -> tuple:
+        """Every field that affects the answer; the raw question is left out"""
+        return astuple(replace(self, query=''))
+
+    @property
+    def has_filters(self) -> bool:
+        return any((self.min_warmth, self.max_warmth, self.roles, self.companies, self.locations,
+                    self.inactive_days,
+                    self.active_within_days, self.added_within_days))
+
+    def describe(self) -> str:
+        """Human readable summary of the filters, e.g. for reply headers"""
+        if self.intent == FOLLOW_UPS:
+            return "contacts with follow-ups due"
+        parts = []
+        warmth = {(None, 1): 'cold', (2, 2): 'aware', (3, None): 'warm',
+                  (4, None): 'active', (5, None): 'contributor'}.get((self.min_warmth, self.max_warmth))
+        parts.append(f"{warmth} contacts" if warmth else "contacts")
+        if self.roles:
+            parts.append(f"who are {' or '.join('press' if role == 'press' else role + 's' for role in self.roles)}")
+        if self.companies:
+            parts.append(f"at {' or '.join(self.companies)}")
+        if self.locations:
+            parts.append(f"in {' or '.join(self.locations)}")
+        if self.inactive_days:
+            parts.append(f"not contacted in {self.inactive_days} days")
+        if self.active_within_days:
+            parts.append(f"contacted in the last {self.active_within_days} days")
+        if self.added_within_days:
+            parts.append(f"added in the last {self.added_within_days} days")
+        return ', '.join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'intent': self.intent,
+            'description': self.describe(),
+            'min_warmth': self.min_warmth,
+            'max_warmth': self.max_warmth,
+            'roles': list(self.roles),
+            'companies': list(self.companies),
+            'locations': list(self.locations),
+            'inactive_days': self.inactive_days,
+            'active_within_days': self.active_within_days,
+            'added_within_days': self.added_within_days,
+            'count_only': self.count_only,
+            'limit': self.limit,
+        }
+
+
+def parse_query(query: str) -> QueryPlan:
+    """Parse a question into a QueryPlan without any caching"""
+    text = ' '.join(query.lower().replace('’', "'").split())
+    if not text:
+        return QueryPlan(intent=OPEN_ENDED, query=query)
+    if _OPEN_ENDED_RE.search(text):
+        return QueryPlan(intent=OPEN_ENDED, query=query)
+
+    filters: Dict[str, Any] = {}
+    consumed = text
+
+    # Recency: each trigger consumes only itself and the window that follows it
+    inactive = _INACTIVE_RE.search(consumed)
+    if inactive:
+        days, phrase = _window(consumed[inactive.end():])
+        filters['inactive_days'] = days or DEFAULT_INACTIVE_DAYS
+        consumed = consumed.replace(inactive.group(0), ' ', 1).replace(phrase, ' ', 1) if phrase \
+            else consumed.replace(inactive.group(0), ' ', 1)
+    else:
+        active = _ACTIVE_RE.search(consumed)
+        days, phrase = _window(consumed[active.end():]) if active else (None, '')
+        if days:
+            filters['active_within_days'] = days
+            consumed = consumed.replace(active.group(0), ' ', 1).replace(phrase, ' ', 1)
+    added = _ADDED_RE.search(consumed)
+    if added:
+        days, phrase = _window(consumed[added.end():])
+        filters['added_within_days'] = days or 7
+        consumed = consumed.replace(added.group(0), ' ', 1)
+        if phrase:
+            consumed = consumed.replace(phrase, ' ', 1)
+    consumed = ' '.join(consumed.split())
+
+    # Companies and places ("at fintech companies", "from acme and hooli", "in san francisco")
+    companies, locations = [], []
+    for match in _PLACE_RE.finditer(consumed):
+        phrase = match.group('names')
+        industry = _INDUSTRY_SUFFIX_RE.search(phrase)
+        phrase = _INDUSTRY_SUFFIX_RE.sub('', phrase)
+        target = locations if match.group('prep') in _LOCATION_PREPOSITIONS and not industry else companies
+        target.extend(_names(phrase))
+    if companies:
+        filters['companies'] = tuple(dict.fromkeys(companies))
+    if locations:
+        filters['locations'] = tuple(dict.fromkeys(locations))
+    consumed = _PLACE_RE.sub(' ', consumed)
+
+    # Warmth and roles
+    words = re.findall(r"[a-z0-9\-]+", consumed)
+    for word in words:
+        if word in WARMTH_RANGES and 'min_warmth' not in filters and 'max_warmth' not in filters:
+            low, high = WARMTH_RANGES[word]
+            if low is not None:
+                filters['min_warmth'] = low
+            if high is not None:
+                filters['max_warmth'] = high
+    roles = tuple(dict.fromkeys(ROLE_ALIASES[word] for word in words if word in ROLE_ALIASES))
+    if roles:
+        filters['roles'] = roles
+
+    limit_match = _LIMIT_RE.search(text)
+    limit = min(int(limit_match.group(1)), MAX_RESULT_LIMIT) if limit_match else DEFAULT_RESULT_LIMIT
+    count_only = bool(_COUNT_RE.search(text))
+
+    if _FOLLOW_UP_RE.search(text):
+        intent = FOLLOW_UPS
+    elif filters or re.search(r"\b(?:contacts?|people|who|anyone|network)\b", text):
+        intent = CONTACTS
+    elif _STATS_RE.search(text):
+        intent = STATS
+    elif _GOALS_RE.search(text):
+        intent = GOALS
+    else:
+        intent = OPEN_ENDED
+
+    # "Who" questions without a single filter ("who is the best person to ...")
+    # need reasoning over the network, not a listing.
+    if intent == CONTACTS and not filters and not count_only and not re.search(
+            r"\b(?:show|list|all|my contacts|recent)\b", text):
+        intent = OPEN_ENDED
+
+    return QueryPlan(intent=intent, query=query, limit=limit, count_only=count_only, **filters)
+
+
+def compile_sql(plan: QueryPlan, user_id, placeholder: str = '%s',
+                now: Optional[datetime] = None) -> Tuple[str, List[Any]]:
+    """
+    Compile a contacts / follow-up plan into a parameterized query over the
+    contacts table. Relative windows are resolved against now at compile time,
+    so cached plans never carry stale dates.
+    """
+    now = now or datetime.utcnow()
+    clauses = [f"user_id = {placeholder}"]
+    params: List[Any] = [user_id]
+
+    if plan.intent == FOLLOW_UPS:
+        clauses.append(f"follow_up_due_date IS NOT NULL AND follow_up_due_date <= {placeholder}")
+        params.append(now + timedelta(days=7))
+    if plan.min_warmth is not None:
+        clauses.append(f"warmth_status >= {placeholder}")
+        params.append(plan.min_warmth)
+    if plan.max_warmth is not None:
+        clauses.append(f"warmth_status <= {placeholder}")
+        params.append(plan.max_warmth)
+    if plan.inactive_days:
+        clauses.append(f"(last_interaction_date IS NULL OR last_interaction_date < {placeholder})")
+        params.append(now - timedelta(days=plan.inactive_days))
+    if plan.active_within_days:
+        clauses.append(f"last_interaction_date >= {placeholder}")
+        params.append(now - timedelta(days=plan.active_within_days))
+    if plan.added_within_days:
+        clauses.append(f"created_at >= {placeholder}")
+        params.append(now - timedelta(days=plan.added_within_days))
+    for role in plan.roles:
+        patterns = ROLE_SYNONYMS[role]
+        ors = []
+        for pattern in patterns:
+            for column in ('title', 'relationship_type', 'tags'):
+                ors.append(f"LOWER({column}) LIKE {placeholder}")
+                params.append(f"%{pattern}%")
+        clauses.append(f"({' OR '.join(ors)})")
+    # Any of the named companies; any of the named places (tags carry geography)
+    for names, columns in ((plan.companies, ('company', 'title', 'tags', 'notes', 'interests')),
+                           (plan.locations, ('location', 'tags'))):
+        if not names:
+            continue
+        ors = []
+        for name in names:
+            for column in columns:
+                ors.append(f"LOWER({column}) LIKE {placeholder}")
+                params.append(f"%{name}%")
+        clauses.append(f"({' OR '.join(ors)})")
+
+    where = ' AND '.join(clauses)
+    if plan.count_only:
+        return f"SELECT COUNT(*) FROM contacts WHERE {where}", params
+
+    if plan.intent == FOLLOW_UPS:
+        order = "follow_up_due_date ASC"
+    elif plan.inactive_days:
+        order = "last_interaction_date ASC"
+    else:
+        order = "warmth_status DESC, last_interaction_date DESC"
+    sql = (
+        "SELECT id, name, company, title, warmth_status, warmth_label, last_interaction_date, "
+        "follow_up_action, follow_up_due_date "
+        f"FROM contacts WHERE {where} ORDER BY {order} LIMIT {placeholder}"
+    )
+    params.append(plan.limit)
+    return sql, params
+
+
+class QueryPlanner:
+    """Caches parsed plans; identical questions are parsed once"""
+
+    def __init__(self, max_plans: int = MAX_CACHED_PLANS):
+        self.max_plans = max_plans
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = Counter()
+
+    def plan(self, query: str) -> QueryPlan:
+        key = ' '.join((query or '').lower().split())
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None:
+                self._plans.move_to_end(key)
+                self._stats['hits'] += 1
+                return cached
+
+        try:
+            plan = parse_query(query or '')
+        except Exception as e:
+            logger.error(f"Error planning query '{query}': {e}")
+            plan = QueryPlan(intent=OPEN_ENDED, query=query)
+
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_plans:
+                self._plans.popitem(last=False)
+            self._stats['misses'] += 1
+            self._stats[plan.intent] += 1
+        return plan
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['cached_plans'] = len(self._plans)
+            return stats
+
+
+# Global instance for easy importing
+query_planner = QueryPlanner()
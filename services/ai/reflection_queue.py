@@ -0,0 +1,282 @@
+"""
+Background AI reflection pipeline for journal entries.
+Requests are queued and answered by a local worker pool so the HTTP request
+returns immediately. Job status and results are written to a SQLite (WAL)
+table shared by every app worker, so clients can poll a job from whichever
+worker their request reaches. A repeated question on an entry joins the job
+already answering it while that job is queued or running, and finished
+answers are reused by a hash of the entry content and question.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from services.auth.magic_links import ExpirySweeper
+from services.unified_utilities import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_PATH = 'reflection_jobs.db'
+DEFAULT_MAX_WORKERS = 4
+# gpt-4o requests per minute allotted to journal reflections
+DEFAULT_REQUESTS_PER_MINUTE = 60
+ACTIVE_STATUSES = ('queued', 'running')
+# A queued or running job not updated for this long lost its worker
+JOB_STALE_SECONDS = 600
+# Finished jobs (and the answers reused from them) are kept this long
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+RETENTION_SWEEP_INTERVAL_SECONDS = 3600
+POLL_INTERVAL_SECONDS = 0.05
+
+_COLUMNS = ('job_id', 'user_id', 'entry_id', 'reflection_type', 'cache_key', 'status', 'ai_response',
+            'reflection_id', 'error', 'cached', 'created_at', 'finished_at')
+
+
+def reflection_cache_key(title: str, content: str, user_question: str, reflection_type: str) -> str:
+    """Hash of everything the reflection depends on"""
+    payload = json.dumps([title or '', content or '', (user_question or '').strip().lower(), reflection_type])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class ReflectionJob:
+    """One queued reflection request and, once finished, its result"""
+    job_id: str
+    user_id: str
+    entry_id: str
+    reflection_type: str
+    cache_key: str
+    title: str = ''
+    content: str = ''
+    user_question: str = ''
+    first_reflection: bool = False
+    status: str = 'queued'  # queued, running, done, failed
+    ai_response: Optional[str] = None
+    reflection_id: Optional[str] = None
+    error: Optional[str] = None
+    cached: bool = False
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status not in ACTIVE_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'entry_id': self.entry_id,
+            'status': self.status,
+            'reflection_type': self.reflection_type,
+            'ai_response': self.ai_response,
+            'reflection_id': self.reflection_id,
+            'error': self.error,
+            'cached': self.cached
+        }
+
+
+class ReflectionQueue:
+    """
+    Queues reflection jobs onto a worker pool.
+    generate_fn(job) returns the reflection text and raises on failure;
+    persist_fn(job) stores it and returns the reflection id.
+    """
+
+    def __init__(self, generate_fn: Callable[[ReflectionJob], str],
+                 persist_fn: Callable[[ReflectionJob], Optional[str]],
+                 db_path: Optional[str] = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS,
+                 requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+                 retention: float = JOB_RETENTION_SECONDS):
+        self.generate_fn = generate_fn
+        self.persist_fn = persist_fn
+        self.db_path = db_path or os.environ.get('REFLECTION_JOBS_PATH', DEFAULT_JOBS_PATH)
+        self.retention = retention
+        self.rate_limiter = RateLimiter.per_minute(requests_per_minute, burst=max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='journal-reflection')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self.sweeper = ExpirySweeper(self.purge_finished, RETENTION_SWEEP_INTERVAL_SECONDS,
+                                     name='reflection-job-retention')
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'cache_hits': 0, 'llm_calls': 0, 'failed': 0}
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS reflection_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    reflection_type TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    ai_response TEXT,
+                    reflection_id TEXT,
+                    error TEXT,
+                    cached INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_reflection_jobs_key
+                ON reflection_jobs (cache_key, status)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_reflection_jobs_created
+                ON reflection_jobs (created_at)
+            ''')
+            self._conn = conn
+        return self._conn
+
+    def submit(self, user_id: str, entry_id: str, title: str, content: str, user_question: str = '',
+               reflection_type: str = 'general', first_reflection: bool = False) -> ReflectionJob:
+        """Queue a reflection, or return the queued or running job answering this question for this entry"""
+        cache_key = reflection_cache_key(title, content, user_question, reflection_type)
+        now = time.time()
+
+        with self._lock:
+            self.stats['submitted'] += 1
+            conn = self._get_connection()
+            # IMMEDIATE takes the write lock up front so two workers can't both miss the active job
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = conn.execute(f'''
+                    SELECT {', '.join(_COLUMNS)} FROM reflection_jobs
+                    WHERE cache_key = ? AND entry_id = ? AND status IN ('queued', 'running')
+                      AND updated_at > ?
+                    ORDER BY created_at DESC LIMIT 1
+                ''', (cache_key, str(entry_id), now - JOB_STALE_SECONDS)).fetchone()
+                if row is not None:
+                    conn.execute('COMMIT')
+                    self.stats['deduplicated'] += 1
+                    return self._job_from_row(row)
+
+                job = ReflectionJob(
+                    job_id=str(uuid.uuid4()), user_id=str(user_id), entry_id=str(entry_id),
+                    reflection_type=reflection_type, cache_key=cache_key, title=title, content=content,
+                    user_question=user_question or '', first_reflection=first_reflection, created_at=now
+                )
+                answered = conn.execute('''
+                    SELECT ai_response FROM reflection_jobs
+                    WHERE cache_key = ? AND status = 'done' AND ai_response IS NOT NULL
+                    ORDER BY finished_at DESC LIMIT 1
+                ''', (cache_key,)).fetchone()
+                if answered is not None:
+                    self.stats['cache_hits'] += 1
+                    job.ai_response = answered[0]
+                    job.cached = True
+
+                conn.execute('''
+                    INSERT INTO reflection_jobs
+                    (job_id, user_id, entry_id, reflection_type, cache_key, status, cached, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+                ''', (job.job_id, job.user_id, job.entry_id, reflection_type, cache_key,
+                      int(job.cached), now, now))
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+
+        self.sweeper.start()
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: ReflectionJob):
+        self._update(job, 'running')
+        try:
+            if job.ai_response is None:
+                self.rate_limiter.acquire()
+                with self._lock:
+                    self.stats['llm_calls'] += 1
+                job.ai_response = self.generate_fn(job)
+
+            job.reflection_id = self.persist_fn(job)
+            job.status = 'done'
+
+        except Exception as e:
+            logger.error(f"Reflection job {job.job_id} for entry {job.entry_id} failed: {e}")
+            job.status = 'failed'
+            job.error = "Unable to generate AI reflection at this time. Please try again later."
+            with self._lock:
+                self.stats['failed'] += 1
+
+        job.finished_at = time.time()
+        self._update(job, job.status)
+
+    def _update(self, job: ReflectionJob, status: str):
+        job.status = status
+        with self._lock:
+            self._get_connection().execute('''
+                UPDATE reflection_jobs
+                SET status = ?, ai_response = ?, reflection_id = ?, error = ?, updated_at = ?, finished_at = ?
+                WHERE job_id = ?
+            ''', (status, job.ai_response, job.reflection_id, job.error, time.time(), job.finished_at,
+                  job.job_id))
+
+    def get(self, job_id: str, user_id: Optional[str] = None) -> Optional[ReflectionJob]:
+        """Look up a job in the shared table; with user_id, only that user's jobs are visible"""
+        with self._lock:
+            conn = self._get_connection()
+            row = conn.execute(f'''
+                SELECT {', '.join(_COLUMNS)}, updated_at FROM reflection_jobs WHERE job_id = ?
+            ''', (job_id,)).fetchone()
+            if row is None or (user_id is not None and row[1] != str(user_id)):
+                return None
+
+            job = self._job_from_row(row[:-1])
+            if not job.finished and row[-1] < time.time() - JOB_STALE_SECONDS:
+                # The worker that owned it exited before finishing
+                job.status = 'failed'
+                job.error = "Reflection was interrupted. Please try again."
+                job.finished_at = time.time()
+                conn.execute('''
+                    UPDATE reflection_jobs SET status = 'failed', error = ?, finished_at = ?
+                    WHERE job_id = ? AND status IN ('queued', 'running')
+                ''', (job.error, job.finished_at, job_id))
+            return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[ReflectionJob]:
+        """Poll the table until the job finishes or timeout seconds pass"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.finished or (deadline is not None and time.time() >= deadline):
+                return job
+            time.sleep(POLL_INTERVAL_SECONDS)
+
+    def purge_finished(self) -> int:
+        """Delete finished jobs older than the retention period"""
+        with self._lock:
+            return self._get_connection().execute('''
+                DELETE FROM reflection_jobs
+                WHERE status IN ('done', 'failed') AND created_at < ?
+            ''', (time.time() - self.retention,)).rowcount
+
+    @staticmethod
+    def _job_from_row(row) -> ReflectionJob:
+        values = dict(zip(_COLUMNS, row))
+        values['cached'] = bool(values['cached'])
+        return ReflectionJob(**values)
+
+    def shutdown(self, wait: bool = True):
+        self.sweeper.stop()
+        self._executor.shutdown(wait=wait)
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
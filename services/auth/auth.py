@@ -13,9 +13,16 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
 import os
 
+from services.auth.guest_sessions import get_guest_session_store
+from services.auth.magic_links import MagicLinkTokenStore
+from services.auth.usage_accounting import get_usage_accountant
+
 class AuthManager:
     def __init__(self, db):
         self.db = db
+        self.magic_links = MagicLinkTokenStore(db)
+        # Guest traffic is counted in memory and persisted in batches
+        self.guest_sessions = get_guest_session_store(db)
     
     def create_user(self, email: str, google_id: str = None, subscription_tier: str = 'explorer') -> Optional[str]:
         """Create a new user with email or Google authentication"""
@@ -67,99 +74,23 @@ class AuthManager:
     
     def create_magic_link(self, email: str) -> str:
         """Create a magic link token for passwordless authentication"""
-        token = secrets.token_urlsafe(32)
-        expires_at = datetime.now() + timedelta(minutes=15)  # 15 minute expiry
-        
-        conn = self.db.get_connection()
-        try:
-            # Update users table with magic link token
-            conn.execute(
-                """UPDATE users 
-                   SET magic_link_token = ?, magic_link_expires = ?, updated_at = datetime('now')
-                   WHERE email = ?""",
-                (token, expires_at, email)
-            )
-            conn.commit()
-            return token
-        finally:
-            conn.close()
+        return self.magic_links.issue(email)
     
     def verify_magic_link(self, token: str) -> Optional[str]:
         """Verify magic link token and return email if valid"""
-        conn = self.db.get_connection()
-        try:
-            user = conn.execute(
-                """SELECT email FROM users 
-                   WHERE magic_link_token = ? AND magic_link_expires > datetime('now')""",
-                (token,)
-            ).fetchone()
-            
-            if user:
-                # Clear token after use
-                conn.execute(
-                    """UPDATE users 
-                       SET magic_link_token = NULL, magic_link_expires = NULL, updated_at = datetime('now')
-                       WHERE magic_link_token = ?""",
-                    (token,)
-                )
-                conn.commit()
-                return user[0]
-            return None
-        finally:
-            conn.close()
+        return self.magic_links.consume(token)
     
     def create_guest_session(self) -> str:
         """Create a guest session for unauthenticated users"""
-        session_token = str(uuid.uuid4())
-        expires_at = datetime.now() + timedelta(hours=24)  # 24 hour guest session
-        
-        conn = self.db.get_connection()
-        try:
-            conn.execute(
-                """INSERT INTO guest_sessions (id, session_token, expires_at) 
-                   VALUES (?, ?, ?)""",
-                (str(uuid.uuid4()), session_token, expires_at)
-            )
-            conn.commit()
-            return session_token
-        finally:
-            conn.close()
+        return self.guest_sessions.create()
     
     def get_guest_session(self, session_token: str) -> Optional[Dict[str, Any]]:
         """Get guest session data"""
-        conn = self.db.get_connection()
-        try:
-            session = conn.execute(
-                """SELECT * FROM guest_sessions 
-                   WHERE session_token = ? AND expires_at > datetime('now')""",
-                (session_token,)
-            ).fetchone()
-            return dict(session) if session else None
-        finally:
-            conn.close()
+        return self.guest_sessions.get(session_token)
     
     def increment_guest_action(self, session_token: str, action_type: str = 'general'):
         """Increment guest action counter"""
-        conn = self.db.get_connection()
-        try:
-            if action_type == 'goal':
-                conn.execute(
-                    "UPDATE guest_sessions SET goals_created = goals_created + 1, actions_count = actions_count + 1 WHERE session_token = ?",
-                    (session_token,)
-                )
-            elif action_type == 'contact':
-                conn.execute(
-                    "UPDATE guest_sessions SET contacts_added = contacts_added + 1, actions_count = actions_count + 1 WHERE session_token = ?",
-                    (session_token,)
-                )
-            else:
-                conn.execute(
-                    "UPDATE guest_sessions SET actions_count = actions_count + 1 WHERE session_token = ?",
-                    (session_token,)
-                )
-            conn.commit()
-        finally:
-            conn.close()
+        self.guest_sessions.increment(session_token, action_type)
 
 class SubscriptionManager:
     """Manage subscription tiers and usage limits"""
@@ -186,78 +117,28 @@ class SubscriptionManager:
     
     def __init__(self, db):
         self.db = db
+        # Tiers are cached per process; limited counters are claimed in the users row
+        self.usage = get_usage_accountant(db, self.TIER_LIMITS)
     
     def check_usage_limit(self, user_id: str, action_type: str) -> bool:
         """Check if user can perform action based on their tier limits"""
-        user = self.get_user_with_usage(user_id)
-        if not user:
-            return False
-        
-        tier = user['subscription_tier']
-        limits = self.TIER_LIMITS.get(tier, self.TIER_LIMITS['explorer'])
-        
-        if action_type == 'goal_creation':
-            if limits['max_goals'] == -1:
-                return True
-            return user['goals_count'] < limits['max_goals']
-        
-        elif action_type == 'contact_import':
-            if limits['max_contacts'] == -1:
-                return True
-            return user['contacts_count'] < limits['max_contacts']
-        
-        elif action_type == 'ai_suggestion':
-            if limits['max_ai_suggestions'] == -1:
-                return True
-            return user['ai_suggestions_used'] < limits['max_ai_suggestions']
-        
-        return True
+        return self.usage.check(user_id, action_type)
     
     def has_feature_access(self, user_id: str, feature: str) -> bool:
         """Check if user has access to a specific feature"""
-        user = self.get_user_with_usage(user_id)
-        if not user:
-            return False
-        
-        tier = user['subscription_tier']
-        limits = self.TIER_LIMITS.get(tier, self.TIER_LIMITS['explorer'])
-        
-        return feature in limits['features']
+        return self.usage.has_feature(user_id, feature)
+    
+    def check_and_track_usage(self, user_id: str, action_type: str, metadata: Dict = None) -> bool:
+        """Atomically check the user's limit and count the action if it is allowed"""
+        return self.usage.check_and_increment(user_id, action_type, metadata)
     
     def track_usage(self, user_id: str, action_type: str, metadata: Dict = None):
-        """Track user action and update usage counters"""
-        conn = self.db.get_connection()
-        try:
-            # Log usage tracking
-            conn.execute(
-                """INSERT INTO usage_tracking (id, user_id, action_type, metadata) 
-                   VALUES (?, ?, ?, ?)""",
-                (str(uuid.uuid4()), user_id, action_type, json.dumps(metadata or {}))
-            )
-            
-            # Update user counters
-            if action_type == 'goal_created':
-                conn.execute(
-                    "UPDATE users SET goals_count = goals_count + 1, updated_at = datetime('now') WHERE id = ?",
-                    (user_id,)
-                )
-            elif action_type == 'contact_imported':
-                conn.execute(
-                    "UPDATE users SET contacts_count = contacts_count + 1, updated_at = datetime('now') WHERE id = ?",
-                    (user_id,)
-                )
-            elif action_type == 'ai_suggestion_generated':
-                conn.execute(
-                    "UPDATE users SET ai_suggestions_used = ai_suggestions_used + 1, updated_at = datetime('now') WHERE id = ?",
-                    (user_id,)
-                )
-            
-            conn.commit()
-        finally:
-            conn.close()
+        """Track user action and update usage counters (written in batches)"""
+        self.usage.record(user_id, action_type, metadata)
     
     def get_user_with_usage(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user with current usage statistics"""
+        self.usage.flush()
         conn = self.db.get_connection()
         try:
             user = conn.execute(
@@ -296,6 +177,7 @@ class SubscriptionManager:
             logging.info(f"Upgraded user {user_id} from {old_tier} to {new_tier}")
         finally:
             conn.close()
+        self.usage.invalidate(user_id)
     
     def get_tier_info(self, tier: str) -> Dict[str, Any]:
         """Get information about a subscription tier"""
@@ -0,0 +1,280 @@
+"""
+Guest session store.
+Guest sessions are inserted into guest_sessions when created, so a guest whose
+next request reaches another worker is still recognized. Action counts are
+kept in process memory and added to the table in periodic batches, so
+anonymous landing-page traffic doesn't hit the database on every click.
+Sessions held in memory re-read their counts every few seconds to pick up
+what other workers flushed. Expired sessions are evicted from memory and
+deleted from the table in batches by a background sweeper.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from services.auth.magic_links import ExpirySweeper
+
+logger = logging.getLogger(__name__)
+
+GUEST_SESSION_TTL_HOURS = 24
+FLUSH_INTERVAL_SECONDS = 10
+FLUSH_THRESHOLD = 200
+# How long a session held in memory is served before its counts are re-read
+SESSION_REFRESH_SECONDS = 5
+SWEEP_BATCH_SIZE = 500
+# Counters each guest action type increments
+ACTION_COUNTERS = {
+    'goal': ('goals_created', 'actions_count'),
+    'contact': ('contacts_added', 'actions_count'),
+}
+COUNTERS = ('goals_created', 'contacts_added', 'actions_count')
+
+
+def _sqlite_utc(timestamp: float) -> str:
+    """Format like SQLite's datetime('now') so the table's predicates keep working"""
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class _GuestSession:
+    __slots__ = ('id', 'session_token', 'created_at', 'expires_at', 'counts', 'pending', 'loaded_at')
+
+    def __init__(self, session_id: str, session_token: str, created_at: float, expires_at: float,
+                 counts: Optional[Dict[str, int]] = None):
+        self.id = session_id
+        self.session_token = session_token
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.counts = counts or {counter: 0 for counter in COUNTERS}
+        self.pending = {counter: 0 for counter in COUNTERS}
+        self.loaded_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        session = {
+            'id': self.id,
+            'session_token': self.session_token,
+            'created_at': _sqlite_utc(self.created_at),
+            'expires_at': _sqlite_utc(self.expires_at),
+        }
+        for counter in COUNTERS:
+            session[counter] = self.counts[counter] + self.pending[counter]
+        return session
+
+
+class GuestSessionStore:
+    """Guest sessions cached in memory with TTL eviction and batched counter writes"""
+
+    def __init__(self, db, ttl_hours: int = GUEST_SESSION_TTL_HOURS,
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, flush_threshold: int = FLUSH_THRESHOLD,
+                 refresh_seconds: float = SESSION_REFRESH_SECONDS):
+        self.db = db
+        self.ttl_seconds = ttl_hours * 3600
+        self.flush_threshold = flush_threshold
+        self.refresh_seconds = refresh_seconds
+        self._sessions: Dict[str, _GuestSession] = {}
+        self._dirty = set()
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self.sweeper = ExpirySweeper(self._maintain, flush_interval, name='guest-session-sweeper')
+        self.stats = {'created': 0, 'hits': 0, 'loads': 0, 'refreshes': 0, 'flushes': 0, 'evicted': 0}
+
+    def create(self) -> str:
+        """Insert a new guest session right away so every worker can find it"""
+        now = time.time()
+        session = _GuestSession(str(uuid.uuid4()), str(uuid.uuid4()), now, now + self.ttl_seconds)
+        conn = self.db.get_connection()
+        try:
+            conn.execute(
+                """INSERT INTO guest_sessions (id, session_token, created_at, expires_at)
+                   VALUES (?, ?, ?, ?)""",
+                (session.id, session.session_token, _sqlite_utc(session.created_at),
+                 _sqlite_utc(session.expires_at))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._sessions[session.session_token] = session
+            self.stats['created'] += 1
+        self.sweeper.start()
+        return session.session_token
+
+    def _load(self, session_token: str) -> Optional[_GuestSession]:
+        conn = self.db.get_connection()
+        try:
+            row = conn.execute(
+                """SELECT id, goals_created, contacts_added, actions_count,
+                          CAST(strftime('%s', created_at) AS REAL), CAST(strftime('%s', expires_at) AS REAL)
+                   FROM guest_sessions
+                   WHERE session_token = ? AND expires_at > datetime('now')""",
+                (session_token,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        session_id, goals, contacts, actions, created_at, expires_at = tuple(row)
+        return _GuestSession(session_id, session_token, created_at or time.time(), expires_at, {
+            'goals_created': goals or 0, 'contacts_added': contacts or 0, 'actions_count': actions or 0
+        })
+
+    def _get(self, session_token: str) -> Optional[_GuestSession]:
+        """Live session from memory, falling back to the table; call with self._lock held"""
+        session = self._sessions.get(session_token)
+        if session is not None:
+            if session.expires_at <= time.time():
+                return None
+            # Skipped while a flush is writing, so its deltas aren't counted twice
+            if (time.time() - session.loaded_at >= self.refresh_seconds
+                    and not self._flush_lock.locked()):
+                return self._refresh(session)
+            self.stats['hits'] += 1
+            return session
+
+        session = self._load(session_token)
+        self.stats['loads'] += 1
+        if session is not None:
+            self._sessions[session_token] = session
+        return session
+
+    def _refresh(self, session: _GuestSession) -> Optional[_GuestSession]:
+        """Re-read counts other workers flushed, keeping this worker's pending deltas"""
+        stored = self._load(session.session_token)
+        self.stats['refreshes'] += 1
+        if stored is None:
+            del self._sessions[session.session_token]
+            self._dirty.discard(session.session_token)
+            return None
+        session.counts = stored.counts
+        session.expires_at = stored.expires_at
+        session.loaded_at = stored.loaded_at
+        return session
+
+    def get(self, session_token: str) -> Optional[Dict[str, Any]]:
+        if not session_token:
+            return None
+        with self._lock:
+            session = self._get(session_token)
+            return session.to_dict() if session else None
+
+    def increment(self, session_token: str, action_type: str = 'general') -> bool:
+        """Count a guest action; returns False for unknown or expired sessions"""
+        with self._lock:
+            session = self._get(session_token)
+            if session is None:
+                return False
+            for counter in ACTION_COUNTERS.get(action_type, ('actions_count',)):
+                session.pending[counter] += 1
+            self._dirty.add(session_token)
+            should_flush = len(self._dirty) >= self.flush_threshold
+
+        self.sweeper.start()
+        if should_flush:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Add pending counter deltas to the table in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                updates, written = [], []
+                for token in self._dirty:
+                    session = self._sessions.get(token)
+                    if session is None:
+                        continue
+                    pending = dict(session.pending)
+                    if any(pending.values()):
+                        updates.append((pending['goals_created'], pending['contacts_added'],
+                                        pending['actions_count'], token))
+                        written.append((session, pending))
+                self._dirty = set()
+            if not written:
+                return 0
+
+            conn = self.db.get_connection()
+            try:
+                conn.executemany(
+                    """UPDATE guest_sessions SET goals_created = goals_created + ?,
+                       contacts_added = contacts_added + ?, actions_count = actions_count + ?
+                       WHERE session_token = ?""",
+                    updates
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to persist guest sessions: {e}")
+                conn.rollback()
+                with self._lock:
+                    self._dirty.update(session.session_token for session, _ in written)
+                return 0
+            finally:
+                conn.close()
+
+            with self._lock:
+                for session, pending in written:
+                    for counter, amount in pending.items():
+                        session.pending[counter] -= amount
+                        session.counts[counter] += amount
+                self.stats['flushes'] += 1
+            return len(written)
+
+    def evict_expired(self) -> int:
+        """Drop expired sessions from memory (their pending counts are discarded)"""
+        now = time.time()
+        with self._lock:
+            expired = [token for token, session in self._sessions.items() if session.expires_at <= now]
+            for token in expired:
+                del self._sessions[token]
+                self._dirty.discard(token)
+            self.stats['evicted'] += len(expired)
+        return len(expired)
+
+    def sweep_expired(self, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+        """Delete expired guest_sessions rows a batch at a time"""
+        removed = 0
+        conn = self.db.get_connection()
+        try:
+            while True:
+                deleted = conn.execute(
+                    """DELETE FROM guest_sessions WHERE id IN (
+                           SELECT id FROM guest_sessions WHERE expires_at <= datetime('now') LIMIT ?
+                       )""",
+                    (batch_size,)
+                ).rowcount
+                conn.commit()
+                removed += deleted
+                if deleted < batch_size:
+                    return removed
+        finally:
+            conn.close()
+
+    def _maintain(self) -> int:
+        self.flush()
+        self.evict_expired()
+        return self.sweep_expired()
+
+
+_stores: Dict[int, GuestSessionStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_guest_session_store(db) -> GuestSessionStore:
+    """Process-wide guest session store per database handle"""
+    with _stores_lock:
+        store = _stores.get(id(db))
+        if store is None or store.db is not db:
+            store = _stores[id(db)] = GuestSessionStore(db)
+        return store
+
+
+@atexit.register
+def _flush_all():
+    for store in list(_stores.values()):
+        try:
+            store.flush()
+        except Exception as e:
+            logger.error(f"Failed to persist guest sessions on exit: {e}")
@@ -0,0 +1,154 @@
+"""
+Magic-link token store.
+Tokens are kept only as SHA-256 hashes in their own table keyed by the hash,
+so verification is a primary-key lookup and a copy of the table can't be
+replayed. Expired tokens are deleted in batches by a background sweeper
+instead of on the login path.
+"""
+
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC_LINK_TTL_MINUTES = 15
+SWEEP_INTERVAL_SECONDS = 300
+SWEEP_BATCH_SIZE = 500
+
+MAGIC_LINK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS magic_link_tokens (
+  token_hash TEXT PRIMARY KEY,
+  email TEXT NOT NULL,
+  expires_at REAL NOT NULL, -- unix time
+  created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_magic_link_tokens_expires ON magic_link_tokens (expires_at);
+"""
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class ExpirySweeper:
+    """Background thread that calls a batch-deleting sweep function on an interval"""
+
+    def __init__(self, sweep_fn: Callable[[], int], interval: float = SWEEP_INTERVAL_SECONDS,
+                 name: str = 'token-sweeper'):
+        self.sweep_fn = sweep_fn
+        self.interval = interval
+        self.name = name
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                removed = self.sweep_fn()
+                if removed:
+                    logger.info(f"{self.name} removed {removed} expired tokens")
+            except Exception as e:
+                logger.error(f"{self.name} failed: {e}")
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class MagicLinkTokenStore:
+    """Single-use magic-link tokens stored by hash"""
+
+    def __init__(self, db, ttl_minutes: int = MAGIC_LINK_TTL_MINUTES,
+                 sweep_interval: float = SWEEP_INTERVAL_SECONDS):
+        self.db = db
+        self.ttl_seconds = ttl_minutes * 60
+        self.sweeper = ExpirySweeper(self.sweep_expired, sweep_interval, name='magic-link-sweeper')
+        self._schema_ready = False
+
+    def ensure_schema(self):
+        if self._schema_ready:
+            return
+        conn = self.db.get_connection()
+        try:
+            conn.executescript(MAGIC_LINK_SCHEMA)
+            conn.commit()
+        finally:
+            conn.close()
+        self._schema_ready = True
+
+    def issue(self, email: str) -> str:
+        """Create a token for an email; only its hash is stored"""
+        self.ensure_schema()
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        conn = self.db.get_connection()
+        try:
+            conn.execute(
+                "INSERT INTO magic_link_tokens (token_hash, email, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (hash_token(token), email, now + self.ttl_seconds, now)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        self.sweeper.start()
+        return token
+
+    def consume(self, token: str) -> Optional[str]:
+        """Return the token's email if it is valid, deleting it so it can be used once"""
+        if not token:
+            return None
+        self.ensure_schema()
+        token_hash = hash_token(token)
+        conn = self.db.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT email, expires_at FROM magic_link_tokens WHERE token_hash = ?",
+                (token_hash,)
+            ).fetchone()
+            if not row:
+                return None
+            # Only the request whose delete lands gets to log in
+            deleted = conn.execute("DELETE FROM magic_link_tokens WHERE token_hash = ?", (token_hash,)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+
+        email, expires_at = row[0], row[1]
+        if deleted != 1 or expires_at <= time.time():
+            return None
+        return email
+
+    def sweep_expired(self, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+        """Delete expired tokens a batch at a time; returns how many were removed"""
+        self.ensure_schema()
+        removed = 0
+        conn = self.db.get_connection()
+        try:
+            while True:
+                deleted = conn.execute(
+                    """DELETE FROM magic_link_tokens WHERE token_hash IN (
+                           SELECT token_hash FROM magic_link_tokens WHERE expires_at < ? LIMIT ?
+                       )""",
+                    (time.time(), batch_size)
+                ).rowcount
+                conn.commit()
+                removed += deleted
+                if deleted < batch_size:
+                    return removed
+        finally:
+            conn.close()
@@ -0,0 +1,297 @@
+"""
+Usage accounting for subscription tiers.
+Keeps each user's tier in process memory and batches usage_tracking rows into
+periodic flushes. An action that counts against a finite limit is claimed with
+one conditional UPDATE (x = x + 1 WHERE x < limit), so the cap holds exactly
+however many workers serve the user. Only increments nobody is limited on
+(unlimited tiers and record()) are batched in memory. check() reads the cached
+counters, so it can be briefly out of date; check_and_increment is the
+authoritative gate.
+"""
+
+import atexit
+import json
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a cached tier is re-read, so upgrades from other processes show up
+TIER_CACHE_TTL = 60
+FLUSH_INTERVAL_SECONDS = 5
+FLUSH_THRESHOLD = 100
+
+# Both the check names and the tracking names map onto one users counter
+ACTION_COUNTERS = {
+    'goal_creation': 'goals_count',
+    'goal_created': 'goals_count',
+    'contact_import': 'contacts_count',
+    'contact_imported': 'contacts_count',
+    'ai_suggestion': 'ai_suggestions_used',
+    'ai_suggestion_generated': 'ai_suggestions_used',
+}
+COUNTER_LIMITS = {
+    'goals_count': 'max_goals',
+    'contacts_count': 'max_contacts',
+    'ai_suggestions_used': 'max_ai_suggestions',
+}
+
+
+class _UserUsage:
+    __slots__ = ('tier', 'counts', 'pending', 'loaded_at')
+
+    def __init__(self, tier: str, counts: Dict[str, int]):
+        self.tier = tier
+        self.counts = counts
+        self.pending = {counter: 0 for counter in COUNTER_LIMITS}
+        self.loaded_at = time.monotonic()
+
+    def used(self, counter: str) -> int:
+        return self.counts[counter] + self.pending[counter]
+
+
+class UsageAccountant:
+    """Per-process tier cache, database-enforced limits and batched usage writes"""
+
+    def __init__(self, db, tier_limits: Dict[str, Dict[str, Any]], default_tier: str = 'explorer',
+                 flush_interval: float = FLUSH_INTERVAL_SECONDS, flush_threshold: int = FLUSH_THRESHOLD):
+        self.db = db
+        self.tier_limits = tier_limits
+        self.default_tier = default_tier
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        self._users: Dict[str, _UserUsage] = {}
+        self._events: List[Tuple[str, str, str, str]] = []
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.stats = {'hits': 0, 'loads': 0, 'flushes': 0, 'flush_errors': 0}
+
+    def _limits(self, tier: str) -> Dict[str, Any]:
+        return self.tier_limits.get(tier, self.tier_limits[self.default_tier])
+
+    def _load(self, user_id: str) -> Optional[_UserUsage]:
+        conn = self.db.get_connection()
+        try:
+            row = conn.execute(
+                "SELECT subscription_tier, goals_count, contacts_count, ai_suggestions_used FROM users WHERE id = ?",
+                (user_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return None
+        tier, goals, contacts, ai_used = tuple(row)
+        return _UserUsage(tier or self.default_tier, {
+            'goals_count': goals or 0, 'contacts_count': contacts or 0, 'ai_suggestions_used': ai_used or 0
+        })
+
+    def _get(self, user_id: str) -> Optional[_UserUsage]:
+        """Cached usage for a user; call with self._lock held"""
+        usage = self._users.get(user_id)
+        if usage is not None and time.monotonic() - usage.loaded_at < TIER_CACHE_TTL:
+            self.stats['hits'] += 1
+            return usage
+
+        if usage is not None and any(usage.pending.values()):
+            # Keep unflushed increments on top of the fresh row
+            pending = usage.pending
+            usage = self._load(user_id)
+            if usage is not None:
+                usage.pending = pending
+        else:
+            usage = self._load(user_id)
+        self.stats['loads'] += 1
+        if usage is None:
+            self._users.pop(user_id, None)
+        else:
+            self._users[user_id] = usage
+        return usage
+
+    def _allowed(self, usage: _UserUsage, counter: Optional[str]) -> bool:
+        if counter is None:
+            return True
+        limit = self._limits(usage.tier)[COUNTER_LIMITS[counter]]
+        return limit == -1 or usage.used(counter) < limit
+
+    def check(self, user_id: str, action_type: str) -> bool:
+        """Whether the user's tier allows one more of this action"""
+        with self._lock:
+            usage = self._get(str(user_id))
+            return usage is not None and self._allowed(usage, ACTION_COUNTERS.get(action_type))
+
+    def has_feature(self, user_id: str, feature: str) -> bool:
+        with self._lock:
+            usage = self._get(str(user_id))
+            return usage is not None and feature in self._limits(usage.tier)['features']
+
+    def get_tier(self, user_id: str) -> Optional[str]:
+        with self._lock:
+            usage = self._get(str(user_id))
+            return usage.tier if usage else None
+
+    def check_and_increment(self, user_id: str, action_type: str, metadata: Dict = None) -> bool:
+        """Atomically check the limit and, if allowed, count the action"""
+        user_id = str(user_id)
+        with self._lock:
+            usage = self._get(user_id)
+            if usage is None:
+                return False
+            counter = ACTION_COUNTERS.get(action_type)
+            limit = self._limits(usage.tier)[COUNTER_LIMITS[counter]] if counter else -1
+            if limit == -1:
+                self._count(usage, user_id, action_type, counter, metadata)
+                should_flush = len(self._events) >= self.flush_threshold
+
+        if limit != -1:
+            if not self._claim(user_id, usage, counter, limit):
+                return False
+            with self._lock:
+                self._count(usage, user_id, action_type, None, metadata)
+                should_flush = len(self._events) >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+        return True
+
+    def _claim(self, user_id: str, usage: _UserUsage, counter: str, limit: int) -> bool:
+        """Take one unit of a limited counter in the users row; False once the limit is reached"""
+        # Flushes move pending into counts, so hold them off while counts is re-read
+        with self._flush_lock:
+            with self._lock:
+                pending = usage.pending[counter]
+            conn = self.db.get_connection()
+            try:
+                claimed = conn.execute(
+                    f"""UPDATE users SET {counter} = {counter} + 1, updated_at = datetime('now')
+                        WHERE id = ? AND {counter} + ? < ?""",
+                    (user_id, pending, limit)
+                ).rowcount == 1
+                used = conn.execute(f"SELECT {counter} FROM users WHERE id = ?", (user_id,)).fetchone()
+                conn.commit()
+            finally:
+                conn.close()
+            with self._lock:
+                if used is not None:
+                    usage.counts[counter] = used[0] or 0
+            return claimed
+
+    def record(self, user_id: str, action_type: str, metadata: Dict = None):
+        """Count an action that has already happened, without a limit check"""
+        user_id = str(user_id)
+        with self._lock:
+            usage = self._get(user_id)
+            counter = ACTION_COUNTERS.get(action_type)
+            if usage is not None:
+                self._count(usage, user_id, action_type, counter, metadata)
+            else:
+                self._events.append((str(uuid.uuid4()), user_id, action_type, json.dumps(metadata or {})))
+            should_flush = len(self._events) >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+
+    def _count(self, usage: _UserUsage, user_id: str, action_type: str, counter: Optional[str], metadata):
+        if counter:
+            usage.pending[counter] += 1
+        self._events.append((str(uuid.uuid4()), user_id, action_type, json.dumps(metadata or {})))
+        self.start_flusher()
+
+    def flush(self) -> int:
+        """Write buffered usage rows and counter increments in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, []
+                deltas: Dict[str, Dict[str, int]] = {}
+                for user_id, usage in self._users.items():
+                    if any(usage.pending.values()):
+                        deltas[user_id] = dict(usage.pending)
+            if not events and not deltas:
+                return 0
+
+            conn = self.db.get_connection()
+            try:
+                conn.executemany(
+                    "INSERT INTO usage_tracking (id, user_id, action_type, metadata) VALUES (?, ?, ?, ?)",
+                    events
+                )
+                conn.executemany(
+                    """UPDATE users SET goals_count = goals_count + ?, contacts_count = contacts_count + ?,
+                       ai_suggestions_used = ai_suggestions_used + ?, updated_at = datetime('now')
+                       WHERE id = ?""",
+                    [(d['goals_count'], d['contacts_count'], d['ai_suggestions_used'], user_id)
+                     for user_id, d in deltas.items()]
+                )
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to flush usage counters: {e}")
+                conn.rollback()
+                with self._lock:
+                    # Put everything back so the next flush retries it
+                    self._events[:0] = events
+                    self.stats['flush_errors'] += 1
+                return 0
+            finally:
+                conn.close()
+
+            with self._lock:
+                for user_id, written in deltas.items():
+                    usage = self._users.get(user_id)
+                    if usage is None:
+                        continue
+                    for counter, amount in written.items():
+                        moved = min(amount, usage.pending[counter])
+                        usage.pending[counter] -= moved
+                        usage.counts[counter] += moved
+                self.stats['flushes'] += 1
+            return len(events)
+
+    def invalidate(self, user_id: str):
+        """Drop a user's cached tier (after an upgrade); pending increments are flushed first"""
+        self.flush()
+        with self._lock:
+            self._users.pop(str(user_id), None)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start_flusher(self):
+        if self._flusher is not None and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._stop.clear()
+                self._flusher = threading.Thread(target=self._run, name='usage-flusher', daemon=True)
+                self._flusher.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+
+_accountants: Dict[int, UsageAccountant] = {}
+_accountants_lock = threading.Lock()
+
+
+def get_usage_accountant(db, tier_limits: Dict[str, Dict[str, Any]]) -> UsageAccountant:
+    """Process-wide accountant per database handle"""
+    with _accountants_lock:
+        accountant = _accountants.get(id(db))
+        if accountant is None or accountant.db is not db:
+            accountant = _accountants[id(db)] = UsageAccountant(db, tier_limits)
+        return accountant
+
+
+@atexit.register
+def _flush_all():
+    for accountant in list(_accountants.values()):
+        try:
+            accountant.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush usage on exit: {e}")
@@ -0,0 +1,223 @@
+"""
+In-process event bus for automation side effects.
+Interaction events are published from the request and delivered to their
+subscribers on a dedicated event-loop thread: async subscribers run on that
+loop, blocking ones on a small thread pool. The number of undelivered events
+is bounded, so a slow Slack or Telegram backs up into dropped (or briefly
+blocked) publishes instead of unbounded memory, and delivery counts and
+latencies are kept per event type and subscriber.
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, ClassVar, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING_EVENTS = 1000
+SUBSCRIBER_WORKERS = 4
+SUBSCRIBER_TIMEOUT_SECONDS = 30
+
+
+@dataclass
+class InteractionEvent:
+    """Something happened with a contact; subclasses fix the event type"""
+    user_id: Any
+    contact_id: Any
+    contact_name: str
+    details: Dict[str, Any] = field(default_factory=dict)
+    event_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    created_at: float = field(default_factory=time.time)
+
+    event_type: ClassVar[str] = 'interaction'
+
+
+@dataclass
+class EmailSent(InteractionEvent):
+    event_type: ClassVar[str] = 'email_sent'
+
+
+@dataclass
+class MeetingScheduled(InteractionEvent):
+    event_type: ClassVar[str] = 'meeting_scheduled'
+
+
+@dataclass
+class IntroductionMade(InteractionEvent):
+    event_type: ClassVar[str] = 'introduction_made'
+
+
+EVENT_TYPES = {cls.event_type: cls for cls in (EmailSent, MeetingScheduled, IntroductionMade)}
+
+
+def create_event(event_type: str, **fields) -> InteractionEvent:
+    """Build the typed event for an interaction type name; raises ValueError if unknown"""
+    event_cls = EVENT_TYPES.get(event_type)
+    if event_cls is None:
+        raise ValueError(f"Unknown automation event type: {event_type}")
+    return event_cls(**fields)
+
+
+def _subscriber_name(handler: Callable) -> str:
+    return getattr(handler, '__qualname__', None) or repr(handler)
+
+
+class AutomationEventBus:
+    """Bounded, non-blocking publish/subscribe for automation side effects"""
+
+    def __init__(self, max_pending: int = MAX_PENDING_EVENTS, max_workers: int = SUBSCRIBER_WORKERS,
+                 subscriber_timeout: float = SUBSCRIBER_TIMEOUT_SECONDS):
+        self.max_pending = max_pending
+        self.max_workers = max_workers
+        self.subscriber_timeout = subscriber_timeout
+
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.stats = {'published': 0, 'delivered': 0, 'failed': 0, 'dropped': 0, 'peak_pending': 0}
+        self._by_type: Dict[str, Dict[str, float]] = {}
+        self._by_subscriber: Dict[str, Dict[str, float]] = {}
+
+    def subscribe(self, event_type: str, handler: Callable[[InteractionEvent], Any]):
+        """Register a sync or async handler for an event type"""
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown automation event type: {event_type}")
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append(handler)
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                loop = asyncio.new_event_loop()
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='automation-subscriber')
+                loop.set_default_executor(self._executor)
+                self._thread = threading.Thread(target=loop.run_forever, name='automation-events', daemon=True)
+                self._thread.start()
+                self._loop = loop
+            return self._loop
+
+    def publish(self, event: InteractionEvent, timeout: float = 0) -> bool:
+        """
+        Queue an event for delivery and return immediately.
+        When max_pending events are undelivered, waits up to timeout seconds for
+        room and otherwise drops the event, returning False.
+        """
+        acquired = self._slots.acquire(timeout=timeout) if timeout > 0 else self._slots.acquire(blocking=False)
+        if not acquired:
+            with self._lock:
+                self.stats['dropped'] += 1
+                self._type_stats(event.event_type)['dropped'] += 1
+            logger.warning(f"Automation event bus full, dropped {event.event_type} {event.event_id}")
+            return False
+
+        with self._lock:
+            handlers = list(self._subscribers.get(event.event_type, ()))
+            self._pending += 1
+            self.stats['published'] += 1
+            self.stats['peak_pending'] = max(self.stats['peak_pending'], self._pending)
+            self._type_stats(event.event_type)['published'] += 1
+
+        asyncio.run_coroutine_threadsafe(self._deliver(event, handlers), self._ensure_loop())
+        return True
+
+    async def _run_handler(self, handler: Callable, event: InteractionEvent):
+        if inspect.iscoroutinefunction(handler):
+            call = handler(event)
+        else:
+            call = asyncio.get_running_loop().run_in_executor(None, handler, event)
+        return await asyncio.wait_for(call, self.subscriber_timeout)
+
+    async def _deliver(self, event: InteractionEvent, handlers: List[Callable]):
+        try:
+            results = await asyncio.gather(*[self._timed(handler, event) for handler in handlers])
+            latency = time.time() - event.created_at
+            with self._lock:
+                type_stats = self._type_stats(event.event_type)
+                type_stats['delivered'] += 1
+                type_stats['latency_seconds'] += latency
+                type_stats['failed'] += results.count(False)
+                self.stats['delivered'] += 1
+                self.stats['failed'] += results.count(False)
+        finally:
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+
+    async def _timed(self, handler: Callable, event: InteractionEvent) -> bool:
+        started = time.perf_counter()
+        ok = True
+        try:
+            await self._run_handler(handler, event)
+        except Exception as e:
+            ok = False
+            logger.error(f"Automation subscriber {_subscriber_name(handler)} failed for "
+                         f"{event.event_type}: {e!r}")
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            stats = self._by_subscriber.setdefault(_subscriber_name(handler), {
+                'calls': 0, 'failures': 0, 'seconds': 0.0, 'max_seconds': 0.0
+            })
+            stats['calls'] += 1
+            stats['failures'] += 0 if ok else 1
+            stats['seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+        return ok
+
+    def _type_stats(self, event_type: str) -> Dict[str, float]:
+        """Per-type counters; call with self._lock held"""
+        return self._by_type.setdefault(event_type, {
+            'published': 0, 'delivered': 0, 'failed': 0, 'dropped': 0, 'latency_seconds': 0.0
+        })
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every published event has been delivered"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.stats, pending=self._pending, max_pending=self.max_pending)
+            metrics['event_types'] = {
+                event_type: dict(
+                    {k: v for k, v in stats.items() if k != 'latency_seconds'},
+                    avg_latency_ms=round(stats['latency_seconds'] / stats['delivered'] * 1000, 2)
+                    if stats['delivered'] else 0.0
+                )
+                for event_type, stats in self._by_type.items()
+            }
+            metrics['subscribers'] = {
+                name: {
+                    'calls': stats['calls'],
+                    'failures': stats['failures'],
+                    'avg_ms': round(stats['seconds'] / stats['calls'] * 1000, 2),
+                    'max_ms': round(stats['max_seconds'] * 1000, 2),
+                }
+                for name, stats in self._by_subscriber.items()
+            }
+        return metrics
+
+    def stop(self, timeout: float = 5):
+        """Deliver what is queued, then stop the loop thread"""
+        self.drain(timeout)
+        with self._lock:
+            loop, thread, executor = self._loop, self._thread, self._executor
+            self._loop = self._thread = self._executor = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            loop.close()
+        if executor is not None:
+            executor.shutdown(wait=False)
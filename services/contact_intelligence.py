@@ -8,10 +8,14 @@ import json
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import os
-from openai import OpenAI
+from services.ai.context_builder import context_builder
+from services.ai.query_planner import CONTACTS, FOLLOW_UPS, compile_sql, query_planner
 
 logger = logging.getLogger(__name__)
 
+# Token budget for the network context attached to natural language queries
+CONTEXT_TOKEN_BUDGET = 1200
+
 class ContactIntelligence:
     """Main class for contact intelligence and natural language processing"""
     
@@ -20,6 +24,8 @@ class ContactIntelligence:
         try:
             api_key = os.environ.get("OPENAI_API_KEY")
             if api_key:
+                # Imported only when AI is configured; the SDK is slow to import
+                from openai import OpenAI
                 self.openai_client = OpenAI(api_key=api_key)
             else:
                 self.openai_client = None
@@ -216,11 +222,16 @@ class ContactIntelligence:
     def process_natural_language_query(self, user_id: str, query: str) -> Dict[str, Any]:
         """Process natural language queries about contacts and relationships"""
         try:
+            # Structured questions are answered straight from the database
+            plan = query_planner.plan(query)
+            if plan.intent in (CONTACTS, FOLLOW_UPS) and self.db:
+                return self._answer_with_plan(user_id, query, plan)
+            
             if not self.openai_client:
                 return {"error": "AI assistant not available"}
             
-            # Get user's contact data for context
-            contacts_context = self._get_contacts_context(user_id)
+            # Get user's contact data for context, ranked against the query
+            contacts_context = self._get_contacts_context(user_id, query)
             
             prompt = f"""
             You are a relationship intelligence assistant. Answer this query about the user's professional network:
@@ -248,32 +259,83 @@ class ContactIntelligence:
             logger.error(f"Error processing natural language query: {e}")
             return {"error": "Unable to process query"}
 
-    def _get_contacts_context(self, user_id: str) -> str:
-        """Get summarized context of user's contacts for AI queries"""
+    def _answer_with_plan(self, user_id: str, query: str, plan) -> Dict[str, Any]:
+        """Execute a planned query and phrase the result without the LLM"""
+        sql, params = compile_sql(plan, user_id)
+        cursor = self.db.cursor()
+        cursor.execute(sql, params)
+        
+        if plan.count_only:
+            count = cursor.fetchone()[0]
+            return {
+                "response": f"You have {count} {plan.describe()}.",
+                "query": query,
+                "count": count,
+                "plan": plan.to_dict()
+            }
+        
+        columns = [column[0] for column in cursor.description]
+        contacts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        if not contacts:
+            response = f"No {plan.describe()} found."
+        else:
+            lines = [f"Found {len(contacts)} {plan.describe()}:"]
+            for contact in contacts:
+                line = f"- {contact['name']}"
+                role = ' at '.join(part for part in (contact.get('title'), contact.get('company')) if part)
+                if role:
+                    line += f" ({role})"
+                if plan.intent == FOLLOW_UPS and contact.get('follow_up_action'):
+                    line += f": {contact['follow_up_action']}"
+                lines.append(line)
+            response = "\n".join(lines)
+        
+        for contact in contacts:
+            for key, value in contact.items():
+                if isinstance(value, datetime):
+                    contact[key] = value.isoformat()
+        
+        return {
+            "response": response,
+            "query": query,
+            "contacts": contacts,
+            "plan": plan.to_dict()
+        }
+
+    def _get_contacts_context(self, user_id: str, query: Optional[str] = None) -> str:
+        """Get token-budgeted context of user's contacts for AI queries"""
         try:
-            if not self.db:
+            if not self.db and not context_builder.is_loaded(user_id):
                 return "No contact data available"
-                
-            cursor = self.db.cursor()
-            cursor.execute("""
-                SELECT COUNT(*) as total_contacts,
-                       COUNT(CASE WHEN warmth_status >= 3 THEN 1 END) as warm_contacts,
-                       STRING_AGG(DISTINCT company, ', ') as companies,
-                       STRING_AGG(DISTINCT title, ', ') as titles
-                FROM contacts 
-                WHERE user_id = %s
-            """, (user_id,))
             
-            result = cursor.fetchone()
-            if result:
-                total, warm, companies, titles = result
-                return f"Total contacts: {total}, Warm relationships: {warm}, Companies: {companies}, Roles: {titles}"
-            
-            return "No contacts found"
+            context_builder.ensure_loaded(user_id, lambda: self._load_context_records(user_id))
+            return context_builder.build_context(user_id, query=query, token_budget=CONTEXT_TOKEN_BUDGET)
             
         except Exception as e:
             logger.error(f"Error getting contacts context: {e}")
             return "Contact data unavailable"
 
+    def _load_context_records(self, user_id: str):
+        """Load the contact and goal rows the context builder summarizes"""
+        cursor = self.db.cursor()
+        cursor.execute("""
+            SELECT id, name, company, title, notes, tags, interests,
+                   warmth_level, warmth_status, last_interaction_date
+            FROM contacts
+            WHERE user_id = %s
+        """, (user_id,))
+        columns = [column[0] for column in cursor.description]
+        contacts = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        
+        cursor.execute("""
+            SELECT title FROM goals
+            WHERE user_id = %s AND status = 'active'
+            ORDER BY created_at DESC
+        """, (user_id,))
+        goals = [{'title': row[0]} for row in cursor.fetchall()]
+        
+        return contacts, goals
+
 # Global instance for easy importing
 contact_intelligence = ContactIntelligence()
\ No newline at end of file
@@ -8,7 +8,6 @@ import json
 import csv
 import io
 import re
-import pandas as pd
 import uuid
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
@@ -34,7 +33,8 @@ class ContactSyncEngine:
     def import_csv_file(self, user_id: str, file) -> Dict[str, Any]:
         """Import contacts from uploaded CSV file"""
         try:
-            # Read CSV file with pandas
+            # Read CSV file with pandas (imported here to keep it off the startup path)
+            import pandas as pd
             df = pd.read_csv(file)
             
             # Clean and prepare data
@@ -0,0 +1,267 @@
+"""
+Contact Export Engine
+Streams a user's contacts out of the database in keyset-paginated batches and
+serializes them as CSV, NDJSON or Parquet with CRM-specific column profiles,
+optionally gzip-compressed. Memory use is bounded by the batch size, not the
+size of the network.
+"""
+
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    'id', 'name', 'email', 'phone', 'company', 'title', 'linkedin', 'twitter', 'relationship_type',
+    'warmth_label', 'warmth_status', 'priority_level', 'notes', 'tags', 'location',
+    'last_interaction_date', 'follow_up_due_date', 'created_at'
+)
+
+
+def _first_name(contact: Dict[str, Any]) -> str:
+    return (contact.get('name') or '').strip().split(' ')[0]
+
+
+def _last_name(contact: Dict[str, Any]) -> str:
+    parts = (contact.get('name') or '').strip().split(' ', 1)
+    return parts[1] if len(parts) > 1 else ''
+
+
+def _field(name: str) -> Callable[[Dict[str, Any]], Any]:
+    return lambda contact: contact.get(name)
+
+
+# Target-specific columns: (header, value getter)
+EXPORT_PROFILES: Dict[str, List[Tuple[str, Callable[[Dict[str, Any]], Any]]]] = {
+    'standard': [
+        ('Name', _field('name')),
+        ('Email', _field('email')),
+        ('Phone', _field('phone')),
+        ('Company', _field('company')),
+        ('Title', _field('title')),
+        ('LinkedIn', _field('linkedin')),
+        ('Relationship Type', _field('relationship_type')),
+        ('Warmth Level', _field('warmth_label')),
+        ('Priority', _field('priority_level')),
+        ('Notes', _field('notes')),
+        ('Last Contact', _field('last_interaction_date')),
+        ('Follow Up Due', _field('follow_up_due_date')),
+    ],
+    'hubspot': [
+        ('First Name', _first_name),
+        ('Last Name', _last_name),
+        ('Email', _field('email')),
+        ('Phone Number', _field('phone')),
+        ('Company Name', _field('company')),
+        ('Job Title', _field('title')),
+        ('LinkedIn URL', _field('linkedin')),
+        ('Lead Status', _field('warmth_label')),
+        ('Last Contacted', _field('last_interaction_date')),
+        ('Notes', _field('notes')),
+    ],
+    'salesforce': [
+        ('FirstName', _first_name),
+        ('LastName', lambda contact: _last_name(contact) or contact.get('name')),
+        ('Email', _field('email')),
+        ('Phone', _field('phone')),
+        ('Account Name', _field('company')),
+        ('Title', _field('title')),
+        ('LeadSource', lambda contact: 'Rhiz'),
+        ('Description', _field('notes')),
+    ],
+    'airtable': [
+        ('Name', _field('name')),
+        ('Email', _field('email')),
+        ('Phone', _field('phone')),
+        ('Company', _field('company')),
+        ('Title', _field('title')),
+        ('LinkedIn', _field('linkedin')),
+        ('Twitter', _field('twitter')),
+        ('Tags', _field('tags')),
+        ('Location', _field('location')),
+        ('Warmth', _field('warmth_label')),
+        ('Priority', _field('priority_level')),
+        ('Notes', _field('notes')),
+        ('Last Contact', _field('last_interaction_date')),
+        ('Follow Up Due', _field('follow_up_due_date')),
+    ],
+    'pipedrive': [
+        ('Person - Name', _field('name')),
+        ('Person - Email', _field('email')),
+        ('Person - Phone', _field('phone')),
+        ('Organization - Name', _field('company')),
+        ('Person - Job title', _field('title')),
+        ('Person - Label', _field('warmth_label')),
+        ('Note - Content', _field('notes')),
+    ],
+}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def gzip_chunks(chunks: Iterable[Union[str, bytes]]) -> Iterator[bytes]:
+    """Gzip a stream of chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ContactExporter:
+    """Streams contacts for one user in a given profile and format"""
+
+    def __init__(self, db, placeholder: str = '?', batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db = db
+        self.placeholder = placeholder
+        self.batch_size = batch_size
+
+    def iter_batches(self, user_id) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield contacts batch_size at a time, keyset-paginated on id so each
+        query is an index range scan and no driver buffers the whole result.
+        """
+        p = self.placeholder
+        sql = (
+            f"SELECT {', '.join(EXPORT_COLUMNS)} FROM contacts "
+            f"WHERE user_id = {p} AND id > {p} ORDER BY id LIMIT {p}"
+        )
+        conn = self.db.get_connection()
+        try:
+            last_id = ''
+            while True:
+                cursor = conn.cursor()
+                cursor.execute(sql, (user_id, last_id, self.batch_size))
+                rows = cursor.fetchall()
+                cursor.close()
+                if not rows:
+                    return
+                batch = [dict(row) if hasattr(row, 'keys') else dict(zip(EXPORT_COLUMNS, row)) for row in rows]
+                yield batch
+                if len(rows) < self.batch_size:
+                    return
+                last_id = batch[-1]['id']
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _profile(profile: str):
+        columns = EXPORT_PROFILES.get((profile or 'standard').lower())
+        if columns is None:
+            raise ValueError(f"Unknown export profile: {profile}")
+        return columns
+
+    def iter_csv(self, user_id, profile: str = 'standard') -> Iterator[str]:
+        columns = self._profile(profile)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for header, _ in columns])
+        for batch in self.iter_batches(user_id):
+            for contact in batch:
+                writer.writerow([_plain(getter(contact)) for _, getter in columns])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def iter_ndjson(self, user_id, profile: str = 'standard') -> Iterator[str]:
+        columns = self._profile(profile)
+        for batch in self.iter_batches(user_id):
+            yield ''.join(
+                json.dumps({header: _plain(getter(contact)) for header, getter in columns}) + '\n'
+                for contact in batch
+            )
+
+    def iter_parquet(self, user_id, profile: str = 'standard') -> Iterator[bytes]:
+        if not PARQUET_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow")
+        columns = self._profile(profile)
+        schema = pa.schema([(header, pa.string()) for header, _ in columns])
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            for batch in self.iter_batches(user_id):
+                arrays = [
+                    pa.array([None if getter(c) is None else str(_plain(getter(c))) for c in batch], pa.string())
+                    for _, getter in columns
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                data = sink.drain()
+                if data:
+                    yield data
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def export(self, user_id, profile: str = 'standard', fmt: str = 'csv',
+               compress: bool = False) -> Tuple[Iterator[Union[str, bytes]], str, str]:
+        """
+        Return (chunks, mimetype, filename) for a streamed export.
+        Raises ValueError for unknown profiles or formats.
+        """
+        self._profile(profile)
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == 'parquet' and not PARQUET_AVAILABLE:
+            raise ValueError("Parquet export requires pyarrow")
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        chunks = {
+            'csv': self.iter_csv,
+            'ndjson': self.iter_ndjson,
+            'parquet': self.iter_parquet,
+        }[fmt](user_id, profile)
+
+        filename = f"contacts_{profile}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+        if compress:
+            return gzip_chunks(chunks), 'application/gzip', filename + '.gz'
+        return chunks, mimetype, filename
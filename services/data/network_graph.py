@@ -0,0 +1,501 @@
+"""
+Network Graph Engine
+Builds a compact, array-backed adjacency structure over a user's contacts,
+goals, companies, introducers and shared tags; clusters it server-side and
+serves level-of-detail views that stream to the client as chunked JSON.
+"""
+
+import heapq
+import json
+import logging
+import math
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_NODES = 300
+MAX_NODES_LIMIT = 2000
+MAX_OVERVIEW_CLUSTERS = 30
+# Tags shared by at most this many contacts become pairwise edges; larger
+# tags become a single hub node instead of a clique
+MAX_TAG_CLIQUE = 8
+CLUSTER_ITERATIONS = 8
+GRAPH_TTL_SECONDS = 300
+MAX_CACHED_GRAPHS = 32
+JSON_CHUNK_SIZE = 500
+
+# Label for the aggregate of clusters too small to show individually
+OTHER_CLUSTER = -1
+
+# Node types
+USER, CONTACT, GOAL, COMPANY, TAG, INTRODUCER = range(6)
+NODE_TYPE_NAMES = ('user', 'contact', 'goal', 'company', 'tag', 'introducer')
+
+# Edge types
+RELATIONSHIP, GOAL_LINK, WORKS_AT, INTRODUCED, SHARED_TAG, TAGGED, SUGGESTED = range(7)
+EDGE_TYPE_NAMES = ('relationship', 'goal', 'works_at', 'introduced', 'shared_tag', 'tagged', 'suggested')
+
+WARMTH_STRENGTH = {'hot': 0.8, 'warm': 0.6}
+
+
+def _warmth_strength(contact: Dict[str, Any]) -> float:
+    level = (contact.get('warmth_level') or '').lower()
+    if level in WARMTH_STRENGTH:
+        return WARMTH_STRENGTH[level]
+    status = contact.get('warmth_status') or 0
+    if status >= 4:
+        return 0.8
+    if status == 3:
+        return 0.6
+    return 0.4
+
+
+def _split_tags(tags: Any) -> List[str]:
+    if not tags:
+        return []
+    if isinstance(tags, (list, tuple, set)):
+        values = tags
+    else:
+        text = str(tags)
+        if text.startswith('['):
+            try:
+                values = json.loads(text)
+            except ValueError:
+                values = text.strip('[]').split(',')
+        else:
+            values = text.split(',')
+    return [str(tag).strip().lower() for tag in values if str(tag).strip()]
+
+
+class NetworkGraph:
+    """Undirected weighted graph stored as CSR arrays"""
+
+    def __init__(self):
+        self.node_ids: List[str] = []
+        self.node_labels: List[str] = []
+        self.node_types = array('b')
+        self.node_attrs: List[Dict[str, Any]] = []
+        self._index: Dict[str, int] = {}
+
+        # Edge list, compacted into CSR by finalize()
+        self.edge_src = array('i')
+        self.edge_dst = array('i')
+        self.edge_weight = array('f')
+        self.edge_type = array('b')
+
+        self.indptr = array('i')
+        self.indices = array('i')
+        self.weights = array('f')
+        self.labels: Optional[array] = None
+        self.importance = array('f')
+        self.built_at = time.time()
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def add_node(self, node_id: str, node_type: int, label: str, **attrs) -> int:
+        index = self._index.get(node_id)
+        if index is not None:
+            return index
+        index = len(self.node_ids)
+        self._index[node_id] = index
+        self.node_ids.append(node_id)
+        self.node_labels.append(label)
+        self.node_types.append(node_type)
+        self.node_attrs.append(attrs)
+        return index
+
+    def add_edge(self, a: int, b: int, edge_type: int, weight: float):
+        self.edge_src.append(a)
+        self.edge_dst.append(b)
+        self.edge_weight.append(weight)
+        self.edge_type.append(edge_type)
+
+    def node_index(self, node_id: str) -> Optional[int]:
+        return self._index.get(node_id)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.edge_src)
+
+    def finalize(self):
+        """Compact the edge list into CSR adjacency (both directions)"""
+        node_count = len(self.node_ids)
+        degree = array('i', bytes(4 * (node_count + 1)))
+        for a, b in zip(self.edge_src, self.edge_dst):
+            degree[a + 1] += 1
+            degree[b + 1] += 1
+        for i in range(node_count):
+            degree[i + 1] += degree[i]
+        self.indptr = degree
+        cursor = array('i', degree)
+        self.indices = array('i', bytes(4 * degree[node_count]))
+        self.weights = array('f', bytes(4 * degree[node_count]))
+        for a, b, weight in zip(self.edge_src, self.edge_dst, self.edge_weight):
+            self.indices[cursor[a]] = b
+            self.weights[cursor[a]] = weight
+            cursor[a] += 1
+            self.indices[cursor[b]] = a
+            self.weights[cursor[b]] = weight
+            cursor[b] += 1
+        self._compute_importance()
+        return self
+
+    def neighbors(self, index: int) -> Iterator[Tuple[int, float]]:
+        start, end = self.indptr[index], self.indptr[index + 1]
+        return zip(self.indices[start:end], self.weights[start:end])
+
+    def degree(self, index: int) -> int:
+        return self.indptr[index + 1] - self.indptr[index]
+
+    def _compute_importance(self):
+        """Contact salience used for level-of-detail sampling"""
+        importance = array('f', bytes(4 * len(self.node_ids)))
+        for index, node_type in enumerate(self.node_types):
+            if node_type == CONTACT:
+                attrs = self.node_attrs[index]
+                # Peer connections beyond the edge back to the user
+                importance[index] = attrs['strength'] + 0.3 * math.log1p(max(0, self.degree(index) - 1))
+        self.importance = importance
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, contacts: Iterable[Dict[str, Any]], goals: Iterable[Dict[str, Any]] = (),
+              suggestions: Iterable[Dict[str, Any]] = ()) -> 'NetworkGraph':
+        graph = cls()
+        user = graph.add_node('user', USER, 'You')
+
+        by_company: Dict[str, List[int]] = defaultdict(list)
+        company_names: Dict[str, str] = {}
+        by_tag: Dict[str, List[int]] = defaultdict(list)
+        by_introducer: Dict[str, List[int]] = defaultdict(list)
+        introducer_names: Dict[str, str] = {}
+        by_name: Dict[str, int] = {}
+
+        for contact in contacts:
+            strength = _warmth_strength(contact)
+            index = graph.add_node(
+                str(contact['id']), CONTACT, contact.get('name') or 'Unknown',
+                company=contact.get('company'), warmth=contact.get('warmth_level'), strength=strength
+            )
+            graph.add_edge(user, index, RELATIONSHIP, strength)
+            if contact.get('name'):
+                by_name.setdefault(contact['name'].strip().lower(), index)
+            if contact.get('company'):
+                key = contact['company'].strip().lower()
+                by_company[key].append(index)
+                company_names.setdefault(key, contact['company'].strip())
+            for tag in _split_tags(contact.get('tags')):
+                by_tag[tag].append(index)
+            if contact.get('introduced_by'):
+                key = contact['introduced_by'].strip().lower()
+                by_introducer[key].append(index)
+                introducer_names.setdefault(key, contact['introduced_by'].strip())
+
+        # Shared employers
+        for key, members in by_company.items():
+            if len(members) < 2:
+                continue
+            company = graph.add_node(f'company_{key}', COMPANY, company_names[key], size=len(members))
+            for member in members:
+                graph.add_edge(company, member, WORKS_AT, 0.5)
+
+        # Introductions: to the introducer's own contact record when there is one
+        for key, members in by_introducer.items():
+            introducer = by_name.get(key)
+            if introducer is None:
+                if len(members) < 2:
+                    continue
+                introducer = graph.add_node(f'introducer_{key}', INTRODUCER, introducer_names[key], size=len(members))
+            for member in members:
+                if member != introducer:
+                    graph.add_edge(introducer, member, INTRODUCED, 0.7)
+
+        # Shared tags
+        for tag, members in by_tag.items():
+            if len(members) < 2:
+                continue
+            if len(members) <= MAX_TAG_CLIQUE:
+                for i, a in enumerate(members):
+                    for b in members[i + 1:]:
+                        graph.add_edge(a, b, SHARED_TAG, 0.3)
+            else:
+                hub = graph.add_node(f'tag_{tag}', TAG, tag, size=len(members))
+                for member in members:
+                    graph.add_edge(hub, member, TAGGED, 0.3)
+
+        for goal in goals:
+            index = graph.add_node(f"goal_{goal['id']}", GOAL, goal.get('title') or 'Goal',
+                                   priority=goal.get('priority_level'))
+            graph.add_edge(user, index, GOAL_LINK, 0.9)
+
+        for suggestion in suggestions:
+            goal = graph.node_index(f"goal_{suggestion.get('goal_id')}")
+            contact = graph.node_index(str(suggestion.get('contact_id')))
+            if goal is not None and contact is not None:
+                graph.add_edge(goal, contact, SUGGESTED, float(suggestion.get('confidence') or 0.5))
+
+        return graph.finalize()
+
+    # ------------------------------------------------------------------
+    # Clustering
+    # ------------------------------------------------------------------
+
+    def cluster(self, iterations: int = CLUSTER_ITERATIONS) -> array:
+        """
+        Weighted label propagation over everything except the user hub and
+        goals, so communities form around shared companies, tags and
+        introductions rather than the star every contact has to the user.
+        """
+        if self.labels is not None:
+            return self.labels
+        labels = array('i', range(len(self.node_ids)))
+        order = [i for i, node_type in enumerate(self.node_types) if node_type not in (USER, GOAL)]
+        skip = {i for i, node_type in enumerate(self.node_types) if node_type in (USER, GOAL)}
+        for _ in range(iterations):
+            changed = 0
+            for index in order:
+                votes: Dict[int, float] = {}
+                for neighbor, weight in self.neighbors(index):
+                    if neighbor in skip:
+                        continue
+                    label = labels[neighbor]
+                    votes[label] = votes.get(label, 0.0) + weight
+                if not votes:
+                    continue
+                best = max(votes.items(), key=lambda item: (item[1], -item[0]))[0]
+                if best != labels[index]:
+                    labels[index] = best
+                    changed += 1
+            if not changed:
+                break
+        self.labels = labels
+        return labels
+
+    def clusters(self) -> Dict[int, List[int]]:
+        """Contact members per cluster label, largest clusters first"""
+        labels = self.cluster()
+        members: Dict[int, List[int]] = defaultdict(list)
+        for index, node_type in enumerate(self.node_types):
+            if node_type == CONTACT:
+                members[labels[index]].append(index)
+        return dict(sorted(members.items(), key=lambda item: (-len(item[1]), item[0])))
+
+    def _describe_cluster(self, label: int, members: List[int]) -> Dict[str, Any]:
+        if label == OTHER_CLUSTER:
+            return {'id': 'cluster_other', 'name': f'{len(members)} other contacts', 'type': 'cluster',
+                    'size': len(members),
+                    'warm': sum(1 for i in members if self.node_attrs[i]['strength'] >= 0.6),
+                    'top_companies': []}
+        companies = Counter(self.node_attrs[i].get('company') for i in members if self.node_attrs[i].get('company'))
+        anchor = self.node_labels[label] if self.node_types[label] in (COMPANY, TAG, INTRODUCER) else None
+        name = anchor or (companies.most_common(1)[0][0] if companies else f'Group of {len(members)}')
+        return {
+            'id': f'cluster_{label}',
+            'name': name,
+            'type': 'cluster',
+            'size': len(members),
+            'warm': sum(1 for i in members if self.node_attrs[i]['strength'] >= 0.6),
+            'top_companies': [company for company, _ in companies.most_common(3)],
+        }
+
+    # ------------------------------------------------------------------
+    # Views
+    # ------------------------------------------------------------------
+
+    def _node_json(self, index: int) -> Dict[str, Any]:
+        node_type = self.node_types[index]
+        node = {'id': self.node_ids[index], 'name': self.node_labels[index], 'type': NODE_TYPE_NAMES[node_type]}
+        attrs = self.node_attrs[index]
+        if node_type == CONTACT:
+            node['company'] = attrs.get('company')
+            node['warmth'] = attrs.get('warmth')
+            if self.labels is not None:
+                node['cluster'] = f'cluster_{self.labels[index]}'
+        elif node_type == GOAL:
+            node['priority'] = attrs.get('priority')
+        else:
+            node.update(attrs)
+        return node
+
+    def _edges_within(self, keep: set) -> Iterator[Dict[str, Any]]:
+        for position, (a, b) in enumerate(zip(self.edge_src, self.edge_dst)):
+            if a in keep and b in keep:
+                edge_type = self.edge_type[position]
+                yield {
+                    'id': f'{EDGE_TYPE_NAMES[edge_type]}_{self.node_ids[a]}_{self.node_ids[b]}',
+                    'source': self.node_ids[a],
+                    'target': self.node_ids[b],
+                    'type': EDGE_TYPE_NAMES[edge_type],
+                    'strength': round(self.edge_weight[position], 3),
+                }
+
+    def full(self) -> Dict[str, Any]:
+        keep = set(range(len(self.node_ids)))
+        contact_count = sum(1 for node_type in self.node_types if node_type == CONTACT)
+        return {
+            'nodes': (self._node_json(i) for i in range(len(self.node_ids))),
+            'edges': self._edges_within(keep),
+            'meta': {'level': 'full', 'total_contacts': contact_count, 'shown_contacts': contact_count},
+        }
+
+    def overview(self, max_nodes: int = DEFAULT_MAX_NODES) -> Dict[str, Any]:
+        """
+        Whole-network view within max_nodes: the full graph when it fits,
+        otherwise cluster nodes plus the most important contacts of each
+        cluster, sampled in proportion to cluster size.
+        """
+        contact_count = sum(1 for node_type in self.node_types if node_type == CONTACT)
+        if len(self.node_ids) <= max_nodes:
+            return self.full()
+
+        clusters = self.clusters()
+        shown = list(clusters.items())[:MAX_OVERVIEW_CLUSTERS]
+        rest = [member for _, members in list(clusters.items())[MAX_OVERVIEW_CLUSTERS:] for member in members]
+        goals = [i for i, node_type in enumerate(self.node_types) if node_type == GOAL]
+        groups = shown + ([(OTHER_CLUSTER, rest)] if rest else [])
+        budget = max(0, max_nodes - 1 - len(goals) - len(groups))
+
+        keep = {0, *goals}
+        sampled: Dict[int, List[int]] = {}
+        for label, members in groups:
+            quota = min(len(members), max(1, round(budget * len(members) / contact_count)))
+            sampled[label] = heapq.nlargest(quota, members, key=self.importance.__getitem__)
+            keep.update(sampled[label])
+
+        cluster_nodes = [self._describe_cluster(label, members) for label, members in groups]
+        shown_contacts = sum(len(members) for members in sampled.values())
+
+        def nodes():
+            for index in sorted(keep):
+                yield self._node_json(index)
+            yield from cluster_nodes
+
+        def edges():
+            for edge in self._edges_within(keep):
+                if edge['type'] != 'relationship':
+                    yield edge
+            for cluster, (label, members) in zip(cluster_nodes, groups):
+                yield {'id': f"user_{cluster['id']}", 'source': 'user', 'target': cluster['id'],
+                       'type': 'cluster', 'strength': round(min(1.0, 0.3 + len(members) / contact_count), 3)}
+                for member in sampled[label]:
+                    yield {'id': f"{cluster['id']}_{self.node_ids[member]}", 'source': cluster['id'],
+                           'target': self.node_ids[member], 'type': 'member',
+                           'strength': round(self.node_attrs[member]['strength'], 3)}
+            yield from self._cluster_links({label for label, _ in shown})
+
+        return {
+            'nodes': nodes(),
+            'edges': edges(),
+            'meta': {
+                'level': 'overview',
+                'total_contacts': contact_count,
+                'shown_contacts': shown_contacts,
+                'clusters': len(clusters),
+                'grouped_clusters': max(0, len(clusters) - len(shown)),
+            },
+        }
+
+    def _cluster_links(self, shown_labels: set) -> Iterator[Dict[str, Any]]:
+        """Aggregated edges between clusters, weighted by how many links cross them"""
+        labels = self.cluster()
+        crossings: Counter = Counter()
+        for a, b, edge_type in zip(self.edge_src, self.edge_dst, self.edge_type):
+            if edge_type in (RELATIONSHIP, GOAL_LINK, SUGGESTED):
+                continue
+            label_a, label_b = labels[a], labels[b]
+            if label_a != label_b and label_a in shown_labels and label_b in shown_labels:
+                crossings[(min(label_a, label_b), max(label_a, label_b))] += 1
+        if not crossings:
+            return
+        heaviest = crossings.most_common(3 * len(shown_labels))
+        top = heaviest[0][1]
+        for (label_a, label_b), count in heaviest:
+            yield {'id': f'cluster_{label_a}_cluster_{label_b}', 'source': f'cluster_{label_a}',
+                   'target': f'cluster_{label_b}', 'type': 'cluster_link',
+                   'strength': round(0.2 + 0.8 * count / top, 3), 'count': count}
+
+    def cluster_detail(self, cluster_id: str, max_nodes: int = DEFAULT_MAX_NODES) -> Optional[Dict[str, Any]]:
+        """Drill into one cluster: its most important members and their links"""
+        try:
+            label = int(str(cluster_id).replace('cluster_', ''))
+        except ValueError:
+            return None
+        members = self.clusters().get(label)
+        if not members:
+            return None
+        labels = self.labels
+        shown = heapq.nlargest(max(1, max_nodes - 1), members, key=self.importance.__getitem__)
+        keep = {0, *shown}
+        keep.update(i for i, node_type in enumerate(self.node_types)
+                    if node_type in (COMPANY, TAG, INTRODUCER) and labels[i] == label)
+        return {
+            'nodes': (self._node_json(i) for i in sorted(keep)),
+            'edges': self._edges_within(keep),
+            'meta': {'level': 'cluster', 'cluster': f'cluster_{label}',
+                     'total_contacts': len(members), 'shown_contacts': len(shown)},
+        }
+
+
+def stream_graph_json(payload: Dict[str, Any], chunk_size: int = JSON_CHUNK_SIZE) -> Iterator[str]:
+    """Serialize a graph view as a JSON document, chunk_size items at a time"""
+    for key in ('nodes', 'edges'):
+        yield '{"nodes":[' if key == 'nodes' else '],"edges":['
+        batch = []
+        first = True
+        for item in payload[key]:
+            batch.append(json.dumps(item, default=str))
+            if len(batch) >= chunk_size:
+                yield ('' if first else ',') + ','.join(batch)
+                first = False
+                batch = []
+        if batch:
+            yield ('' if first else ',') + ','.join(batch)
+    yield '],"meta":' + json.dumps(payload.get('meta', {}), default=str) + '}'
+
+
+class NetworkGraphCache:
+    """Per-user built graphs, rebuilt after TTL expiry or an invalidating write"""
+
+    def __init__(self, ttl: int = GRAPH_TTL_SECONDS, max_graphs: int = MAX_CACHED_GRAPHS):
+        self.ttl = ttl
+        self.max_graphs = max_graphs
+        self._graphs: "OrderedDict[str, NetworkGraph]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, loader: Callable[[], Tuple[Iterable, Iterable, Iterable]]) -> NetworkGraph:
+        """Return the user's graph; loader returns (contacts, goals, suggestions)"""
+        key = str(user_id)
+        with self._lock:
+            graph = self._graphs.get(key)
+            if graph is not None and time.time() - graph.built_at < self.ttl:
+                self._graphs.move_to_end(key)
+                return graph
+
+        start = time.perf_counter()
+        contacts, goals, suggestions = loader()
+        graph = NetworkGraph.build(contacts, goals, suggestions)
+        graph.cluster()
+        logger.info(f"Built network graph for user {key}: {len(graph)} nodes, "
+                    f"{graph.edge_count} edges in {time.perf_counter() - start:.2f}s")
+
+        with self._lock:
+            self._graphs[key] = graph
+            while len(self._graphs) > self.max_graphs:
+                self._graphs.popitem(last=False)
+        return graph
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._graphs.pop(str(user_id), None)
+
+
+# Global instance for easy importing
+network_graph_cache = NetworkGraphCache()
@@ -3,13 +3,31 @@ Network Metrics Dashboard - Aggregated Community Analytics
 Provides anonymized metrics across all Root Members with real-time updates and milestone tracking.
 """
 
+import bisect
 import sqlite3
 import json
+import logging
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
 import random
 
+logger = logging.getLogger(__name__)
+
+# Counts derived from other tables (intros, launches, OKRs) are refreshed at most this often
+EXTERNAL_COUNTS_TTL = 60
+
+# Metric type feeding each milestone type
+MILESTONE_METRIC_TYPES = {
+    'funding_total': 'funding_raised',
+    'intros_made': 'intros_made',
+    'projects_launched': 'projects_launched',
+    'collective_okrs': 'collective_okrs'
+}
+METRIC_MILESTONE_TYPES = {metric: milestone for milestone, metric in MILESTONE_METRIC_TYPES.items()}
+
 
 @dataclass
 class NetworkMetric:
@@ -28,11 +46,27 @@ class NetworkMetricsManager:
     
     def __init__(self, db_path: str = 'db.sqlite3'):
         self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        
+        # Running SUM(value) per quarter and metric type, folded in from network_metrics by id
+        self._quarter_totals: Dict[str, Dict[str, float]] = {}
+        self._last_metric_id = 0
+        self._external_counts: Dict[str, int] = {}
+        self._external_counts_at = 0.0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        # Unachieved milestones per type as parallel sorted lists: thresholds for bisect, rows for announcing
+        self._pending_milestones: Optional[Dict[str, Tuple[List[float], List[tuple]]]] = None
+        self._unreported_milestones: List[Dict[str, Any]] = []
+        
         self._init_database()
+        self._load_totals()
 
     def _init_database(self):
         """Initialize network metrics database tables"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
             # Network metrics table
@@ -74,7 +108,10 @@ class NetworkMetricsManager:
                 )
             ''')
             
-            conn.commit()
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_community_milestones_type
+                ON community_milestones (milestone_type, achieved_at, threshold_value)
+            ''')
 
     def get_current_quarter(self) -> str:
         """Get current quarter string (e.g., '2025-Q1')"""
@@ -82,71 +119,196 @@ class NetworkMetricsManager:
         quarter = (now.month - 1) // 3 + 1
         return f"{now.year}-Q{quarter}"
 
-    def record_metric(self, metric_type: str, value: float, metadata: Dict = None):
-        """Record a network metric"""
+    def record_metric(self, metric_type: str, value: float, metadata: Dict = None) -> List[Dict[str, Any]]:
+        """Record a network metric, returning any milestones it pushed over their threshold"""
         quarter = self.get_current_quarter()
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        with self._lock, self._conn as conn:
+            conn.execute('''
                 INSERT INTO network_metrics (metric_type, value, quarter, metadata)
                 VALUES (?, ?, ?, ?)
             ''', (metric_type, value, quarter, json.dumps(metadata or {})))
-            conn.commit()
+        return self._catch_up()
 
-    def get_quarterly_metrics(self) -> Dict[str, Any]:
-        """Get aggregated metrics for current quarter"""
-        quarter = self.get_current_quarter()
-        
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+    def _load_totals(self):
+        """Seed the running totals with one grouped scan at startup"""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT quarter, metric_type, SUM(value), MAX(id) FROM network_metrics
+                GROUP BY quarter, metric_type
+            ''').fetchall()
+            for quarter, metric_type, total, max_id in rows:
+                self._quarter_totals.setdefault(quarter, {})[metric_type] = total
+                self._last_metric_id = max(self._last_metric_id, max_id)
+
+    def _catch_up(self) -> List[Dict[str, Any]]:
+        """
+        Fold network_metrics rows newer than the last one seen into the running
+        totals. Covers writes from this instance and from other processes
+        sharing the database with a single primary-key range scan.
+        """
+        with self._lock:
+            changed_types = set()
+            rows = self._conn.execute('''
+                SELECT id, metric_type, value, quarter FROM network_metrics
+                WHERE id > ? ORDER BY id
+            ''', (self._last_metric_id,)).fetchall()
             
-            # Get funding raised this quarter
-            cursor.execute('''
-                SELECT SUM(value) FROM network_metrics 
-                WHERE metric_type = 'funding_raised' AND quarter = ?
-            ''', (quarter,))
-            funding_raised = cursor.fetchone()[0] or 0
+            for metric_id, metric_type, value, quarter in rows:
+                totals = self._quarter_totals.setdefault(quarter, {})
+                totals[metric_type] = totals.get(metric_type, 0) + value
+                changed_types.add(metric_type)
+                self._last_metric_id = metric_id
             
+            if not rows:
+                return []
+            self._snapshot = None
+            return self._metrics_changed(changed_types)
+
+    def _quarter_total(self, quarter: str, metric_type: str) -> float:
+        return self._quarter_totals.get(quarter, {}).get(metric_type, 0)
+
+    def _count_external(self, query: str, params: tuple = ()) -> int:
+        try:
+            return self._conn.execute(query, params).fetchone()[0] or 0
+        except sqlite3.Error as e:
+            logger.error(f"Network metrics count failed: {e}")
+            return 0
+
+    def _refresh_external_counts(self, quarter: str):
+        """Re-count metrics that live in other tables, marking the ones that moved as changed"""
+        counts = {
             # Get introductions made this quarter
-            cursor.execute('''
+            'intros_made': self._count_external('''
                 SELECT COUNT(*) FROM contact_interactions 
                 WHERE interaction_type = 'introduction' 
                 AND created_at >= date('now', 'start of year', '+' || (CAST(substr(?, -1) AS INTEGER) - 1) * 3 || ' months')
                 AND created_at < date('now', 'start of year', '+' || CAST(substr(?, -1) AS INTEGER) * 3 || ' months')
-            ''', (quarter, quarter))
-            intros_made = cursor.fetchone()[0] or 0
-            
+            ''', (quarter, quarter)),
             # Get projects launched (goals completed)
-            cursor.execute('''
+            'projects_launched': self._count_external('''
                 SELECT COUNT(*) FROM goals 
                 WHERE status = 'completed' 
                 AND completed_at >= date('now', 'start of year', '+' || (CAST(substr(?, -1) AS INTEGER) - 1) * 3 || ' months')
                 AND completed_at < date('now', 'start of year', '+' || CAST(substr(?, -1) AS INTEGER) * 3 || ' months')
-            ''', (quarter, quarter))
-            projects_launched = cursor.fetchone()[0] or 0
-            
+            ''', (quarter, quarter)),
             # Get collective action completions
-            cursor.execute('''
+            'collective_okrs': self._count_external('''
                 SELECT COUNT(*) FROM collective_action_participants 
                 WHERE completion_status = 'completed'
                 AND JSON_EXTRACT(progress_data, '$.progress_percentage') >= 100
             ''')
-            collective_okrs = cursor.fetchone()[0] or 0
+        }
+        
+        changed_types = {
+            metric_type for metric_type, value in counts.items()
+            if self._external_counts.get(metric_type) != value
+        }
+        self._external_counts = counts
+        self._external_counts_at = time.time()
+        if changed_types:
+            self._snapshot = None
+            self._metrics_changed(changed_types)
+
+    def _current_value(self, metric_type: str) -> float:
+        if metric_type in self._external_counts:
+            return self._external_counts[metric_type]
+        return self._quarter_total(self.get_current_quarter(), metric_type)
+
+    def _load_pending_milestones(self) -> List[Dict[str, Any]]:
+        """Load unachieved milestones into sorted per-type lists and settle any already crossed"""
+        rows = self._conn.execute('''
+            SELECT id, milestone_type, threshold_value, title, description FROM community_milestones
+            WHERE achieved_at IS NULL
+            ORDER BY milestone_type, threshold_value
+        ''').fetchall()
+        
+        self._pending_milestones = {}
+        for row in rows:
+            thresholds, entries = self._pending_milestones.setdefault(row[1], ([], []))
+            thresholds.append(row[2])
+            entries.append(row)
+        
+        achieved = []
+        for milestone_type in list(self._pending_milestones):
+            metric_type = MILESTONE_METRIC_TYPES.get(milestone_type, milestone_type)
+            achieved.extend(self._evaluate_milestones(milestone_type, self._current_value(metric_type)))
+        return achieved
+
+    def _metrics_changed(self, metric_types) -> List[Dict[str, Any]]:
+        """Evaluate milestones fed by the given metric types against their current values"""
+        if self._pending_milestones is None:
+            return self._load_pending_milestones()
+        achieved = []
+        for metric_type in metric_types:
+            milestone_type = METRIC_MILESTONE_TYPES.get(metric_type)
+            if milestone_type in self._pending_milestones:
+                achieved.extend(self._evaluate_milestones(milestone_type, self._current_value(metric_type)))
+        return achieved
+
+    def _evaluate_milestones(self, milestone_type: str, current_value: float) -> List[Dict[str, Any]]:
+        """Announce every pending milestone of this type whose threshold is at or below current_value"""
+        thresholds, entries = self._pending_milestones.get(milestone_type, ([], []))
+        crossed_count = bisect.bisect_right(thresholds, current_value)
+        if not crossed_count:
+            return []
+        
+        crossed = entries[:crossed_count]
+        del thresholds[:crossed_count]
+        del entries[:crossed_count]
+        
+        achieved_milestones = []
+        with self._conn as conn:
+            for milestone_id, _, threshold, title, description in crossed:
+                # Another process sharing the database may have announced it already
+                updated = conn.execute('''
+                    UPDATE community_milestones 
+                    SET current_value = ?, achieved_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND achieved_at IS NULL
+                ''', (current_value, milestone_id)).rowcount
+                if not updated:
+                    continue
+                
+                conn.execute('''
+                    INSERT INTO ticker_messages 
+                    (message_type, content, priority)
+                    VALUES (?, ?, ?)
+                ''', ('milestone', f"🎉 {title} - {description}", 3))
+                
+                achieved_milestones.append({
+                    'id': milestone_id,
+                    'title': title,
+                    'description': description,
+                    'threshold': threshold,
+                    'current_value': current_value
+                })
+        
+        self._unreported_milestones.extend(achieved_milestones)
+        return achieved_milestones
+
+    def get_quarterly_metrics(self) -> Dict[str, Any]:
+        """Get aggregated metrics for current quarter"""
+        quarter = self.get_current_quarter()
+        
+        with self._lock:
+            self._catch_up()
+            if time.time() - self._external_counts_at > EXTERNAL_COUNTS_TTL:
+                self._refresh_external_counts(quarter)
             
-            # Calculate trends (compare with previous quarter)
-            prev_quarter = self._get_previous_quarter(quarter)
-            trends = self._calculate_trends(quarter, prev_quarter)
+            if self._snapshot is None or self._snapshot['quarter'] != quarter:
+                # Calculate trends (compare with previous quarter)
+                prev_quarter = self._get_previous_quarter(quarter)
+                self._snapshot = {
+                    'quarter': quarter,
+                    'funding_raised': self._quarter_total(quarter, 'funding_raised'),
+                    'intros_made': self._external_counts['intros_made'],
+                    'projects_launched': self._external_counts['projects_launched'],
+                    'collective_okrs': self._external_counts['collective_okrs'],
+                    'trends': self._calculate_trends(quarter, prev_quarter),
+                    'last_updated': datetime.now().isoformat()
+                }
             
-            return {
-                'quarter': quarter,
-                'funding_raised': funding_raised,
-                'intros_made': intros_made,
-                'projects_launched': projects_launched,
-                'collective_okrs': collective_okrs,
-                'trends': trends,
-                'last_updated': datetime.now().isoformat()
-            }
+            return dict(self._snapshot)
 
     def _get_previous_quarter(self, quarter: str) -> str:
         """Get previous quarter string"""
@@ -160,37 +322,25 @@ class NetworkMetricsManager:
 
     def _calculate_trends(self, current_quarter: str, previous_quarter: str) -> Dict[str, Dict[str, float]]:
         """Calculate trend percentages for metrics"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            trends = {}
-            
-            # Funding trend
-            cursor.execute('''
-                SELECT SUM(value) FROM network_metrics 
-                WHERE metric_type = 'funding_raised' AND quarter = ?
-            ''', (current_quarter,))
-            current_funding = cursor.fetchone()[0] or 0
-            
-            cursor.execute('''
-                SELECT SUM(value) FROM network_metrics 
-                WHERE metric_type = 'funding_raised' AND quarter = ?
-            ''', (previous_quarter,))
-            prev_funding = cursor.fetchone()[0] or 0
-            
-            funding_trend = self._calculate_percentage_change(current_funding, prev_funding)
-            trends['funding_raised'] = {
-                'direction': 'up' if funding_trend > 0 else 'down' if funding_trend < 0 else 'stable',
-                'percentage': abs(funding_trend)
-            }
-            
-            # Add similar calculations for other metrics
-            # For demo purposes, adding realistic trends
-            trends['intros_made'] = {'direction': 'up', 'percentage': 23.5}
-            trends['projects_launched'] = {'direction': 'up', 'percentage': 12.8}
-            trends['collective_okrs'] = {'direction': 'up', 'percentage': 45.2}
-            
-            return trends
+        trends = {}
+        
+        # Funding trend
+        current_funding = self._quarter_total(current_quarter, 'funding_raised')
+        prev_funding = self._quarter_total(previous_quarter, 'funding_raised')
+        
+        funding_trend = self._calculate_percentage_change(current_funding, prev_funding)
+        trends['funding_raised'] = {
+            'direction': 'up' if funding_trend > 0 else 'down' if funding_trend < 0 else 'stable',
+            'percentage': abs(funding_trend)
+        }
+        
+        # Add similar calculations for other metrics
+        # For demo purposes, adding realistic trends
+        trends['intros_made'] = {'direction': 'up', 'percentage': 23.5}
+        trends['projects_launched'] = {'direction': 'up', 'percentage': 12.8}
+        trends['collective_okrs'] = {'direction': 'up', 'percentage': 45.2}
+        
+        return trends
 
     def _calculate_percentage_change(self, current: float, previous: float) -> float:
         """Calculate percentage change between two values"""
@@ -284,7 +434,7 @@ class NetworkMetricsManager:
             }
         ]
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
             for milestone in milestones:
@@ -303,65 +453,25 @@ class NetworkMetricsManager:
                           milestone['title'], milestone['description']))
             
             conn.commit()
+            self._pending_milestones = None
 
     def check_milestone_achievements(self) -> List[Dict[str, Any]]:
-        """Check for newly achieved milestones"""
-        quarterly_data = self.get_quarterly_metrics()
-        achieved_milestones = []
-        
-        metric_mapping = {
-            'funding_total': quarterly_data['funding_raised'],
-            'intros_made': quarterly_data['intros_made'],
-            'projects_launched': quarterly_data['projects_launched'],
-            'collective_okrs': quarterly_data['collective_okrs']
-        }
+        """
+        Return milestones achieved since the last call. Crossings are detected
+        as metrics change; this only folds in pending writes and drains them.
+        """
+        self.get_quarterly_metrics()
         
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            for milestone_type, current_value in metric_mapping.items():
-                cursor.execute('''
-                    SELECT * FROM community_milestones 
-                    WHERE milestone_type = ? 
-                    AND threshold_value <= ? 
-                    AND achieved_at IS NULL
-                    ORDER BY threshold_value ASC
-                ''', (milestone_type, current_value))
-                
-                milestones = cursor.fetchall()
-                
-                for milestone_row in milestones:
-                    milestone_id = milestone_row[0]
-                    
-                    # Mark as achieved
-                    cursor.execute('''
-                        UPDATE community_milestones 
-                        SET current_value = ?, achieved_at = CURRENT_TIMESTAMP
-                        WHERE id = ?
-                    ''', (current_value, milestone_id))
-                    
-                    # Create ticker message
-                    cursor.execute('''
-                        INSERT INTO ticker_messages 
-                        (message_type, content, priority)
-                        VALUES (?, ?, ?)
-                    ''', ('milestone', f"🎉 {milestone_row[5]} - {milestone_row[6]}", 3))
-                    
-                    achieved_milestones.append({
-                        'id': milestone_id,
-                        'title': milestone_row[5],
-                        'description': milestone_row[6],
-                        'threshold': milestone_row[2],
-                        'current_value': current_value
-                    })
-            
-            conn.commit()
+        with self._lock:
+            if self._pending_milestones is None:
+                self._load_pending_milestones()
+            achieved_milestones, self._unreported_milestones = self._unreported_milestones, []
         
         return achieved_milestones
 
     def get_ticker_messages(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent ticker messages for display"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT * FROM ticker_messages 
@@ -388,7 +498,7 @@ class NetworkMetricsManager:
         if expires_hours:
             expires_at = (datetime.now() + timedelta(hours=expires_hours)).isoformat()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 INSERT INTO ticker_messages (message_type, content, priority, expires_at)
@@ -423,7 +533,7 @@ class NetworkMetricsManager:
         quarterly_data = self.get_quarterly_metrics()
         
         # Additional aggregate stats
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
             
             # Total active members (users with activity in last 30 days)
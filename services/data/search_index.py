@@ -0,0 +1,750 @@
+"""
+Contact Search Index
+Per-user BM25 inverted index over contact fields, blended with embedding
+similarity for semantic queries. Updated incrementally on contact writes and
+persisted to SQLite so warm restarts don't re-tokenize whole networks. Writes
+made by other workers or other code paths are caught by comparing a cheap
+contacts signature (count, latest update) before serving, or by a TTL when the
+caller has no signature; a stale index is rebuilt, keeping embeddings of
+unchanged contacts. Embedding API calls run outside the manager's lock.
+"""
+
+import bisect
+import heapq
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter, OrderedDict
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from services.ai.context_builder import cosine_similarity, openai_embed_fn, tokenize
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = 'search_index.db'
+MAX_LOADED_USERS = 64
+# How often a user's contacts signature is re-checked, and the rebuild TTL without one
+SIGNATURE_CHECK_SECONDS = 30
+INDEX_TTL_SECONDS = 3600
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Relative change in document count or length before cached norms are rebuilt
+STATS_DRIFT = 0.02
+# Terms present in at least this share of contacts get impact lists built on load
+WARM_TERM_SHARE = 0.01
+# Multi-term queries whose terms share more documents than this are ranked
+# with the threshold algorithm instead of exact overlap scoring
+MAX_EXACT_OVERLAP = 10000
+OVERLAP_SAMPLE_SIZE = 256
+
+# Field weights applied to term frequencies (a simple BM25F)
+FIELD_WEIGHTS = {
+    'name': 3,
+    'company': 2,
+    'title': 2,
+    'tags': 2,
+    'interests': 1,
+    'notes': 1,
+}
+# Fields kept alongside the index so results render without a database hit
+DISPLAY_FIELDS = ('name', 'company', 'title')
+
+# Lexical hits that get re-ranked by embedding similarity
+SEMANTIC_CANDIDATES = 200
+SEMANTIC_WEIGHT = 0.4
+EMBEDDING_BATCH_SIZE = 100
+MAX_CACHED_QUERY_EMBEDDINGS = 256
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'me', 'my', 'of', 'on', 'or', 'the', 'to', 'who', 'with', 'what', 'which'
+))
+
+
+def _field_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple, set)):
+        return ' '.join(str(item) for item in value)
+    return str(value)
+
+
+def index_terms(contact: Dict[str, Any]) -> Counter:
+    """Field-weighted term frequencies for one contact"""
+    terms = Counter()
+    for field_name, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(_field_text(contact.get(field_name))):
+            if token not in STOPWORDS:
+                terms[token] += weight
+    return terms
+
+
+def query_terms(query: str) -> List[str]:
+    """Distinct, stopword-free query terms"""
+    return list(dict.fromkeys(token for token in tokenize(query) if token not in STOPWORDS))
+
+
+def _document_text(contact: Dict[str, Any]) -> str:
+    return ' '.join(_field_text(contact.get(name)) for name in FIELD_WEIGHTS if contact.get(name))
+
+
+class _TermImpacts:
+    """BM25 contributions of one term, kept both by document and in impact order"""
+
+    __slots__ = ('generation', 'boost', 'by_doc', 'ordered', 'stale')
+
+    def __init__(self, generation: int, boost: float, by_doc: Dict[str, float]):
+        self.generation = generation
+        self.boost = boost
+        self.by_doc = by_doc
+        # Ascending on negated impact so bisect.insort keeps it best-first
+        self.ordered = sorted((-impact, contact_id) for contact_id, impact in by_doc.items())
+        self.stale = 0
+
+    def put(self, contact_id: str, impact: float):
+        if contact_id in self.by_doc:
+            self.stale += 1
+        self.by_doc[contact_id] = impact
+        bisect.insort(self.ordered, (-impact, contact_id))
+
+    def drop(self, contact_id: str):
+        if self.by_doc.pop(contact_id, None) is not None:
+            self.stale += 1
+        if self.stale > len(self.ordered) // 4:
+            self.ordered = sorted((-impact, contact_id) for contact_id, impact in self.by_doc.items())
+            self.stale = 0
+
+
+_numpy_module = None
+
+
+def _numpy():
+    """numpy, imported on the first semantic query rather than at app startup (None if missing)"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
+
+class ContactSearchIndex:
+    """In-memory inverted index for a single user's contacts"""
+
+    def __init__(self, user_id: str):
+        self.user_id = str(user_id)
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}
+        self.doc_lengths: Dict[str, int] = {}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self.embeddings: Dict[str, array] = {}
+        self.total_length = 0
+        # Term impacts are patched in place on writes using the idf and length
+        # norms of the current generation, which only advances once collection
+        # stats drift noticeably.
+        self._generation = 0
+        self._stats_reference = (0, 0.0)
+        self._impacts: Dict[str, _TermImpacts] = {}
+        self._matrix = None
+        self._matrix_ids: List[str] = []
+        # Freshness against the contacts table
+        self.built_at = time.time()
+        self.signature: Optional[str] = None
+        self.checked_at = 0.0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @property
+    def average_length(self) -> float:
+        return self.total_length / len(self.doc_lengths) if self.doc_lengths else 0.0
+
+    def add(self, contact_id: str, terms: Dict[str, int], document: Dict[str, Any],
+            embedding: Optional[array] = None):
+        contact_id = str(contact_id)
+        self.remove(contact_id)
+        length = sum(terms.values())
+        self.doc_terms[contact_id] = dict(terms)
+        self.doc_lengths[contact_id] = length
+        self.documents[contact_id] = document
+        self.total_length += length
+        self._check_drift()
+        norm = self._norm(length)
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[contact_id] = tf
+            cached = self._impacts.get(term)
+            if cached is not None and cached.generation == self._generation:
+                cached.put(contact_id, cached.boost * tf / (tf + norm))
+        if embedding is not None:
+            self.set_embedding(contact_id, embedding)
+
+    def remove(self, contact_id: str) -> bool:
+        contact_id = str(contact_id)
+        terms = self.doc_terms.pop(contact_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(contact_id, None)
+                if not posting:
+                    del self.postings[term]
+                    self._impacts.pop(term, None)
+                    continue
+            cached = self._impacts.get(term)
+            if cached is not None:
+                cached.drop(contact_id)
+        self.total_length -= self.doc_lengths.pop(contact_id, 0)
+        self._check_drift()
+        self.documents.pop(contact_id, None)
+        if self.embeddings.pop(contact_id, None) is not None:
+            self._matrix = None
+        return True
+
+    def set_embedding(self, contact_id: str, embedding: array):
+        self.embeddings[str(contact_id)] = embedding
+        self._matrix = None
+
+    def _check_drift(self):
+        reference_docs, reference_length = self._stats_reference
+        total_docs, average_length = len(self.doc_lengths), self.average_length
+        if (abs(total_docs - reference_docs) > STATS_DRIFT * max(reference_docs, 1) or
+                abs(average_length - reference_length) > STATS_DRIFT * max(reference_length, 1.0)):
+            self.refresh_stats()
+
+    def refresh_stats(self):
+        """Re-anchor idf and length norms on the current collection"""
+        self._generation += 1
+        self._stats_reference = (len(self.doc_lengths), self.average_length)
+
+    def _norm(self, length: int) -> float:
+        average_length = self._stats_reference[1] or 1.0
+        return BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+
+    def _term_impacts(self, term: str) -> Optional[_TermImpacts]:
+        cached = self._impacts.get(term)
+        if cached is not None and cached.generation == self._generation:
+            return cached
+        posting = self.postings.get(term)
+        if not posting:
+            return None
+        total_docs = len(self.doc_lengths)
+        df = len(posting)
+        boost = math.log(1 + (total_docs - df + 0.5) / (df + 0.5)) * (BM25_K1 + 1)
+        norm, doc_lengths = self._norm, self.doc_lengths
+        by_doc = {contact_id: boost * tf / (tf + norm(doc_lengths[contact_id])) for contact_id, tf in posting.items()}
+        cached = _TermImpacts(self._generation, boost, by_doc)
+        self._impacts[term] = cached
+        return cached
+
+    def warm(self, min_document_share: float = WARM_TERM_SHARE):
+        """Precompute impact lists for frequent terms, the expensive ones to build at query time"""
+        min_df = max(1, int(len(self.doc_lengths) * min_document_share))
+        for term, posting in self.postings.items():
+            if len(posting) >= min_df:
+                self._term_impacts(term)
+
+    def bm25(self, terms: List[str], limit: int) -> Dict[str, float]:
+        """Top-limit BM25 scores for documents matching any of the terms"""
+        lists = [impacts for impacts in (self._term_impacts(term) for term in terms) if impacts]
+        if not lists:
+            return {}
+        if len(lists) == 1:
+            return self._top_single(lists[0], limit, ())
+        if self._estimate_overlap(lists) > MAX_EXACT_OVERLAP:
+            return self._threshold_top(lists, limit)
+
+        # Mostly disjoint terms: documents matching several terms are scored
+        # exactly, everything else scores its single term impact, so each list
+        # only needs its head.
+        overlap = set()
+        for i, impacts in enumerate(lists):
+            for other in lists[i + 1:]:
+                overlap |= impacts.by_doc.keys() & other.by_doc.keys()
+        scores = {contact_id: sum(impacts.by_doc.get(contact_id, 0.0) for impacts in lists)
+                  for contact_id in overlap}
+        for impacts in lists:
+            scores.update(self._top_single(impacts, limit, overlap))
+        return dict(heapq.nlargest(limit, scores.items(), key=itemgetter(1)))
+
+    @staticmethod
+    def _estimate_overlap(lists: List[_TermImpacts]) -> float:
+        """Rough count of documents matching more than one term, from a sample"""
+        estimate = 0.0
+        for i, impacts in enumerate(lists):
+            for other in lists[i + 1:]:
+                small, large = sorted((impacts.by_doc, other.by_doc), key=len)
+                sample = list(islice(small, OVERLAP_SAMPLE_SIZE))
+                shared = sum(1 for contact_id in sample if contact_id in large)
+                estimate += len(small) * shared / len(sample)
+        return estimate
+
+    @staticmethod
+    def _top_single(impacts: _TermImpacts, limit: int, exclude) -> Dict[str, float]:
+        top = {}
+        for negated, contact_id in impacts.ordered:
+            if len(top) >= limit:
+                break
+            if contact_id in exclude or contact_id in top or impacts.by_doc.get(contact_id) != -negated:
+                continue  # Scored elsewhere or superseded by a later write
+            top[contact_id] = -negated
+        return top
+
+    @staticmethod
+    def _threshold_top(lists: List[_TermImpacts], limit: int) -> Dict[str, float]:
+        """
+        Threshold algorithm for heavily overlapping terms: walk the
+        impact-ordered postings in lockstep and stop once no unseen document
+        can beat the current top results.
+        """
+        top: List[Tuple[float, str]] = []
+        seen = set()
+        depth = 0
+        longest = max(len(impacts.ordered) for impacts in lists)
+        while depth < longest:
+            threshold = 0.0
+            for impacts in lists:
+                if depth >= len(impacts.ordered):
+                    continue
+                negated, contact_id = impacts.ordered[depth]
+                if impacts.by_doc.get(contact_id) != -negated:
+                    continue  # Superseded by a later write
+                threshold -= negated
+                if contact_id in seen:
+                    continue
+                seen.add(contact_id)
+                score = sum(other.by_doc.get(contact_id, 0.0) for other in lists)
+                if len(top) < limit:
+                    heapq.heappush(top, (score, contact_id))
+                elif score > top[0][0]:
+                    heapq.heapreplace(top, (score, contact_id))
+            if len(top) >= limit and top[0][0] >= threshold:
+                break
+            depth += 1
+        return {contact_id: score for score, contact_id in top}
+
+    def vector_scores(self, query_vector: List[float], limit: int) -> Dict[str, float]:
+        """Cosine similarity against every embedded document (numpy only)"""
+        np = _numpy()
+        if np is None or not self.embeddings:
+            return {}
+        if self._matrix is None:
+            self._matrix_ids = list(self.embeddings)
+            matrix = np.array([self.embeddings[cid] for cid in self._matrix_ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._matrix = matrix / norms
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = np.linalg.norm(query)
+        if query_norm == 0 or query.shape[0] != self._matrix.shape[1]:
+            return {}
+        similarities = self._matrix @ (query / query_norm)
+        limit = min(limit, len(similarities))
+        top = np.argpartition(-similarities, limit - 1)[:limit]
+        return {self._matrix_ids[i]: float(similarities[i]) for i in top}
+
+
+class SearchIndexManager:
+    """Loads, updates, persists and queries per-user contact search indexes"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 embed_fn: Optional[Callable[[List[str]], List[List[float]]]] = None,
+                 max_users: int = MAX_LOADED_USERS):
+        self.db_path = db_path or os.environ.get('SEARCH_INDEX_PATH', DEFAULT_INDEX_PATH)
+        self._embed_fn = embed_fn
+        self._embed_fn_resolved = embed_fn is not None
+        self.max_users = max_users
+
+        self._lock = threading.RLock()
+        self._indexes: "OrderedDict[str, ContactSearchIndex]" = OrderedDict()
+        self._query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._embedding_lock = threading.Lock()
+        # Per-user locks so concurrent searches share one rebuild without blocking other users
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stats = Counter()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS search_users (
+                    user_id TEXT PRIMARY KEY,
+                    indexed_at REAL NOT NULL,
+                    signature TEXT
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS search_documents (
+                    user_id TEXT NOT NULL,
+                    contact_id TEXT NOT NULL,
+                    document TEXT NOT NULL,
+                    terms TEXT NOT NULL,
+                    embedding BLOB,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, contact_id)
+                )
+            ''')
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _is_persisted(self, user_id: str) -> bool:
+        row = self._get_connection().execute(
+            'SELECT 1 FROM search_users WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        return row is not None
+
+    def _persist_rows(self, user_id: str, rows: Iterable[Tuple], commit: bool = True):
+        """Store (contact_id, document, terms[, embedding]) rows"""
+        now = time.time()
+        conn = self._get_connection()
+        conn.executemany(
+            '''INSERT OR REPLACE INTO search_documents
+               (user_id, contact_id, document, terms, embedding, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)''',
+            [(user_id, row[0], json.dumps(row[1]), json.dumps(row[2]),
+              row[3].tobytes() if len(row) > 3 and row[3] is not None else None, now)
+             for row in rows]
+        )
+        if commit:
+            conn.commit()
+
+    def _load_persisted(self, user_id: str) -> ContactSearchIndex:
+        index = ContactSearchIndex(user_id)
+        built = self._get_connection().execute(
+            'SELECT indexed_at, signature FROM search_users WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if built is not None:
+            index.built_at, index.signature = built
+        rows = self._get_connection().execute(
+            'SELECT contact_id, document, terms, embedding FROM search_documents WHERE user_id = ?',
+            (user_id,)
+        )
+        for contact_id, document, terms, embedding in rows:
+            vector = None
+            if embedding:
+                vector = array('f')
+                vector.frombytes(embedding)
+            index.add(contact_id, json.loads(terms), json.loads(document), vector)
+        return index
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def ensure_loaded(self, user_id: str,
+                      loader: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+                      signature: Optional[Callable[[], Any]] = None) -> Optional[ContactSearchIndex]:
+        """
+        Return the user's index, loading it from SQLite or building it with
+        loader. With a loader, an index whose contacts signature changed (or
+        that outlived INDEX_TTL_SECONDS when no signature is given) is rebuilt.
+        signature() and loader() run without holding the manager lock, so one
+        user's rebuild doesn't stall searches for everyone else.
+        """
+        user_id = str(user_id)
+        with self._lock:
+            index = self._cached_index(user_id)
+            if loader is None or self._recently_checked(index):
+                return index
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                # Another search may have checked or rebuilt it while we waited
+                index = self._cached_index(user_id)
+                if self._recently_checked(index):
+                    return index
+
+            current = self._stale_signature(index, signature)
+            if current is False:
+                return index
+            built, rows = self._build(user_id, loader, current, previous=index)
+
+            with self._lock:
+                if index is not None:
+                    self._stats['stale_rebuilds'] += 1
+                self._store_build(user_id, built, rows)
+            return built
+
+    def _cached_index(self, user_id: str) -> Optional[ContactSearchIndex]:
+        """The in-memory index, else the persisted one; call holding self._lock"""
+        index = self._indexes.get(user_id)
+        if index is not None:
+            self._indexes.move_to_end(user_id)
+        elif self._is_persisted(user_id):
+            index = self._load_persisted(user_id)
+            self._stats['persisted_loads'] += 1
+            self._remember(user_id, index)
+        return index
+
+    @staticmethod
+    def _recently_checked(index: Optional[ContactSearchIndex]) -> bool:
+        return index is not None and time.time() - index.checked_at < SIGNATURE_CHECK_SECONDS
+
+    def _stale_signature(self, index: Optional[ContactSearchIndex],
+                         signature: Optional[Callable[[], Any]]):
+        """False when index is fresh, else the current signature to build with"""
+        now = time.time()
+        current = json.dumps(signature(), default=str) if signature is not None else None
+        if index is None:
+            return current
+        index.checked_at = now
+        if signature is not None:
+            return False if current == index.signature else current
+        return False if now - index.built_at < INDEX_TTL_SECONDS else current
+
+    def _build(self, user_id: str, loader: Callable[[], Iterable[Dict[str, Any]]],
+               signature: Optional[str], previous: Optional[ContactSearchIndex] = None
+               ) -> Tuple[ContactSearchIndex, List[Tuple]]:
+        """Index every contact from loader; embeddings of unchanged contacts are kept"""
+        index = ContactSearchIndex(user_id)
+        rows = []
+        for contact in loader():
+            contact_id = str(contact['id'])
+            terms = index_terms(contact)
+            document = self._document(contact)
+            embedding = None
+            if previous is not None and previous.documents.get(contact_id, {}).get('text') == document['text']:
+                embedding = previous.embeddings.get(contact_id)
+            index.add(contact_id, terms, document, embedding)
+            rows.append((contact_id, document, terms, embedding))
+
+        index.signature = signature
+        index.checked_at = index.built_at
+        return index, rows
+
+    def _store_build(self, user_id: str, index: ContactSearchIndex, rows: List[Tuple]):
+        """Persist a built index and swap it in; call holding self._lock"""
+        conn = self._get_connection()
+        conn.execute('DELETE FROM search_documents WHERE user_id = ?', (user_id,))
+        self._persist_rows(user_id, rows, commit=False)
+        conn.execute('INSERT OR REPLACE INTO search_users (user_id, indexed_at, signature) VALUES (?, ?, ?)',
+                     (user_id, index.built_at, index.signature))
+        conn.commit()
+        self._stats['builds'] += 1
+        self._remember(user_id, index)
+
+    def _remember(self, user_id: str, index: ContactSearchIndex):
+        index.refresh_stats()
+        index.warm()
+        self._indexes[user_id] = index
+        self._indexes.move_to_end(user_id)
+        while len(self._indexes) > self.max_users:
+            self._indexes.popitem(last=False)
+
+    def upsert_contact(self, user_id: str, contact: Dict[str, Any]):
+        """Re-index one contact after it was created or edited"""
+        user_id = str(user_id)
+        contact_id = str(contact['id'])
+        terms = index_terms(contact)
+        document = self._document(contact)
+        try:
+            with self._lock:
+                index = self._indexes.get(user_id)
+                if index is None and not self._is_persisted(user_id):
+                    return  # Built from scratch on first search
+                if index is not None:
+                    index.add(contact_id, terms, document)
+                self._persist_rows(user_id, [(contact_id, document, terms)])
+                self._stats['upserts'] += 1
+        except Exception as e:
+            logger.error(f"Error indexing contact {contact_id}: {e}")
+
+    def remove_contact(self, user_id: str, contact_id: str):
+        """Drop a deleted contact from the index"""
+        user_id = str(user_id)
+        try:
+            with self._lock:
+                index = self._indexes.get(user_id)
+                if index is not None:
+                    index.remove(contact_id)
+                conn = self._get_connection()
+                conn.execute('DELETE FROM search_documents WHERE user_id = ? AND contact_id = ?',
+                             (user_id, str(contact_id)))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error removing contact {contact_id} from index: {e}")
+
+    def invalidate_user(self, user_id: str):
+        """Forget a user's index after bulk imports; it is rebuilt on the next search"""
+        user_id = str(user_id)
+        try:
+            with self._lock:
+                self._indexes.pop(user_id, None)
+                conn = self._get_connection()
+                conn.execute('DELETE FROM search_documents WHERE user_id = ?', (user_id,))
+                conn.execute('DELETE FROM search_users WHERE user_id = ?', (user_id,))
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Error invalidating search index for user {user_id}: {e}")
+
+    @staticmethod
+    def _document(contact: Dict[str, Any]) -> Dict[str, Any]:
+        document = {name: contact.get(name) for name in DISPLAY_FIELDS}
+        document['text'] = _document_text(contact)
+        return document
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(self, user_id: str, query: str, limit: int = 20,
+               loader: Optional[Callable[[], Iterable[Dict[str, Any]]]] = None,
+               semantic: bool = True, signature: Optional[Callable[[], Any]] = None) -> List[Dict[str, Any]]:
+        """Rank the user's contacts for a free-text query"""
+        start = time.perf_counter()
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        # The embedding API is called without holding the lock, so one user's
+        # round-trip doesn't queue every other search in the worker
+        query_vector = self._query_embedding(query) if semantic else None
+        semantic = query_vector is not None
+
+        index = self.ensure_loaded(user_id, loader, signature)
+        if index is None:
+            return []
+
+        with self._lock:
+            lexical = index.bm25(terms, max(limit, SEMANTIC_CANDIDATES) if semantic else limit)
+            candidates = list(lexical)
+            missing = [(cid, index.documents.get(cid, {}).get('text') or ' ')
+                       for cid in candidates if cid not in index.embeddings] if semantic else []
+
+        embedded = self._embed_texts(missing) if missing else []
+
+        with self._lock:
+            if embedded:
+                self._store_embeddings(index, embedded)
+            semantic_scores = self._semantic_scores(index, query_vector, candidates) if semantic else {}
+
+            max_lexical = max(lexical.values()) if lexical else 0.0
+            scored = []
+            for contact_id in set(candidates) | set(semantic_scores):
+                lexical_score = lexical.get(contact_id, 0.0) / max_lexical if max_lexical else 0.0
+                if semantic_scores:
+                    score = (1 - SEMANTIC_WEIGHT) * lexical_score + SEMANTIC_WEIGHT * semantic_scores.get(contact_id, 0.0)
+                else:
+                    score = lexical_score
+                scored.append((score, contact_id, lexical_score))
+
+            results = []
+            for score, contact_id, lexical_score in heapq.nlargest(limit, scored):
+                document = index.documents.get(contact_id)
+                if document is None:
+                    continue  # Removed while embeddings were fetched
+                result = {name: document.get(name) for name in DISPLAY_FIELDS}
+                result.update({
+                    'id': contact_id,
+                    'score': round(score, 4),
+                    'lexical_score': round(lexical_score, 4),
+                })
+                if contact_id in semantic_scores:
+                    result['semantic_score'] = round(semantic_scores[contact_id], 4)
+                results.append(result)
+
+            self._stats['queries'] += 1
+            self._stats['query_ms'] += int((time.perf_counter() - start) * 1000)
+            return results
+
+    def _resolve_embed_fn(self):
+        if not self._embed_fn_resolved:
+            self._embed_fn_resolved = True
+            self._embed_fn = openai_embed_fn()
+        return self._embed_fn
+
+    def _query_embedding(self, query: str) -> Optional[List[float]]:
+        """Cached query embedding; call without holding self._lock"""
+        embed_fn = self._resolve_embed_fn()
+        if embed_fn is None:
+            return None
+        key = query.strip().lower()
+        with self._embedding_lock:
+            cached = self._query_embeddings.get(key)
+            if cached is not None:
+                self._query_embeddings.move_to_end(key)
+                return cached
+        try:
+            vectors = embed_fn([query])
+        except Exception as e:
+            logger.warning(f"Semantic ranking unavailable, using BM25 only: {e}")
+            return None
+        if not vectors:
+            return None
+        with self._embedding_lock:
+            self._query_embeddings[key] = vectors[0]
+            while len(self._query_embeddings) > MAX_CACHED_QUERY_EMBEDDINGS:
+                self._query_embeddings.popitem(last=False)
+        return vectors[0]
+
+    def _embed_texts(self, items: List[Tuple[str, str]]) -> List[Tuple[str, str, array]]:
+        """Embed (contact_id, text) pairs in batches; call without holding self._lock"""
+        embedded = []
+        try:
+            for offset in range(0, len(items), EMBEDDING_BATCH_SIZE):
+                batch = items[offset:offset + EMBEDDING_BATCH_SIZE]
+                vectors = self._resolve_embed_fn()([text for _, text in batch])
+                embedded.extend((contact_id, text, array('f', vector))
+                                for (contact_id, text), vector in zip(batch, vectors))
+        except Exception as e:
+            logger.warning(f"Contact embeddings unavailable, using BM25 only: {e}")
+        return embedded
+
+    def _store_embeddings(self, index: ContactSearchIndex, embedded: List[Tuple[str, str, array]]):
+        """Attach fetched embeddings to documents that did not change meanwhile"""
+        rows = []
+        for contact_id, text, packed in embedded:
+            if index.documents.get(contact_id, {}).get('text') != text:
+                continue
+            index.set_embedding(contact_id, packed)
+            rows.append((packed.tobytes(), index.user_id, contact_id))
+        conn = self._get_connection()
+        conn.executemany(
+            'UPDATE search_documents SET embedding = ? WHERE user_id = ? AND contact_id = ?', rows
+        )
+        conn.commit()
+        self._stats['embedded'] += len(rows)
+
+    def _semantic_scores(self, index: ContactSearchIndex, query_vector: List[float],
+                         candidates: List[str]) -> Dict[str, float]:
+        try:
+            # Full-network nearest neighbours when numpy is around; otherwise only
+            # the lexical candidates are re-ranked.
+            scores = index.vector_scores(query_vector, SEMANTIC_CANDIDATES)
+            for contact_id in candidates:
+                if contact_id not in scores and contact_id in index.embeddings:
+                    scores[contact_id] = cosine_similarity(query_vector, index.embeddings[contact_id])
+            return {contact_id: max(0.0, score) for contact_id, score in scores.items()}
+        except Exception as e:
+            logger.warning(f"Semantic ranking unavailable, using BM25 only: {e}")
+            return {}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['loaded_users'] = len(self._indexes)
+            return stats
+
+
+# Global instance for easy importing
+search_index = SearchIndexManager()
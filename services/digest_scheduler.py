@@ -0,0 +1,416 @@
+"""
+Daily digest scheduler for Slack and Telegram.
+Digests are computed for users a batch at a time with one set-based query per
+metric (recent activity, follow-ups, network size, response rate) instead of
+the per-user dashboard/timeline/follow-up calls, rendered on a worker pool,
+and delivered through a per-channel rate-limited dispatcher. Each user's
+digest only goes to that user's own destinations (digest_destinations: a
+Slack incoming webhook URL or a Telegram chat id), and the all-users run only
+covers users that have one. Senders post to webhook URLs, so a run can be
+pointed at local stubs.
+
+Users set their destinations through /api/digest/destinations, and a daily
+cron job sends the digests:
+
+    flask --app backend digest run
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+from services.unified_utilities import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+USER_BATCH_SIZE = 500
+RENDER_WORKERS = 4
+DISPATCH_WORKERS = 4
+DIGEST_PREVIEW_ITEMS = 3
+ACTIVITY_DAYS = 1
+FOLLOW_UP_DAYS_AHEAD = 1
+RESPONSE_RATE_DAYS = 30
+DIGEST_INTERVAL_SECONDS = 24 * 3600
+SEND_TIMEOUT_SECONDS = 10
+MAX_SEND_ATTEMPTS = 3
+# Slack allows ~1 message/second per channel; Telegram ~30/second per bot
+CHANNEL_RATES_PER_MINUTE = {'slack': 60, 'telegram': 1800}
+# Stored timestamps are CURRENT_TIMESTAMP strings in UTC
+DB_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Digests are posted server-side, so only Slack's own webhook host is accepted
+SLACK_WEBHOOK_PREFIX = 'https://hooks.slack.com/'
+TELEGRAM_CHAT_RE = re.compile(r'^(-?\d{1,20}|@[A-Za-z][A-Za-z0-9_]{4,31})$')
+
+
+def validate_destination(channel: str, destination: str) -> str:
+    """The cleaned destination for a channel; raises ValueError if it can't receive digests"""
+    destination = (destination or '').strip()
+    if channel == 'slack':
+        if not destination.startswith(SLACK_WEBHOOK_PREFIX):
+            raise ValueError(f"Slack digests need an incoming webhook URL starting with {SLACK_WEBHOOK_PREFIX}")
+    elif channel == 'telegram':
+        if not TELEGRAM_CHAT_RE.match(destination):
+            raise ValueError("Telegram digests need a numeric chat id or an @channel name")
+    else:
+        raise ValueError(f"Unknown digest channel: {channel}")
+    return destination
+
+
+def env_destinations() -> Dict[str, Dict[str, str]]:
+    """The deployment-wide webhook/chat, which belongs to DIGEST_OWNER_USER_ID only"""
+    owner = os.environ.get('DIGEST_OWNER_USER_ID')
+    if not owner:
+        return {}
+    destinations = {
+        'slack': os.environ.get('SLACK_DIGEST_WEBHOOK_URL'),
+        'telegram': os.environ.get('TELEGRAM_CHAT_ID'),
+    }
+    return {owner: {channel: dest for channel, dest in destinations.items() if dest}}
+
+
+class DigestDataLoader:
+    """Loads digest metrics for many users at once, one query per metric"""
+
+    def __init__(self, db, preview_items: int = DIGEST_PREVIEW_ITEMS,
+                 fallback_destinations: Optional[Dict[str, Dict[str, str]]] = None):
+        self.db = db
+        self.preview_items = preview_items
+        self.fallback_destinations = env_destinations() if fallback_destinations is None else fallback_destinations
+
+    def iter_user_batches(self, batch_size: int = USER_BATCH_SIZE) -> Iterator[List[str]]:
+        """Keyset-paginate the ids of users with a digest destination"""
+        last_id = ''
+        # Configured owners without a stored destination go out with the last page
+        unseen_owners = set(self.fallback_destinations)
+        while True:
+            conn = self.db.get_connection()
+            try:
+                rows = conn.execute(
+                    "SELECT DISTINCT user_id FROM digest_destinations WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            finally:
+                conn.close()
+            batch = [str(row[0]) for row in rows]
+            unseen_owners.difference_update(batch)
+            if len(batch) < batch_size:
+                batch.extend(sorted(unseen_owners))
+                if batch:
+                    yield batch
+                return
+            yield batch
+            last_id = batch[-1]
+
+    def destinations(self, user_ids: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """{user_id: {channel: destination}} for the given users"""
+        user_ids = [str(user_id) for user_id in user_ids]
+        found = {user_id: dict(self.fallback_destinations.get(user_id, {})) for user_id in user_ids}
+        if not user_ids:
+            return found
+        conn = self.db.get_connection()
+        try:
+            rows = conn.execute(f"""
+                SELECT user_id, channel, destination FROM digest_destinations
+                WHERE user_id IN ({','.join('?' * len(user_ids))})
+            """, user_ids).fetchall()
+        finally:
+            conn.close()
+        for user_id, channel, destination in rows:
+            found[str(user_id)][channel] = destination
+        return found
+
+    def load(self, user_ids: Sequence[str], now: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+        now = now or datetime.utcnow()
+        user_ids = [str(user_id) for user_id in user_ids]
+        digests = {user_id: {
+            'user_id': user_id,
+            'date': now,
+            'interaction_count': 0,
+            'recent_interactions': [],
+            'follow_up_count': 0,
+            'follow_ups': [],
+            'overdue': [],
+            'total_contacts': 0,
+            'active_contacts': 0,
+            'response_rate': 0.0,
+        } for user_id in user_ids}
+        if not user_ids:
+            return digests
+
+        marks = ','.join('?' * len(user_ids))
+        today = now.date().isoformat()
+        conn = self.db.get_connection()
+        try:
+            rows = conn.execute(f"""
+                SELECT user_id, summary, total FROM (
+                    SELECT user_id, summary,
+                           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY timestamp DESC) AS position,
+                           COUNT(*) OVER (PARTITION BY user_id) AS total
+                    FROM contact_interactions
+                    WHERE user_id IN ({marks}) AND timestamp >= ?
+                ) WHERE position <= ?
+            """, (*user_ids, (now - timedelta(days=ACTIVITY_DAYS)).strftime(DB_TIMESTAMP_FORMAT),
+                  self.preview_items)).fetchall()
+            for user_id, summary, total in rows:
+                digest = digests[str(user_id)]
+                digest['interaction_count'] = total
+                digest['recent_interactions'].append({'summary': summary})
+
+            rows = conn.execute(f"""
+                SELECT user_id, name, follow_up_action, follow_up_due_date, total, overdue FROM (
+                    SELECT user_id, name, follow_up_action, follow_up_due_date,
+                           ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY follow_up_due_date) AS position,
+                           COUNT(*) OVER (PARTITION BY user_id) AS total,
+                           DATE(follow_up_due_date) <= ? AS overdue
+                    FROM contacts
+                    WHERE user_id IN ({marks}) AND follow_up_due_date IS NOT NULL
+                      AND DATE(follow_up_due_date) <= ?
+                ) WHERE position <= ?
+            """, (today, *user_ids, (now + timedelta(days=FOLLOW_UP_DAYS_AHEAD)).date().isoformat(),
+                  self.preview_items)).fetchall()
+            for user_id, name, action, due_date, total, overdue in rows:
+                digest = digests[str(user_id)]
+                digest['follow_up_count'] = total
+                follow_up = {'name': name, 'follow_up_action': action, 'follow_up_due_date': due_date}
+                digest['follow_ups'].append(follow_up)
+                if overdue:
+                    digest['overdue'].append(follow_up)
+
+            rows = conn.execute(f"""
+                SELECT user_id, COUNT(*), SUM(CASE WHEN warmth_label = 'Active' THEN 1 ELSE 0 END)
+                FROM contacts WHERE user_id IN ({marks}) GROUP BY user_id
+            """, user_ids).fetchall()
+            for user_id, total, active in rows:
+                digests[str(user_id)].update(total_contacts=total, active_contacts=active or 0)
+
+            rows = conn.execute(f"""
+                SELECT user_id,
+                       SUM(CASE WHEN direction = 'outbound' AND status = 'sent' THEN 1 ELSE 0 END),
+                       SUM(CASE WHEN direction = 'inbound' THEN 1 ELSE 0 END)
+                FROM contact_interactions
+                WHERE user_id IN ({marks}) AND interaction_type = 'Email' AND timestamp >= ?
+                GROUP BY user_id
+            """, (*user_ids, (now - timedelta(days=RESPONSE_RATE_DAYS)).strftime(DB_TIMESTAMP_FORMAT))).fetchall()
+            for user_id, sent, responses in rows:
+                if sent:
+                    digests[str(user_id)]['response_rate'] = round(responses / sent * 100, 1)
+        finally:
+            conn.close()
+        return digests
+
+
+def render_slack_digest(digest: Dict[str, Any]) -> str:
+    parts = ["📊 *Daily Networking Digest*"]
+
+    if digest['recent_interactions']:
+        parts.append(f"\n✅ *Recent Activity* ({digest['interaction_count']} interactions)")
+        for interaction in digest['recent_interactions']:
+            parts.append(f"• {interaction.get('summary') or 'Contact interaction'}")
+
+    if digest['follow_ups']:
+        parts.append(f"\n⏰ *Follow-ups Due* ({digest['follow_up_count']} contacts)")
+        for contact in digest['follow_ups']:
+            parts.append(f"• {contact['name']} - {contact.get('follow_up_action') or 'Follow up'}")
+
+    if digest['overdue']:
+        parts.append(f"\n⚠️ Overdue follow-ups: {', '.join(contact['name'] for contact in digest['overdue'])}")
+
+    if not digest['recent_interactions'] and not digest['follow_ups']:
+        parts.append("\n💤 Quiet day - consider reaching out to warm contacts")
+
+    return "\n".join(parts)
+
+
+def render_telegram_digest(digest: Dict[str, Any]) -> str:
+    parts = [
+        "📊 **Daily Networking Digest**",
+        f"*{digest['date'].strftime('%B %d, %Y')}*\n"
+    ]
+
+    if digest['recent_interactions']:
+        parts.append(f"✅ **Yesterday's Activity ({digest['interaction_count']} interactions):**")
+        for interaction in digest['recent_interactions']:
+            parts.append(f"• {interaction.get('summary') or 'Contact interaction'}")
+        parts.append("")
+
+    if digest['follow_ups']:
+        parts.append(f"⏰ **Follow-ups Due Today ({digest['follow_up_count']}):**")
+        for contact in digest['follow_ups']:
+            parts.append(f"• {contact['name']} - {contact.get('follow_up_action') or 'Follow up'}")
+        parts.append("")
+
+    parts.extend([
+        "📈 **Network Health:**",
+        f"• Total Contacts: {digest['total_contacts']}",
+        f"• Response Rate: {digest['response_rate']:.1f}%",
+        f"• Active Relationships: {digest['active_contacts']}"
+    ])
+
+    if not digest['recent_interactions'] and not digest['follow_ups']:
+        parts.append("💤 Quiet day - consider reaching out to warm contacts!")
+
+    return '\n'.join(parts)
+
+
+RENDERERS = {'slack': render_slack_digest, 'telegram': render_telegram_digest}
+
+
+class WebhookSender:
+    """Posts a rendered digest as JSON; url_for and build_payload map a destination to the request"""
+
+    def __init__(self, url_for: Callable[[str], str], build_payload: Callable[[str, str], Dict[str, Any]],
+                 timeout: float = SEND_TIMEOUT_SECONDS, session: Optional[requests.Session] = None):
+        self.url_for = url_for
+        self.build_payload = build_payload
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def __call__(self, destination: str, text: str) -> requests.Response:
+        return self.session.post(self.url_for(destination), json=self.build_payload(destination, text),
+                                 timeout=self.timeout)
+
+
+def slack_webhook_sender() -> WebhookSender:
+    """Sender for Slack incoming webhooks; the destination is the user's webhook URL"""
+    return WebhookSender(lambda url: url, lambda url, text: {
+        'text': text,
+        'blocks': [{'type': 'section', 'text': {'type': 'mrkdwn', 'text': text}}]
+    })
+
+
+def telegram_sender(token: Optional[str] = None, api_base: Optional[str] = None) -> Optional[WebhookSender]:
+    """Sender for the Telegram Bot API sendMessage method (TELEGRAM_API_BASE overrides the host)"""
+    token = token or os.environ.get('TELEGRAM_BOT_TOKEN')
+    if not token:
+        return None
+    api_base = (api_base or os.environ.get('TELEGRAM_API_BASE', 'https://api.telegram.org')).rstrip('/')
+    url = f"{api_base}/bot{token}/sendMessage"
+    return WebhookSender(lambda chat_id: url, lambda chat_id, text: {
+        'chat_id': chat_id, 'text': text, 'parse_mode': 'Markdown'
+    })
+
+
+class DigestDispatcher:
+    """Delivers rendered digests through per-channel rate limits, retrying 429s and 5xxs"""
+
+    def __init__(self, senders: Dict[str, Callable[[str, str], Any]],
+                 rates_per_minute: Optional[Dict[str, float]] = None,
+                 max_workers: int = DISPATCH_WORKERS, max_attempts: int = MAX_SEND_ATTEMPTS):
+        self.senders = senders
+        rates = dict(CHANNEL_RATES_PER_MINUTE, **(rates_per_minute or {}))
+        self.limiters = {channel: RateLimiter.per_minute(rates.get(channel, 60)) for channel in senders}
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+
+    def _send(self, channel: str, user_id: str, destination: str, text: str) -> bool:
+        sender = self.senders[channel]
+        for attempt in range(1, self.max_attempts + 1):
+            self.limiters[channel].acquire()
+            try:
+                response = sender(destination, text)
+            except Exception as e:
+                logger.warning(f"{channel} digest for user {user_id} failed (attempt {attempt}): {e}")
+                continue
+            if response is False:
+                return False
+            status = getattr(response, 'status_code', 200)
+            if status < 400:
+                return True
+            if status != 429 and status < 500:
+                logger.error(f"{channel} digest for user {user_id} rejected with {status}")
+                return False
+            retry_after = response.headers.get('Retry-After') if status == 429 else None
+            if retry_after:
+                time.sleep(min(float(retry_after), 30))
+        return False
+
+    def dispatch(self, messages: List[tuple]) -> Dict[str, int]:
+        """Send (channel, user_id, destination, text) messages; returns sent/failed counts"""
+        results = {'sent': 0, 'failed': 0}
+        if not messages:
+            return results
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='digest-dispatch') as pool:
+            for ok in pool.map(lambda message: self._send(*message), messages):
+                results['sent' if ok else 'failed'] += 1
+        return results
+
+
+class DigestScheduler:
+    """Computes, renders and sends daily digests for every user in batches"""
+
+    def __init__(self, db, senders: Optional[Dict[str, Callable[[str, str], Any]]] = None,
+                 batch_size: int = USER_BATCH_SIZE, render_workers: int = RENDER_WORKERS,
+                 rates_per_minute: Optional[Dict[str, float]] = None):
+        if senders is None:
+            senders = {'slack': slack_webhook_sender(), 'telegram': telegram_sender()}
+        self.senders = {channel: sender for channel, sender in senders.items() if sender is not None}
+        self.loader = DigestDataLoader(db)
+        self.dispatcher = DigestDispatcher(self.senders, rates_per_minute)
+        self.batch_size = batch_size
+        self.render_workers = render_workers
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    def is_configured(self) -> bool:
+        return bool(self.senders)
+
+    def _render(self, item) -> List[tuple]:
+        digest, destinations = item
+        return [(channel, digest['user_id'], destination, RENDERERS[channel](digest))
+                for channel, destination in destinations.items() if channel in self.senders]
+
+    def run_once(self, user_ids: Optional[Sequence] = None) -> Dict[str, Any]:
+        """Send digests to the given users, or to every user with a destination when none are given"""
+        started = time.perf_counter()
+        stats = {'users': 0, 'batches': 0, 'sent': 0, 'failed': 0}
+        if user_ids is not None:
+            ids = [str(user_id) for user_id in user_ids]
+            batches = (ids[i:i + self.batch_size] for i in range(0, len(ids), self.batch_size))
+        else:
+            batches = self.loader.iter_user_batches(self.batch_size)
+
+        with ThreadPoolExecutor(max_workers=self.render_workers, thread_name_prefix='digest-render') as pool:
+            for batch in batches:
+                destinations = self.loader.destinations(batch)
+                batch = [user_id for user_id in batch if destinations[str(user_id)]]
+                digests = self.loader.load(batch)
+                items = [(digest, destinations[user_id]) for user_id, digest in digests.items()]
+                messages = [message for rendered in pool.map(self._render, items) for message in rendered]
+                results = self.dispatcher.dispatch(messages)
+                stats['users'] += len(batch)
+                stats['batches'] += 1
+                stats['sent'] += results['sent']
+                stats['failed'] += results['failed']
+
+        stats['seconds'] = round(time.perf_counter() - started, 3)
+        self.last_run = stats
+        logger.info(f"Daily digests: {stats}")
+        return stats
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Daily digest run failed: {e}")
+
+    def start(self, interval: float = DIGEST_INTERVAL_SECONDS):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name='digest-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
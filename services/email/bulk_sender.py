@@ -0,0 +1,294 @@
+"""
+Bulk email delivery.
+Keeps SMTP connections open across messages in a small pool, sends Resend
+mail through the batch endpoint, and fans SMTP sends out over a bounded
+worker pool with per-provider rate limits and retry with backoff.
+"""
+
+import logging
+import queue
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import resend
+
+from services.unified_utilities import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 4
+# Providers drop long-lived sessions; reconnect after this many messages
+MAX_MESSAGES_PER_CONNECTION = 100
+# Idle pooled connections are NOOP-checked before reuse after this long
+IDLE_CHECK_SECONDS = 30
+DEFAULT_MAX_WORKERS = 4
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RESEND_BATCH_SIZE = 100  # Resend batch endpoint limit
+RESEND_REQUESTS_PER_MINUTE = 120  # Resend default: 2 requests/second
+SMTP_MESSAGES_PER_MINUTE = 600
+
+
+@dataclass
+class OutgoingEmail:
+    """One message in a bulk send"""
+    to_email: str
+    subject: str
+    html_content: Optional[str] = None
+    text_content: Optional[str] = None
+    reply_to: Optional[str] = None
+    contact_id: Optional[Any] = None
+    user_id: Optional[Any] = None
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+def build_mime_message(email: OutgoingEmail, from_address: str) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = email.subject
+    msg['From'] = from_address
+    msg['To'] = email.to_email
+    if email.reply_to:
+        msg['Reply-To'] = email.reply_to
+
+    # Add text and HTML parts
+    if email.text_content:
+        msg.attach(MIMEText(email.text_content, 'plain'))
+    if email.html_content:
+        msg.attach(MIMEText(email.html_content, 'html'))
+    return msg
+
+
+def is_transient_smtp_error(error: Exception) -> bool:
+    """Disconnects, network errors and 4xx replies are worth retrying; 5xx are not"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return False
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+class _PooledConnection:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """Reusable authenticated SMTP sessions shared by concurrent senders"""
+
+    def __init__(self, host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                 use_tls: bool = True, size: int = DEFAULT_POOL_SIZE, timeout: float = 30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[_PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.stats = {'connections_opened': 0, 'messages_sent': 0, 'discarded': 0}
+
+    def _connect(self) -> _PooledConnection:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        with self._lock:
+            self.stats['connections_opened'] += 1
+        return _PooledConnection(server)
+
+    def _checkout(self) -> _PooledConnection:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - conn.last_used < IDLE_CHECK_SECONDS:
+                return conn
+            try:
+                if conn.server.noop()[0] == 250:
+                    return conn
+            except smtplib.SMTPException:
+                pass
+            conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a logged-in SMTP session; it is discarded if the block raises"""
+        self._slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn.server
+            except Exception:
+                with self._lock:
+                    self.stats['discarded'] += 1
+                conn.close()
+                raise
+
+            conn.sent += 1
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self.stats['messages_sent'] += 1
+            if conn.sent >= MAX_MESSAGES_PER_CONNECTION:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def send_message(self, msg):
+        with self.connection() as server:
+            server.send_message(msg)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools: Dict[tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host: str, port: int, username: Optional[str] = None, password: Optional[str] = None,
+                  use_tls: bool = True) -> SMTPConnectionPool:
+    """Process-wide pool per SMTP server and account"""
+    key = (host, port, username, use_tls)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool.password != password:
+            pool = _pools[key] = SMTPConnectionPool(host, port, username, password, use_tls)
+        return pool
+
+
+class BulkEmailSender:
+    """Sends many messages through a UnifiedEmailService's configured providers"""
+
+    def __init__(self, service, max_workers: int = DEFAULT_MAX_WORKERS, max_retries: int = MAX_RETRIES,
+                 resend_per_minute: int = RESEND_REQUESTS_PER_MINUTE,
+                 smtp_per_minute: int = SMTP_MESSAGES_PER_MINUTE):
+        self.service = service
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.resend_limiter = RateLimiter.per_minute(resend_per_minute, burst=2)
+        self.smtp_limiter = RateLimiter.per_minute(smtp_per_minute, burst=max_workers)
+
+    def send_batch(self, messages: List[OutgoingEmail]) -> Dict[str, Any]:
+        """
+        Send every message, Resend first with SMTP fallback, and log the sent
+        ones against their contacts in one write. Results keep input order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(messages)
+        pending = list(range(len(messages)))
+
+        if self.service.resend_configured:
+            pending = self._send_resend(messages, pending, results)
+
+        if pending and self.service.smtp_configured:
+            self._send_smtp(messages, pending, results)
+        else:
+            for i in pending:
+                results[i] = results[i] or {'success': False, 'error': 'No email services configured', 'method': 'none'}
+
+        self.service._log_email_interactions([
+            (messages[i].contact_id, messages[i].user_id, messages[i].subject, 'sent', result['method'])
+            for i, result in enumerate(results) if result['success'] and messages[i].contact_id
+        ])
+
+        sent = sum(1 for result in results if result['success'])
+        return {'sent': sent, 'failed': len(results) - sent, 'results': results}
+
+    def _retry(self, send, transient) -> Any:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return send()
+            except Exception as e:
+                if attempt == self.max_retries or not transient(e):
+                    raise
+                time.sleep(RETRY_BACKOFF_SECONDS * (2 ** attempt))
+
+    def _send_resend(self, messages, indexes, results) -> List[int]:
+        """Send through Resend's batch endpoint; returns indexes that still need sending"""
+        remaining = []
+        for start in range(0, len(indexes), RESEND_BATCH_SIZE):
+            chunk = indexes[start:start + RESEND_BATCH_SIZE]
+            params = []
+            for i in chunk:
+                email = messages[i]
+                email_data = {"from": f"Rhiz <{self.service.from_email}>", "to": [email.to_email],
+                              "subject": email.subject}
+                if email.html_content:
+                    email_data["html"] = email.html_content
+                if email.text_content:
+                    email_data["text"] = email.text_content
+                if email.reply_to:
+                    email_data["reply_to"] = email.reply_to
+                params.append(email_data)
+
+            def send_chunk():
+                self.resend_limiter.acquire()
+                return resend.Batch.send(params)
+
+            try:
+                response = self._retry(send_chunk, lambda e: not isinstance(e, ValueError))
+                sent = (response or {}).get('data') or []
+                timestamp = datetime.now().isoformat()
+                for position, i in enumerate(chunk):
+                    message_id = sent[position].get('id') if position < len(sent) else None
+                    results[i] = {'success': True, 'message_id': message_id, 'method': 'resend', 'timestamp': timestamp}
+            except Exception as e:
+                logger.warning(f"Resend batch of {len(chunk)} failed: {e}")
+                for i in chunk:
+                    results[i] = {'success': False, 'error': str(e), 'method': 'resend'}
+                remaining.extend(chunk)
+        return remaining
+
+    def _send_smtp(self, messages, indexes, results):
+        pool = self.service.get_smtp_pool()
+        from_address = self.service.email_address
+
+        def send_one(i):
+            msg = build_mime_message(messages[i], from_address)
+
+            def attempt():
+                self.smtp_limiter.acquire()
+                pool.send_message(msg)
+
+            try:
+                self._retry(attempt, is_transient_smtp_error)
+                results[i] = {'success': True, 'method': 'smtp', 'timestamp': datetime.now().isoformat()}
+            except Exception as e:
+                logger.error(f"SMTP email to {messages[i].to_email} failed: {e}")
+                results[i] = {'success': False, 'error': str(e), 'method': 'smtp'}
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, pool.size)) as executor:
+            list(executor.map(send_one, indexes))
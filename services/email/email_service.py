@@ -3,7 +3,6 @@ Simple email service for sending AI-generated messages.
 Supports both SMTP and Resend for reliable email delivery.
 """
 
-import smtplib
 import os
 import logging
 import resend
@@ -12,11 +11,56 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from services.email.bulk_sender import get_smtp_pool
+
 try:
     resend_available = True
 except ImportError:
     resend_available = False
 
+OUTREACH_TEMPLATES = {
+    'warm_intro': {
+        'subject': 'Quick connection from {sender_name}',
+        'template': """Hi {contact_name},
+
+I hope this message finds you well. I came across your profile and was impressed by your work at {company}.
+
+{personalized_message}
+
+I'd love to connect and explore potential synergies between our work. Would you be open to a brief conversation?
+
+Best regards,
+{sender_name}"""
+    },
+    'collaboration': {
+        'subject': 'Collaboration opportunity - {goal_title}',
+        'template': """Hello {contact_name},
+
+I'm reaching out regarding an exciting collaboration opportunity that aligns with your expertise in {industry}.
+
+{personalized_message}
+
+I believe there could be mutual value in connecting. Would you be interested in exploring this further?
+
+Best,
+{sender_name}"""
+    },
+    'follow_up': {
+        'subject': 'Following up on our {goal_title} discussion',
+        'template': """Hi {contact_name},
+
+Following up on our recent conversation about {goal_title}.
+
+{personalized_message}
+
+Looking forward to continuing our discussion.
+
+Best regards,
+{sender_name}"""
+    }
+}
+
+
 class EmailService:
     def __init__(self, db):
         self.db = db
@@ -161,12 +205,9 @@ class EmailService:
             msg.attach(text_part)
             msg.attach(html_part)
             
-            # Send email
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_address, self.email_password)
-            server.send_message(msg)
-            server.quit()
+            # Send email over a pooled, already-authenticated connection
+            get_smtp_pool(self.smtp_server, self.smtp_port, self.email_address,
+                          self.email_password).send_message(msg)
             
             # Log the interaction
             self._log_email_interaction(contact_id, user_id, to_email, subject, 
@@ -226,47 +267,7 @@ class EmailService:
     
     def get_email_templates(self) -> Dict[str, Dict[str, str]]:
         """Get common email templates"""
-        return {
-            'warm_intro': {
-                'subject': 'Quick connection from {sender_name}',
-                'template': """Hi {contact_name},
-
-I hope this message finds you well. I came across your profile and was impressed by your work at {company}.
-
-{personalized_message}
-
-I'd love to connect and explore potential synergies between our work. Would you be open to a brief conversation?
-
-Best regards,
-{sender_name}"""
-            },
-            'collaboration': {
-                'subject': 'Collaboration opportunity - {goal_title}',
-                'template': """Hello {contact_name},
-
-I'm reaching out regarding an exciting collaboration opportunity that aligns with your expertise in {industry}.
-
-{personalized_message}
-
-I believe there could be mutual value in connecting. Would you be interested in exploring this further?
-
-Best,
-{sender_name}"""
-            },
-            'follow_up': {
-                'subject': 'Following up on our {goal_title} discussion',
-                'template': """Hi {contact_name},
-
-Following up on our recent conversation about {goal_title}.
-
-{personalized_message}
-
-Looking forward to continuing our discussion.
-
-Best regards,
-{sender_name}"""
-            }
-        }
+        return OUTREACH_TEMPLATES
     
     def test_email_configuration(self) -> Dict[str, Any]:
         """Test email configuration"""
@@ -0,0 +1,359 @@
+"""
+Durable outbound email queue.
+Request handlers enqueue mail into a SQLite (WAL) outbox and return; a worker
+thread drains it in batches through the bulk sender. Each message carries an
+idempotency key, failed sends back off exponentially, and messages that keep
+failing are dead-lettered for inspection instead of being lost. Message
+bodies are cleared once a message is sent, dead-lettered or expired, so
+login links are not kept at rest, and finished rows are purged after a
+retention period. Messages with an expiry (magic links) are dropped rather
+than retried once they can no longer be used.
+"""
+
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from services.auth.magic_links import ExpirySweeper
+from services.email.bulk_sender import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTBOX_PATH = 'email_outbox.db'
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 6
+BASE_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+# A claimed batch is handed to another worker if not finished within this time
+LEASE_SECONDS = 300
+POLL_INTERVAL_SECONDS = 2.0
+# Sent, dead and expired rows are deleted this long after they were queued
+RETENTION_SECONDS = 7 * 24 * 3600
+RETENTION_SWEEP_INTERVAL_SECONDS = 3600
+SWEEP_BATCH_SIZE = 1000
+FINISHED_STATUSES = ('sent', 'dead', 'expired')
+
+_COLUMNS = ('id', 'idempotency_key', 'kind', 'to_email', 'subject', 'html_content', 'text_content',
+            'reply_to', 'contact_id', 'user_id', 'attempts', 'created_at', 'expires_at')
+
+
+def default_idempotency_key(message: OutgoingEmail) -> str:
+    """Content hash; it only deduplicates against a copy that hasn't been sent yet"""
+    payload = '\x1f'.join(str(part or '') for part in (
+        message.to_email, message.subject, message.text_content, message.html_content, message.contact_id
+    ))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _default_send_fn(messages: List[OutgoingEmail]) -> Dict[str, Any]:
+    from services.unified_email_service import get_email_service
+    return get_email_service().send_bulk(messages)
+
+
+class EmailOutbox:
+    """Persistent outbox of emails with a batch-draining background worker"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 send_fn: Optional[Callable[[List[OutgoingEmail]], Dict[str, Any]]] = None,
+                 batch_size: int = BATCH_SIZE, max_attempts: int = MAX_ATTEMPTS,
+                 base_backoff: float = BASE_BACKOFF_SECONDS, retention: float = RETENTION_SECONDS):
+        self.db_path = db_path or os.environ.get('EMAIL_OUTBOX_PATH', DEFAULT_OUTBOX_PATH)
+        self.send_fn = send_fn or _default_send_fn
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.retention = retention
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = Counter()
+        self._last_batch: Dict[str, Any] = {}
+        self.sweeper = ExpirySweeper(self.purge_finished, RETENTION_SWEEP_INTERVAL_SECONDS,
+                                     name='email-outbox-retention')
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS email_outbox (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    kind TEXT NOT NULL DEFAULT 'generic',
+                    to_email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    html_content TEXT,
+                    text_content TEXT,
+                    reply_to TEXT,
+                    contact_id TEXT,
+                    user_id TEXT,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    leased_until REAL,
+                    last_error TEXT,
+                    method TEXT,
+                    message_id TEXT,
+                    created_at REAL NOT NULL,
+                    sent_at REAL,
+                    expires_at REAL
+                )
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_email_outbox_due
+                ON email_outbox (status, next_attempt_at)
+            ''')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_email_outbox_created
+                ON email_outbox (created_at)
+            ''')
+            self._conn = conn
+        return self._conn
+
+    def enqueue(self, message: OutgoingEmail, idempotency_key: Optional[str] = None,
+                kind: str = 'generic', start_worker: bool = True,
+                expires_at: Optional[float] = None) -> Tuple[int, bool]:
+        """
+        Store a message for delivery. Returns (outbox id, created); a repeated
+        idempotency key returns the existing row instead of queueing twice.
+        Without an idempotency key, a message is only a duplicate of an
+        identical one still waiting to be sent, so the same notification sent
+        again later is delivered again. A message still unsent at expires_at
+        (epoch seconds) is dropped.
+        """
+        key = idempotency_key or default_idempotency_key(message)
+        now = time.time()
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if idempotency_key is None:
+                    # A finished copy gives up its content key to the new message
+                    conn.execute(f'''
+                        UPDATE email_outbox SET idempotency_key = idempotency_key || ':' || id
+                        WHERE idempotency_key = ? AND status IN ({', '.join('?' * len(FINISHED_STATUSES))})
+                    ''', (key, *FINISHED_STATUSES))
+                created = conn.execute('''
+                    INSERT OR IGNORE INTO email_outbox
+                    (idempotency_key, kind, to_email, subject, html_content, text_content, reply_to,
+                     contact_id, user_id, next_attempt_at, created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (key, kind, message.to_email, message.subject, message.html_content, message.text_content,
+                      message.reply_to, message.contact_id, message.user_id, now, now,
+                      expires_at)).rowcount == 1
+                outbox_id = conn.execute('SELECT id FROM email_outbox WHERE idempotency_key = ?',
+                                         (key,)).fetchone()[0]
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._stats['enqueued' if created else 'duplicates'] += 1
+
+        if created:
+            if start_worker:
+                self.start_worker()
+            self._wakeup.set()
+        return outbox_id, created
+
+    def _claim_batch(self) -> List[Dict[str, Any]]:
+        """Lease due messages (and expired leases) to this worker"""
+        now = time.time()
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                expired = conn.execute('''
+                    UPDATE email_outbox
+                    SET status = 'expired', html_content = NULL, text_content = NULL, leased_until = NULL
+                    WHERE expires_at <= ?
+                      AND (status = 'pending' OR (status = 'sending' AND leased_until < ?))
+                ''', (now, now)).rowcount
+                rows = conn.execute(f'''
+                    SELECT {', '.join(_COLUMNS)} FROM email_outbox
+                    WHERE (status = 'pending' AND next_attempt_at <= ?)
+                       OR (status = 'sending' AND leased_until < ?)
+                    ORDER BY next_attempt_at
+                    LIMIT ?
+                ''', (now, now, self.batch_size)).fetchall()
+                conn.executemany('''
+                    UPDATE email_outbox SET status = 'sending', leased_until = ?, attempts = attempts + 1
+                    WHERE id = ?
+                ''', [(now + LEASE_SECONDS, row[0]) for row in rows])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            self._stats['expired'] += expired
+        claimed = [dict(zip(_COLUMNS, row)) for row in rows]
+        for row in claimed:
+            row['attempts'] += 1
+        return claimed
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(MAX_BACKOFF_SECONDS, self.base_backoff * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.8, 1.2)
+
+    def drain_once(self) -> int:
+        """Send one batch of due messages; returns how many were attempted"""
+        batch = self._claim_batch()
+        if not batch:
+            return 0
+
+        started = time.time()
+        messages = [OutgoingEmail(row['to_email'], row['subject'], row['html_content'], row['text_content'],
+                                  reply_to=row['reply_to'], contact_id=row['contact_id'], user_id=row['user_id'])
+                    for row in batch]
+        try:
+            results = self.send_fn(messages)['results']
+        except Exception as e:
+            logger.error(f"Email outbox batch of {len(batch)} failed: {e}")
+            results = [{'success': False, 'error': str(e)}] * len(batch)
+
+        now = time.time()
+        sent, retry, dead, expired = [], [], [], []
+        for row, result in zip(batch, results):
+            if result.get('success'):
+                sent.append((result.get('method'), result.get('message_id'), now, row['id']))
+            elif row['attempts'] >= self.max_attempts:
+                dead.append((result.get('error'), row['id']))
+            else:
+                next_attempt_at = now + self._backoff(row['attempts'])
+                if row['expires_at'] is not None and next_attempt_at >= row['expires_at']:
+                    # The link would be stale before the next attempt
+                    expired.append((result.get('error'), row['id']))
+                else:
+                    retry.append((result.get('error'), next_attempt_at, row['id']))
+
+        with self._lock:
+            conn = self._get_connection()
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('''
+                UPDATE email_outbox SET status = 'sent', method = ?, message_id = ?, sent_at = ?,
+                                        leased_until = NULL, last_error = NULL,
+                                        html_content = NULL, text_content = NULL
+                WHERE id = ?
+            ''', sent)
+            conn.executemany('''
+                UPDATE email_outbox SET status = 'pending', last_error = ?, next_attempt_at = ?, leased_until = NULL
+                WHERE id = ?
+            ''', retry)
+            conn.executemany('''
+                UPDATE email_outbox SET status = 'dead', last_error = ?, leased_until = NULL,
+                                        html_content = NULL, text_content = NULL
+                WHERE id = ?
+            ''', dead)
+            conn.executemany('''
+                UPDATE email_outbox SET status = 'expired', last_error = ?, leased_until = NULL,
+                                        html_content = NULL, text_content = NULL
+                WHERE id = ?
+            ''', expired)
+            conn.execute('COMMIT')
+
+            elapsed = max(now - started, 1e-6)
+            self._stats['batches'] += 1
+            self._stats['sent'] += len(sent)
+            self._stats['retried'] += len(retry)
+            self._stats['dead_lettered'] += len(dead)
+            self._stats['expired'] += len(expired)
+            self._stats['queue_latency_ms'] += sum((now - row['created_at']) * 1000 for row in batch if row['attempts'] == 1)
+            self._stats['first_attempts'] += sum(1 for row in batch if row['attempts'] == 1)
+            self._last_batch = {
+                'size': len(batch), 'sent': len(sent), 'seconds': round(elapsed, 3),
+                'messages_per_second': round(len(batch) / elapsed, 1)
+            }
+
+        if dead:
+            logger.warning(f"Dead-lettered {len(dead)} emails after {self.max_attempts} attempts")
+        return len(batch)
+
+    def drain(self) -> int:
+        """Send everything currently due"""
+        total = 0
+        while True:
+            attempted = self.drain_once()
+            if not attempted:
+                return total
+            total += attempted
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.drain_once():
+                    continue
+            except Exception as e:
+                logger.error(f"Email outbox worker error: {e}")
+            self._wakeup.wait(POLL_INTERVAL_SECONDS)
+            self._wakeup.clear()
+
+    def start_worker(self):
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='email-outbox', daemon=True)
+            self._worker.start()
+        self.sweeper.start()
+
+    def stop_worker(self, timeout: float = 5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+        self.sweeper.stop(timeout)
+
+    def purge_finished(self, batch_size: int = SWEEP_BATCH_SIZE) -> int:
+        """Delete sent, dead and expired rows older than the retention period"""
+        cutoff = time.time() - self.retention
+        placeholders = ', '.join('?' for _ in FINISHED_STATUSES)
+        removed = 0
+        while True:
+            with self._lock:
+                deleted = self._get_connection().execute(f'''
+                    DELETE FROM email_outbox WHERE id IN (
+                        SELECT id FROM email_outbox
+                        WHERE status IN ({placeholders}) AND created_at < ?
+                        LIMIT ?
+                    )
+                ''', (*FINISHED_STATUSES, cutoff, batch_size)).rowcount
+            removed += deleted
+            if deleted < batch_size:
+                return removed
+
+    def dead_letters(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._get_connection().execute('''
+                SELECT id, kind, to_email, subject, attempts, last_error, created_at
+                FROM email_outbox WHERE status = 'dead'
+                ORDER BY id DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return [dict(zip(('id', 'kind', 'to_email', 'subject', 'attempts', 'last_error', 'created_at'), row))
+                for row in rows]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status = dict(self._get_connection().execute(
+                'SELECT status, COUNT(*) FROM email_outbox GROUP BY status'
+            ).fetchall())
+            stats = dict(self._stats)
+            first_attempts = stats.pop('first_attempts', 0)
+            latency = stats.pop('queue_latency_ms', 0)
+            stats['avg_queue_latency_ms'] = round(latency / first_attempts, 1) if first_attempts else None
+            stats['last_batch'] = dict(self._last_batch)
+        stats['by_status'] = by_status
+        return stats
+
+
+# Global instance for easy importing
+email_outbox = EmailOutbox()
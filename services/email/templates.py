@@ -0,0 +1,269 @@
+"""
+Compiled email templates.
+Jinja templates are compiled once and pre-rendered with everything that is
+the same for every recipient; what remains is a list of static fragments
+around per-recipient slots, so rendering one email is a single join.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from jinja2 import DictLoader, Environment, StrictUndefined, select_autoescape
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Marks a per-recipient variable in the pre-rendered output
+_SLOT = '\x00{}\x00'
+_SLOT_PATTERN = re.compile('\x00(\\w+)\x00')
+
+TEMPLATE_SOURCES = {
+    'layout.html': """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{% block title %}{% endblock %}</title>
+</head>
+<body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="text-align: center; margin-bottom: 30px;">
+        <h1 style="color: #2563eb; margin: 0;">Rhiz</h1>
+        <p style="color: #6b7280; margin: 5px 0;">Relationship Intelligence Platform</p>
+    </div>
+
+    <div style="background: #f8fafc; border-radius: 8px; padding: 30px; margin: 20px 0;">
+        {% block content %}{% endblock %}
+    </div>
+
+    <div style="text-align: center; margin-top: 30px;">
+        <p style="color: #9ca3af; font-size: 12px;">
+{% block footer %}{% endblock %}
+        </p>
+    </div>
+</body>
+</html>""",
+
+    'magic_link.html': """{% extends "layout.html" %}
+{% block title %}Sign in to Rhiz{% endblock %}
+{% block content %}
+        <h2 style="color: #1f2937; margin-top: 0;">Welcome back!</h2>
+        <p style="color: #4b5563; line-height: 1.6;">
+            Click the button below to sign in to your Rhiz account. This link will expire in 15 minutes.
+        </p>
+
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{{ magic_url }}"
+               style="background: #2563eb; color: white; padding: 12px 24px; text-decoration: none;
+                      border-radius: 6px; font-weight: 500; display: inline-block;">
+                Sign in to Rhiz
+            </a>
+        </div>
+
+        <p style="color: #6b7280; font-size: 14px; margin-bottom: 0;">
+            If the button doesn't work, copy and paste this link into your browser:<br>
+            <a href="{{ magic_url }}" style="color: #2563eb; word-break: break-all;">{{ magic_url }}</a>
+        </p>
+{% endblock %}
+{% block footer %}
+            This email was sent to {{ to_email }}. If you didn't request this, you can safely ignore it.
+{% endblock %}""",
+
+    'magic_link.txt': """Sign in to Rhiz
+
+Welcome back!
+
+Click this link to sign in to your Rhiz account:
+{{ magic_url }}
+
+This link will expire in 15 minutes.
+
+If you didn't request this, you can safely ignore this email.""",
+
+    'welcome.html': """{% extends "layout.html" %}
+{% block title %}Welcome to Rhiz{% endblock %}
+{% block content %}
+        <h2 style="color: #1f2937; margin-top: 0;">{{ greeting }}</h2>
+        <p style="color: #4b5563; line-height: 1.6;">
+            Thank you for joining Rhiz! We're excited to help you build and maintain meaningful relationships
+            through intelligent insights and automation.
+        </p>
+
+        <h3 style="color: #1f2937;">Getting Started:</h3>
+        <ul style="color: #4b5563; line-height: 1.6;">
+            {% for step in getting_started %}
+            <li>{{ step }}</li>
+            {% endfor %}
+        </ul>
+
+        <div style="text-align: center; margin: 30px 0;">
+            <a href="{{ app_url }}"
+               style="background: #2563eb; color: white; padding: 12px 24px; text-decoration: none;
+                      border-radius: 6px; font-weight: 500; display: inline-block;">
+                Start Building Relationships
+            </a>
+        </div>
+{% endblock %}
+{% block footer %}
+            Questions? Just reply to this email - we're here to help!
+{% endblock %}""",
+
+    'welcome.txt': """Welcome to Rhiz!
+
+{{ greeting }}
+
+Thank you for joining Rhiz! We're excited to help you build and maintain meaningful relationships
+through intelligent insights and automation.
+
+Getting Started:
+{% for step in getting_started %}
+- {{ step }}
+{% endfor %}
+
+Visit {{ app_url }} to get started.
+
+Questions? Just reply to this email - we're here to help!""",
+
+    'ai_outreach.html': """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>{{ subject }}</title>
+</head>
+<body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="background: white; border-radius: 8px; padding: 30px;">
+        <div style="white-space: pre-wrap; line-height: 1.6; color: #1f2937;">{{ message_body }}</div>
+    </div>
+
+    <div style="text-align: center; margin-top: 30px;">
+        <p style="color: #9ca3af; font-size: 12px;">
+            Sent via Rhiz - Relationship Intelligence Platform
+        </p>
+    </div>
+</body>
+</html>""",
+
+    'ai_outreach.txt': "{{ message_body }}",
+}
+
+# name -> subject template and the variables that change per recipient
+EMAIL_TEMPLATES = {
+    'magic_link': {'subject': 'Sign in to Rhiz', 'fields': ('magic_url', 'to_email')},
+    'welcome': {'subject': 'Welcome to Rhiz!', 'fields': ('greeting',)},
+    'ai_outreach': {'subject': '{{ subject }}', 'fields': ('subject', 'message_body')},
+}
+
+GETTING_STARTED_STEPS = [
+    'Set your first relationship goal',
+    'Import your existing contacts',
+    'Discover AI-powered insights about your network',
+    'Start building meaningful connections',
+]
+
+
+def default_static_context() -> Dict[str, Any]:
+    """Template values shared by every recipient, read once at startup"""
+    return {
+        'app_url': os.environ.get('REPLIT_URL', 'http://localhost:5000'),
+        'getting_started': GETTING_STARTED_STEPS,
+    }
+
+
+class CompiledEmailTemplate:
+    """Static fragments of a pre-rendered template, interleaved with per-recipient slots"""
+
+    def __init__(self, rendered: str, escape_values: bool):
+        parts = _SLOT_PATTERN.split(rendered)
+        self.fragments: List[str] = parts[0::2]
+        self.fields: List[str] = parts[1::2]
+        self.escape_values = escape_values
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        out = [self.fragments[0]]
+        for field, fragment in zip(self.fields, self.fragments[1:]):
+            value = variables[field]
+            out.append(str(escape(value)) if self.escape_values else str(value))
+            out.append(fragment)
+        return ''.join(out)
+
+
+class EmailTemplates:
+    """Compiles every email template once and renders per-recipient variables only"""
+
+    def __init__(self, static_context: Optional[Dict[str, Any]] = None):
+        self.env = Environment(
+            loader=DictLoader(TEMPLATE_SOURCES),
+            autoescape=select_autoescape(['html']),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self.static_context = static_context if static_context is not None else default_static_context()
+        self._compiled: Dict[str, Dict[str, CompiledEmailTemplate]] = {}
+        self._lock = threading.Lock()
+        for name in EMAIL_TEMPLATES:
+            self._compile(name)
+
+    def _compile(self, name: str) -> Dict[str, CompiledEmailTemplate]:
+        spec = EMAIL_TEMPLATES[name]
+        html_slots = dict(self.static_context, **{f: Markup(_SLOT.format(f)) for f in spec['fields']})
+        text_slots = dict(self.static_context, **{f: _SLOT.format(f) for f in spec['fields']})
+
+        compiled = {
+            'subject': CompiledEmailTemplate(self.env.from_string(spec['subject']).render(text_slots), False),
+            'html': CompiledEmailTemplate(self.env.get_template(f'{name}.html').render(html_slots), True),
+            'text': CompiledEmailTemplate(self.env.get_template(f'{name}.txt').render(text_slots), False),
+        }
+        with self._lock:
+            self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name: str, **variables) -> Dict[str, str]:
+        """Render subject, html and text for one recipient"""
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            raise ValueError(f"Unknown email template: {name}")
+        return {part: template.render(variables) for part, template in compiled.items()}
+
+    def render_many(self, name: str, recipients: Iterable[Dict[str, Any]]) -> List[Dict[str, str]]:
+        return [self.render(name, **variables) for variables in recipients]
+
+
+def benchmark(recipients: int = 10000) -> Dict[str, float]:
+    """Emails per second for a batch: full Jinja render per recipient vs compiled fragments"""
+    templates = EmailTemplates()
+    batch = [{'magic_url': f'http://localhost:5000/api/auth/verify?token=token-{i}',
+              'to_email': f'user{i}@example.com'} for i in range(recipients)]
+
+    html = templates.env.get_template('magic_link.html')
+    text = templates.env.get_template('magic_link.txt')
+    start = time.perf_counter()
+    for variables in batch:
+        context = dict(templates.static_context, **variables)
+        html.render(context)
+        text.render(context)
+    jinja_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    templates.render_many('magic_link', batch)
+    compiled_seconds = time.perf_counter() - start
+
+    return {
+        'recipients': recipients,
+        'jinja_per_second': round(recipients / jinja_seconds),
+        'compiled_per_second': round(recipients / compiled_seconds),
+        'speedup': round(jinja_seconds / compiled_seconds, 1)
+    }
+
+
+# Global instance for easy importing
+email_templates = EmailTemplates()
+
+
+if __name__ == "__main__":
+    print("Email template benchmark (10k recipients)")
+    print("=" * 50)
+    for key, value in benchmark().items():
+        print(f"{key}: {value}")
@@ -0,0 +1,175 @@
+"""
+Health probes
+Liveness answers "is this process serving requests" and never touches a
+dependency. Readiness runs the dependency probes (database, email provider,
+OpenAI and Stripe configuration) concurrently, each with its own timeout, and
+caches the combined result for a few seconds so load balancer checks don't
+open connections or construct services on every poll. Concurrent callers of
+an expired result share a single refresh, and a probe that is still stuck
+from an earlier refresh is reported as timed out rather than started again.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CACHE_TTL_SECONDS = 5
+PROBE_TIMEOUT_SECONDS = 2.0
+# Probe statuses that count towards readiness
+PASSING_STATUSES = ('healthy', 'configured')
+
+
+class HealthProbe:
+    """A named dependency check; fn returns None (healthy) or a dict with a 'status' key"""
+
+    def __init__(self, name: str, fn: Callable[[], Optional[Dict[str, Any]]],
+                 timeout: float = PROBE_TIMEOUT_SECONDS, critical: bool = True):
+        self.name = name
+        self.fn = fn
+        self.timeout = timeout
+        self.critical = critical
+
+
+def config_probe(*env_vars: str) -> Callable[[], Dict[str, Any]]:
+    """Probe that reports whether any of the given environment variables is set"""
+    def check():
+        configured = any(os.environ.get(name) for name in env_vars)
+        return {'status': 'configured' if configured else 'not_configured'}
+    return check
+
+
+def email_probe() -> Dict[str, Any]:
+    from services.unified_email_service import get_email_service
+    status = get_email_service().get_service_status()
+    return {
+        'status': 'configured' if status['any_configured'] else 'not_configured',
+        'resend': status['resend']['configured'],
+        'smtp': status['smtp']['configured'],
+    }
+
+
+def standard_probes(database: Callable[[], Any]) -> List[HealthProbe]:
+    """The app's dependency probes; only the database is required for readiness"""
+    return [
+        HealthProbe('database', database),
+        HealthProbe('email', email_probe, critical=False),
+        HealthProbe('openai', config_probe('OPENAI_API_KEY'), critical=False),
+        HealthProbe('stripe', config_probe('STRIPE_SECRET_KEY'), critical=False),
+    ]
+
+
+class HealthMonitor:
+    """Runs probes concurrently with per-probe timeouts and caches readiness for ttl seconds"""
+
+    def __init__(self, probes: List[HealthProbe], ttl: float = HEALTH_CACHE_TTL_SECONDS):
+        self.probes = list(probes)
+        self.ttl = ttl
+        self.started_at = time.time()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[str, Any] = {}
+        self._cached: Optional[Dict[str, Any]] = None
+        self._cached_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._metrics = {'refreshes': 0, 'cache_hits': 0, 'timeouts': 0}
+
+    def liveness(self) -> Dict[str, Any]:
+        """Process-level check; never runs a probe"""
+        return {
+            'status': 'alive',
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+        }
+
+    def readiness(self, force: bool = False) -> Dict[str, Any]:
+        """Combined probe results, refreshed at most once per ttl"""
+        cached = self._fresh_result(force)
+        if cached is not None:
+            return cached
+
+        with self._refresh_lock:
+            # Another caller may have refreshed while we waited for the lock
+            cached = self._fresh_result(force)
+            if cached is not None:
+                return cached
+            result = self._run_probes()
+            self._cached = result
+            self._cached_at = time.monotonic()
+            self._metrics['refreshes'] += 1
+        return dict(result, cached=False, age_seconds=0.0)
+
+    def _fresh_result(self, force: bool) -> Optional[Dict[str, Any]]:
+        if force or self._cached is None:
+            return None
+        age = time.monotonic() - self._cached_at
+        if age >= self.ttl:
+            return None
+        self._metrics['cache_hits'] += 1
+        return dict(self._cached, cached=True, age_seconds=round(age, 2))
+
+    def _run_probes(self) -> Dict[str, Any]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, len(self.probes)), thread_name_prefix='health-probe'
+            )
+
+        started = time.perf_counter()
+        submitted = {}
+        for probe in self.probes:
+            future = self._running.get(probe.name)
+            if future is None or future.done():
+                future = self._executor.submit(self._timed, probe)
+                self._running[probe.name] = future
+                submitted[probe.name] = True
+            else:
+                submitted[probe.name] = False
+
+        checks = {}
+        for probe in self.probes:
+            future = self._running[probe.name]
+            remaining = probe.timeout - (time.perf_counter() - started)
+            if not submitted[probe.name]:
+                check = {'status': 'timeout', 'error': 'previous check is still running'}
+            else:
+                try:
+                    check = future.result(timeout=max(0.0, remaining))
+                except FutureTimeoutError:
+                    check = {'status': 'timeout', 'error': f'no response within {probe.timeout}s'}
+            if check['status'] == 'timeout':
+                self._metrics['timeouts'] += 1
+                logger.warning(f"Health probe {probe.name} timed out")
+            check['critical'] = probe.critical
+            checks[probe.name] = check
+
+        ready = all(check['status'] in PASSING_STATUSES
+                    for check in checks.values() if check['critical'])
+        return {
+            'status': 'ready' if ready else 'not_ready',
+            'ready': ready,
+            'checked_at': datetime.now().isoformat(),
+            'duration_ms': round((time.perf_counter() - started) * 1000, 2),
+            'checks': checks,
+        }
+
+    @staticmethod
+    def _timed(probe: HealthProbe) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            check = dict(probe.fn() or {'status': 'healthy'})
+        except Exception as e:
+            check = {'status': 'unhealthy', 'error': f"{type(e).__name__}: {e}"}
+        check['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return check
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return dict(self._metrics, ttl_seconds=self.ttl)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -10,7 +10,12 @@ from typing import Dict, List, Optional, Any
 import json
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-from models import Database, Contact, ContactInteraction
+from models import Database, Contact
+from services.data.contact_export import ContactExporter
+from services.automation_events import AutomationEventBus, EVENT_TYPES, create_event
+from services.digest_scheduler import (
+    DigestDataLoader, DigestScheduler, render_slack_digest, slack_webhook_sender, telegram_sender
+)
 try:
     from telegram_integration import TelegramNetworkingBot
     TELEGRAM_INTEGRATION_AVAILABLE = True
@@ -77,51 +82,32 @@ class SlackIntegration:
             logger.error(f"Slack integration error: {str(e)}")
             return False
     
+    def post_message(self, user_id, text: str) -> bool:
+        """Post an already formatted message to the configured channel"""
+        response = self.client.chat_postMessage(
+            channel=self.slack_channel_id,
+            text=text,
+            blocks=[
+                {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": text
+                    }
+                }
+            ]
+        )
+        return bool(response.get('ok', True))
+    
     def send_daily_digest(self, user_id: int) -> bool:
         """Send daily networking digest to Slack"""
         if not self.is_configured():
             return False
         
         try:
-            # Get recent interactions
-            interaction_model = ContactInteraction(self.db)
-            recent_interactions = interaction_model.get_timeline(user_id, days_back=1)
-            
-            # Get contacts needing follow-up
-            contact_model = Contact(self.db)
-            follow_ups = contact_model.get_follow_ups_due(user_id, days_ahead=1)
-            
-            # Build digest message
-            digest_parts = ["📊 *Daily Networking Digest*"]
-            
-            if recent_interactions:
-                digest_parts.append(f"\n✅ *Recent Activity* ({len(recent_interactions)} interactions)")
-                for interaction in recent_interactions[:3]:  # Show top 3
-                    digest_parts.append(f"• {interaction.get('summary', 'Contact interaction')}")
-            
-            if follow_ups:
-                digest_parts.append(f"\n⏰ *Follow-ups Due* ({len(follow_ups)} contacts)")
-                for contact in follow_ups[:3]:  # Show top 3
-                    digest_parts.append(f"• {contact['name']} - {contact.get('follow_up_action', 'Follow up')}")
-            
-            if not recent_interactions and not follow_ups:
-                digest_parts.append("\n💤 Quiet day - consider reaching out to warm contacts")
-            
-            digest_message = "\n".join(digest_parts)
-            
-            response = self.client.chat_postMessage(
-                channel=self.slack_channel_id,
-                text=digest_message,
-                blocks=[
-                    {
-                        "type": "section",
-                        "text": {
-                            "type": "mrkdwn",
-                            "text": digest_message
-                        }
-                    }
-                ]
-            )
+            # Recent activity, follow-ups due and overdue follow-ups in one pass
+            digest = DigestDataLoader(self.db).load([user_id])[str(user_id)]
+            self.post_message(user_id, render_slack_digest(digest))
             
             logger.info("Daily digest sent to Slack")
             return True
@@ -207,41 +193,24 @@ class CRMSync:
         self.supported_crms = ['hubspot', 'salesforce', 'airtable', 'pipedrive']
         logger.info("CRM sync module initialized")
     
-    def export_contacts_to_csv(self, user_id: int) -> str:
-        """Export contacts in standard CRM format"""
+    def export_contacts_to_csv(self, user_id: int, crm: str = 'standard') -> str:
+        """Export contacts in standard (or a CRM-specific) CSV format"""
         try:
-            contact_model = Contact(self.db)
-            contacts = contact_model.get_all(user_id)
-            
-            if not contacts:
-                return ""
-            
-            # Generate CSV content
-            csv_lines = ["Name,Email,Phone,Company,Title,LinkedIn,Relationship Type,Warmth Level,Priority,Notes,Last Contact,Follow Up Due"]
-            
-            for contact in contacts:
-                line_parts = [
-                    contact.get('name', ''),
-                    contact.get('email', ''),
-                    contact.get('phone', ''),
-                    contact.get('company', ''),
-                    contact.get('title', ''),
-                    contact.get('linkedin', ''),
-                    contact.get('relationship_type', ''),
-                    contact.get('warmth_label', ''),
-                    contact.get('priority_level', ''),
-                    contact.get('notes', '').replace(',', ';'),  # Escape commas
-                    contact.get('last_interaction_date', ''),
-                    contact.get('follow_up_due_date', '')
-                ]
-                csv_lines.append(','.join(f'"{part}"' for part in line_parts))
-            
-            return '\n'.join(csv_lines)
+            csv_content = ''.join(ContactExporter(self.db).iter_csv(user_id, crm))
+            # Header only means there was nothing to export
+            return csv_content if csv_content.count('\n') > 1 else ""
             
         except Exception as e:
             logger.error(f"CSV export error: {str(e)}")
             return ""
     
+    def stream_export(self, user_id: int, crm: str = 'standard', fmt: str = 'csv', compress: bool = False):
+        """
+        Stream contacts for import into an external CRM.
+        Returns (chunks, mimetype, filename); raises ValueError for unknown crm/fmt.
+        """
+        return ContactExporter(self.db).export(user_id, profile=crm, fmt=fmt, compress=compress)
+    
     def get_sync_status(self) -> Dict[str, Any]:
         """Get current sync status with external CRMs"""
         return {
@@ -336,59 +305,61 @@ class AutomationEngine:
         self.calendar = CalendarIntegration(db)
         self.crm_sync = CRMSync(db)
         self.social_monitor = SocialMediaMonitoring(db)
+        
+        # Digests go to each user's own Slack webhook / Telegram chat (digest_destinations)
+        self.digests = DigestScheduler(db, senders={'slack': slack_webhook_sender(), 'telegram': telegram_sender()})
+        
+        # Interaction side effects run on the bus, not in the request
+        self.events = AutomationEventBus()
+        self._register_subscribers()
         logger.info("Automation engine initialized")
     
-    def process_interaction_automation(self, contact_id: int, interaction_type: str, user_id: int):
-        """Process automation triggers after an interaction"""
+    def _register_subscribers(self):
+        """Wire Slack, Telegram and calendar side effects to interaction events"""
+        slack_messages = {
+            'email_sent': "Email sent successfully",
+            'meeting_scheduled': "Meeting scheduled",
+            'introduction_made': "Introduction facilitated",
+        }
+        
+        def slack_update(event):
+            self.slack.send_networking_update(slack_messages[event.event_type], event.contact_name)
+        
+        async def telegram_email_sent(event):
+            if self.telegram:
+                await self.telegram.send_notification("Email sent successfully", event.contact_name)
+        
+        def schedule_email_follow_up(event):
+            self.calendar.schedule_follow_up(event.contact_id, days_ahead=7, note="Follow up on email response")
+        
+        for event_type in slack_messages:
+            self.events.subscribe(event_type, slack_update)
+        self.events.subscribe('email_sent', telegram_email_sent)
+        self.events.subscribe('email_sent', schedule_email_follow_up)
+    
+    def process_interaction_automation(self, contact_id: int, interaction_type: str, user_id: int) -> bool:
+        """Publish an interaction event; its Slack/Telegram/calendar side effects run in the background"""
+        if interaction_type not in EVENT_TYPES:
+            return False
+        
         try:
             contact_model = Contact(self.db)
             contact = contact_model.get_by_id(contact_id)
             
             if not contact:
-                return
+                return False
             
             contact_name = contact['name']
+            published = self.events.publish(create_event(
+                interaction_type, user_id=user_id, contact_id=contact_id, contact_name=contact_name
+            ))
             
-            # Send notifications
-            if interaction_type == 'email_sent':
-                self.slack.send_networking_update(
-                    f"Email sent successfully", 
-                    contact_name
-                )
-                
-                # Send Telegram notification  
-                import asyncio
-                try:
-                    asyncio.create_task(self.telegram.send_notification(
-                        f"Email sent successfully", 
-                        contact_name
-                    ))
-                except Exception as e:
-                    logger.warning(f"Telegram notification failed: {e}")
-                
-                # Schedule follow-up reminder
-                self.calendar.schedule_follow_up(
-                    contact_id, 
-                    days_ahead=7, 
-                    note="Follow up on email response"
-                )
-            
-            elif interaction_type == 'meeting_scheduled':
-                self.slack.send_networking_update(
-                    f"Meeting scheduled", 
-                    contact_name
-                )
-            
-            elif interaction_type == 'introduction_made':
-                self.slack.send_networking_update(
-                    f"Introduction facilitated", 
-                    contact_name
-                )
-            
-            logger.info(f"Automation processed for {contact_name}: {interaction_type}")
+            logger.info(f"Automation queued for {contact_name}: {interaction_type}")
+            return published
             
         except Exception as e:
             logger.error(f"Automation processing error: {str(e)}")
+            return False
     
     def get_integration_status(self) -> Dict[str, Any]:
         """Get status of all integrations"""
@@ -413,26 +384,17 @@ class AutomationEngine:
             "social_monitoring": {
                 "configured": False,
                 "status": "mock_mode"
-            }
+            },
+            "event_bus": self.events.get_metrics()
         }
     
     def run_daily_automation(self, user_id: int):
         """Run daily automation tasks"""
         try:
-            # Send daily Slack digest
-            self.slack.send_daily_digest(user_id)
-            
-            # Process follow-up reminders
-            contact_model = Contact(self.db)
-            overdue_followups = contact_model.get_follow_ups_due(user_id, days_ahead=0)
-            
-            if overdue_followups:
-                overdue_names = [contact['name'] for contact in overdue_followups[:3]]
-                self.slack.send_networking_update(
-                    f"⚠️ Overdue follow-ups: {', '.join(overdue_names)}"
-                )
+            # Daily digest, including overdue follow-up reminders
+            self.digests.run_once([user_id])
             
             logger.info(f"Daily automation completed for user {user_id}")
             
         except Exception as e:
-            logger.error(f"Daily automation error: {str(e)}")
\ No newline at end of file
+            logger.error(f"Daily automation error: {str(e)}")
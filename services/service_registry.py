@@ -0,0 +1,137 @@
+"""
+Lazy service registry.
+Engines are registered by import path and constructed on first use, once per
+process, so a worker only pays import and construction cost (OpenAI clients,
+database connections) for the engines its requests actually touch. A failed
+construction only affects that engine: it raises ServiceUnavailable when used
+and is retried after a short delay, while every other engine keeps working.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Seconds before a failed construction is attempted again
+RETRY_FAILED_AFTER_SECONDS = 60
+
+
+class ServiceUnavailable(RuntimeError):
+    """Raised when a registered service could not be constructed"""
+
+    def __init__(self, name: str, error: str):
+        super().__init__(f"Service '{name}' is unavailable: {error}")
+        self.name = name
+        self.error = error
+
+
+class _ServiceEntry:
+    __slots__ = ('name', 'target', 'args', 'kwargs', 'instance', 'status', 'error',
+                 'failed_at', 'import_ms', 'init_ms', 'lock')
+
+    def __init__(self, name: str, target: Union[str, Callable], args: tuple, kwargs: dict):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs
+        self.instance = None
+        self.status = 'pending'  # pending, ready, failed
+        self.error: Optional[str] = None
+        self.failed_at = 0.0
+        self.import_ms: Optional[float] = None
+        self.init_ms: Optional[float] = None
+        self.lock = threading.Lock()
+
+
+def _resolve(target: Union[str, Callable]) -> Callable:
+    """Import 'package.module.Attr' (or return an already imported callable)"""
+    if callable(target):
+        return target
+    module_name, _, attr = target.rpartition('.')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LazyServiceRegistry:
+    """Constructs each registered service on first use and caches it for the process"""
+
+    def __init__(self, retry_after: float = RETRY_FAILED_AFTER_SECONDS):
+        self.retry_after = retry_after
+        self._entries: Dict[str, _ServiceEntry] = {}
+
+    def register(self, name: str, target: Union[str, Callable], *args, **kwargs):
+        """Register a factory by import path or callable; args are passed when it is built"""
+        self._entries[name] = _ServiceEntry(name, target, args, kwargs)
+
+    def get(self, name: str) -> Any:
+        entry = self._entries.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown service: {name}")
+        if entry.status == 'ready':
+            return entry.instance
+
+        with entry.lock:
+            if entry.status == 'ready':
+                return entry.instance
+            if entry.status == 'failed' and time.monotonic() - entry.failed_at < self.retry_after:
+                raise ServiceUnavailable(name, entry.error)
+            self._construct(entry)
+        if entry.status != 'ready':
+            raise ServiceUnavailable(name, entry.error)
+        return entry.instance
+
+    def _construct(self, entry: _ServiceEntry):
+        """Import and build one service; call with entry.lock held"""
+        started = time.perf_counter()
+        try:
+            factory = _resolve(entry.target)
+            imported = time.perf_counter()
+            instance = factory(*entry.args, **entry.kwargs)
+        except Exception as e:
+            entry.status = 'failed'
+            entry.error = f"{type(e).__name__}: {e}"
+            entry.failed_at = time.monotonic()
+            logger.error(f"Failed to initialize service {entry.name}: {entry.error}")
+            return
+
+        finished = time.perf_counter()
+        entry.instance = instance
+        entry.import_ms = round((imported - started) * 1000, 2)
+        entry.init_ms = round((finished - imported) * 1000, 2)
+        entry.status = 'ready'
+        entry.error = None
+        logger.info(f"Initialized service {entry.name} in {entry.import_ms + entry.init_ms:.1f}ms "
+                    f"(import {entry.import_ms}ms)")
+
+    def is_available(self, name: str) -> bool:
+        try:
+            self.get(name)
+            return True
+        except ServiceUnavailable:
+            return False
+
+    def service(self, name: str) -> property:
+        """Class attribute that resolves to the named service on access"""
+        return property(lambda owner: self.get(name), doc=f"Lazily constructed '{name}' service")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Status and construction cost of every registered service, without building any"""
+        return {
+            name: {
+                'status': entry.status,
+                'import_ms': entry.import_ms,
+                'init_ms': entry.init_ms,
+                'error': entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+    def reset(self, name: Optional[str] = None):
+        """Forget constructed instances (all, or one) so they are rebuilt on next use"""
+        for entry in ([self._entries[name]] if name else self._entries.values()):
+            with entry.lock:
+                entry.instance = None
+                entry.status = 'pending'
+                entry.error = None
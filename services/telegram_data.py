@@ -0,0 +1,168 @@
+"""
+Async data access for the Telegram bot.
+Blocking sqlite/SQLAlchemy queries run on a small bounded thread pool so one
+slow digest can't stall the event loop for every chat. Read results are cached
+per chat for a short TTL (repeat /stats or /digest taps are answered from
+memory), identical in-flight reads from a chat share one query, and the pool
+keeps concurrency and latency metrics.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_DB_WORKERS = 4
+RESPONSE_CACHE_TTL_SECONDS = 30
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+
+
+class TelegramDataAccess:
+    """Runs blocking queries off the event loop with per-chat response caching"""
+
+    def __init__(self, max_workers: int = MAX_DB_WORKERS, cache_ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+                 max_cache_entries: int = RESPONSE_CACHE_MAX_ENTRIES, app=None):
+        self.max_workers = max_workers
+        self.cache_ttl = cache_ttl
+        self.max_cache_entries = max_cache_entries
+        # Flask app whose context worker threads need for SQLAlchemy sessions
+        self.app = app
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._cache: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+        self._loading: Dict[Tuple[str, Hashable], asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'queries': 0, 'errors': 0, 'in_flight': 0, 'peak_in_flight': 0,
+            'cache_hits': 0, 'cache_misses': 0, 'coalesced': 0,
+            'query_seconds': 0.0, 'max_query_seconds': 0.0, 'wait_seconds': 0.0,
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='telegram-db')
+            return self._executor
+
+    def _call(self, submitted_at: float, fn: Callable, args, kwargs):
+        started = time.perf_counter()
+        with self._lock:
+            self.stats['wait_seconds'] += started - submitted_at
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    return fn(*args, **kwargs)
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats['query_seconds'] += elapsed
+                self.stats['max_query_seconds'] = max(self.stats['max_query_seconds'], elapsed)
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the pool and await its result"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.stats['queries'] += 1
+            self.stats['in_flight'] += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.stats['in_flight'])
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), self._call, time.perf_counter(), fn, args, kwargs
+            )
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                self.stats['in_flight'] -= 1
+
+    async def cached(self, chat_id, key: Hashable, fn: Callable, *args, ttl: Optional[float] = None) -> Any:
+        """Per-chat cached read; concurrent misses for the same key share one query"""
+        cache_key = (str(chat_id), key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(cache_key)
+            if entry is not None and entry[0] > now:
+                self.stats['cache_hits'] += 1
+                return entry[1]
+            pending = self._loading.get(cache_key)
+            if pending is not None:
+                self.stats['coalesced'] += 1
+            else:
+                self.stats['cache_misses'] += 1
+
+        if pending is not None:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise  # This waiter was cancelled
+                # The loading task was cancelled, not us: load it ourselves
+                return await self.cached(chat_id, key, fn, *args, ttl=ttl)
+
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._loading[cache_key] = future
+        try:
+            value = await self.run(fn, *args)
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; mark it retrieved so an unwaited future doesn't log
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            self._store(cache_key, value, self.cache_ttl if ttl is None else ttl)
+            return value
+        finally:
+            # A cancelled owner must not leave coalesced waiters blocked forever
+            if not future.done():
+                future.cancel()
+            with self._lock:
+                self._loading.pop(cache_key, None)
+
+    def _store(self, cache_key: Tuple[str, Hashable], value: Any, ttl: float):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._cache) >= self.max_cache_entries:
+                for stale in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                    del self._cache[stale]
+                if len(self._cache) >= self.max_cache_entries:
+                    # Still full: drop the entry closest to expiry
+                    del self._cache[min(self._cache, key=lambda k: self._cache[k][0])]
+            self._cache[cache_key] = (now + ttl, value)
+
+    def invalidate(self, chat_id=None, key: Optional[Hashable] = None):
+        """Drop cached responses for one chat (or every chat), optionally for a single key"""
+        with self._lock:
+            for cache_key in list(self._cache):
+                if chat_id is not None and cache_key[0] != str(chat_id):
+                    continue
+                if key is not None and cache_key[1] != key:
+                    continue
+                del self._cache[cache_key]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.stats)
+            metrics['cached_responses'] = len(self._cache)
+        completed = max(metrics['queries'] - metrics['in_flight'], 1)
+        metrics['max_workers'] = self.max_workers
+        metrics['avg_query_ms'] = round(metrics['query_seconds'] / completed * 1000, 2)
+        metrics['avg_wait_ms'] = round(metrics['wait_seconds'] / completed * 1000, 2)
+        metrics['max_query_ms'] = round(metrics.pop('max_query_seconds') * 1000, 2)
+        lookups = metrics['cache_hits'] + metrics['cache_misses'] + metrics['coalesced']
+        metrics['cache_hit_rate'] = round((metrics['cache_hits'] + metrics['coalesced']) / lookups, 3) if lookups else 0.0
+        return metrics
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -24,7 +24,10 @@ except ImportError:
     filters = None
     ContextTypes = None
     TELEGRAM_AVAILABLE = False
-from models import Database, Contact, ContactInteraction, Goal
+from models import Database, Contact, Goal
+from services.ai.query_planner import CONTACTS, FOLLOW_UPS, GOALS, STATS, compile_sql, query_planner
+from services.telegram_data import TelegramDataAccess
+from services.digest_scheduler import DigestDataLoader, render_telegram_digest
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,8 +36,10 @@ logger = logging.getLogger(__name__)
 class TelegramNetworkingBot:
     """Telegram bot for founder networking automation"""
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, app=None):
         self.db = db
+        # Handlers await this instead of querying on the event loop
+        self.data = TelegramDataAccess(app=app)
         self.bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.environ.get('TELEGRAM_CHAT_ID')  # Your personal chat ID
         self.application = None
@@ -49,6 +54,66 @@ class TelegramNetworkingBot:
     def is_configured(self) -> bool:
         """Check if Telegram bot is properly configured"""
         return self.bot_token is not None and self.chat_id is not None
+
+    def get_concurrency_metrics(self) -> Dict[str, Any]:
+        """Query pool and response cache metrics"""
+        return self.data.get_metrics()
+
+    def _chat_key(self, update) -> str:
+        """Chat id of an Update or CallbackQuery, used to scope cached responses"""
+        chat = getattr(update, 'effective_chat', None)
+        if chat is not None:
+            return str(chat.id)
+        message = getattr(update, 'message', None)
+        return str(getattr(message, 'chat_id', self.chat_id))
+
+    # Blocking queries; only ever called through self.data
+
+    def _load_dashboard(self, user_id: int) -> Dict[str, Any]:
+        from analytics import NetworkingAnalytics
+        return NetworkingAnalytics(self.db).get_comprehensive_dashboard_data(user_id)
+
+    def _load_contacts(self, user_id: int) -> List[Dict]:
+        return Contact(self.db).get_all(user_id)
+
+    def _load_goals(self, user_id: int) -> List[Dict]:
+        return Goal(self.db).get_all(user_id)
+
+    def _load_follow_ups(self, user_id: int, days_ahead: int) -> List[Dict]:
+        return Contact(self.db).get_follow_ups_due(user_id, days_ahead=days_ahead)
+
+    def _load_digest_data(self, user_id: int) -> Dict[str, Any]:
+        return DigestDataLoader(self.db).load([user_id])[str(user_id)]
+
+    def _run_planned_query(self, plan, user_id: int):
+        sql, params = compile_sql(plan, user_id, placeholder='?')
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            if plan.count_only:
+                return cursor.fetchone()[0]
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def _clear_follow_up(self, contact_id: str):
+        conn = self.db.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("""
+                UPDATE contacts 
+                SET follow_up_due_date = NULL, follow_up_action = NULL
+                WHERE id = ?
+            """, (contact_id,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _export_contacts_csv(self, user_id: int) -> str:
+        from integrations import CRMSync
+        return CRMSync(self.db).export_contacts_to_csv(user_id)
     
     def _setup_handlers(self):
         """Set up bot command and message handlers"""
@@ -122,11 +187,10 @@ Need help? Just ask me anything about your network!"""
     async def _stats_command(self, update, context):
         """Show networking statistics"""
         try:
-            from analytics import NetworkingAnalytics
-            analytics = NetworkingAnalytics(self.db)
-            
             # Get comprehensive dashboard data
-            dashboard_data = analytics.get_comprehensive_dashboard_data(1)  # Default user ID
+            dashboard_data = await self.data.cached(
+                self._chat_key(update), 'dashboard', self._load_dashboard, 1  # Default user ID
+            )
             
             stats_message = f"""📊 **Your Networking Stats**
 
@@ -154,8 +218,9 @@ Keep up the great networking! 🚀"""
     async def _contacts_command(self, update, context):
         """Show recent contacts"""
         try:
-            contact_model = Contact(self.db)
-            contacts = contact_model.get_all(1)  # Default user ID
+            contacts = await self.data.cached(
+                self._chat_key(update), 'contacts', self._load_contacts, 1  # Default user ID
+            )
             
             if not contacts:
                 await update.message.reply_text("No contacts found. Add some contacts to get started!")
@@ -202,8 +267,9 @@ Keep up the great networking! 🚀"""
     async def _goals_command(self, update, context):
         """Show networking goals"""
         try:
-            goal_model = Goal(self.db)
-            goals = goal_model.get_all(1)  # Default user ID
+            goals = await self.data.cached(
+                self._chat_key(update), 'goals', self._load_goals, 1  # Default user ID
+            )
             
             if not goals:
                 await update.message.reply_text("No goals found. Create some networking goals to get started!")
@@ -238,8 +304,9 @@ Keep up the great networking! 🚀"""
     async def _followups_command(self, update, context):
         """Show contacts needing follow-up"""
         try:
-            contact_model = Contact(self.db)
-            follow_ups = contact_model.get_follow_ups_due(1, days_ahead=7)  # Default user ID
+            follow_ups = await self.data.cached(
+                self._chat_key(update), ('follow_ups', 7), self._load_follow_ups, 1, 7  # Default user ID
+            )
             
             if not follow_ups:
                 await update.message.reply_text("🎉 No follow-ups due! You're all caught up.")
@@ -278,7 +345,7 @@ Keep up the great networking! 🚀"""
     async def _digest_command(self, update, context):
         """Send daily networking digest"""
         try:
-            digest_message = await self._generate_daily_digest(1)  # Default user ID
+            digest_message = await self._generate_daily_digest(1, chat_id=self._chat_key(update))  # Default user ID
             await update.message.reply_text(digest_message, parse_mode='Markdown')
             
         except Exception as e:
@@ -287,9 +354,7 @@ Keep up the great networking! 🚀"""
     async def _export_command(self, update, context):
         """Export contacts to CSV"""
         try:
-            from integrations import CRMSync
-            crm_sync = CRMSync(self.db)
-            csv_content = crm_sync.export_contacts_to_csv(1)  # Default user ID
+            csv_content = await self.data.run(self._export_contacts_csv, 1)  # Default user ID
             
             if not csv_content:
                 await update.message.reply_text("No contacts to export.")
@@ -311,18 +376,17 @@ Keep up the great networking! 🚀"""
     async def _handle_message(self, update, context):
         """Handle natural language messages"""
         try:
-            user_message = update.message.text.lower()
+            plan = query_planner.plan(update.message.text)
             
-            # Simple natural language processing
-            if any(word in user_message for word in ['warm', 'hot', 'active']):
-                await self._show_warm_contacts(update)
-            elif any(word in user_message for word in ['cold', 'new', 'recent']):
+            if plan.intent == CONTACTS and (plan.has_filters or plan.count_only):
+                await self._show_planned_contacts(update, plan)
+            elif plan.intent == CONTACTS:
                 await self._show_recent_contacts(update)
-            elif any(word in user_message for word in ['follow', 'due', 'reminder']):
+            elif plan.intent == FOLLOW_UPS:
                 await self._followups_command(update, context)
-            elif any(word in user_message for word in ['stats', 'metrics', 'performance']):
+            elif plan.intent == STATS:
                 await self._stats_command(update, context)
-            elif any(word in user_message for word in ['goal', 'objective', 'target']):
+            elif plan.intent == GOALS:
                 await self._goals_command(update, context)
             else:
                 # Generic helpful response
@@ -363,28 +427,38 @@ Keep up the great networking! 🚀"""
         except Exception as e:
             await query.edit_message_text(f"Error: {str(e)}")
     
-    async def _show_warm_contacts(self, update):
-        """Show warm/active contacts"""
+    async def _show_planned_contacts(self, update, plan):
+        """Show contacts matching a planned natural language query"""
         try:
-            contact_model = Contact(self.db)
-            contacts = contact_model.get_by_filters(1, warmth_status=3)  # Warm contacts
+            result = await self.data.cached(
+                self._chat_key(update), ('planned', plan.cache_key),
+                self._run_planned_query, plan, 1  # Default user ID
+            )
+            
+            if plan.count_only:
+                await update.message.reply_text(f"📇 You have {result} {plan.describe()}.")
+                return
+            
+            contacts = result
             
             if not contacts:
-                await update.message.reply_text("No warm contacts found. Time to heat up some relationships! 🔥")
+                await update.message.reply_text(f"No {plan.describe()} found.")
                 return
             
-            message_parts = ["🔥 **Warm Contacts:**\n"]
+            message_parts = [f"🔎 **{plan.describe().capitalize()}:**\n"]
             
-            for contact in contacts[:10]:
+            for contact in contacts:
                 contact_line = f"• **{contact['name']}**"
                 if contact.get('company'):
                     contact_line += f" - {contact['company']}"
+                if contact.get('last_interaction_date'):
+                    contact_line += f" (Last: {contact['last_interaction_date']})"
                 message_parts.append(contact_line)
             
             await update.message.reply_text('\n'.join(message_parts), parse_mode='Markdown')
             
         except Exception as e:
-            await update.message.reply_text(f"Error retrieving warm contacts: {str(e)}")
+            await update.message.reply_text(f"Error searching contacts: {str(e)}")
     
     async def _show_recent_contacts(self, update):
         """Show recently added contacts"""
@@ -394,69 +468,23 @@ Keep up the great networking! 🚀"""
         """Mark a follow-up as complete"""
         try:
             # Update contact to clear follow-up
-            conn = self.db.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                UPDATE contacts 
-                SET follow_up_due_date = NULL, follow_up_action = NULL
-                WHERE id = ?
-            """, (contact_id,))
-            
-            conn.commit()
+            await self.data.run(self._clear_follow_up, contact_id)
+            # Every chat reads the same contacts, so none of the cached lists still hold
+            self.data.invalidate()
             
             await query.edit_message_text("✅ Follow-up marked as complete!")
             
         except Exception as e:
             await query.edit_message_text(f"Error updating follow-up: {str(e)}")
     
-    async def _generate_daily_digest(self, user_id: int) -> str:
+    async def _generate_daily_digest(self, user_id: int, chat_id: Optional[str] = None) -> str:
         """Generate daily networking digest"""
         try:
-            # Get recent interactions
-            interaction_model = ContactInteraction(self.db)
-            recent_interactions = interaction_model.get_timeline(user_id, days_back=1)
-            
-            # Get follow-ups due
-            contact_model = Contact(self.db)
-            follow_ups = contact_model.get_follow_ups_due(user_id, days_ahead=1)
-            
-            # Get analytics
-            from analytics import NetworkingAnalytics
-            analytics = NetworkingAnalytics(self.db)
-            dashboard_data = analytics.get_comprehensive_dashboard_data(user_id)
-            
-            digest_parts = [
-                "📊 **Daily Networking Digest**",
-                f"*{datetime.now().strftime('%B %d, %Y')}*\n"
-            ]
-            
-            # Recent activity
-            if recent_interactions:
-                digest_parts.append(f"✅ **Yesterday's Activity ({len(recent_interactions)} interactions):**")
-                for interaction in recent_interactions[:3]:
-                    digest_parts.append(f"• {interaction.get('summary', 'Contact interaction')}")
-                digest_parts.append("")
-            
-            # Follow-ups due today
-            if follow_ups:
-                digest_parts.append(f"⏰ **Follow-ups Due Today ({len(follow_ups)}):**")
-                for contact in follow_ups[:3]:
-                    digest_parts.append(f"• {contact['name']} - {contact.get('follow_up_action', 'Follow up')}")
-                digest_parts.append("")
-            
-            # Network stats
-            digest_parts.extend([
-                "📈 **Network Health:**",
-                f"• Total Contacts: {dashboard_data['network_growth']['total_contacts']}",
-                f"• Response Rate: {dashboard_data['outreach_metrics']['response_rate']:.1f}%",
-                f"• Active Relationships: {dashboard_data['warmth_pipeline']['Active']}"
-            ])
-            
-            if not recent_interactions and not follow_ups:
-                digest_parts.append("💤 Quiet day - consider reaching out to warm contacts!")
-            
-            return '\n'.join(digest_parts)
+            # Activity, follow-ups and network stats in one pooled call
+            digest = await self.data.cached(
+                chat_id or self.chat_id, ('digest', user_id), self._load_digest_data, user_id
+            )
+            return render_telegram_digest(digest)
             
         except Exception as e:
             return f"Error generating digest: {str(e)}"
@@ -527,6 +555,6 @@ Keep up the great networking! 🚀"""
         logger.info(f"Telegram webhook set to: {webhook_url}")
 
 # Utility function for integration with main app
-def create_telegram_bot(db: Database) -> TelegramNetworkingBot:
+def create_telegram_bot(db: Database, app=None) -> TelegramNetworkingBot:
     """Create and return a Telegram bot instance"""
-    return TelegramNetworkingBot(db)
\ No newline at end of file
+    return TelegramNetworkingBot(db, app=app)
\ No newline at end of file
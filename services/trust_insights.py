@@ -8,7 +8,6 @@ import json
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import os
-from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +19,8 @@ class TrustInsights:
         try:
             api_key = os.environ.get("OPENAI_API_KEY")
             if api_key:
+                # Imported only when AI is configured; the SDK is slow to import
+                from openai import OpenAI
                 self.openai_client = OpenAI(api_key=api_key)
             else:
                 self.openai_client = None
@@ -3,14 +3,18 @@ Unified Email Service for Rhiz
 Consolidates all email functionality into a single, comprehensive service
 """
 import os
+import hashlib
 import logging
 import resend
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
+from services.email.bulk_sender import (
+    BulkEmailSender, OutgoingEmail, SMTPConnectionPool, DEFAULT_MAX_WORKERS, build_mime_message, get_smtp_pool
+)
+from services.email.outbox import email_outbox
+from services.email.templates import email_templates
+
 logger = logging.getLogger(__name__)
 
 class UnifiedEmailService:
@@ -31,6 +35,7 @@ class UnifiedEmailService:
         self.smtp_port = int(os.environ.get('SMTP_PORT', '587'))
         self.email_address = os.environ.get('EMAIL_ADDRESS')
         self.email_password = os.environ.get('EMAIL_PASSWORD')
+        self.smtp_use_tls = os.environ.get('SMTP_USE_TLS', 'true').lower() != 'false'
         
         # Configuration status
         self.resend_configured = False
@@ -149,25 +154,12 @@ class UnifiedEmailService:
                        text_content: str = None, **kwargs) -> Dict[str, Any]:
         """Send email using SMTP"""
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.email_address
-            msg['To'] = to_email
-            
-            # Add text and HTML parts
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-            
-            if html_content:
-                html_part = MIMEText(html_content, 'html')
-                msg.attach(html_part)
+            msg = build_mime_message(OutgoingEmail(
+                to_email, subject, html_content, text_content, reply_to=kwargs.get('reply_to')
+            ), self.email_address)
             
-            # Send via SMTP
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.email_address, self.email_password)
-                server.send_message(msg)
+            # Send over a pooled, already-authenticated connection
+            self.get_smtp_pool().send_message(msg)
             
             # Log success
             if self.db and kwargs.get('contact_id'):
@@ -188,191 +180,124 @@ class UnifiedEmailService:
                 'method': 'smtp'
             }
     
-    def send_magic_link(self, to_email: str, magic_token: str, base_url: str = None) -> Dict[str, Any]:
-        """Send magic link authentication email"""
-        if not base_url:
-            base_url = os.environ.get('REPLIT_URL', 'http://localhost:5000')
-        
-        magic_url = f"{base_url}/api/auth/verify?token={magic_token}"
-        
-        subject = "Sign in to Rhiz"
-        
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Sign in to Rhiz</title>
-        </head>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="text-align: center; margin-bottom: 30px;">
-                <h1 style="color: #2563eb; margin: 0;">Rhiz</h1>
-                <p style="color: #6b7280; margin: 5px 0;">Relationship Intelligence Platform</p>
-            </div>
-            
-            <div style="background: #f8fafc; border-radius: 8px; padding: 30px; margin: 20px 0;">
-                <h2 style="color: #1f2937; margin-top: 0;">Welcome back!</h2>
-                <p style="color: #4b5563; line-height: 1.6;">
-                    Click the button below to sign in to your Rhiz account. This link will expire in 15 minutes.
-                </p>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{magic_url}" 
-                       style="background: #2563eb; color: white; padding: 12px 24px; text-decoration: none; 
-                              border-radius: 6px; font-weight: 500; display: inline-block;">
-                        Sign in to Rhiz
-                    </a>
-                </div>
-                
-                <p style="color: #6b7280; font-size: 14px; margin-bottom: 0;">
-                    If the button doesn't work, copy and paste this link into your browser:<br>
-                    <a href="{magic_url}" style="color: #2563eb; word-break: break-all;">{magic_url}</a>
-                </p>
-            </div>
-            
-            <div style="text-align: center; margin-top: 30px;">
-                <p style="color: #9ca3af; font-size: 12px;">
-                    This email was sent to {to_email}. If you didn't request this, you can safely ignore it.
-                </p>
-            </div>
-        </body>
-        </html>
+    def get_smtp_pool(self) -> SMTPConnectionPool:
+        """Shared SMTP connection pool for the configured server and account"""
+        return get_smtp_pool(self.smtp_server, self.smtp_port, self.email_address,
+                             self.email_password, self.smtp_use_tls)
+    
+    def send_bulk(self, messages: List[OutgoingEmail], max_workers: int = DEFAULT_MAX_WORKERS) -> Dict[str, Any]:
         """
+        Send many emails at once: Resend batches with SMTP fallback over pooled
+        connections, rate limited and retried per provider
+        """
+        return BulkEmailSender(self, max_workers=max_workers).send_batch(messages)
+    
+    def queue_email(self, to_email: str, subject: str, html_content: str = None, text_content: str = None,
+                    idempotency_key: str = None, kind: str = 'generic', **kwargs) -> Dict[str, Any]:
+        """
+        Store an email in the durable outbox for the background worker to send,
+        so the caller never waits on the email provider
+        """
+        if not html_content and not text_content:
+            return {
+                'success': False,
+                'error': 'No email content provided',
+                'method': 'none'
+            }
         
-        text_content = f"""
-        Sign in to Rhiz
-        
-        Welcome back!
+        if not self.resend_configured and not self.smtp_configured:
+            return {
+                'success': False,
+                'error': 'No email services configured',
+                'method': 'none'
+            }
         
-        Click this link to sign in to your Rhiz account:
-        {magic_url}
+        message = OutgoingEmail(
+            to_email, subject, html_content, text_content, reply_to=kwargs.get('reply_to'),
+            contact_id=kwargs.get('contact_id'), user_id=kwargs.get('user_id')
+        )
+        try:
+            outbox_id, created = email_outbox.enqueue(message, idempotency_key, kind)
+        except Exception as e:
+            logger.error(f"Failed to queue {kind} email: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'method': 'outbox'
+            }
         
-        This link will expire in 15 minutes.
+        return {
+            'success': True,
+            'queued': True,
+            'duplicate': not created,
+            'outbox_id': outbox_id,
+            'method': 'outbox',
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def send_magic_link(self, to_email: str, magic_token: str, base_url: str = None,
+                        queue: bool = True) -> Dict[str, Any]:
+        """Send magic link authentication email (through the outbox unless queue=False)"""
+        if not base_url:
+            base_url = os.environ.get('REPLIT_URL', 'http://localhost:5000')
         
-        If you didn't request this, you can safely ignore this email.
-        """
+        magic_url = f"{base_url}/api/auth/verify?token={magic_token}"
+        email = email_templates.render('magic_link', magic_url=magic_url, to_email=to_email)
         
-        return self.send_email(to_email, subject, html_content, text_content)
+        if queue:
+            token_hash = hashlib.sha256(magic_token.encode('utf-8')).hexdigest()
+            return self.queue_email(to_email, email['subject'], email['html'], email['text'],
+                                    idempotency_key=f"magic_link:{token_hash}", kind='magic_link')
+        return self.send_email(to_email, email['subject'], email['html'], email['text'])
     
     def send_ai_outreach(self, to_email: str, contact_name: str, subject: str, 
-                        message_body: str, contact_id: int = None, user_id: int = None) -> Dict[str, Any]:
-        """Send AI-generated outreach email"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>{subject}</title>
-        </head>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: white; border-radius: 8px; padding: 30px;">
-                <div style="white-space: pre-wrap; line-height: 1.6; color: #1f2937;">
-{message_body}
-                </div>
-            </div>
-            
-            <div style="text-align: center; margin-top: 30px;">
-                <p style="color: #9ca3af; font-size: 12px;">
-                    Sent via Rhiz - Relationship Intelligence Platform
-                </p>
-            </div>
-        </body>
-        </html>
-        """
+                        message_body: str, contact_id: int = None, user_id: int = None,
+                        queue: bool = True, idempotency_key: str = None) -> Dict[str, Any]:
+        """Send AI-generated outreach email (through the outbox unless queue=False)"""
+        email = email_templates.render('ai_outreach', subject=subject, message_body=message_body)
         
+        if queue:
+            return self.queue_email(
+                to_email, email['subject'], email['html'], email['text'], idempotency_key=idempotency_key,
+                kind='ai_outreach', contact_id=contact_id, user_id=user_id
+            )
         return self.send_email(
-            to_email, subject, html_content, message_body,
+            to_email, email['subject'], email['html'], email['text'],
             contact_id=contact_id, user_id=user_id
         )
     
-    def send_welcome_email(self, to_email: str, user_name: str = None) -> Dict[str, Any]:
-        """Send welcome email to new users"""
-        subject = "Welcome to Rhiz!"
-        
+    def send_welcome_email(self, to_email: str, user_name: str = None, queue: bool = True) -> Dict[str, Any]:
+        """Send welcome email to new users (through the outbox unless queue=False)"""
         greeting = f"Hi {user_name}," if user_name else "Welcome!"
+        email = email_templates.render('welcome', greeting=greeting)
         
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <title>Welcome to Rhiz</title>
-        </head>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="text-align: center; margin-bottom: 30px;">
-                <h1 style="color: #2563eb; margin: 0;">Rhiz</h1>
-                <p style="color: #6b7280; margin: 5px 0;">Relationship Intelligence Platform</p>
-            </div>
-            
-            <div style="background: #f8fafc; border-radius: 8px; padding: 30px; margin: 20px 0;">
-                <h2 style="color: #1f2937; margin-top: 0;">{greeting}</h2>
-                <p style="color: #4b5563; line-height: 1.6;">
-                    Thank you for joining Rhiz! We're excited to help you build and maintain meaningful relationships
-                    through intelligent insights and automation.
-                </p>
-                
-                <h3 style="color: #1f2937;">Getting Started:</h3>
-                <ul style="color: #4b5563; line-height: 1.6;">
-                    <li>Set your first relationship goal</li>
-                    <li>Import your existing contacts</li>
-                    <li>Discover AI-powered insights about your network</li>
-                    <li>Start building meaningful connections</li>
-                </ul>
-                
-                <div style="text-align: center; margin: 30px 0;">
-                    <a href="{os.environ.get('REPLIT_URL', 'http://localhost:5000')}" 
-                       style="background: #2563eb; color: white; padding: 12px 24px; text-decoration: none; 
-                              border-radius: 6px; font-weight: 500; display: inline-block;">
-                        Start Building Relationships
-                    </a>
-                </div>
-            </div>
-            
-            <div style="text-align: center; margin-top: 30px;">
-                <p style="color: #9ca3af; font-size: 12px;">
-                    Questions? Just reply to this email - we're here to help!
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        text_content = f"""
-        Welcome to Rhiz!
-        
-        {greeting}
-        
-        Thank you for joining Rhiz! We're excited to help you build and maintain meaningful relationships
-        through intelligent insights and automation.
-        
-        Getting Started:
-        - Set your first relationship goal
-        - Import your existing contacts  
-        - Discover AI-powered insights about your network
-        - Start building meaningful connections
-        
-        Visit {os.environ.get('REPLIT_URL', 'http://localhost:5000')} to get started.
-        
-        Questions? Just reply to this email - we're here to help!
-        """
-        
-        return self.send_email(to_email, subject, html_content, text_content)
+        if queue:
+            # One welcome per address, however many times signup is retried
+            return self.queue_email(to_email, email['subject'], email['html'], email['text'],
+                                    idempotency_key=f"welcome:{to_email.strip().lower()}", kind='welcome')
+        return self.send_email(to_email, email['subject'], email['html'], email['text'])
     
     def _log_email_interaction(self, contact_id: int, user_id: int, subject: str, 
                               status: str, method: str):
         """Log email interaction to database"""
-        if not self.db:
+        self._log_email_interactions([(contact_id, user_id, subject, status, method)])
+    
+    def _log_email_interactions(self, records: List[tuple]):
+        """Log (contact_id, user_id, subject, status, method) records in one statement"""
+        if not self.db or not records:
             return
         
         try:
+            now = datetime.now()
             with self.db.cursor() as cursor:
-                cursor.execute('''
+                cursor.executemany('''
                     INSERT INTO contact_interactions 
                     (contact_id, user_id, interaction_type, interaction_date, notes, status)
                     VALUES (%s, %s, 'email', %s, %s, %s)
-                ''', (contact_id, user_id, datetime.now(), f"Email: {subject} (via {method})", status))
+                ''', [(contact_id, user_id, now, f"Email: {subject} (via {method})", status)
+                      for contact_id, user_id, subject, status, method in records])
         except Exception as e:
-            logger.error(f"Failed to log email interaction: {e}")
+            logger.error(f"Failed to log email interactions: {e}")
 
 # Global instance for easy import
 email_service = None
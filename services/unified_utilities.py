@@ -8,6 +8,8 @@ import hashlib
 import uuid
 import json
 import re
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Union
 from email.utils import parseaddr
@@ -383,36 +385,87 @@ class ProductionUtils:
         else:
             logger.info(f"Performance: {json.dumps(log_data)}")
     
+    _health_monitor = None
+
     @staticmethod
     def health_check() -> Dict[str, Any]:
-        """Perform application health check"""
+        """Perform application health check (probes run concurrently and are cached briefly)"""
+        from services.health import HealthMonitor, standard_probes
+        if ProductionUtils._health_monitor is None:
+            ProductionUtils._health_monitor = HealthMonitor(standard_probes(
+                lambda: DatabaseUtils.execute_query('SELECT 1', fetch_all=False)
+            ))
+        readiness = ProductionUtils._health_monitor.readiness()
+        checks = readiness['checks']
+
         health = {
             'timestamp': datetime.now().isoformat(),
-            'status': 'healthy',
+            'status': 'healthy' if readiness['ready'] else 'unhealthy',
             'environment': 'production' if ProductionUtils.is_production() else 'development',
             'services': {}
         }
-        
-        # Check database
-        try:
-            DatabaseUtils.execute_query('SELECT 1', fetch_all=False)
-            health['services']['database'] = 'healthy'
-        except Exception as e:
-            health['services']['database'] = f'unhealthy: {str(e)}'
-            health['status'] = 'unhealthy'
-        
-        # Check email service
-        from services.unified_email_service import get_email_service
-        email_service = get_email_service()
-        email_status = email_service.get_service_status()
-        health['services']['email'] = 'healthy' if email_status['any_configured'] else 'not configured'
-        
-        # Check OpenAI
-        openai_key = os.environ.get('OPENAI_API_KEY')
-        health['services']['openai'] = 'configured' if openai_key else 'not configured'
+        database = checks['database']
+        health['services']['database'] = (
+            'healthy' if database['status'] == 'healthy'
+            else f"{database['status']}: {database.get('error', '')}"
+        )
+        health['services']['email'] = 'healthy' if checks['email']['status'] == 'configured' else 'not configured'
+        for name in ('openai', 'stripe'):
+            health['services'][name] = 'configured' if checks[name]['status'] == 'configured' else 'not configured'
         
         return health
 
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting calls to an external provider.
+    acquire() blocks until a token is available.
+    """
+    
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate = float(rate_per_second)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: int = 1) -> 'RateLimiter':
+        """Create a limiter from a requests-per-minute quota"""
+        return cls(requests_per_minute / 60.0, burst)
+    
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+    
+    def try_acquire(self) -> bool:
+        """Take a token without waiting; returns False when throttled"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is available (or timeout seconds pass)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else 0.05
+            if deadline is not None:
+                wait = min(wait, deadline - time.monotonic())
+                if wait <= 0:
+                    return False
+            time.sleep(wait)
+            self.waited_seconds += wait
+
 # Create global utility instances for easy import
 db_utils = DatabaseUtils()
 validation_utils = ValidationUtils()
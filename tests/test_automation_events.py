@@ -0,0 +1,72 @@
+"""Test the automation event bus."""
+import threading
+import time
+
+import pytest
+
+from services.automation_events import AutomationEventBus, EmailSent, MeetingScheduled, create_event
+
+
+def test_publish_returns_before_slow_subscribers_finish():
+    bus = AutomationEventBus()
+    release = threading.Event()
+    delivered = []
+
+    def slow_slack(event):
+        release.wait(5)
+        delivered.append(('slack', event.contact_name))
+
+    async def telegram(event):
+        delivered.append(('telegram', event.contact_name))
+
+    bus.subscribe('email_sent', slow_slack)
+    bus.subscribe('email_sent', telegram)
+    bus.subscribe('meeting_scheduled', telegram)
+
+    started = time.perf_counter()
+    assert bus.publish(create_event('email_sent', user_id='u1', contact_id='c1', contact_name='Maya'))
+    assert time.perf_counter() - started < 0.1
+
+    release.set()
+    assert bus.drain(5)
+    assert sorted(delivered) == [('slack', 'Maya'), ('telegram', 'Maya')]
+    metrics = bus.get_metrics()
+    assert metrics['delivered'] == 1 and metrics['pending'] == 0
+    assert metrics['event_types']['email_sent']['delivered'] == 1
+    bus.stop()
+
+
+def test_full_bus_drops_events_and_counts_failures():
+    bus = AutomationEventBus(max_pending=2)
+    release = threading.Event()
+
+    def blocked(event):
+        release.wait(5)
+
+    def broken(event):
+        raise RuntimeError('slack is down')
+
+    bus.subscribe('email_sent', blocked)
+    bus.subscribe('meeting_scheduled', broken)
+
+    assert bus.publish(EmailSent('u1', 'c1', 'Maya'))
+    assert bus.publish(EmailSent('u1', 'c2', 'Sam'))
+    assert not bus.publish(EmailSent('u1', 'c3', 'Lee'))
+
+    release.set()
+    assert bus.drain(5)
+    assert bus.publish(MeetingScheduled('u1', 'c1', 'Maya'))
+    assert bus.drain(5)
+
+    metrics = bus.get_metrics()
+    assert metrics['dropped'] == 1 and metrics['peak_pending'] == 2
+    assert metrics['failed'] == 1 and metrics['event_types']['meeting_scheduled']['failed'] == 1
+    bus.stop()
+
+
+def test_unknown_event_types_are_rejected():
+    bus = AutomationEventBus()
+    with pytest.raises(ValueError):
+        create_event('coffee_chat', user_id='u1', contact_id='c1', contact_name='Maya')
+    with pytest.raises(ValueError):
+        bus.subscribe('coffee_chat', print)
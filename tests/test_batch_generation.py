@@ -0,0 +1,157 @@
+"""Test batched outreach drafts against an in-memory generator stub."""
+import sqlite3
+import threading
+import time
+import uuid
+
+from services.ai.batch_generation import BatchMessageGenerator
+from services.unified_utilities import RateLimiter
+
+
+class _CountingDB:
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+        self.statements = []
+
+    def get_connection(self):
+        self.connections += 1
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+class _StubGenerator:
+    def __init__(self, delays=None, fail_for=()):
+        self.delays = delays or {}
+        self.fail_for = set(fail_for)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def generate_message(self, contact_name, **kwargs):
+        with self._lock:
+            self.calls.append((time.monotonic(), contact_name))
+        time.sleep(self.delays.get(contact_name, 0))
+        if contact_name in self.fail_for:
+            raise RuntimeError('upstream 500')
+        return f"Hi {contact_name}"
+
+
+def _db(tmp_path, contacts):
+    path = str(tmp_path / 'outreach.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE goals (id TEXT PRIMARY KEY, title TEXT, description TEXT);
+        CREATE TABLE contacts (id TEXT PRIMARY KEY, name TEXT, relationship_type TEXT, title TEXT,
+                               company TEXT, location TEXT, tags TEXT, interests TEXT, notes TEXT,
+                               narrative_thread TEXT);
+        CREATE TABLE contact_interactions (id INTEGER PRIMARY KEY, contact_id TEXT, interaction_type TEXT,
+                                           subject TEXT, summary TEXT, sentiment TEXT, timestamp TEXT,
+                                           direction TEXT);
+    """)
+    conn.execute("INSERT INTO goals VALUES ('g1', 'Raise seed round', 'Close $2M by spring')")
+    # Ids are unique per test so the shared bio cache never carries over
+    ids = []
+    for name, company in contacts:
+        contact_id = f"c-{uuid.uuid4().hex[:8]}"
+        ids.append(contact_id)
+        conn.execute(
+            "INSERT INTO contacts (id, name, relationship_type, company) VALUES (?, ?, 'Investor', ?)",
+            (contact_id, name, company)
+        )
+    conn.commit()
+    conn.close()
+    return _CountingDB(path), ids
+
+
+def test_identical_prompts_share_one_llm_call(tmp_path):
+    db, ids = _db(tmp_path, [('Alex', 'Acme'), ('Alex', 'Acme'), ('Sam', 'Initech')])
+    stub = _StubGenerator()
+    generator = BatchMessageGenerator(db=db, openai_utils=stub, requests_per_minute=6000)
+
+    results = list(generator.iter_messages('g1', ids))
+
+    assert sorted(r['contact_id'] for r in results) == sorted(ids)
+    assert sorted(name for _, name in stub.calls) == ['Alex', 'Sam']
+    assert generator.stats == {'requested': 3, 'llm_calls': 2, 'deduplicated': 1, 'failed': 0}
+
+
+def test_bios_are_loaded_on_the_batch_connection_and_cached(tmp_path):
+    db, ids = _db(tmp_path, [('Alex', 'Acme'), ('Sam', 'Initech')])
+    generator = BatchMessageGenerator(db=db, openai_utils=_StubGenerator(), requests_per_minute=6000)
+
+    results = list(generator.iter_messages('g1', ids))
+    assert db.connections == 1
+    assert all(r['bio_length'] > 0 for r in results)
+    bio_queries = [sql for sql in db.statements if 'narrative_thread' in sql]
+    assert len(bio_queries) == 1
+
+    list(generator.iter_messages('g1', ids))
+    assert db.connections == 2
+    assert len([sql for sql in db.statements if 'narrative_thread' in sql]) == 1
+
+
+def test_llm_calls_are_paced_by_the_rate_limit(tmp_path):
+    names = [('Contact %d' % i, 'Co %d' % i) for i in range(5)]
+    db, ids = _db(tmp_path, names)
+    stub = _StubGenerator()
+    # 10 requests per second with a burst of 2
+    generator = BatchMessageGenerator(db=db, openai_utils=stub, max_workers=2, requests_per_minute=600)
+
+    started = time.monotonic()
+    list(generator.iter_messages('g1', ids))
+
+    assert len(stub.calls) == 5
+    assert time.monotonic() - started >= 0.28
+    assert generator.rate_limiter.waited_seconds > 0
+
+
+def test_results_stream_in_completion_order(tmp_path):
+    db, ids = _db(tmp_path, [('Slow', 'Acme'), ('Fast', 'Initech')])
+    stub = _StubGenerator(delays={'Slow': 0.3})
+    generator = BatchMessageGenerator(db=db, openai_utils=stub, requests_per_minute=6000)
+
+    started = time.monotonic()
+    stream = generator.iter_messages('g1', ids)
+    first = next(stream)
+    first_at = time.monotonic() - started
+    second = next(stream)
+
+    assert first['contact_name'] == 'Fast' and first_at < 0.2
+    assert second['contact_name'] == 'Slow'
+
+
+def test_failed_generations_yield_error_rows(tmp_path):
+    db, ids = _db(tmp_path, [('Alex', 'Acme'), ('Broken', 'Initech')])
+    generator = BatchMessageGenerator(db=db, openai_utils=_StubGenerator(fail_for={'Broken'}),
+                                      requests_per_minute=6000)
+
+    results = {r['contact_name']: r for r in generator.iter_messages('g1', ids)}
+
+    assert results['Alex']['message'] == 'Hi Alex'
+    assert results['Broken'] == {'contact_id': ids[1], 'contact_name': 'Broken',
+                                 'goal_title': 'Raise seed round', 'error': 'generation_failed'}
+    assert generator.stats['failed'] == 1
+
+
+def test_rate_limiter_allows_a_burst_then_throttles():
+    limiter = RateLimiter(rate_per_second=20, burst=3)
+
+    assert all(limiter.try_acquire() for _ in range(3))
+    assert not limiter.try_acquire()
+
+    started = time.monotonic()
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert time.monotonic() - started >= 0.08
+    assert limiter.waited_seconds > 0
+
+
+def test_rate_limiter_acquire_times_out():
+    limiter = RateLimiter.per_minute(6, burst=1)
+    assert limiter.acquire(timeout=0.01)
+
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=0.05)
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,82 @@
+"""Test bulk email delivery against a local SMTP sink."""
+import socketserver
+import threading
+
+from services.email.bulk_sender import BulkEmailSender, OutgoingEmail
+from services.unified_email_service import UnifiedEmailService
+
+
+class _SMTPSink(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server that accepts every message and counts sessions"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _SMTPHandler)
+        self.sessions = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        with self.server.lock:
+            self.server.sessions += 1
+        self.reply('220 sink ready')
+        while True:
+            line = self.rfile.readline().decode('utf-8', 'replace').strip()
+            command = line[:4].upper()
+            if not line or command == 'QUIT':
+                self.reply('221 bye')
+                return
+            if command == 'EHLO':
+                self.reply('250 sink')
+            elif command == 'DATA':
+                self.reply('354 go ahead')
+                body = []
+                while True:
+                    data = self.rfile.readline().decode('utf-8', 'replace')
+                    if data in ('.\r\n', '.\n', ''):
+                        break
+                    body.append(data)
+                with self.server.lock:
+                    self.server.messages.append(''.join(body))
+                self.reply('250 queued')
+            else:
+                self.reply('250 ok')
+
+
+def test_bulk_send_reuses_pooled_connections_and_logs_in_one_write():
+    sink = _SMTPSink()
+    threading.Thread(target=sink.serve_forever, daemon=True).start()
+    logged = []
+
+    service = UnifiedEmailService()
+    service.resend_configured = False
+    service.smtp_configured = True
+    service.smtp_server, service.smtp_port = sink.server_address
+    service.email_address, service.email_password, service.smtp_use_tls = 'digest@example.com', None, False
+    service._log_email_interactions = logged.append
+    try:
+        messages = [
+            OutgoingEmail(f'user{i}@example.com', 'Your weekly digest', text_content=f'Hello {i}',
+                          contact_id=i if i % 2 else None)
+            for i in range(40)
+        ]
+        summary = BulkEmailSender(service, max_workers=4, smtp_per_minute=60000).send_batch(messages)
+
+        assert summary['sent'] == 40 and summary['failed'] == 0
+        assert len(sink.messages) == 40
+        assert sink.sessions <= 4
+        assert service.get_smtp_pool().stats['connections_opened'] == sink.sessions
+        assert len(logged) == 1 and len(logged[0]) == 20
+
+        assert service.send_email('solo@example.com', 'Hi', text_content='again')['success']
+        assert sink.sessions <= 4
+    finally:
+        service.get_smtp_pool().close()
+        sink.shutdown()
+        sink.server_close()
@@ -0,0 +1,67 @@
+"""Test the streaming contact export engine."""
+import csv
+import gzip
+import io
+import json
+import sqlite3
+
+import pytest
+
+from services.data.contact_export import ContactExporter
+
+
+class _SqliteDB:
+    def __init__(self, path):
+        self.path = path
+
+    def get_connection(self):
+        return sqlite3.connect(self.path)
+
+
+def _db(tmp_path, count=25):
+    path = str(tmp_path / 'export.db')
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE contacts (id TEXT PRIMARY KEY, user_id TEXT, name TEXT, email TEXT, phone TEXT, "
+        "company TEXT, title TEXT, linkedin TEXT, twitter TEXT, relationship_type TEXT, warmth_label TEXT, "
+        "warmth_status INTEGER, priority_level TEXT, notes TEXT, tags TEXT, location TEXT, "
+        "last_interaction_date TEXT, follow_up_due_date TEXT, created_at TEXT)"
+    )
+    for i in range(count):
+        conn.execute(
+            "INSERT INTO contacts (id, user_id, name, email, company, title, notes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (f'c{i:03d}', 'u1', f'Person {i} Smith', f'p{i}@example.com', 'Acme', 'Engineer', 'Met at "demo", day 1')
+        )
+    conn.execute("INSERT INTO contacts (id, user_id, name) VALUES ('x1', 'u2', 'Other User')")
+    conn.commit()
+    conn.close()
+    return _SqliteDB(path)
+
+
+def test_csv_export_streams_in_batches_and_quotes_correctly(tmp_path):
+    """Each batch is its own chunk and fields with commas/quotes round-trip."""
+    exporter = ContactExporter(_db(tmp_path), batch_size=10)
+    chunks = list(exporter.iter_csv('u1', 'hubspot'))
+    assert len(chunks) == 3
+
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0][:3] == ['First Name', 'Last Name', 'Email']
+    assert len(rows) == 26
+    assert rows[1][:2] == ['Person', '0 Smith']
+    assert rows[1][-1] == 'Met at "demo", day 1'
+
+
+def test_ndjson_gzip_export_and_validation(tmp_path):
+    """Compressed NDJSON decodes to one record per contact; bad options are rejected."""
+    exporter = ContactExporter(_db(tmp_path), batch_size=7)
+    chunks, mimetype, filename = exporter.export('u1', profile='pipedrive', fmt='ndjson', compress=True)
+    assert mimetype == 'application/gzip' and filename.endswith('.ndjson.gz')
+
+    lines = gzip.decompress(b''.join(chunks)).decode('utf-8').splitlines()
+    assert len(lines) == 25
+    assert json.loads(lines[0])['Person - Name'] == 'Person 0 Smith'
+
+    with pytest.raises(ValueError):
+        exporter.export('u1', profile='zoho')
+    with pytest.raises(ValueError):
+        exporter.export('u1', fmt='xlsx')
@@ -0,0 +1,97 @@
+"""Test the prompt context builder and its cached network summaries."""
+from services.ai.context_builder import ContextBuilder, estimate_tokens, fit_sections
+
+
+def _contacts():
+    return [
+        {'id': '1', 'name': 'Ada Investor', 'company': 'Seed VC', 'title': 'Partner',
+         'notes': 'Leads fintech seed rounds', 'warmth_level': 'warm'},
+        {'id': '2', 'name': 'Bob Builder', 'company': 'Acme', 'title': 'Engineer',
+         'notes': 'Backend hiring referrals', 'warmth_level': 'cold'},
+        {'id': '3', 'name': 'Cy Designer', 'company': 'Acme', 'title': 'Designer',
+         'notes': 'Brand work', 'warmth_level': 'hot'},
+    ]
+
+
+def test_summary_is_loaded_once_and_updated_incrementally():
+    """The loader runs only on a cache miss and writes update the summary in place."""
+    builder = ContextBuilder(embed_fn=lambda texts: [])
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return _contacts(), [{'title': 'Raise seed round'}]
+
+    summary = builder.ensure_loaded('u1', loader)
+    builder.ensure_loaded('u1', loader)
+    assert len(calls) == 1
+    assert summary.total_contacts == 3
+    assert summary.warm_contacts == 2
+
+    builder.upsert_contact('u1', {'id': '2', 'name': 'Bob Builder', 'company': 'Acme', 'warmth_level': 'warm'})
+    assert summary.total_contacts == 3
+    assert summary.warm_contacts == 3
+
+    builder.remove_contact('u1', '1')
+    assert summary.total_contacts == 2
+    assert 'Seed VC' not in summary.companies
+
+
+def test_context_respects_token_budget_and_ranks_relevant_contacts():
+    """Relevant contacts are selected first and the context never exceeds the budget."""
+    builder = ContextBuilder(embed_fn=lambda texts: [])
+    builder.load_user('u1', _contacts(), [{'title': 'Raise seed round'}])
+
+    context = builder.build_context('u1', query='who leads fintech seed rounds', token_budget=80)
+    assert estimate_tokens(context) <= 80
+    assert 'Ada Investor' in context
+
+    selected = builder.select_contacts('u1', 'fintech seed', token_budget=200)
+    assert selected[0]['name'] == 'Ada Investor'
+
+
+def test_context_fragments_are_cached_until_the_network_changes():
+    """Repeated builds hit the fragment cache; a write invalidates it."""
+    builder = ContextBuilder(embed_fn=lambda texts: [])
+    builder.load_user('u1', _contacts(), [])
+
+    first = builder.build_context('u1', query='design')
+    hits = builder.get_stats().get('fragment_hits', 0)
+    assert builder.build_context('u1', query='design') == first
+    assert builder.get_stats()['fragment_hits'] == hits + 1
+
+    builder.upsert_contact('u1', {'id': '4', 'name': 'Dee Designer', 'title': 'Designer', 'notes': 'design systems'})
+    assert 'Dee Designer' in builder.build_context('u1', query='design')
+
+
+def test_cached_network_expires_and_only_active_goals_are_added():
+    """Writes the builder never heard about show up once the network TTL passes."""
+    builder = ContextBuilder(embed_fn=lambda texts: [], network_ttl=0)
+    contacts = _contacts()
+    builder.ensure_loaded('u1', lambda: (contacts, []))
+
+    contacts.append({'id': '4', 'name': 'Dee Designer', 'company': 'Acme'})
+    summary = builder.ensure_loaded('u1', lambda: (contacts, [{'title': 'Hire designers'}]))
+    assert summary.total_contacts == 4
+    assert builder.get_stats()['summary_expired'] == 1
+
+    builder.add_goal('u1', {'title': 'Old goal', 'status': 'completed'})
+    builder.add_goal('u1', {'title': 'Raise seed round', 'status': 'active'})
+    assert builder.get_summary('u1').goal_titles == ['Hire designers', 'Raise seed round']
+
+
+def test_embedding_cache_is_bounded():
+    """Query and contact embeddings are evicted least recently used first."""
+    builder = ContextBuilder(embed_fn=lambda texts: [[1.0, 0.0] for _ in texts], max_embeddings=4)
+    builder.load_user('u1', _contacts(), [])
+
+    for query in ('seed', 'design', 'hiring', 'brand', 'fintech'):
+        builder.select_contacts('u1', query, token_budget=200)
+    assert builder.get_stats()['embeddings_cached'] == 4
+
+
+def test_fit_sections_gives_priority_to_earlier_sections():
+    """Earlier sections keep their text; later ones are truncated to what remains."""
+    fitted = fit_sections([('bio', 'a' * 40), ('history', 'b' * 400)], token_budget=20)
+    assert fitted['bio'] == 'a' * 40
+    assert estimate_tokens(fitted['bio']) + estimate_tokens(fitted['history']) <= 20
@@ -0,0 +1,224 @@
+"""Test batched digest generation against local Slack/Telegram webhook stubs."""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from backend import create_app
+from backend.extensions import db as app_db
+from services.digest_scheduler import (
+    DigestDataLoader, DigestScheduler, slack_webhook_sender, telegram_sender, validate_destination
+)
+
+
+class _CountingDB:
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+
+    def get_connection(self):
+        self.connections += 1
+        return sqlite3.connect(self.path)
+
+
+def _stamp(moment):
+    """Timestamps as SQLite's CURRENT_TIMESTAMP stores them"""
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+SCHEMA = """
+    CREATE TABLE users (id TEXT PRIMARY KEY);
+    CREATE TABLE contacts (id TEXT PRIMARY KEY, user_id TEXT, name TEXT, warmth_label TEXT,
+                           follow_up_action TEXT, follow_up_due_date TIMESTAMP);
+    CREATE TABLE contact_interactions (id TEXT PRIMARY KEY, user_id TEXT, interaction_type TEXT,
+                                       status TEXT, direction TEXT, summary TEXT, timestamp TIMESTAMP);
+"""
+
+
+def _db(tmp_path, users=5):
+    path = str(tmp_path / 'digest.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA + """
+        CREATE TABLE digest_destinations (user_id TEXT, channel TEXT, destination TEXT,
+                                          PRIMARY KEY (user_id, channel));
+    """)
+    now = datetime.utcnow()
+    for u in range(users):
+        user_id = f'u{u}'
+        conn.execute("INSERT INTO users VALUES (?)", (user_id,))
+        for c in range(u):
+            due = (now - timedelta(days=2)).date().isoformat() if c == 0 else None
+            conn.execute("INSERT INTO contacts VALUES (?, ?, ?, ?, ?, ?)",
+                         (f'{user_id}-c{c}', user_id, f'Contact {c}', 'Active' if c % 2 else 'Warm',
+                          'Send deck' if due else None, due))
+        for i in range(u * 2):
+            conn.execute("INSERT INTO contact_interactions VALUES (?, ?, 'Email', 'sent', 'outbound', ?, ?)",
+                         (f'{user_id}-i{i}', user_id, f'Emailed #{i}', _stamp(now - timedelta(hours=i + 1))))
+        if u:
+            conn.execute("INSERT INTO contact_interactions VALUES (?, ?, 'Email', NULL, 'inbound', 'Reply', ?)",
+                         (f'{user_id}-r', user_id, _stamp(now - timedelta(days=3))))
+    conn.commit()
+    conn.close()
+    return _CountingDB(path)
+
+
+class _Stub:
+    """Local webhook stub recording posted JSON; the first request can be throttled"""
+
+    def __init__(self, throttle_first=False):
+        self.requests = []
+        self.throttle_first = throttle_first
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with lock:
+                    stub.requests.append((self.path, body))
+                    throttled = stub.throttle_first and len(stub.requests) == 1
+                self.send_response(429 if throttled else 200)
+                if throttled:
+                    self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def log_message(self, *args):
+                pass
+
+        lock = threading.Lock()
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_loader_uses_one_query_per_metric_for_a_batch(tmp_path):
+    db = _db(tmp_path)
+    digests = DigestDataLoader(db).load([f'u{u}' for u in range(5)])
+
+    assert db.connections == 1
+    assert digests['u0']['total_contacts'] == 0 and not digests['u0']['recent_interactions']
+    u4 = digests['u4']
+    assert u4['total_contacts'] == 4 and u4['active_contacts'] == 2
+    assert u4['interaction_count'] == 8 and len(u4['recent_interactions']) == 3
+    assert u4['recent_interactions'][0]['summary'] == 'Emailed #0'
+    assert [c['name'] for c in u4['overdue']] == ['Contact 0'] and u4['follow_up_count'] == 1
+    assert u4['response_rate'] == 12.5
+
+
+def test_activity_window_includes_earlier_times_on_the_cutoff_date(tmp_path):
+    db = _db(tmp_path, users=1)
+    conn = sqlite3.connect(db.path)
+    conn.execute("INSERT INTO contact_interactions VALUES ('late', 'u0', 'Call', NULL, NULL, 'Caught up', ?)",
+                 ('2026-10-17 20:00:00',))
+    conn.execute("INSERT INTO contact_interactions VALUES ('old', 'u0', 'Call', NULL, NULL, 'Too old', ?)",
+                 ('2026-10-17 11:59:59',))
+    conn.commit()
+    conn.close()
+
+    digest = DigestDataLoader(db).load(['u0'], now=datetime(2026, 10, 18, 12, 0))['u0']
+    assert digest['interaction_count'] == 1
+    assert digest['recent_interactions'] == [{'summary': 'Caught up'}]
+
+
+def test_only_users_with_a_destination_are_listed(tmp_path):
+    db = _db(tmp_path, users=4)
+    conn = sqlite3.connect(db.path)
+    conn.executemany("INSERT INTO digest_destinations VALUES (?, ?, ?)",
+                     [('u0', 'slack', 'https://hooks/u0'), ('u0', 'telegram', '10'), ('u2', 'telegram', '12')])
+    conn.commit()
+    conn.close()
+
+    loader = DigestDataLoader(db, fallback_destinations={'u3': {'telegram': 'owner'}})
+    assert list(loader.iter_user_batches(batch_size=1)) == [['u0'], ['u2'], ['u3']]
+    assert loader.destinations(['u0', 'u1', 'u3']) == {
+        'u0': {'slack': 'https://hooks/u0', 'telegram': '10'}, 'u1': {}, 'u3': {'telegram': 'owner'}
+    }
+
+
+def test_scheduler_sends_each_digest_to_its_own_user_through_rate_limited_stubs(tmp_path):
+    db = _db(tmp_path, users=7)
+    slack, telegram = _Stub(throttle_first=True), _Stub()
+    conn = sqlite3.connect(db.path)
+    # u6 has no destination; even users also get Telegram
+    for u in range(6):
+        conn.execute("INSERT INTO digest_destinations VALUES (?, 'slack', ?)", (f'u{u}', f'{slack.url}/hooks/u{u}'))
+        if u % 2 == 0:
+            conn.execute("INSERT INTO digest_destinations VALUES (?, 'telegram', ?)", (f'u{u}', f'chat-u{u}'))
+    conn.commit()
+    conn.close()
+    try:
+        scheduler = DigestScheduler(db, senders={
+            'slack': slack_webhook_sender(),
+            'telegram': telegram_sender('TOKEN', api_base=telegram.url),
+        }, batch_size=3, rates_per_minute={'slack': 60000, 'telegram': 60000})
+        stats = scheduler.run_once()
+    finally:
+        slack.close()
+        telegram.close()
+
+    assert stats['users'] == 6 and stats['batches'] == 2
+    assert stats['sent'] == 9 and stats['failed'] == 0
+    # Keyset pagination of users, plus one destination and one metric connection per batch
+    assert db.connections == 3 + 2 * 2
+    # The throttled first Slack post was retried
+    assert len(slack.requests) == 7 and len(telegram.requests) == 3
+    assert {path for path, _ in slack.requests} == {f'/hooks/u{u}' for u in range(6)}
+    assert sorted(body['chat_id'] for _, body in telegram.requests) == ['chat-u0', 'chat-u2', 'chat-u4']
+    path, body = telegram.requests[0]
+    assert path == '/botTOKEN/sendMessage' and 'Daily Networking Digest' in body['text']
+    assert any('Overdue follow-ups: Contact 0' in body['text'] for _, body in slack.requests)
+
+
+@pytest.mark.parametrize('channel, destination', [
+    ('slack', 'http://169.254.169.254/latest/meta-data'),
+    ('slack', 'https://hooks.slack.com.evil.example/x'),
+    ('telegram', 'chat; DROP'),
+    ('email', 'me@example.com'),
+])
+def test_destinations_that_cannot_receive_digests_are_rejected(channel, destination):
+    with pytest.raises(ValueError):
+        validate_destination(channel, destination)
+
+
+def test_users_set_destinations_over_the_api_and_cron_sends_them(monkeypatch, tmp_path):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('SESSION_BACKEND', 'cookie')
+    monkeypatch.setenv('TELEGRAM_BOT_TOKEN', 'TOKEN')
+    monkeypatch.delenv('DIGEST_OWNER_USER_ID', raising=False)
+    telegram = _Stub()
+    monkeypatch.setenv('TELEGRAM_API_BASE', telegram.url)
+
+    app = create_app({'TESTING': True})
+    with app.app_context():
+        conn = app_db.engine.raw_connection()
+        conn.executescript(SCHEMA + "INSERT INTO users VALUES ('u1'), ('u2');")
+        conn.close()
+        from backend.models import DigestDestination
+        DigestDestination.__table__.create(app_db.engine)
+
+    client = app.test_client()
+    assert client.put('/api/digest/destinations/telegram', json={'destination': '42'}).status_code == 401
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'u1'
+    assert client.put('/api/digest/destinations/slack', json={'destination': 'http://internal/'}).status_code == 400
+    assert client.put('/api/digest/destinations/telegram', json={'destination': '41'}).status_code == 200
+    assert client.put('/api/digest/destinations/telegram', json={'destination': ' 42 '}).status_code == 200
+    listed = client.get('/api/digest/destinations').get_json()['destinations']
+    assert [(d['channel'], d['destination']) for d in listed] == [('telegram', '42')]
+
+    try:
+        result = app.test_cli_runner().invoke(args=['digest', 'run'])
+    finally:
+        telegram.close()
+
+    assert result.exit_code == 0, result.output
+    assert 'Digests for 1 users: 1 sent, 0 failed' in result.output
+    assert [body['chat_id'] for _, body in telegram.requests] == ['42']
@@ -0,0 +1,127 @@
+"""Test the durable email outbox: idempotency, batching, backoff and dead-lettering."""
+import time
+
+from services.email.bulk_sender import OutgoingEmail
+from services.email.outbox import EmailOutbox
+
+
+class _RecordingSender:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self, messages):
+        self.batches.append([m.to_email for m in messages])
+        if self.fail:
+            return {'results': [{'success': False, 'error': '421 try later', 'method': 'smtp'} for _ in messages]}
+        return {'results': [{'success': True, 'method': 'resend', 'message_id': f'id-{m.to_email}'} for m in messages]}
+
+
+def _message(n):
+    return OutgoingEmail(f'user{n}@example.com', 'Sign in to Rhiz', text_content=f'link {n}')
+
+
+def test_outbox_deduplicates_and_drains_in_batches(tmp_path):
+    sender = _RecordingSender()
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=sender, batch_size=4)
+
+    first_id, created = outbox.enqueue(_message(0), idempotency_key='magic_link:abc', start_worker=False)
+    again_id, created_again = outbox.enqueue(_message(0), idempotency_key='magic_link:abc', start_worker=False)
+    assert created and not created_again and first_id == again_id
+
+    for n in range(1, 10):
+        outbox.enqueue(_message(n), start_worker=False)
+
+    assert outbox.drain() == 10
+    assert [len(batch) for batch in sender.batches] == [4, 4, 2]
+
+    stats = outbox.get_stats()
+    assert stats['by_status'] == {'sent': 10}
+    assert stats['sent'] == 10 and stats['duplicates'] == 1
+    assert stats['last_batch']['messages_per_second'] > 0
+
+
+def test_outbox_backs_off_then_dead_letters(tmp_path):
+    sender = _RecordingSender(fail=True)
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=sender, max_attempts=2, base_backoff=60)
+    outbox.enqueue(_message(1), start_worker=False)
+
+    assert outbox.drain() == 1
+    # Backed off: not due again straight away
+    assert outbox.drain_once() == 0
+    assert outbox.get_stats()['by_status'] == {'pending': 1}
+
+    outbox._get_connection().execute('UPDATE email_outbox SET next_attempt_at = ?', (time.time(),))
+    assert outbox.drain() == 1
+    dead = outbox.dead_letters()
+    assert len(dead) == 1 and dead[0]['attempts'] == 2 and '421' in dead[0]['last_error']
+    # Dead letters keep their metadata but not the message body
+    assert outbox._get_connection().execute(
+        'SELECT html_content, text_content FROM email_outbox'
+    ).fetchone() == (None, None)
+
+
+def test_sent_bodies_are_cleared_and_finished_rows_purged(tmp_path):
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=_RecordingSender(), retention=3600)
+    outbox.enqueue(_message(1), start_worker=False)
+    outbox.enqueue(_message(2), start_worker=False)
+    assert outbox.drain() == 2
+
+    conn = outbox._get_connection()
+    assert conn.execute('SELECT COUNT(*) FROM email_outbox WHERE text_content IS NOT NULL').fetchone()[0] == 0
+
+    assert outbox.purge_finished() == 0
+    conn.execute('UPDATE email_outbox SET created_at = ? WHERE to_email = ?', (time.time() - 7200, 'user1@example.com'))
+    assert outbox.purge_finished(batch_size=1) == 1
+    assert outbox.get_stats()['by_status'] == {'sent': 1}
+
+
+def test_expired_messages_are_dropped_not_retried(tmp_path):
+    sender = _RecordingSender(fail=True)
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=sender, base_backoff=60)
+
+    # Never attempted before its expiry
+    outbox.enqueue(_message(1), kind='magic_link', expires_at=time.time() - 1, start_worker=False)
+    # Fails once; the next attempt would land after the link expires
+    outbox.enqueue(_message(2), kind='magic_link', expires_at=time.time() + 30, start_worker=False)
+
+    assert outbox.drain() == 1
+    assert sender.batches == [['user2@example.com']]
+    stats = outbox.get_stats()
+    assert stats['by_status'] == {'expired': 2} and stats['expired'] == 2
+    assert outbox._get_connection().execute(
+        'SELECT COUNT(*) FROM email_outbox WHERE html_content IS NOT NULL OR text_content IS NOT NULL'
+    ).fetchone()[0] == 0
+
+
+def test_outbox_worker_sends_in_background(tmp_path):
+    sender = _RecordingSender()
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=sender)
+    try:
+        outbox.enqueue(_message(1))
+        deadline = time.time() + 5
+        while outbox.get_stats()['by_status'].get('sent') != 1 and time.time() < deadline:
+            time.sleep(0.02)
+        assert outbox.get_stats()['by_status'] == {'sent': 1}
+    finally:
+        outbox.stop_worker()
+
+
+def test_identical_notifications_are_only_deduplicated_while_unsent(tmp_path):
+    sender = _RecordingSender()
+    outbox = EmailOutbox(str(tmp_path / 'outbox.db'), send_fn=sender)
+
+    first_id, _ = outbox.enqueue(_message(1), start_worker=False)
+    assert outbox.enqueue(_message(1), start_worker=False) == (first_id, False)
+    assert outbox.drain() == 1
+
+    # The same reminder a day later is a new email, not a duplicate of the sent one
+    second_id, created = outbox.enqueue(_message(1), start_worker=False)
+    assert created and second_id != first_id
+    assert outbox.drain() == 1
+    assert sender.batches == [['user1@example.com'], ['user1@example.com']]
+
+    # Caller-supplied keys still deduplicate for as long as the row is kept
+    outbox.enqueue(_message(2), idempotency_key='welcome:user2', start_worker=False)
+    outbox.drain()
+    assert not outbox.enqueue(_message(2), idempotency_key='welcome:user2', start_worker=False)[1]
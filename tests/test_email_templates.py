@@ -0,0 +1,40 @@
+"""Test compiled email templates against a full Jinja render."""
+import pytest
+
+from services.email.templates import EMAIL_TEMPLATES, EmailTemplates, benchmark
+
+
+def test_compiled_output_matches_jinja_render():
+    templates = EmailTemplates({'app_url': 'https://rhiz.test', 'getting_started': ['Import contacts']})
+    variables = {'magic_url': 'https://rhiz.test/api/auth/verify?token=a&b', 'to_email': '<eve@example.com>'}
+
+    rendered = templates.render('magic_link', **variables)
+    context = dict(templates.static_context, **variables)
+    assert rendered['html'] == templates.env.get_template('magic_link.html').render(context)
+    assert rendered['text'] == templates.env.get_template('magic_link.txt').render(context)
+    assert rendered['subject'] == EMAIL_TEMPLATES['magic_link']['subject']
+    assert '&lt;eve@example.com&gt;' in rendered['html'] and 'token=a&amp;b' in rendered['html']
+    assert 'token=a&b' in rendered['text']
+
+
+def test_static_context_is_rendered_once_per_template():
+    templates = EmailTemplates({'app_url': 'https://rhiz.test', 'getting_started': ['Import contacts']})
+    compiled = templates._compiled['welcome']['html']
+    assert compiled.fields == ['greeting']
+    assert 'https://rhiz.test' in ''.join(compiled.fragments)
+
+    outreach = templates.render('ai_outreach', subject='Coffee & chat', message_body='Hi <Sam>')
+    assert outreach['subject'] == 'Coffee & chat'
+    assert '<title>Coffee &amp; chat</title>' in outreach['html']
+    assert outreach['text'] == 'Hi <Sam>'
+
+    with pytest.raises(ValueError):
+        templates.render('missing')
+    with pytest.raises(KeyError):
+        templates.render('welcome')
+
+
+def test_benchmark_reports_throughput():
+    result = benchmark(recipients=200)
+    assert result['recipients'] == 200
+    assert result['compiled_per_second'] > 0 and result['jinja_per_second'] > 0
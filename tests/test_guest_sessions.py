@@ -0,0 +1,84 @@
+"""Test the guest session store and its batched counters."""
+import sqlite3
+import time
+
+from services.auth.guest_sessions import GuestSessionStore
+
+
+class _CountingDB:
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+
+    def get_connection(self):
+        self.connections += 1
+        return sqlite3.connect(self.path)
+
+
+def _db(tmp_path):
+    path = str(tmp_path / 'guests.db')
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE guest_sessions (id TEXT PRIMARY KEY, session_token TEXT UNIQUE NOT NULL,
+                                     goals_created INTEGER DEFAULT 0, contacts_added INTEGER DEFAULT 0,
+                                     actions_count INTEGER DEFAULT 0, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                     expires_at TIMESTAMP)
+    """)
+    conn.close()
+    return _CountingDB(path)
+
+
+def test_guest_actions_are_counted_in_memory_and_persisted_in_batches(tmp_path):
+    db = _db(tmp_path)
+    store = GuestSessionStore(db, flush_interval=3600)
+    token = store.create()
+    for action in ('goal', 'contact', 'contact', 'general'):
+        assert store.increment(token, action)
+    store.sweeper.stop()
+
+    session = store.get(token)
+    assert (session['goals_created'], session['contacts_added'], session['actions_count']) == (1, 2, 4)
+    # Only the insert in create(); the actions are still in memory
+    assert db.connections == 1
+
+    assert store.flush() == 1
+    store.increment(token, 'goal')
+    store.flush()
+
+    # A fresh process sees the persisted counts
+    reloaded = GuestSessionStore(db).get(token)
+    assert (reloaded['goals_created'], reloaded['contacts_added'], reloaded['actions_count']) == (2, 2, 5)
+    assert not store.increment('missing-token')
+
+
+def test_expired_guest_sessions_are_evicted_and_swept(tmp_path):
+    db = _db(tmp_path)
+    store = GuestSessionStore(db, ttl_hours=0, flush_interval=3600)
+    expired = store.create()
+    store.sweeper.stop()
+    store.flush()
+    time.sleep(0.01)
+
+    assert store.get(expired) is None
+    assert store.evict_expired() == 1
+    assert store.sweep_expired() == 1
+
+
+def test_sessions_and_counts_are_shared_across_workers(tmp_path):
+    db = _db(tmp_path)
+    first = GuestSessionStore(db, flush_interval=3600, refresh_seconds=0)
+    second = GuestSessionStore(db, flush_interval=3600, refresh_seconds=0)
+    token = first.create()
+    first.sweeper.stop()
+
+    # Visible to another worker before any flush
+    assert second.increment(token, 'goal')
+    second.sweeper.stop()
+    assert first.increment(token, 'contact')
+    second.flush()
+
+    session = first.get(token)
+    assert (session['goals_created'], session['contacts_added'], session['actions_count']) == (1, 1, 2)
+    first.flush()
+    session = second.get(token)
+    assert (session['goals_created'], session['contacts_added'], session['actions_count']) == (1, 1, 2)
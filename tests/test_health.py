@@ -0,0 +1,76 @@
+"""Test the cached, concurrent health probes."""
+import threading
+import time
+
+from services.health import HealthMonitor, HealthProbe
+
+
+def test_probes_run_concurrently_and_results_are_cached():
+    calls = []
+
+    def slow(name):
+        def check():
+            calls.append(name)
+            time.sleep(0.2)
+        return check
+
+    monitor = HealthMonitor([HealthProbe(name, slow(name)) for name in ('database', 'email', 'openai')], ttl=60)
+
+    started = time.perf_counter()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(monitor.readiness())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 0.5
+    assert sorted(calls) == ['database', 'email', 'openai']
+    assert all(result['ready'] for result in results)
+    assert sum(not result['cached'] for result in results) == 1
+    assert monitor.readiness()['checks']['database']['latency_ms'] >= 200
+    monitor.shutdown()
+
+
+def test_timeouts_and_failures_only_fail_readiness_when_critical():
+    release = threading.Event()
+    calls = []
+
+    def hung():
+        calls.append(1)
+        release.wait(5)
+
+    def broken():
+        raise ConnectionError('smtp refused')
+
+    monitor = HealthMonitor([
+        HealthProbe('database', hung, timeout=0.1),
+        HealthProbe('email', broken, critical=False),
+        HealthProbe('stripe', lambda: {'status': 'not_configured'}, critical=False),
+    ], ttl=0)
+
+    result = monitor.readiness()
+    assert not result['ready'] and result['checks']['database']['status'] == 'timeout'
+    assert result['checks']['email'] == {'status': 'unhealthy', 'error': 'ConnectionError: smtp refused',
+                                         'latency_ms': result['checks']['email']['latency_ms'],
+                                         'critical': False}
+
+    # The stuck probe is not started a second time
+    assert monitor.readiness()['checks']['database']['status'] == 'timeout'
+    assert len(calls) == 1
+
+    release.set()
+    time.sleep(0.05)
+    result = monitor.readiness()
+    assert result['ready'] and result['status'] == 'ready'
+    assert monitor.get_metrics()['timeouts'] == 2
+    monitor.shutdown()
+
+
+def test_liveness_never_runs_probes():
+    def fail():
+        raise AssertionError('liveness must not probe dependencies')
+
+    monitor = HealthMonitor([HealthProbe('database', fail)])
+    assert monitor.liveness()['status'] == 'alive'
+    assert monitor.get_metrics()['refreshes'] == 0
@@ -0,0 +1,123 @@
+"""Test keyset pagination of journal entries and the shared cursor codec."""
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.models.cursors import decode_cursor, encode_cursor, parse_id, parse_rank
+from backend.models.journal import LIST_PREVIEW_CHARS, JournalEntry
+
+
+class _KeysetDB:
+    """Answers get_entries_page's queries with the same keyset semantics as PostgreSQL"""
+
+    def __init__(self, entries, contacts=None):
+        self.entries = entries
+        self.contacts = contacts or {}
+        self.statements = []
+        self._result = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        if 'FROM journal_entries' in sql:
+            rows = sorted((e for e in self.entries if e['user_id'] == params[0]),
+                          key=lambda e: (e['created_at'], e['id']), reverse=True)
+            if 'je.id) <' in sql:
+                rows = [e for e in rows if (e['created_at'], e['id']) < (params[1], params[2])]
+            summary = 'LEFT(je.content' in sql
+            self._result = [(
+                e['id'], e['title'],
+                e['content'][:LIST_PREVIEW_CHARS] if summary else e['content'],
+                e['ai_reflection'] is not None if summary else e['ai_reflection'],
+                'reflection', None, None, [], e['created_at'], e['contact_id'], None
+            ) for e in rows[:params[-1]]]
+        elif 'FROM contacts' in sql:
+            self._result = [(cid, self.contacts[cid]) for cid in params[0] if cid in self.contacts]
+        else:
+            self._result = []
+
+    def fetchall(self):
+        return self._result
+
+
+def _entries(count, created_at=None, user_id='u1'):
+    start = datetime(2025, 6, 1, 9, 0, tzinfo=timezone.utc)
+    return [{
+        'id': str(uuid.uuid4()), 'user_id': user_id, 'title': f'Entry {i}', 'content': 'x' * 1000,
+        'ai_reflection': 'Reflection' if i % 2 else None,
+        'created_at': created_at or start + timedelta(hours=i), 'contact_id': None
+    } for i in range(count)]
+
+
+def _all_pages(journal, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = journal.get_entries_page('u1', limit, cursor, **kwargs)
+        pages.append([entry['id'] for entry in page['entries']])
+        cursor = page['next_cursor']
+        if not cursor:
+            return pages
+
+
+def test_cursor_round_trips_across_pages():
+    entries = _entries(7) + _entries(2, user_id='u2')
+    journal = JournalEntry(_KeysetDB(entries))
+
+    pages = _all_pages(journal, 3)
+
+    newest_first = [e['id'] for e in sorted(entries[:7], key=lambda e: e['created_at'], reverse=True)]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == newest_first
+
+
+def test_entries_sharing_a_timestamp_are_neither_skipped_nor_repeated():
+    tied = _entries(5, created_at=datetime(2025, 5, 31, 9, 0, tzinfo=timezone.utc))
+    journal = JournalEntry(_KeysetDB(tied + _entries(2)))
+
+    ids = sum(_all_pages(journal, 2), [])
+
+    assert len(ids) == len(set(ids)) == 7
+    assert ids[-5:] == sorted((e['id'] for e in tied), reverse=True)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor',
+    base64.urlsafe_b64encode(b'{"created_at": 1}').decode('ascii'),
+    encode_cursor('yesterday', str(uuid.uuid4())),
+    encode_cursor(datetime(2025, 6, 1, tzinfo=timezone.utc), "1 OR 1=1"),
+    encode_cursor(datetime(2025, 6, 1, tzinfo=timezone.utc), str(uuid.uuid4()), 'extra'),
+])
+def test_invalid_or_tampered_cursors_are_rejected_before_querying(cursor):
+    db = _KeysetDB(_entries(3))
+    with pytest.raises(ValueError, match='Invalid page cursor'):
+        JournalEntry(db).get_entries_page('u1', 2, cursor)
+    assert db.statements == []
+
+
+def test_summary_projection_reads_only_a_preview():
+    entries = _entries(2)
+    entries[0]['contact_id'] = 'c1'
+    db = _KeysetDB(entries, contacts={'c1': 'Maya'})
+
+    page = JournalEntry(db).get_entries_page('u1', 10, include_content=False)
+
+    assert f'LEFT(je.content, {LIST_PREVIEW_CHARS})' in db.statements[0]
+    assert 'je.content, je.ai_reflection' not in db.statements[0]
+    oldest = page['entries'][-1]
+    assert 'content' not in oldest and 'ai_reflection' not in oldest
+    assert oldest['content_preview'] == 'x' * LIST_PREVIEW_CHARS
+    assert oldest['has_ai_reflection'] is False and page['entries'][0]['has_ai_reflection'] is True
+    assert oldest['contact_name'] == 'Maya'
+
+
+def test_search_cursors_share_the_codec():
+    cursor = encode_cursor(0.75, 'e1')
+    assert json.loads(base64.urlsafe_b64decode(cursor)) == [0.75, 'e1']
+    assert decode_cursor(cursor, parse_rank, parse_id, name='search') == (0.75, 'e1')
+    with pytest.raises(ValueError, match='Invalid search cursor'):
+        decode_cursor(encode_cursor('high', 'e1'), parse_rank, parse_id, name='search')
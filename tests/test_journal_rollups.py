@@ -0,0 +1,95 @@
+"""Test folding journal rollup rows into dashboard views."""
+from datetime import date
+
+from backend.models.journal_rollups import JournalRollups, build_journal_views
+
+
+class _ScriptedDB:
+    """Records statements and answers the few reads get_analytics makes"""
+
+    def __init__(self, backfilled=False, today=date(2025, 6, 30), rollups=()):
+        self.backfilled = backfilled
+        self.today = today
+        self.rollups = list(rollups)
+        self.statements = []
+        self.commits = 0
+        self._result = []
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        sql = ' '.join(sql.split())
+        self.statements.append((sql, params))
+        self.rowcount = 0
+        self._result = []
+        if sql.startswith('SELECT 1 FROM journal_rollup_backfills'):
+            self._result = [(1,)] if self.backfilled else []
+        elif sql.startswith('INSERT INTO journal_rollup_backfills'):
+            self.rowcount = 0 if self.backfilled else 1
+            self.backfilled = True
+        elif sql == 'SELECT CURRENT_DATE':
+            self._result = [(self.today,)]
+        elif 'FROM journal_daily_rollups' in sql:
+            self._result = [row for row in self.rollups if row[0] >= params[1]]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+def test_views_fold_weekly_and_daily_series_in_one_pass():
+    """Weekly stats cover the last 7 days; daily series cover every rollup day."""
+    today = date(2025, 6, 30)
+    rows = [
+        (date(2025, 6, 10), 'gratitude', 2, 14, 2, 0, 0),
+        (date(2025, 6, 28), 'reflection', 2, 9, 1, 16, 2),
+        (date(2025, 6, 28), 'insight', 1, 0, 0, 0, 0),
+        (date(2025, 6, 29), 'reflection', 1, 8, 1, 6, 1),
+    ]
+    views = build_journal_views(rows, today)
+
+    assert views['weekly_stats'] == (4, 8.5, 22 / 3, 'insight, reflection')
+    assert views['daily_entries'] == [
+        {'day': '2025-06-10', 'count': 2},
+        {'day': '2025-06-28', 'count': 3},
+        {'day': '2025-06-29', 'count': 1},
+    ]
+    assert views['mood_trends'][1] == {'day': '2025-06-28', 'mood': 9.0, 'energy': 8.0}
+    assert build_journal_views([], today)['weekly_stats'] == (0, None, None, None)
+
+
+def test_first_read_backfills_rollups_once():
+    db = _ScriptedDB()
+    rollups = JournalRollups(db)
+
+    rollups.get_analytics('u1')
+    rebuilt = [sql for sql, _ in db.statements if sql.startswith('INSERT INTO journal_daily_rollups')]
+    assert len(rebuilt) == 1 and 'FROM journal_entries' in rebuilt[0]
+
+    db.statements.clear()
+    rollups.get_analytics('u1')
+    assert not any('journal_entries' in sql for sql, _ in db.statements)
+
+
+def test_analytics_windows_use_the_database_date():
+    """The Python clock may already be on the next day; the DB date decides the window."""
+    db = _ScriptedDB(backfilled=True, today=date(2025, 6, 30), rollups=[
+        (date(2025, 6, 23), 'reflection', 1, 5, 1, 0, 0),
+        (date(2025, 6, 22), 'reflection', 4, 0, 0, 0, 0),
+    ])
+
+    analytics = JournalRollups(db).get_analytics('u1')
+
+    windows = [params[1] for sql, params in db.statements if 'day >= %s' in sql]
+    assert windows == [date(2025, 5, 31), date(2025, 6, 23)]
+    assert analytics['weekly_stats'][:2] == (1, 5.0)
@@ -0,0 +1,88 @@
+"""Test the mounted journal blueprint from a queued reflection to a finished job."""
+import time
+
+from backend import create_app
+from backend.models.cursors import encode_cursor
+from backend.routes import journal_routes
+from services.ai.reflection_queue import ReflectionQueue
+
+
+class _FakeJournal:
+    """Journal model stand-in; the real one speaks PostgreSQL"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_entry_by_id(self, entry_id, user_id):
+        if entry_id != 'e1' or user_id != 'u1':
+            return None
+        # id, user_id, title, content, ..., ai_reflection at index 11
+        entry = ('e1', 'u1', 'Coffee with Maya', 'She offered intros') + (None,) * 7 + (None,)
+        return {'entry': entry, 'reflections': []}
+
+
+def _queue(tmp_path, persisted):
+    return ReflectionQueue(
+        lambda job: f"Reflection on {job.title}",
+        lambda job: persisted.append(job.entry_id) or 'r1',
+        db_path=str(tmp_path / 'reflection_jobs.db'), requests_per_minute=6000
+    )
+
+
+def _client(monkeypatch, tmp_path, journal_model=_FakeJournal):
+    monkeypatch.setenv('DATABASE_URL', 'sqlite://')
+    monkeypatch.setenv('SESSION_BACKEND', 'cookie')
+    monkeypatch.setattr(journal_routes, 'JournalEntry', journal_model)
+
+    persisted = []
+    app = create_app({'TESTING': True})
+    app.extensions['reflection_queue'] = _queue(tmp_path, persisted)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'u1'
+    return client, persisted
+
+
+def test_reflect_returns_a_job_that_completes_over_http(monkeypatch, tmp_path):
+    client, persisted = _client(monkeypatch, tmp_path)
+
+    response = client.post('/api/journal/reflect', json={'entry_id': 'e1', 'user_question': 'What next?'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job']['job_id']
+
+    deadline = time.time() + 5
+    job = client.get(f'/api/journal/reflections/{job_id}').get_json()['job']
+    while job['status'] not in ('done', 'failed') and time.time() < deadline:
+        time.sleep(0.01)
+        job = client.get(f'/api/journal/reflections/{job_id}').get_json()['job']
+
+    assert job['status'] == 'done'
+    assert job['ai_response'] == 'Reflection on Coffee with Maya'
+    assert persisted == ['e1']
+
+    # A poll that reaches another worker reads the same job table
+    client.application.extensions['reflection_queue'] = _queue(tmp_path, [])
+    assert client.get(f'/api/journal/reflections/{job_id}').get_json()['job']['status'] == 'done'
+
+
+def test_reflection_jobs_require_their_owner(monkeypatch, tmp_path):
+    client, _ = _client(monkeypatch, tmp_path)
+    job_id = client.post('/api/journal/reflect', json={'entry_id': 'e1'}).get_json()['job']['job_id']
+
+    with client.session_transaction() as sess:
+        sess['user_id'] = 'u2'
+    assert client.get(f'/api/journal/reflections/{job_id}').status_code == 404
+
+    with client.session_transaction() as sess:
+        sess.clear()
+    assert client.get(f'/api/journal/reflections/{job_id}').status_code == 401
+    assert client.get('/api/journal/search?q=maya').status_code == 401
+
+
+def test_invalid_page_cursors_are_a_bad_request(monkeypatch, tmp_path):
+    client, _ = _client(monkeypatch, tmp_path, journal_model=journal_routes.JournalEntry)
+
+    for cursor in ('not-a-cursor', encode_cursor('2025-06-01T09:00:00+00:00', "x' OR '1'='1")):
+        response = client.get('/api/journal/entries', query_string={'cursor': cursor})
+        assert response.status_code == 400
+        assert response.get_json() == {'error': 'Invalid page cursor'}
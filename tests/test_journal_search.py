@@ -0,0 +1,48 @@
+"""Test journal full-text search on the SQLite FTS5 fallback."""
+import sqlite3
+
+from backend.models.journal_search import JournalSearch
+
+
+def _db():
+    db = sqlite3.connect(':memory:')
+    db.executescript("""
+        CREATE TABLE journal_entries (id TEXT PRIMARY KEY, user_id TEXT, title TEXT, content TEXT,
+                                      entry_type TEXT, tags TEXT, created_at TEXT);
+        CREATE TABLE journal_reflections (id TEXT PRIMARY KEY, journal_entry_id TEXT, ai_response TEXT);
+        INSERT INTO journal_entries VALUES ('e1', 'u1', 'Fundraising worries', 'Pitched three investors today',
+                                            'reflection', 'fundraising', '2025-06-01');
+    """)
+    JournalSearch(db).ensure_schema()
+    db.executescript("""
+        INSERT INTO journal_entries VALUES ('e2', 'u1', 'Coffee with Maya', 'She offered to intro me to investors',
+                                            'relationship', '', '2025-06-02');
+        INSERT INTO journal_entries VALUES ('e3', 'u1', 'Gym', 'Long run, felt great', 'gratitude', '', '2025-06-03');
+        INSERT INTO journal_entries VALUES ('e4', 'u2', 'Investors', 'Other user', 'reflection', '', '2025-06-03');
+        INSERT INTO journal_reflections VALUES ('r1', 'e3', 'Exercise clears your head before investor meetings');
+    """)
+    return db
+
+
+def test_search_ranks_highlights_and_covers_reflections():
+    """Entry matches outrank reflection-only matches, which are still found; users are isolated."""
+    search = JournalSearch(_db())
+    results = search.search('u1', 'investors')['results']
+
+    assert [r['id'] for r in results] == ['e1', 'e2', 'e3']
+    assert '<mark>investors</mark>' in results[0]['content_highlight']
+    reflection_hit = next(r for r in results if r['id'] == 'e3')
+    assert '<mark>investor</mark>' in reflection_hit['reflection_highlight']
+    assert search.search('u1', 'fundraising')['results'][0]['title_highlight'] == '<mark>Fundraising</mark> worries'
+    assert search.search('u1', '"; DROP')['results'] == []
+
+
+def test_search_keyset_pagination_visits_each_result_once():
+    search = JournalSearch(_db())
+    page = search.search('u1', 'investors', limit=2)
+    assert len(page['results']) == 2 and page['next_cursor']
+
+    rest = search.search('u1', 'investors', limit=2, cursor=page['next_cursor'])
+    assert rest['next_cursor'] is None
+    ids = [r['id'] for r in page['results'] + rest['results']]
+    assert sorted(ids) == ['e1', 'e2', 'e3']
@@ -0,0 +1,49 @@
+"""Test the hashed magic-link token store and its expiry sweep."""
+import sqlite3
+import time
+
+from services.auth.magic_links import MagicLinkTokenStore, hash_token
+
+
+class _SqliteDB:
+    def __init__(self, path):
+        self.path = path
+
+    def get_connection(self):
+        return sqlite3.connect(self.path)
+
+
+def test_tokens_are_stored_hashed_and_single_use(tmp_path):
+    db = _SqliteDB(str(tmp_path / 'auth.db'))
+    store = MagicLinkTokenStore(db)
+    token = store.issue('founder@example.com')
+    store.sweeper.stop()
+
+    conn = db.get_connection()
+    stored = [row[0] for row in conn.execute("SELECT token_hash FROM magic_link_tokens")]
+    plan = ' '.join(str(row) for row in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT email FROM magic_link_tokens WHERE token_hash = ?", (hash_token(token),)
+    ))
+    conn.close()
+    assert stored == [hash_token(token)] and token not in stored
+    assert 'USING INDEX' in plan or 'PRIMARY KEY' in plan
+
+    assert store.consume(token) == 'founder@example.com'
+    assert store.consume(token) is None
+    assert store.consume('not-a-token') is None
+
+
+def test_expired_tokens_are_rejected_and_swept_in_batches(tmp_path):
+    db = _SqliteDB(str(tmp_path / 'auth.db'))
+    store = MagicLinkTokenStore(db)
+    tokens = [store.issue(f'user{i}@example.com') for i in range(7)]
+    store.sweeper.stop()
+
+    conn = db.get_connection()
+    conn.execute("UPDATE magic_link_tokens SET expires_at = ? WHERE email != 'user6@example.com'", (time.time() - 1,))
+    conn.commit()
+    conn.close()
+
+    assert store.consume(tokens[0]) is None
+    assert store.sweep_expired(batch_size=2) == 5
+    assert store.consume(tokens[6]) == 'user6@example.com'
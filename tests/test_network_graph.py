@@ -0,0 +1,54 @@
+"""Test the network graph engine, its level-of-detail views and JSON streaming."""
+import json
+
+from services.data.network_graph import NetworkGraph, stream_graph_json
+
+
+def _render(view, chunk_size=2):
+    return json.loads(''.join(stream_graph_json(view, chunk_size=chunk_size)))
+
+
+def test_graph_links_companies_introductions_and_tags():
+    """Contacts connect through shared employers, introducers and tags, not just the user."""
+    contacts = [
+        {'id': '1', 'name': 'Ada', 'company': 'Acme', 'warmth_level': 'hot', 'tags': 'ai,climate'},
+        {'id': '2', 'name': 'Bob', 'company': 'acme ', 'tags': 'ai', 'introduced_by': 'Ada'},
+        {'id': '3', 'name': 'Cy', 'company': 'Other', 'tags': '["climate"]'},
+    ]
+    graph = NetworkGraph.build(contacts, goals=[{'id': 'g1', 'title': 'Raise'}],
+                               suggestions=[{'goal_id': 'g1', 'contact_id': '3', 'confidence': 0.9}])
+    data = _render(graph.overview(max_nodes=100))
+
+    edge_types = {(e['source'], e['target'], e['type']) for e in data['edges']}
+    assert ('company_acme', '1', 'works_at') in edge_types
+    assert ('1', '2', 'introduced') in edge_types
+    assert ('1', '3', 'shared_tag') in edge_types
+    assert ('goal_g1', '3', 'suggested') in edge_types
+    assert data['meta']['level'] == 'full'
+    assert len([n for n in data['nodes'] if n['type'] == 'contact']) == 3
+
+
+def test_large_networks_get_a_clustered_overview():
+    """Above max_nodes the view samples every cluster instead of the first N contacts."""
+    contacts = []
+    for company in range(5):
+        for i in range(40):
+            contacts.append({'id': f'{company}-{i}', 'name': f'P{company}-{i}', 'company': f'Co{company}',
+                             'warmth_level': 'warm' if i == 0 else 'cold'})
+    graph = NetworkGraph.build(contacts)
+    data = _render(graph.overview(max_nodes=40), chunk_size=7)
+
+    assert data['meta']['level'] == 'overview'
+    assert data['meta']['total_contacts'] == 200
+    assert len(data['nodes']) <= 40 + 5
+
+    clusters = [n for n in data['nodes'] if n['type'] == 'cluster']
+    assert sorted(c['size'] for c in clusters) == [40] * 5
+    sampled_companies = {n['company'] for n in data['nodes'] if n['type'] == 'contact'}
+    assert sampled_companies == {f'Co{i}' for i in range(5)}
+    # The warm contact is the most important member of its cluster
+    assert 'P0-0' in {n['name'] for n in data['nodes']}
+
+    detail = _render(graph.cluster_detail(clusters[0]['id'], max_nodes=100))
+    assert detail['meta']['total_contacts'] == 40
+    assert len([n for n in detail['nodes'] if n['type'] == 'contact']) == 40
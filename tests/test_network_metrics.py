@@ -0,0 +1,52 @@
+"""Test the running-total network metrics engine."""
+import sqlite3
+
+from services.data.network_metrics import NetworkMetricsManager
+
+
+def test_running_totals_follow_local_and_external_writes(tmp_path):
+    """record_metric updates totals in place; rows written by another process are folded in."""
+    path = str(tmp_path / 'metrics.db')
+    manager = NetworkMetricsManager(db_path=path)
+    quarter = manager.get_current_quarter()
+
+    manager.record_metric('funding_raised', 250000)
+    manager.record_metric('funding_raised', 150000)
+    assert manager.get_quarterly_metrics()['funding_raised'] == 400000
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO network_metrics (metric_type, value, quarter) VALUES ('funding_raised', 100000, ?)",
+                     (quarter,))
+    metrics = manager.get_quarterly_metrics()
+    assert metrics['funding_raised'] == 500000
+    assert metrics['trends']['funding_raised']['direction'] == 'up'
+
+    restarted = NetworkMetricsManager(db_path=path)
+    assert restarted.get_quarterly_metrics()['funding_raised'] == 500000
+
+
+def test_check_milestones_drains_announced_crossings(tmp_path):
+    """check_milestone_achievements reports each crossing once."""
+    manager = NetworkMetricsManager(db_path=str(tmp_path / 'metrics.db'))
+    manager.initialize_milestones()
+    assert manager.check_milestone_achievements() == []
+
+    manager.record_metric('funding_raised', 1200000)
+    achieved = manager.check_milestone_achievements()
+    assert [m['title'] for m in achieved] == ['Million Dollar Quarter']
+    assert manager.check_milestone_achievements() == []
+    assert manager.get_ticker_messages()[0]['type'] == 'milestone'
+
+
+def test_record_metric_announces_crossings_immediately(tmp_path):
+    """A write that crosses several thresholds announces each once, in threshold order."""
+    manager = NetworkMetricsManager(db_path=str(tmp_path / 'metrics.db'))
+    manager.initialize_milestones()
+
+    assert manager.record_metric('funding_raised', 900000) == []
+    achieved = manager.record_metric('funding_raised', 4500000)
+    assert [m['threshold'] for m in achieved] == [1000000, 5000000]
+    assert manager.record_metric('funding_raised', 10) == []
+
+    contents = [m['content'] for m in manager.get_ticker_messages()]
+    assert sum('Five Million Milestone' in c for c in contents) == 1
@@ -0,0 +1,89 @@
+"""Test the natural language query planner and its SQL compilation."""
+import sqlite3
+from datetime import datetime, timedelta
+
+from services.ai.query_planner import (
+    CONTACTS, FOLLOW_UPS, OPEN_ENDED, STATS, QueryPlanner, compile_sql, parse_query
+)
+
+
+def test_structured_questions_compile_to_filters():
+    """Warmth, industry and recency phrases become filters rather than LLM prompts."""
+    plan = parse_query("Warm contacts at fintech companies I haven't talked to in 60 days")
+    assert plan.intent == CONTACTS
+    assert plan.min_warmth == 3
+    assert plan.companies == ('fintech',)
+    assert plan.inactive_days == 60
+
+    assert parse_query("How many investors did I add this month?").count_only
+    assert parse_query("Who needs follow-up?").intent == FOLLOW_UPS
+    assert parse_query("What's my response rate?").intent == STATS
+
+
+def test_places_and_company_lists_are_kept_whole():
+    """Multi-word places and names stay intact; "new" in a name is not a recency filter."""
+    new_york = parse_query("show me contacts in new york")
+    assert new_york.locations == ('new york',) and new_york.added_within_days is None
+    times = parse_query("contacts at the new york times")
+    assert times.companies == ('new york times',) and times.added_within_days is None
+
+    founders = parse_query("founders in san francisco")
+    assert founders.roles == ('founder',) and founders.locations == ('san francisco',)
+    assert not founders.companies
+
+    assert parse_query("investors at acme and hooli").companies == ('acme', 'hooli')
+    assert parse_query("new contacts this week").added_within_days == 7
+    added = parse_query("contacts added in the last 2 weeks in berlin")
+    assert added.added_within_days == 14 and added.locations == ('berlin',)
+
+
+def test_open_ended_questions_escalate():
+    """Advice and action requests are left for the LLM."""
+    assert parse_query("Who should I introduce to Sarah for her seed round?").intent == OPEN_ENDED
+    assert parse_query("Draft a note to the Acme team").intent == OPEN_ENDED
+    assert not parse_query("Why did my response rate drop?").is_structured
+
+
+def test_compiled_sql_runs_against_contacts_table():
+    """The compiled query filters rows as the plan describes."""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""CREATE TABLE contacts (
+        id TEXT, user_id TEXT, name TEXT, company TEXT, title TEXT, tags TEXT, notes TEXT, location TEXT,
+        interests TEXT, relationship_type TEXT, warmth_status INTEGER, warmth_label TEXT,
+        last_interaction_date TIMESTAMP, follow_up_action TEXT, follow_up_due_date TIMESTAMP,
+        created_at TIMESTAMP)""")
+    now = datetime(2025, 6, 1)
+    rows = [
+        ('1', 'u1', 'Ada', 'PayFlow', 'CEO', 'fintech', '', '', 'Ally', 4, 'Active', now - timedelta(days=90)),
+        ('2', 'u1', 'Bob', 'PayFlow', 'CTO', 'fintech', '', '', 'Ally', 4, 'Active', now - timedelta(days=5)),
+        ('3', 'u1', 'Cy', 'Acme', 'Designer', '', '', '', 'Ally', 4, 'Active', now - timedelta(days=90)),
+        ('4', 'u2', 'Dee', 'Fintech Co', 'CEO', '', '', '', 'Ally', 4, 'Active', None),
+    ]
+    conn.executemany(
+        "INSERT INTO contacts (id, user_id, name, company, title, tags, notes, interests, relationship_type, "
+        "warmth_status, warmth_label, last_interaction_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+    )
+
+    plan = parse_query("warm contacts at fintech companies I haven't talked to in 60 days")
+    sql, params = compile_sql(plan, 'u1', placeholder='?', now=now)
+    assert [row[1] for row in conn.execute(sql, params)] == ['Ada']
+
+    conn.execute("UPDATE contacts SET location = 'San Francisco, CA' WHERE id IN ('2', '3')")
+    sql, params = compile_sql(parse_query("contacts in san francisco at acme or payflow"), 'u1',
+                              placeholder='?', now=now)
+    assert sorted(row[1] for row in conn.execute(sql, params)) == ['Bob', 'Cy']
+
+
+def test_plans_are_cached():
+    """Repeated questions (modulo case and spacing) reuse the parsed plan."""
+    planner = QueryPlanner()
+    first = planner.plan("Show me warm contacts")
+    assert planner.plan("show me   WARM contacts") is first
+    assert planner.get_stats()['hits'] == 1
+
+
+def test_cache_key_covers_every_filter_but_not_the_wording():
+    """Answers cached by plan differ by limit and warmth, not by phrasing."""
+    assert parse_query("top 5 investors").cache_key != parse_query("top 20 investors").cache_key
+    assert parse_query("warm contacts").cache_key != parse_query("hot contacts").cache_key
+    assert parse_query("Top 5 investors").cache_key == parse_query("top 5   investors").cache_key
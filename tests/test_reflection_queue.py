@@ -0,0 +1,83 @@
+"""Test the background journal reflection queue."""
+import threading
+
+from services.ai.reflection_queue import ReflectionQueue
+
+
+def _queue(tmp_path, generate=None):
+    persisted = []
+    release = threading.Event()
+
+    def default_generate(job):
+        release.wait(5)
+        return f"Reflection on {job.title}"
+
+    def persist(job):
+        persisted.append(job.entry_id)
+        return f"r{len(persisted)}"
+
+    queue = ReflectionQueue(generate or default_generate, persist, db_path=str(tmp_path / 'jobs.db'),
+                            max_workers=2, requests_per_minute=6000)
+    return queue, persisted, release
+
+
+def test_repeated_questions_share_one_job_and_cache_by_content(tmp_path):
+    queue, persisted, release = _queue(tmp_path)
+    first = queue.submit('u1', 'e1', 'Coffee with Maya', 'She offered intros', 'What next?')
+    repeat = queue.submit('u1', 'e1', 'Coffee with Maya', 'She offered intros', '  what next? ')
+    assert repeat.job_id == first.job_id and repeat.status in ('queued', 'running')
+
+    release.set()
+    done = queue.wait(first.job_id, 5)
+    assert done.status == 'done' and done.reflection_id == 'r1'
+
+    # Same content saved as another entry is answered from the cache
+    copy = queue.wait(queue.submit('u1', 'e2', 'Coffee with Maya', 'She offered intros', 'What next?').job_id, 5)
+    assert copy.cached and copy.ai_response == done.ai_response
+    assert queue.stats['llm_calls'] == 1 and queue.stats['deduplicated'] == 1
+    assert persisted == ['e1', 'e2']
+    assert queue.get(first.job_id, user_id='u2') is None
+
+
+def test_asking_again_after_a_finished_job_saves_a_new_session(tmp_path):
+    queue, persisted, release = _queue(tmp_path)
+    release.set()
+    first = queue.wait(queue.submit('u1', 'e1', 'T', 'C', 'Why?').job_id, 5)
+
+    again = queue.wait(queue.submit('u1', 'e1', 'T', 'C', 'Why?').job_id, 5)
+
+    assert again.job_id != first.job_id and again.status == 'done'
+    assert again.cached and queue.stats['llm_calls'] == 1
+    assert persisted == ['e1', 'e1']
+
+
+def test_jobs_are_visible_to_every_worker(tmp_path):
+    queue, _, release = _queue(tmp_path)
+    job = queue.submit('u1', 'e1', 'T', 'C')
+
+    # Another app worker: same table, different process state
+    other, other_persisted, _ = _queue(tmp_path)
+    assert other.get(job.job_id, user_id='u1').status in ('queued', 'running')
+    assert other.submit('u1', 'e1', 'T', 'C').job_id == job.job_id
+
+    release.set()
+    finished = other.wait(job.job_id, 5)
+    assert finished.status == 'done' and finished.ai_response == 'Reflection on T'
+    assert other_persisted == []
+
+
+def test_failed_generation_is_reported_and_retryable(tmp_path):
+    calls = []
+
+    def flaky(job):
+        calls.append(job.job_id)
+        if len(calls) == 1:
+            raise RuntimeError('rate limited')
+        return 'ok'
+
+    queue, persisted, _ = _queue(tmp_path, flaky)
+    failed = queue.wait(queue.submit('u1', 'e1', 'T', 'C').job_id, 5)
+    assert failed.status == 'failed' and failed.error and persisted == []
+
+    retried = queue.wait(queue.submit('u1', 'e1', 'T', 'C').job_id, 5)
+    assert retried.job_id != failed.job_id and retried.status == 'done'
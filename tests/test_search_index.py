@@ -0,0 +1,135 @@
+"""Test the persistent BM25 + embedding contact search index."""
+import threading
+
+from services.data.search_index import SearchIndexManager
+
+
+def _contacts():
+    return [
+        {'id': '1', 'name': 'Ada Lovelace', 'company': 'Seed VC', 'title': 'Partner',
+         'notes': 'Leads fintech seed rounds', 'tags': ['investor', 'fintech']},
+        {'id': '2', 'name': 'Bob Builder', 'company': 'Acme', 'title': 'Backend Engineer',
+         'notes': 'Knows the fintech hiring market'},
+        {'id': '3', 'name': 'Cy Designer', 'company': 'Acme', 'title': 'Designer',
+         'interests': 'brand systems, typography'},
+    ]
+
+
+def test_bm25_ranks_field_weighted_matches_first(tmp_path):
+    """Matches in weighted fields (tags, title) outrank matches only in notes."""
+    manager = SearchIndexManager(db_path=str(tmp_path / 'index.db'), embed_fn=lambda texts: [])
+
+    results = manager.search('u1', 'fintech investor', loader=_contacts)
+    assert [r['id'] for r in results] == ['1', '2']
+    assert results[0]['name'] == 'Ada Lovelace'
+    assert manager.search('u1', 'the and of') == []
+
+
+def test_index_is_incremental_and_persisted(tmp_path):
+    """Writes update the index in place and survive a restart without the loader."""
+    path = str(tmp_path / 'index.db')
+    manager = SearchIndexManager(db_path=path, embed_fn=lambda texts: [])
+    manager.ensure_loaded('u1', _contacts)
+
+    manager.upsert_contact('u1', {'id': '4', 'name': 'Dee Recruiter', 'title': 'Technical Recruiter'})
+    manager.remove_contact('u1', '3')
+    assert manager.search('u1', 'recruiter')[0]['id'] == '4'
+
+    restarted = SearchIndexManager(db_path=path, embed_fn=lambda texts: [])
+    assert restarted.search('u1', 'recruiter')[0]['id'] == '4'
+    assert restarted.search('u1', 'typography') == []
+    assert restarted.get_stats()['persisted_loads'] == 1
+
+    restarted.invalidate_user('u1')
+    assert restarted.search('u1', 'recruiter') == []
+
+
+def test_embeddings_rerank_lexical_candidates(tmp_path):
+    """Semantic similarity is blended into the BM25 score when embeddings exist."""
+    vectors = {'acme': [1.0, 0.0]}
+
+    def embed(texts):
+        return [[0.0, 1.0] if 'Designer' in text else vectors.get(text.lower(), [1.0, 0.0]) for text in texts]
+
+    manager = SearchIndexManager(db_path=str(tmp_path / 'index.db'), embed_fn=embed)
+    results = manager.search('u1', 'acme', loader=_contacts)
+    assert results[0]['id'] == '2'
+    assert results[0]['semantic_score'] > results[1]['semantic_score']
+    assert manager.get_stats()['embedded'] == 2
+
+
+def test_stale_index_is_rebuilt_when_contacts_signature_changes(tmp_path, monkeypatch):
+    """Writes from another worker show up once the contacts signature moves."""
+    monkeypatch.setattr('services.data.search_index.SIGNATURE_CHECK_SECONDS', 0)
+    contacts = _contacts()
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    manager = SearchIndexManager(db_path=str(tmp_path / 'index.db'), embed_fn=embed)
+    search = lambda query: manager.search('u1', query, loader=lambda: contacts,
+                                          signature=lambda: (len(contacts), contacts[-1]['id']))
+
+    assert {r['id'] for r in search('acme')} == {'2', '3'}
+    embedded.clear()
+
+    # Added without going through this manager
+    contacts.append({'id': '4', 'name': 'Dee Recruiter', 'company': 'Acme', 'title': 'Recruiter'})
+    assert {r['id'] for r in search('acme')} == {'2', '3', '4'}
+    assert manager.get_stats()['stale_rebuilds'] == 1
+    # Unchanged contacts kept their embeddings
+    assert len(embedded) == 1 and 'Dee Recruiter' in embedded[0]
+
+
+def test_embedding_calls_do_not_block_other_searches(tmp_path):
+    """A slow embeddings round-trip for one query doesn't hold the index lock."""
+    entered, release = threading.Event(), threading.Event()
+
+    def slow_embed(texts):
+        entered.set()
+        release.wait(5)
+        return [[1.0, 0.0] for _ in texts]
+
+    manager = SearchIndexManager(db_path=str(tmp_path / 'index.db'), embed_fn=slow_embed)
+    manager.ensure_loaded('u2', _contacts)
+    slow = threading.Thread(target=manager.search, args=('u1', 'acme'), kwargs={'loader': _contacts})
+    slow.start()
+    try:
+        assert entered.wait(5)
+        done = []
+        fast = threading.Thread(target=lambda: done.append(manager.search('u2', 'designer', semantic=False)))
+        fast.start()
+        fast.join(2)
+        assert done and done[0][0]['id'] == '3'
+    finally:
+        release.set()
+        slow.join(5)
+
+
+def test_rebuilding_one_user_does_not_block_another(tmp_path):
+    """The loader runs outside the manager lock; other users keep searching."""
+    manager = SearchIndexManager(db_path=str(tmp_path / 'index.db'), embed_fn=lambda texts: [])
+    manager.ensure_loaded('u2', _contacts)
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_loader():
+        loading.set()
+        release.wait(5)
+        return _contacts()
+
+    builder = threading.Thread(target=manager.search, args=('u1', 'acme'), kwargs={'loader': slow_loader})
+    builder.start()
+    assert loading.wait(5)
+    try:
+        done = []
+        other = threading.Thread(target=lambda: done.append(manager.search('u2', 'typography')))
+        other.start()
+        other.join(2)
+        assert done and done[0][0]['id'] == '3'
+    finally:
+        release.set()
+        builder.join(5)
+    assert manager.search('u1', 'typography')[0]['id'] == '3'
+    assert manager.get_stats()['builds'] == 2
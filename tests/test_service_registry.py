@@ -0,0 +1,75 @@
+"""Test the lazy service registry."""
+import threading
+
+import pytest
+
+from services.service_registry import LazyServiceRegistry, ServiceUnavailable
+
+
+class _Engine:
+    built = 0
+
+    def __init__(self, db=None):
+        type(self).built += 1
+        self.db = db
+
+
+def test_services_are_built_once_on_first_use():
+    _Engine.built = 0
+    registry = LazyServiceRegistry()
+    registry.register('engine', _Engine, 'db-handle')
+    registry.register('ordered', 'collections.OrderedDict')
+
+    assert _Engine.built == 0
+    assert registry.report()['engine']['status'] == 'pending'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('engine'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert _Engine.built == 1 and all(engine is results[0] for engine in results)
+    assert results[0].db == 'db-handle'
+    report = registry.report()
+    assert report['engine']['status'] == 'ready' and report['engine']['init_ms'] is not None
+    assert report['ordered']['status'] == 'pending'
+
+
+def test_broken_dependency_only_affects_its_own_service():
+    registry = LazyServiceRegistry(retry_after=0)
+    registry.register('broken', 'module_that_does_not_exist.Engine')
+    registry.register('engine', _Engine)
+
+    class Routes:
+        broken = registry.service('broken')
+        engine = registry.service('engine')
+
+    routes = Routes()
+    with pytest.raises(ServiceUnavailable) as excinfo:
+        routes.broken
+    assert 'ModuleNotFoundError' in excinfo.value.error
+    assert isinstance(routes.engine, _Engine)
+    assert not registry.is_available('broken') and registry.is_available('engine')
+    assert registry.report()['broken']['status'] == 'failed'
+
+
+def test_failed_services_are_retried_after_a_delay():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError('database unavailable')
+        return 'engine'
+
+    registry = LazyServiceRegistry(retry_after=3600)
+    registry.register('flaky', flaky)
+    for _ in range(3):
+        with pytest.raises(ServiceUnavailable):
+            registry.get('flaky')
+    assert len(attempts) == 1
+
+    registry.retry_after = 0
+    assert registry.get('flaky') == 'engine' and len(attempts) == 2
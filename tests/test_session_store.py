@@ -0,0 +1,87 @@
+"""Test the server-side session store and its cached user profile."""
+
+from flask import Flask, jsonify, session
+
+from backend.services.session_store import (
+    PROFILE_KEY, ServerSideSessionInterface, SessionStore, regenerate_session
+)
+
+
+def _app(store):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(store)
+
+    @app.route('/login')
+    def login():
+        session['user_id'] = 'u1'
+        session[PROFILE_KEY] = {'id': 'u1', 'subscription_tier': 'explorer'}
+        return 'ok'
+
+    @app.route('/visit')
+    def visit():
+        session['theme'] = 'dark'
+        return 'ok'
+
+    @app.route('/signin')
+    def signin():
+        regenerate_session()
+        session['user_id'] = 'u1'
+        return 'ok'
+
+    @app.route('/me')
+    def me():
+        return jsonify(session.get(PROFILE_KEY))
+
+    @app.route('/logout')
+    def logout():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+def test_session_data_lives_server_side(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.db'))
+    client = _app(store).test_client()
+
+    client.get('/login')
+    sid = client.get_cookie('session').value
+    assert 'explorer' not in sid
+    assert store.get(sid)['user_id'] == 'u1'
+    assert client.get('/me').json == {'id': 'u1', 'subscription_tier': 'explorer'}
+
+    # An upgrade elsewhere is written through to every session of the user
+    store.update_user_profile('u1', {'id': 'u1', 'subscription_tier': 'founder_plus'})
+    assert client.get('/me').json['subscription_tier'] == 'founder_plus'
+
+    client.get('/logout')
+    assert store.get(sid) is None
+    store.sweeper.stop()
+
+
+def test_login_issues_a_new_session_id(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.db'))
+    client = _app(store).test_client()
+
+    client.get('/visit')
+    planted = client.get_cookie('session').value
+    assert store.get(planted) == {'theme': 'dark'}
+
+    client.get('/signin')
+    sid = client.get_cookie('session').value
+    assert sid != planted
+    assert store.get(planted) is None
+    assert store.get(sid) == {'theme': 'dark', 'user_id': 'u1'}
+    store.sweeper.stop()
+
+
+def test_expired_sessions_are_swept(tmp_path):
+    store = SessionStore(str(tmp_path / 'sessions.db'))
+    store.set('old', {'user_id': 'u1'}, ttl=-1)
+    store.set('live', {'user_id': 'u1'})
+    store.sweeper.stop()
+
+    assert store.get('old') is None
+    assert store.sweep_expired(batch_size=1) == 1
+    assert store.get('live') == {'user_id': 'u1'}
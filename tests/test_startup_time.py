@@ -0,0 +1,30 @@
+"""Cold-start budget for create_app, measured in a fresh interpreter."""
+import os
+
+from backend.startup_profiler import DEFERRED_MODULES, measure_cold_start
+
+# Milliseconds from importing the backend package to a fully built app
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 3000))
+
+
+def test_cold_start_stays_within_budget_without_heavy_imports():
+    report = measure_cold_start()
+
+    assert report['deferred_modules_loaded'] == [], (
+        f"{report['deferred_modules_loaded']} imported at startup; import them where they are used"
+    )
+    assert report['cold_start_ms'] < STARTUP_BUDGET_MS, (
+        f"create_app cold start took {report['cold_start_ms']:.0f}ms "
+        f"(budget {STARTUP_BUDGET_MS:.0f}ms); run `flask --app backend profile-startup`"
+    )
+
+
+def test_profiling_reports_phases_and_imports():
+    report = measure_cold_start(profile_imports=True)
+
+    phases = [phase['name'] for phase in report['phases']]
+    assert phases[0] == 'flask_app' and 'extension:sqlalchemy' in phases
+    assert {f'blueprint:{name}' for name in ('auth_routes', 'service_routes', 'core_routes')} <= set(phases)
+    packages = {package['package'] for package in report['packages']}
+    assert 'sqlalchemy' in packages and not packages & set(DEFERRED_MODULES)
+    assert report['import_ms'] > 0
@@ -0,0 +1,105 @@
+"""Test the Telegram bot's async data-access layer."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.telegram_data import TelegramDataAccess
+
+
+def test_blocking_queries_do_not_stall_the_event_loop():
+    data = TelegramDataAccess(max_workers=2)
+    ticks = []
+
+    def slow_digest():
+        time.sleep(0.3)
+        return 'digest'
+
+    async def heartbeat():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        return await asyncio.gather(data.run(slow_digest), heartbeat())
+
+    assert asyncio.run(main())[0] == 'digest'
+    # The loop kept ticking while the digest query ran
+    assert ticks[-1] - ticks[0] < 0.25
+    metrics = data.get_metrics()
+    assert metrics['queries'] == 1 and metrics['in_flight'] == 0
+    assert metrics['max_query_ms'] >= 300
+    data.shutdown()
+
+
+def test_responses_are_cached_per_chat_and_shared_while_loading():
+    data = TelegramDataAccess(max_workers=4, cache_ttl=60)
+    calls = []
+    lock = threading.Lock()
+
+    def load_contacts(user_id):
+        with lock:
+            calls.append(user_id)
+        time.sleep(0.05)
+        return [{'name': 'Maya'}]
+
+    async def main():
+        first = await asyncio.gather(*[data.cached('chat-1', 'contacts', load_contacts, 1) for _ in range(3)])
+        repeat = await data.cached('chat-1', 'contacts', load_contacts, 1)
+        other_chat = await data.cached('chat-2', 'contacts', load_contacts, 1)
+        return first, repeat, other_chat
+
+    first, repeat, other_chat = asyncio.run(main())
+    assert all(result == [{'name': 'Maya'}] for result in first + [repeat, other_chat])
+    assert len(calls) == 2
+    metrics = data.get_metrics()
+    assert metrics['coalesced'] == 2 and metrics['cache_hits'] == 1 and metrics['cache_misses'] == 2
+
+    data.invalidate('chat-1')
+    asyncio.run(data.cached('chat-1', 'contacts', load_contacts, 1))
+    assert len(calls) == 3
+    data.shutdown()
+
+
+def test_failed_queries_are_not_cached():
+    data = TelegramDataAccess(max_workers=1)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError('database is locked')
+        return 42
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(data.cached('chat-1', 'stats', flaky))
+    assert asyncio.run(data.cached('chat-1', 'stats', flaky)) == 42
+    assert data.get_metrics()['errors'] == 1
+    data.shutdown()
+
+
+def test_waiters_recover_when_the_loading_task_is_cancelled():
+    data = TelegramDataAccess(max_workers=2)
+    started = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            time.sleep(0.2)
+        return 'contacts'
+
+    async def main():
+        owner = asyncio.create_task(data.cached('chat-1', 'contacts', load))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(data.cached('chat-1', 'contacts', load))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await asyncio.wait_for(waiter, 2)
+
+    assert asyncio.run(main()) == 'contacts'
+    assert len(calls) == 2
+    data.shutdown()
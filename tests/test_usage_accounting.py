@@ -0,0 +1,118 @@
+"""Test database-enforced usage limits, the tier cache and batched usage rows."""
+import sqlite3
+import threading
+
+from services.auth.auth import SubscriptionManager
+from services.auth.usage_accounting import UsageAccountant
+
+
+class _CountingDB:
+    def __init__(self, path):
+        self.path = path
+        self.connections = 0
+
+    def get_connection(self):
+        self.connections += 1
+        conn = sqlite3.connect(self.path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def _db(tmp_path):
+    path = str(tmp_path / 'usage.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE users (id TEXT PRIMARY KEY, subscription_tier TEXT, goals_count INTEGER DEFAULT 0,
+                            contacts_count INTEGER DEFAULT 0, ai_suggestions_used INTEGER DEFAULT 0,
+                            stripe_customer_id TEXT, stripe_subscription_id TEXT, subscription_status TEXT,
+                            updated_at TEXT);
+        CREATE TABLE usage_tracking (id TEXT PRIMARY KEY, user_id TEXT, action_type TEXT, metadata TEXT);
+        CREATE TABLE subscription_history (id TEXT, user_id TEXT, action TEXT, from_tier TEXT, to_tier TEXT);
+        INSERT INTO users (id, subscription_tier) VALUES ('u1', 'explorer');
+    """)
+    conn.commit()
+    conn.close()
+    return _CountingDB(path)
+
+
+def _ai_used(db):
+    conn = db.get_connection()
+    try:
+        return conn.execute("SELECT ai_suggestions_used FROM users WHERE id = 'u1'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _tracked(db):
+    conn = db.get_connection()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM usage_tracking").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_limited_actions_are_claimed_in_the_database_and_rows_batched(tmp_path):
+    db = _db(tmp_path)
+    usage = UsageAccountant(db, SubscriptionManager.TIER_LIMITS, flush_interval=3600)
+
+    assert [usage.check_and_increment('u1', 'ai_suggestion') for _ in range(4)] == [True, True, True, False]
+    assert not usage.check('u1', 'ai_suggestion')
+    assert usage.has_feature('u1', 'limited_ai') and not usage.has_feature('u1', 'analytics')
+    # One load for the tier plus one conditional update per attempt
+    assert db.connections == 5
+    assert _ai_used(db) == 3 and _tracked(db) == 0
+
+    assert usage.flush() == 3
+    assert _ai_used(db) == 3
+    conn = db.get_connection()
+    assert conn.execute("SELECT COUNT(*) FROM usage_tracking").fetchone()[0] == 3
+    conn.close()
+    assert not usage.check('u1', 'ai_suggestion')
+
+
+def test_check_and_increment_is_atomic_across_threads(tmp_path):
+    db = _db(tmp_path)
+    usage = UsageAccountant(db, SubscriptionManager.TIER_LIMITS, flush_interval=3600)
+    allowed = []
+
+    def worker():
+        allowed.append(usage.check_and_increment('u1', 'ai_suggestion'))
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert allowed.count(True) == 3
+    usage.flush()
+    assert _ai_used(db) == 3
+
+
+def test_upgrade_refreshes_cached_tier(tmp_path):
+    db = _db(tmp_path)
+    manager = SubscriptionManager(db)
+    for _ in range(3):
+        manager.track_usage('u1', 'ai_suggestion_generated')
+    assert not manager.check_usage_limit('u1', 'ai_suggestion')
+    assert manager.get_user_with_usage('u1')['ai_suggestions_used'] == 3
+
+    manager.upgrade_user_subscription('u1', 'founder_plus')
+    assert manager.check_usage_limit('u1', 'ai_suggestion')
+    assert manager.has_feature_access('u1', 'analytics')
+    manager.usage.stop()
+
+
+def test_limits_hold_across_workers(tmp_path):
+    db = _db(tmp_path)
+    workers = [UsageAccountant(db, SubscriptionManager.TIER_LIMITS, flush_interval=3600) for _ in range(4)]
+
+    # Every worker has the tier cached before anyone spends the allowance
+    assert all(worker.check('u1', 'ai_suggestion') for worker in workers)
+    allowed = [worker.check_and_increment('u1', 'ai_suggestion') for worker in workers for _ in range(2)]
+
+    assert allowed.count(True) == 3
+    assert _ai_used(db) == 3
+    for worker in workers:
+        worker.flush()
+    assert _ai_used(db) == 3 and _tracked(db) == 3